@@ -59,6 +59,8 @@ class Ambrosia : CliktCommand() {
         }
         value
       }
+    val httpsBindPort by
+      option("--https-bind-port", help = "Bind port for the https api").int().default(9443)
     val secret by
       option("--secret", help = "Secret key for the server").defaultLazy {
         val seed = SeedGenerator.generateSeed() // Generate a new seed
@@ -87,6 +89,21 @@ class Ambrosia : CliktCommand() {
       }
     val jwtAccessTokenExpirationSeconds by
       option("--jwt-access-token-expiration", help = "Access token expiration in seconds (default: 60)").default("60")
+    val serverTiming by
+      option(
+        "--server-timing",
+        help = "Emit Server-Timing headers and serve per-route histograms on /metrics (benchmarking only)"
+      ).flag(default = false)
+    val permissionCache by
+      option(
+        "--permission-cache",
+        help = "Cache each user's permissions in memory instead of querying them on every request"
+      ).flag(default = false)
+    val virtualPrinters by
+      option(
+        "--virtual-printers",
+        help = "Accept tcp://host:port and file:/path printers in /printers/set (testing only)"
+      ).flag(default = false)
     val phoenixdWebhookSecret by
       option("--phoenixd-webhook-secret", help = "webhook-secret for phoenixd webhooks").defaultLazy {
         AppConfig.loadConfig()
@@ -143,6 +160,9 @@ class Ambrosia : CliktCommand() {
                   put("phoenixd-url", options.phoenixdUrl)
                   put("phoenixd-password", options.phoenixdPassword)
                   put("phoenix.webhook-secret", options.phoenixdWebhookSecret)
+                  put("server-timing", options.serverTiming.toString())
+                  put("permission-cache", options.permissionCache.toString())
+                  put("virtual-printers", options.virtualPrinters.toString())
                 }
             },
           configure = {
@@ -160,7 +180,7 @@ class Ambrosia : CliktCommand() {
                 keyStorePassword = { storePassword.toCharArray() },
                 privateKeyPassword = { privateKeyPassword.toCharArray() }
             ) {
-                port = 9443
+                port = options.httpsBindPort
                 host = options.httpBindIp
             }
           },
@@ -18,7 +18,10 @@ import io.ktor.server.websocket.*
 import org.slf4j.LoggerFactory
 import pos.ambrosia.api.*
 import pos.ambrosia.config.AppConfig
+import pos.ambrosia.utils.PermissionCache
+import pos.ambrosia.utils.ServerTiming
 import pos.ambrosia.utils.UnauthorizedApiException
+import pos.ambrosia.utils.serverTimings
 import pos.ambrosia.db.DatabaseConnection
 import kotlinx.coroutines.*
 import kotlin.time.Duration.Companion.seconds
@@ -29,6 +32,15 @@ class Api() {
     fun Application.module() {
     AppConfig.loadConfig() // Load the configuration
     val config = environment.config // Configure the application
+    val serverTiming = config.propertyOrNull("server-timing")?.getString() == "true"
+    if (serverTiming) {
+      // Solo para pruebas de rendimiento: cabeceras Server-Timing y /metrics
+      DatabaseConnection.enableTiming()
+      install(ServerTiming)
+    }
+    if (config.propertyOrNull("permission-cache")?.getString() == "true") {
+      PermissionCache.enable()
+    }
     Handler() // Install exception handlers
     install(ContentNegotiation) { json() }
     install(CORS) {
@@ -48,6 +60,7 @@ class Api() {
       jwt("auth-jwt") {
         // Configurar para leer el token desde cookies
         authHeader { call ->
+          call.serverTimings?.begin("auth")
           try {
             val token = call.request.cookies["accessToken"]
             if (token != null) {
@@ -66,6 +79,7 @@ class Api() {
           .withClaim("realm", "Ambrosia-Server")
           .build())
         validate { credential ->
+          serverTimings?.end("auth")
           if (credential.payload.getClaim("userId").asString() != "") {
             JWTPrincipal(credential.payload)
           } else {
@@ -77,6 +91,7 @@ class Api() {
 
       jwt("auth-jwt-wallet") {
         authHeader { call ->
+          call.serverTimings?.begin("auth")
           try {
             val token = call.request.cookies["walletAccessToken"]
             if (token != null) {
@@ -94,6 +109,7 @@ class Api() {
           .withClaim("realm", "Ambrosia-Server")
           .build())
         validate { credential ->
+          serverTimings?.end("auth")
           if (credential.payload.getClaim("scope").asString() == "wallet_access") {
             JWTPrincipal(credential.payload)
           } else {
@@ -127,5 +143,6 @@ class Api() {
     configureInitialSetup()
     configurePhoenixWebhook()
     configurePaymentWebsocket()
+    if (serverTiming) configureMetrics()
   }
 }
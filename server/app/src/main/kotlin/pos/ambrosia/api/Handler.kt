@@ -11,6 +11,7 @@ import pos.ambrosia.models.Message
 import pos.ambrosia.utils.AdminOnlyException
 import pos.ambrosia.utils.PermissionDeniedException
 import pos.ambrosia.utils.InvalidCredentialsException
+import pos.ambrosia.utils.InvalidPageRequestException
 import pos.ambrosia.utils.InvalidTokenException
 import pos.ambrosia.utils.PhoenixBalanceException
 import pos.ambrosia.utils.PhoenixConnectionException
@@ -39,6 +40,10 @@ fun Application.Handler() {
       logger.warn("Invalid token: ${cause.message}")
       call.respond(HttpStatusCode.Unauthorized, Message("Invalid token"))
     }
+    exception<InvalidPageRequestException> { call, cause ->
+      logger.warn("Invalid pagination request: ${cause.message}")
+      call.respond(HttpStatusCode.BadRequest, Message(cause.message ?: "Invalid pagination parameters"))
+    }
     exception<Exception> { call, cause ->
       logger.error("Unhandled exception: ${cause.message}")
       call.respond(HttpStatusCode.InternalServerError, Message("Internal server error"))
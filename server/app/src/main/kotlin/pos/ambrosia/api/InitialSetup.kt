@@ -18,6 +18,7 @@ import pos.ambrosia.services.RolesService
 import pos.ambrosia.services.UsersService
 import pos.ambrosia.services.CurrencyService
 import pos.ambrosia.logger
+import pos.ambrosia.utils.PermissionCache
 
 fun Application.configureInitialSetup() {
   val connection: Connection = DatabaseConnection.getConnection()
@@ -137,6 +138,8 @@ private fun Route.initialSetupRoutes(connection: Connection) {
 
       connection.autoCommit = false
       connection.commit()
+      // El rol, sus permisos y el usuario se confirman aquí; se invalida tras el commit
+      PermissionCache.invalidateAll()
       call.respond(HttpStatusCode.Created, mapOf("message" to "Initial setup completed", "userId" to userId, "roleId" to roleId))
     } catch (e: Exception) {
       logger.error("Initial setup failed: ${e.message}")
@@ -0,0 +1,17 @@
+package pos.ambrosia.api
+
+import io.ktor.http.*
+import io.ktor.server.application.*
+import io.ktor.server.response.*
+import io.ktor.server.routing.*
+import pos.ambrosia.utils.RouteMetricsKey
+
+/** Histogramas por ruta del plugin ServerTiming; solo se registra con `--server-timing` */
+fun Application.configureMetrics() {
+  val metrics = attributes[RouteMetricsKey]
+  routing {
+    get("/metrics") {
+      call.respondText(metrics.render(), ContentType.parse("text/plain; version=0.0.4"))
+    }
+  }
+}
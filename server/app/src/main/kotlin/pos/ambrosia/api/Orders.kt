@@ -10,15 +10,19 @@ import io.ktor.server.request.*
 import io.ktor.server.response.*
 import io.ktor.server.routing.*
 import java.sql.Connection
+import java.util.UUID
 import pos.ambrosia.db.DatabaseConnection
 import pos.ambrosia.logger
 import pos.ambrosia.models.AddOrderDishRequest
 import pos.ambrosia.models.CompleteOrder
 import pos.ambrosia.models.Order
 import pos.ambrosia.models.OrderDish
+import pos.ambrosia.models.OrderTotalResponse
 import pos.ambrosia.models.OrderWithDishesRequest
 import pos.ambrosia.services.OrderService
 import pos.ambrosia.utils.authorizePermission
+import pos.ambrosia.utils.pageRequest
+import pos.ambrosia.utils.setNextCursor
 
 fun Application.configureOrders() {
   val connection: Connection = DatabaseConnection.getConnection()
@@ -29,7 +33,11 @@ fun Application.configureOrders() {
 fun Route.orders(orderService: OrderService) {
   authorizePermission("orders_read") {
     get("") {
-      val orders = orderService.getOrders()
+      val page = call.pageRequest()
+      val orders =
+        if (page == null) orderService.getOrders()
+        else orderService.getOrdersPage(page.limit, page.cursor)
+      page?.let { call.setNextCursor(it, orders.size, orders.lastOrNull()?.id) }
       if (orders.isEmpty()) {
         call.respond(HttpStatusCode.NoContent, "No orders found")
         return@get
@@ -271,6 +279,7 @@ fun Route.orders(orderService: OrderService) {
         val dishes =
         dishRequests.map { request ->
           OrderDish(
+            id = UUID.randomUUID().toString(),
             order_id = orderId,
             dish_id = request.dish_id,
             price_at_order = request.price_at_order,
@@ -280,17 +289,20 @@ fun Route.orders(orderService: OrderService) {
           )
         }
 
-        val added = orderService.addDishesToOrder(orderId, dishes)
-        if (!added) {
+        // Los platos y el total se guardan en la misma transacción
+        val total = orderService.addDishesAndUpdateTotal(orderId, dishes)
+        if (total == null) {
           call.respond(HttpStatusCode.BadRequest, "Failed to add dishes to order")
           return@post
         }
-
-        // Update order total
-        orderService.updateOrderTotal(orderId)
         call.respond(
           HttpStatusCode.Created,
-          mapOf("orderId" to orderId, "message" to "Dishes added to order successfully")
+          OrderTotalResponse(
+            orderId = orderId,
+            message = "Dishes added to order successfully",
+            total = total,
+            dishIds = dishes.mapNotNull { it.id }
+          )
         )
       } catch (e: Exception) {
         logger.error("Error adding dishes to order: ${e.message}")
@@ -335,20 +347,18 @@ fun Route.orders(orderService: OrderService) {
       try {
         val updatedDish = call.receive<OrderDish>()
         val dishWithId = updatedDish.copy(id = dishId, order_id = orderId)
-        val isUpdated = orderService.updateOrderDish(dishWithId)
-        if (!isUpdated) {
+        val total = orderService.updateOrderDishAndTotal(dishWithId)
+        if (total == null) {
           call.respond(HttpStatusCode.NotFound, "Order dish not found")
           return@put
         }
-
-        // Update order total
-        orderService.updateOrderTotal(orderId)
         call.respond(
           HttpStatusCode.OK,
-          mapOf(
-            "orderId" to orderId,
-            "dishId" to dishId,
-            "message" to "Order dish updated successfully"
+          OrderTotalResponse(
+            orderId = orderId,
+            message = "Order dish updated successfully",
+            total = total,
+            dishId = dishId
           )
         )
       } catch (e: Exception) {
@@ -373,7 +383,11 @@ fun Route.orders(orderService: OrderService) {
         }
         call.respond(
           HttpStatusCode.OK,
-          mapOf("message" to "Order total updated successfully", "total" to newTotal)
+          OrderTotalResponse(
+            orderId = orderId,
+            message = "Order total updated successfully",
+            total = newTotal
+          )
         )
       } catch (e: Exception) {
         logger.error("Error calculating order total: ${e.message}")
@@ -414,20 +428,18 @@ fun Route.orders(orderService: OrderService) {
       }
 
       try {
-        val isDeleted = orderService.removeOrderDish(dishId)
-        if (!isDeleted) {
+        val total = orderService.removeOrderDishAndTotal(orderId, dishId)
+        if (total == null) {
           call.respond(HttpStatusCode.NotFound, "Order dish not found")
           return@delete
         }
-
-        // Update order total
-        orderService.updateOrderTotal(orderId)
         call.respond(
           HttpStatusCode.OK,
-          mapOf(
-            "orderId" to orderId,
-            "dishId" to dishId,
-            "message" to "Dish removed from order successfully"
+          OrderTotalResponse(
+            orderId = orderId,
+            message = "Dish removed from order successfully",
+            total = total,
+            dishId = dishId
           )
         )
       } catch (e: Exception) {
@@ -444,19 +456,17 @@ fun Route.orders(orderService: OrderService) {
       }
 
       try {
-        val isDeleted = orderService.removeAllOrderDishes(orderId)
-        if (!isDeleted) {
-          call.respond(HttpStatusCode.InternalServerError, "Failed to remove dishes from order")
+        val total = orderService.removeAllOrderDishesAndTotal(orderId)
+        if (total == null) {
+          call.respond(HttpStatusCode.NotFound, "Order not found")
           return@delete
         }
-
-        // Update order total to 0
-        orderService.updateOrderTotal(orderId)
         call.respond(
           HttpStatusCode.OK,
-          mapOf(
-            "orderId" to orderId,
-            "message" to "All dishes removed from order successfully"
+          OrderTotalResponse(
+            orderId = orderId,
+            message = "All dishes removed from order successfully",
+            total = total
           )
         )
       } catch (e: Exception) {
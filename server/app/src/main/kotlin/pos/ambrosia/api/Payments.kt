@@ -16,6 +16,8 @@ import pos.ambrosia.models.TicketPayment
 import pos.ambrosia.services.PaymentService
 import pos.ambrosia.services.TicketPaymentService
 import pos.ambrosia.utils.authorizePermission
+import pos.ambrosia.utils.pageRequest
+import pos.ambrosia.utils.setNextCursor
 
 fun Application.configurePayments() {
   val connection: Connection = DatabaseConnection.getConnection()
@@ -27,7 +29,11 @@ fun Application.configurePayments() {
 fun Route.payments(paymentService: PaymentService, ticketPaymentService: TicketPaymentService) {
   authorizePermission("payments_read") {
     get("") {
-      val payments = paymentService.getPayments()
+      val page = call.pageRequest()
+      val payments =
+        if (page == null) paymentService.getPayments()
+        else paymentService.getPaymentsPage(page.limit, page.cursor)
+      page?.let { call.setNextCursor(it, payments.size, payments.lastOrNull()?.id) }
       if (payments.isEmpty()) {
         call.respond(HttpStatusCode.NoContent, "No payments found")
         return@get
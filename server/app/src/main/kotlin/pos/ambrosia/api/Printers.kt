@@ -16,7 +16,8 @@ import pos.ambrosia.services.TicketTemplateService
 fun Application.configurePrinters() {
   val connection = DatabaseConnection.getConnection()
   val ticketTemplateService = TicketTemplateService(connection)
-  val printService = PrintService(ticketTemplateService)
+  val virtualPrinters = environment.config.propertyOrNull("virtual-printers")?.getString() == "true"
+  val printService = PrintService(ticketTemplateService, virtualPrinters)
   val configService = ConfigService(connection)
   routing { route("/printers") { printers(printService, configService) } }
 }
@@ -35,18 +36,38 @@ fun Route.printers(printService: PrintService, configService: ConfigService) {
     }
     post("/print") {
       val request = call.receive<PrintRequest>()
+      // Con ?wait=true se responde cuando el ticket ya se imprimió
+      val wait = call.request.queryParameters["wait"]?.toBoolean() ?: false
 
       try {
         val config = configService.getConfig()
-        printService.printTicket(
-            request.ticketData,
-            request.templateName,
-            request.printerType,
-            config)
-        call.respondText("Print job sent", status = HttpStatusCode.OK)
+        if (wait) {
+          val job =
+              printService.printTicket(
+                  request.ticketData, request.templateName, request.printerType, config)
+          call.respond(HttpStatusCode.OK, job)
+        } else {
+          val job =
+              printService.submit(
+                  request.ticketData, request.templateName, request.printerType, config)
+          call.respond(HttpStatusCode.Accepted, job)
+        }
       } catch (e: Exception) {
         throw pos.ambrosia.utils.PrintTicketException(e.message ?: "An unknown error occurred during printing.")
       }
     }
+    get("/jobs/{id}") {
+      val id = call.parameters["id"]
+      if (id.isNullOrBlank()) {
+        call.respond(HttpStatusCode.BadRequest, "Missing or malformed ID")
+        return@get
+      }
+      val job = printService.getJob(id)
+      if (job == null) {
+        call.respond(HttpStatusCode.NotFound, "Print job not found")
+        return@get
+      }
+      call.respond(HttpStatusCode.OK, job)
+    }
   }
 }
@@ -15,6 +15,8 @@ import pos.ambrosia.logger
 import pos.ambrosia.models.Ticket
 import pos.ambrosia.services.TicketService
 import pos.ambrosia.utils.authorizePermission
+import pos.ambrosia.utils.pageRequest
+import pos.ambrosia.utils.setNextCursor
 
 fun Application.configureTickets() {
   val connection: Connection = DatabaseConnection.getConnection()
@@ -25,7 +27,11 @@ fun Application.configureTickets() {
 fun Route.tickets(ticketService: TicketService) {
   authorizePermission("tickets_read") {
     get("") {
-      val tickets = ticketService.getTickets()
+      val page = call.pageRequest()
+      val tickets =
+        if (page == null) ticketService.getTickets()
+        else ticketService.getTicketsPage(page.limit, page.cursor)
+      page?.let { call.setNextCursor(it, tickets.size, tickets.lastOrNull()?.id) }
       if (tickets.isEmpty()) {
         call.respond(HttpStatusCode.NoContent, "No tickets found")
         return@get
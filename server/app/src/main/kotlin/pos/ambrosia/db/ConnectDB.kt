@@ -6,20 +6,33 @@ import java.sql.DriverManager
 import java.sql.SQLException
 import kotlinx.io.files.Path
 import pos.ambrosia.logger
+import pos.ambrosia.utils.timedConnection
 
 object DatabaseConnection {
   @Volatile private var instance: Connection? = null
+  @Volatile private var timing = false
 
   fun getConnection(): Connection {
     return instance ?: synchronized(this) { instance ?: createConnection().also { instance = it } }
   }
 
+  /** Mide las consultas como fase `db` de Server-Timing; llamar antes de configurar las rutas */
+  fun enableTiming() {
+    synchronized(this) {
+      if (!timing) {
+        timing = true
+        instance = instance?.let(::timedConnection)
+      }
+    }
+  }
+
   private fun createConnection(): Connection {
     val datadir = Path(Path(System.getProperty("user.home")), ".Ambrosia-POS")
     // load the SQLite datapath from the config file
     val DBPath = Path(datadir, "ambrosia.db").toString()
     return try {
-      DriverManager.getConnection("jdbc:sqlite:$DBPath")
+      val connection = DriverManager.getConnection("jdbc:sqlite:$DBPath")
+      if (timing) timedConnection(connection) else connection
     } catch (e: SQLException) {
       logger.error("Error connecting to SQLite database: ${e.message}")
       logger.error("Shutting down the application use ./install.sh to install the application")
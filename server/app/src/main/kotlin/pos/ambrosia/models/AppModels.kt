@@ -173,11 +173,23 @@ data class AddOrderDishRequest(
   val notes: String? = null,
 )
 
+/** Respuesta de los cambios de platos de una orden, con el total ya actualizado */
+@Serializable
+data class OrderTotalResponse(
+  val orderId: String,
+  val message: String,
+  val total: Double,
+  val dishId: String? = null,
+  val dishIds: List<String>? = null,
+)
+
+@Serializable
 data class CompleteOrder(
   val order: Order,
   val dishes: List<OrderDish>,
 )
 
+@Serializable
 data class OrderWithDishesRequest(
   val order: Order,
   val dishes: List<OrderDish>,
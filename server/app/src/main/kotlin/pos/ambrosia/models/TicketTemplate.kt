@@ -9,6 +9,25 @@ data class PrintRequest(
     val printerType: PrinterType
 )
 
+@Serializable
+enum class PrintJobStatus { QUEUED, PRINTING, DONE, FAILED }
+
+/** Trabajo en la cola de una impresora; los tiempos son epoch en milisegundos */
+@Serializable
+data class PrintJob(
+    val id: String,
+    val printerType: PrinterType,
+    val templateName: String,
+    val status: PrintJobStatus,
+    val createdAt: Long,
+    val startedAt: Long? = null,
+    val finishedAt: Long? = null,
+    val bytes: Int? = null,
+    val renderMillis: Double? = null,
+    val sendMillis: Double? = null,
+    val error: String? = null
+)
+
 @Serializable
 data class TicketTemplate(
     val id: String,
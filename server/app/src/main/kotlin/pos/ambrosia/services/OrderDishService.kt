@@ -20,6 +20,16 @@ class OrderDishService(private val connection: Connection) {
     private const val CHECK_ORDER_EXISTS = "SELECT id FROM orders WHERE id = ? AND is_deleted = 0"
     private const val CHECK_DISH_EXISTS = "SELECT id FROM dishes WHERE id = ? AND is_deleted = 0"
     private const val CHECK_STATUS = "SELECT id FROM orders_dishes WHERE status = ?"
+    private const val UPDATE_ORDER_DISH_IN_ORDER =
+            "UPDATE orders_dishes SET price_at_order = ?, notes = ?, status = ?, should_prepare = ? WHERE id = ? AND order_id = ?"
+    private const val DELETE_ORDER_DISH_IN_ORDER =
+            "DELETE FROM orders_dishes WHERE id = ? AND order_id = ?"
+    // El total se recalcula con los platos de la orden, así un total escrito por un cliente con
+    // PUT /orders/{id} no se arrastra; RETURNING lo devuelve en la misma sentencia
+    private const val REFRESH_ORDER_TOTAL =
+            "UPDATE orders SET total = (SELECT COALESCE(SUM(price_at_order), 0) FROM orders_dishes WHERE order_id = ?) WHERE id = ? AND is_deleted = 0 RETURNING total"
+    private const val RESET_ORDER_TOTAL =
+            "UPDATE orders SET total = 0 WHERE id = ? AND is_deleted = 0 RETURNING total"
   }
 
   private fun orderExists(orderId: String): Boolean {
@@ -36,6 +46,43 @@ class OrderDishService(private val connection: Connection) {
     return resultSet.next()
   }
 
+  /**
+   * Ejecuta [block] en una transacción. Si devuelve null o lanza una excepción no se aplica
+   * ningún cambio.
+   */
+  private inline fun <T : Any> inTransaction(block: () -> T?): T? {
+    connection.autoCommit = false
+    try {
+      val result = block()
+      if (result != null) connection.commit() else connection.rollback()
+      return result
+    } catch (e: Exception) {
+      try {
+        connection.rollback()
+      } catch (_: Exception) {
+      }
+      throw e
+    } finally {
+      try {
+        connection.autoCommit = true
+      } catch (_: Exception) {
+      }
+    }
+  }
+
+  /**
+   * Guarda como total de la orden la suma de sus platos; devuelve el nuevo total o null si la
+   * orden no existe
+   */
+  private fun refreshOrderTotal(orderId: String): Double? {
+    connection.prepareStatement(REFRESH_ORDER_TOTAL).use { statement ->
+      statement.setString(1, orderId)
+      statement.setString(2, orderId)
+      val resultSet = statement.executeQuery()
+      return if (resultSet.next()) resultSet.getDouble("total") else null
+    }
+  }
+
   private fun mapResultSetToOrderDish(resultSet: java.sql.ResultSet): OrderDish {
     return OrderDish(
             id = resultSet.getString("id"),
@@ -49,37 +96,41 @@ class OrderDishService(private val connection: Connection) {
   }
 
   suspend fun addOrderDish(orderDish: OrderDish): String? {
-    // Verificar que la orden existe
-    if (!orderExists(orderDish.order_id)) {
-      logger.error("Order does not exist: ${orderDish.order_id}")
-      return null
-    }
+    // Las comprobaciones van dentro de la transacción para que la orden o el plato no se borren
+    // entre la comprobación y la inserción
+    return inTransaction {
+      // Verificar que la orden existe
+      if (!orderExists(orderDish.order_id)) {
+        logger.error("Order does not exist: ${orderDish.order_id}")
+        return@inTransaction null
+      }
 
-    // Verificar que el plato existe
-    if (!dishExists(orderDish.dish_id)) {
-      logger.error("Dish does not exist: ${orderDish.dish_id}")
-      return null
-    }
+      // Verificar que el plato existe
+      if (!dishExists(orderDish.dish_id)) {
+        logger.error("Dish does not exist: ${orderDish.dish_id}")
+        return@inTransaction null
+      }
 
-    val generatedId = UUID.randomUUID().toString()
-    val statement = connection.prepareStatement(ADD_ORDER_DISH)
+      val generatedId = UUID.randomUUID().toString()
+      val statement = connection.prepareStatement(ADD_ORDER_DISH)
 
-    statement.setString(1, generatedId)
-    statement.setString(2, orderDish.order_id)
-    statement.setString(3, orderDish.dish_id)
-    statement.setDouble(4, orderDish.price_at_order)
-    statement.setString(5, orderDish.notes)
-    statement.setString(6, orderDish.status)
-    statement.setBoolean(7, orderDish.should_prepare)
+      statement.setString(1, generatedId)
+      statement.setString(2, orderDish.order_id)
+      statement.setString(3, orderDish.dish_id)
+      statement.setDouble(4, orderDish.price_at_order)
+      statement.setString(5, orderDish.notes)
+      statement.setString(6, orderDish.status)
+      statement.setBoolean(7, orderDish.should_prepare)
 
-    val rowsAffected = statement.executeUpdate()
+      val rowsAffected = statement.executeUpdate()
 
-    return if (rowsAffected > 0) {
-      logger.info("OrderDish created successfully with ID: $generatedId")
-      generatedId
-    } else {
-      logger.error("Failed to create order dish")
-      null
+      if (rowsAffected > 0) {
+        logger.info("OrderDish created successfully with ID: $generatedId")
+        generatedId
+      } else {
+        logger.error("Failed to create order dish")
+        null
+      }
     }
   }
 
@@ -155,6 +206,120 @@ class OrderDishService(private val connection: Connection) {
     return true // Return true even if no rows deleted (order might not have dishes)
   }
 
+  /**
+   * Añade los platos a la orden y recalcula su total en una sola transacción. Los platos
+   * sin id reciben uno nuevo. Devuelve el nuevo total, o null si la orden o algún plato no existe,
+   * en cuyo caso no se añade ninguno.
+   */
+  suspend fun addOrderDishesAndTotal(orderId: String, orderDishes: List<OrderDish>): Double? {
+    val total = inTransaction {
+      // Dentro de la transacción, para que nada se borre entre la comprobación y la inserción
+      if (!orderExists(orderId)) {
+        logger.error("Order does not exist: $orderId")
+        return@inTransaction null
+      }
+      orderDishes.firstOrNull { !dishExists(it.dish_id) }?.let {
+        logger.error("Dish does not exist: ${it.dish_id}")
+        return@inTransaction null
+      }
+      connection.prepareStatement(ADD_ORDER_DISH).use { statement ->
+        orderDishes.forEach { orderDish ->
+          statement.setString(1, orderDish.id ?: UUID.randomUUID().toString())
+          statement.setString(2, orderId)
+          statement.setString(3, orderDish.dish_id)
+          statement.setDouble(4, orderDish.price_at_order)
+          statement.setString(5, orderDish.notes)
+          statement.setString(6, orderDish.status)
+          statement.setBoolean(7, orderDish.should_prepare)
+          statement.addBatch()
+        }
+        statement.executeBatch()
+      }
+      refreshOrderTotal(orderId)
+    }
+    if (total != null) {
+      logger.info("Added ${orderDishes.size} dishes to order $orderId, total: $total")
+    } else {
+      logger.error("Failed to add dishes to order: $orderId")
+    }
+    return total
+  }
+
+  /**
+   * Actualiza un plato de la orden y recalcula su total en una sola transacción. Devuelve el nuevo
+   * total, o null si el plato no pertenece a la orden.
+   */
+  suspend fun updateOrderDishAndTotal(orderDish: OrderDish): Double? {
+    if (orderDish.id == null) {
+      logger.error("Cannot update order dish: ID is null")
+      return null
+    }
+
+    val total = inTransaction {
+      val rowsUpdated =
+          connection.prepareStatement(UPDATE_ORDER_DISH_IN_ORDER).use { statement ->
+            statement.setDouble(1, orderDish.price_at_order)
+            statement.setString(2, orderDish.notes)
+            statement.setString(3, orderDish.status)
+            statement.setBoolean(4, orderDish.should_prepare)
+            statement.setString(5, orderDish.id)
+            statement.setString(6, orderDish.order_id)
+            statement.executeUpdate()
+          }
+      if (rowsUpdated == 0) return@inTransaction null
+      refreshOrderTotal(orderDish.order_id)
+    }
+    if (total != null) {
+      logger.info("OrderDish updated successfully: ${orderDish.id}, order total: $total")
+    } else {
+      logger.error("Failed to update order dish: ${orderDish.id}")
+    }
+    return total
+  }
+
+  /**
+   * Quita un plato de la orden y recalcula su total en una sola transacción. Devuelve el nuevo
+   * total, o null si el plato no pertenece a la orden.
+   */
+  suspend fun deleteOrderDishAndTotal(orderId: String, id: String): Double? {
+    val total = inTransaction {
+      val rowsDeleted =
+          connection.prepareStatement(DELETE_ORDER_DISH_IN_ORDER).use { statement ->
+            statement.setString(1, id)
+            statement.setString(2, orderId)
+            statement.executeUpdate()
+          }
+      if (rowsDeleted == 0) return@inTransaction null
+      refreshOrderTotal(orderId)
+    }
+    if (total != null) {
+      logger.info("OrderDish deleted successfully: $id, order total: $total")
+    } else {
+      logger.error("Failed to delete order dish: $id")
+    }
+    return total
+  }
+
+  /** Quita todos los platos de la orden y deja su total a 0; null si la orden no existe */
+  suspend fun deleteOrderDishesAndTotal(orderId: String): Double? {
+    val total = inTransaction {
+      connection.prepareStatement(DELETE_ORDER_DISHES_BY_ORDER).use { statement ->
+        statement.setString(1, orderId)
+        val rowsDeleted = statement.executeUpdate()
+        logger.info("Deleted $rowsDeleted dishes for order: $orderId")
+      }
+      connection.prepareStatement(RESET_ORDER_TOTAL).use { statement ->
+        statement.setString(1, orderId)
+        val resultSet = statement.executeQuery()
+        if (resultSet.next()) resultSet.getDouble("total") else null
+      }
+    }
+    if (total == null) {
+      logger.error("Failed to remove dishes, order not found: $orderId")
+    }
+    return total
+  }
+
   suspend fun checkOrderDishStatus(id: String, status: String): Boolean {
     val statement = connection.prepareStatement(CHECK_STATUS)
     statement.setString(1, status)
@@ -13,6 +13,8 @@ class OrderService(private val connection: Connection) {
             "INSERT INTO orders (id, user_id, table_id, waiter, status, total, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)"
     private const val GET_ORDERS =
             "SELECT id, user_id, table_id, waiter, status, total, created_at FROM orders WHERE is_deleted = 0"
+    private const val GET_ORDERS_PAGE =
+            "SELECT id, user_id, table_id, waiter, status, total, created_at FROM orders WHERE is_deleted = 0 AND id > ? ORDER BY id LIMIT ?"
     private const val GET_ORDER_BY_ID =
             "SELECT id, user_id, table_id, waiter, status, total, created_at FROM orders WHERE id = ? AND is_deleted = 0"
     private const val UPDATE_ORDER =
@@ -140,6 +142,19 @@ class OrderService(private val connection: Connection) {
     return orders
   }
 
+  /** Página de órdenes ordenadas por id, a partir del id `cursor` (excluido) */
+  suspend fun getOrdersPage(limit: Int, cursor: String?): List<Order> {
+    val statement = connection.prepareStatement(GET_ORDERS_PAGE)
+    statement.setString(1, cursor ?: "")
+    statement.setInt(2, limit)
+    val resultSet = statement.executeQuery()
+    val orders = mutableListOf<Order>()
+    while (resultSet.next()) {
+      orders.add(mapResultSetToOrder(resultSet))
+    }
+    return orders
+  }
+
   suspend fun getOrdersWithPayments(): List<OrderWithPayment> {
     val statement = connection.prepareStatement(GET_ORDERS_WITH_PAYMENTS)
     val resultSet = statement.executeQuery()
@@ -330,6 +345,24 @@ class OrderService(private val connection: Connection) {
     return orderDishService.deleteOrderDishesByOrderId(orderId)
   }
 
+  // Estas variantes mantienen el total de la orden en la misma transacción que el cambio de platos
+  // y devuelven el nuevo total (null si la orden o el plato no existen)
+  suspend fun addDishesAndUpdateTotal(orderId: String, dishes: List<OrderDish>): Double? {
+    return orderDishService.addOrderDishesAndTotal(orderId, dishes)
+  }
+
+  suspend fun updateOrderDishAndTotal(orderDish: OrderDish): Double? {
+    return orderDishService.updateOrderDishAndTotal(orderDish)
+  }
+
+  suspend fun removeOrderDishAndTotal(orderId: String, orderDishId: String): Double? {
+    return orderDishService.deleteOrderDishAndTotal(orderId, orderDishId)
+  }
+
+  suspend fun removeAllOrderDishesAndTotal(orderId: String): Double? {
+    return orderDishService.deleteOrderDishesAndTotal(orderId)
+  }
+
   suspend fun calculateOrderTotal(orderId: String): Double {
     val dishes = orderDishService.getOrderDishesByOrderId(orderId)
     // Como ya no hay quantity, sumamos directamente los precios
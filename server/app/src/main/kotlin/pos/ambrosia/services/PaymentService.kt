@@ -12,6 +12,8 @@ class PaymentService(private val connection: Connection) {
             "INSERT INTO payments (id, method_id, currency_id, transaction_id, amount, date) VALUES (?, ?, ?, ?, ?, datetime('now'))"
     private const val GET_PAYMENTS =
             "SELECT id, method_id, currency_id, transaction_id, amount, date FROM payments"
+    private const val GET_PAYMENTS_PAGE =
+            "SELECT id, method_id, currency_id, transaction_id, amount, date FROM payments WHERE id > ? ORDER BY id LIMIT ?"
     private const val GET_PAYMENT_BY_ID =
             "SELECT id, method_id, currency_id, transaction_id, amount, date FROM payments WHERE id = ?"
     private const val UPDATE_PAYMENT =
@@ -171,6 +173,27 @@ class PaymentService(private val connection: Connection) {
     return payments
   }
 
+  /** Página de pagos ordenados por id, a partir del id `cursor` (excluido) */
+  suspend fun getPaymentsPage(limit: Int, cursor: String?): List<Payment> {
+    val statement = connection.prepareStatement(GET_PAYMENTS_PAGE)
+    statement.setString(1, cursor ?: "")
+    statement.setInt(2, limit)
+    val resultSet = statement.executeQuery()
+    val payments = mutableListOf<Payment>()
+    while (resultSet.next()) {
+      payments.add(
+              Payment(
+                      id = resultSet.getString("id"),
+                      method_id = resultSet.getString("method_id"),
+                      currency_id = resultSet.getString("currency_id"),
+                      transaction_id = resultSet.getString("transaction_id"),
+                      amount = resultSet.getDouble("amount")
+              )
+      )
+    }
+    return payments
+  }
+
   suspend fun getPaymentById(id: String): Payment? {
     val statement = connection.prepareStatement(GET_PAYMENT_BY_ID)
     statement.setString(1, id)
@@ -3,6 +3,7 @@ package pos.ambrosia.services
 import io.ktor.server.application.ApplicationEnvironment
 import pos.ambrosia.logger
 import pos.ambrosia.models.Permission
+import pos.ambrosia.utils.PermissionCache
 import java.sql.Connection
 
 class PermissionsService(
@@ -85,6 +86,7 @@ class PermissionsService(
 
       if (permissionKeys.isEmpty()) {
         connection.commit()
+        PermissionCache.invalidateRole(roleId)
         return 0
       }
 
@@ -106,6 +108,7 @@ class PermissionsService(
         }
       }
       connection.commit()
+      PermissionCache.invalidateRole(roleId)
       return count
     } catch (e: Exception) {
       logger.error("Failed to replace role permissions: ${e.message}")
@@ -138,6 +141,7 @@ class PermissionsService(
         count += st.executeUpdate()
       }
     }
+    PermissionCache.invalidateRole(roleId)
     return count
   }
 }
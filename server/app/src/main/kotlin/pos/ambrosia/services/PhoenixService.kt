@@ -3,6 +3,8 @@ package pos.ambrosia.services
 import io.ktor.client.HttpClient
 import io.ktor.client.call.body
 import io.ktor.client.engine.cio.CIO
+import io.ktor.client.plugins.HttpSend
+import io.ktor.client.plugins.plugin
 import io.ktor.client.plugins.auth.*
 import io.ktor.client.plugins.auth.providers.*
 import io.ktor.client.plugins.contentnegotiation.ContentNegotiation
@@ -46,6 +48,11 @@ class PhoenixService(app: ApplicationEnvironment, private val httpClient: HttpCl
     }
   )
 
+  init {
+    // Fase `phoenix` de Server-Timing (sin efecto si está desactivado)
+    httpClient.plugin(HttpSend).intercept { request -> timed("phoenix") { execute(request) } }
+  }
+
   /** Get node information from Phoenix */
   suspend fun getNodeInfo(): NodeInfo {
     try {
@@ -4,18 +4,60 @@ import com.github.anastaciocintra.escpos.EscPos
 import com.github.anastaciocintra.escpos.EscPosConst
 import com.github.anastaciocintra.escpos.Style
 import com.github.anastaciocintra.output.PrinterOutputStream
+import java.io.ByteArrayOutputStream
 import java.io.IOException
-import javax.print.PrintService
+import java.util.UUID
+import java.util.concurrent.ConcurrentHashMap
+import java.util.concurrent.ConcurrentLinkedQueue
+import java.util.concurrent.atomic.AtomicInteger
+import kotlinx.coroutines.CompletableDeferred
+import kotlinx.coroutines.CoroutineScope
+import kotlinx.coroutines.Dispatchers
+import kotlinx.coroutines.SupervisorJob
+import kotlinx.coroutines.channels.Channel
+import kotlinx.coroutines.launch
 import pos.ambrosia.models.TicketData
 import pos.ambrosia.models.TicketTemplate
 import pos.ambrosia.models.PrinterType
 import pos.ambrosia.models.Config
+import pos.ambrosia.models.PrintJob
+import pos.ambrosia.models.PrintJobStatus
 import pos.ambrosia.logger
 
-class PrintService(private val ticketTemplateService: TicketTemplateService) {
-  private var kitchenPrinter: PrintService? = null
-  private var customerPrinter: PrintService? = null
-  private var barPrinter: PrintService? = null
+/**
+ * Imprime tickets ESC/POS. Con [virtualPrinters] (`--virtual-printers`) una impresora también
+ * puede ser `tcp://host:puerto` o `file:/ruta`, para pruebas y benchmarks sin hardware.
+ *
+ * Cada tipo de impresora tiene su propia cola con un único trabajador: los trabajos de una
+ * impresora salen en orden y sin mezclarse, y una impresora lenta o apagada no retrasa a las
+ * demás ni a la petición HTTP que encola el trabajo.
+ */
+class PrintService(
+    private val ticketTemplateService: TicketTemplateService,
+    private val virtualPrinters: Boolean = false,
+    private val scope: CoroutineScope = CoroutineScope(SupervisorJob() + Dispatchers.IO)
+) {
+  companion object {
+    // Estados que se conservan para GET /printers/jobs/{id}
+    private const val MAX_TRACKED_JOBS = 10_000
+  }
+
+  private class QueuedJob(
+      val job: PrintJob,
+      val ticketData: TicketData,
+      val factory: TicketFactory,
+      val config: Config?,
+      val done: CompletableDeferred<PrintJob> = CompletableDeferred()
+  )
+
+  @Volatile private var kitchenPrinter: PrinterSink? = null
+  @Volatile private var customerPrinter: PrinterSink? = null
+  @Volatile private var barPrinter: PrinterSink? = null
+
+  private val queues = ConcurrentHashMap<PrinterType, Channel<QueuedJob>>()
+  private val jobs = ConcurrentHashMap<String, PrintJob>()
+  private val jobOrder = ConcurrentLinkedQueue<String>()
+  private val trackedJobs = AtomicInteger()
 
   fun getAvailablePrinters(): Array<String> {
     val printerNames = PrinterOutputStream.getListPrintServicesNames()
@@ -25,49 +67,157 @@ class PrintService(private val ticketTemplateService: TicketTemplateService) {
 
   fun setPrinter(type: PrinterType, printerName: String) {
     logger.info("Setting printer '$printerName' for $type")
-    val printService = PrinterOutputStream.getPrintServiceByName(printerName)
-    if (printService == null) {
+    val printer =
+        (if (virtualPrinters) virtualPrinterSink(printerName) else null)
+            ?: PrinterOutputStream.getPrintServiceByName(printerName)?.let { SystemPrinterSink(it) }
+    if (printer == null) {
       logger.error("Printer '$printerName' not found on this system.")
     }
     when (type) {
-      PrinterType.KITCHEN -> kitchenPrinter = printService
-      PrinterType.CUSTOMER -> customerPrinter = printService
-      PrinterType.BAR -> barPrinter = printService
+      PrinterType.KITCHEN -> kitchenPrinter = printer
+      PrinterType.CUSTOMER -> customerPrinter = printer
+      PrinterType.BAR -> barPrinter = printer
     }
   }
 
+  private fun printerFor(type: PrinterType): PrinterSink? =
+      when (type) {
+        PrinterType.KITCHEN -> kitchenPrinter
+        PrinterType.CUSTOMER -> customerPrinter
+        PrinterType.BAR -> barPrinter
+      }
+
+  /** Genera los bytes ESC/POS del ticket, incluido el avance y el corte final */
+  fun render(template: TicketTemplate, ticketData: TicketData, config: Config?): ByteArray =
+      render(TicketFactory(template), ticketData, config)
+
+  private fun render(factory: TicketFactory, ticketData: TicketData, config: Config?): ByteArray {
+    val buffer = ByteArrayOutputStream()
+    val escpos = EscPos(buffer)
+    factory.build(escpos, ticketData, config)
+    escpos.feed(5).cut(EscPos.CutMode.FULL)
+    escpos.close()
+    return buffer.toByteArray()
+  }
+
+  /** Estado de un trabajo encolado; null si no existe o ya se descartó */
+  fun getJob(id: String): PrintJob? = jobs[id]
+
+  /**
+   * Encola un ticket en la impresora de [type] y vuelve sin esperar a que se imprima. Falla de
+   * inmediato si la impresora no está configurada o la plantilla no existe.
+   */
+  suspend fun submit(
+      ticketData: TicketData,
+      templateName: String,
+      type: PrinterType,
+      config: Config?
+  ): PrintJob = enqueue(ticketData, templateName, type, config).job
+
+  /** Encola un ticket y espera a que se imprima; lanza IOException si falla */
   suspend fun printTicket(
       ticketData: TicketData,
       templateName: String,
       type: PrinterType,
       config: Config?
-  ) {
-    logger.info("Starting print job for $type using template '$templateName'")
-    val printerService =
-        when (type) {
-          PrinterType.KITCHEN -> kitchenPrinter
-          PrinterType.CUSTOMER -> customerPrinter
-          PrinterType.BAR -> barPrinter
-        }
-            ?: throw IOException("Printer for type $type not configured.")
+  ): PrintJob {
+    val job = enqueue(ticketData, templateName, type, config).done.await()
+    if (job.status == PrintJobStatus.FAILED) {
+      throw IOException("Failed to print ticket: ${job.error}")
+    }
+    return job
+  }
 
-    val template =
-        ticketTemplateService.getTemplateByName(templateName)
+  private suspend fun enqueue(
+      ticketData: TicketData,
+      templateName: String,
+      type: PrinterType,
+      config: Config?
+  ): QueuedJob {
+    logger.info("Queueing print job for $type using template '$templateName'")
+    printerFor(type) ?: throw IOException("Printer for type $type not configured.")
+    val factory =
+        TicketFactoryCache.get(templateName) { ticketTemplateService.getTemplateByName(it) }
             ?: throw IOException("Template '$templateName' not found.")
 
-    try {
-      val printerOutputStream = PrinterOutputStream(printerService)
-      val escpos = EscPos(printerOutputStream)
-
-      val ticketFactory = TicketFactory(template)
-      ticketFactory.build(escpos, ticketData, config)
+    val job =
+        PrintJob(
+            id = UUID.randomUUID().toString(),
+            printerType = type,
+            templateName = templateName,
+            status = PrintJobStatus.QUEUED,
+            createdAt = System.currentTimeMillis()
+        )
+    val queued = QueuedJob(job, ticketData, factory, config)
+    track(job)
+    queueFor(type).send(queued)
+    return queued
+  }
 
-      escpos.feed(5).cut(EscPos.CutMode.FULL)
-      escpos.close()
-      logger.info("Successfully sent print job to $type printer.")
-    } catch (e: Exception) {
-      logger.error("Failed to print ticket: ${e.message}", e)
-      throw IOException("Failed to print ticket: ${e.message}", e)
+  private fun track(job: PrintJob) {
+    jobs[job.id] = job
+    jobOrder.add(job.id)
+    // ConcurrentLinkedQueue.size recorre la cola, se lleva la cuenta aparte
+    if (trackedJobs.incrementAndGet() > MAX_TRACKED_JOBS) {
+      jobOrder.poll()?.let {
+        jobs.remove(it)
+        trackedJobs.decrementAndGet()
+      }
     }
   }
+
+  /** Actualiza el estado de un trabajo salvo que ya se haya descartado */
+  private fun record(job: PrintJob) {
+    jobs.computeIfPresent(job.id) { _, _ -> job }
+  }
+
+  /** Cola de [type]; su trabajador se arranca con el primer trabajo */
+  private fun queueFor(type: PrinterType): Channel<QueuedJob> =
+      queues.computeIfAbsent(type) {
+        Channel<QueuedJob>(Channel.UNLIMITED).also { channel ->
+          scope.launch {
+            for (queued in channel) {
+              process(type, queued)
+            }
+          }
+        }
+      }
+
+  private fun process(type: PrinterType, queued: QueuedJob) {
+    val id = queued.job.id
+    val started =
+        queued.job.copy(status = PrintJobStatus.PRINTING, startedAt = System.currentTimeMillis())
+    record(started)
+    val finished =
+        try {
+          val printer =
+              printerFor(type) ?: throw IOException("Printer for type $type not configured.")
+          val renderStart = System.nanoTime()
+          // Se genera en memoria para no tener la impresora ocupada mientras se compone el ticket
+          val bytes = render(queued.factory, queued.ticketData, queued.config)
+          val sendStart = System.nanoTime()
+          printer.open().use { output ->
+            output.write(bytes)
+            output.flush()
+          }
+          val sendEnd = System.nanoTime()
+          logger.info("Successfully sent print job $id (${bytes.size} bytes) to $type printer.")
+          started.copy(
+              status = PrintJobStatus.DONE,
+              finishedAt = System.currentTimeMillis(),
+              bytes = bytes.size,
+              renderMillis = (sendStart - renderStart) / 1_000_000.0,
+              sendMillis = (sendEnd - sendStart) / 1_000_000.0
+          )
+        } catch (e: Exception) {
+          logger.error("Failed to print ticket $id: ${e.message}", e)
+          started.copy(
+              status = PrintJobStatus.FAILED,
+              finishedAt = System.currentTimeMillis(),
+              error = e.message ?: e.javaClass.simpleName
+          )
+        }
+    record(finished)
+    queued.done.complete(finished)
+  }
 }
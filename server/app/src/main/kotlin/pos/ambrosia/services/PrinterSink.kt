@@ -0,0 +1,88 @@
+package pos.ambrosia.services
+
+import com.github.anastaciocintra.output.PrinterOutputStream
+import java.io.FilterOutputStream
+import java.io.OutputStream
+import java.net.InetSocketAddress
+import java.net.Socket
+import java.net.URI
+import java.nio.file.Files
+import java.nio.file.Path
+import java.nio.file.Paths
+import java.nio.file.StandardOpenOption
+
+/** Destino de los bytes ESC/POS de una impresora */
+interface PrinterSink {
+  val name: String
+
+  /** Abre la salida de un trabajo; cerrarla termina el trabajo */
+  fun open(): OutputStream
+}
+
+/** Impresora instalada en el sistema (javax.print) */
+class SystemPrinterSink(private val printService: javax.print.PrintService) : PrinterSink {
+  override val name: String = printService.name
+
+  override fun open(): OutputStream = PrinterOutputStream(printService)
+}
+
+/**
+ * Impresora que recibe ESC/POS crudo por TCP, como las de red en el puerto 9100. Al cerrar el
+ * trabajo se espera a que la impresora cierre la conexión, así el trabajo termina cuando la
+ * impresora ha recibido todo (como al enviarlo a la cola de una impresora del sistema).
+ */
+class TcpPrinterSink(
+    private val host: String,
+    private val port: Int,
+    private val timeoutMillis: Int = 5000
+) : PrinterSink {
+  override val name: String = "tcp://$host:$port"
+
+  override fun open(): OutputStream {
+    val socket = Socket()
+    try {
+      socket.connect(InetSocketAddress(host, port), timeoutMillis)
+      socket.soTimeout = timeoutMillis
+    } catch (e: Exception) {
+      socket.close()
+      throw e
+    }
+    return object : FilterOutputStream(socket.getOutputStream()) {
+      override fun write(b: ByteArray, off: Int, len: Int) {
+        out.write(b, off, len)
+      }
+
+      override fun close() {
+        socket.use {
+          out.flush()
+          it.shutdownOutput()
+          val input = it.getInputStream()
+          val buffer = ByteArray(256)
+          while (input.read(buffer) >= 0) {}
+        }
+      }
+    }
+  }
+}
+
+/** Impresora virtual que añade cada trabajo al final de un fichero */
+class FilePrinterSink(private val path: Path) : PrinterSink {
+  override val name: String = "file:$path"
+
+  override fun open(): OutputStream =
+      Files.newOutputStream(path, StandardOpenOption.CREATE, StandardOpenOption.APPEND)
+}
+
+/**
+ * Impresora virtual (`--virtual-printers`) a partir de su nombre: `tcp://host:puerto` o
+ * `file:/ruta`. Devuelve null si el nombre no es de una impresora virtual.
+ */
+fun virtualPrinterSink(printerName: String): PrinterSink? {
+  val uri = runCatching { URI(printerName) }.getOrNull() ?: return null
+  return when (uri.scheme) {
+    "tcp" ->
+        if (uri.host != null && uri.port > 0) TcpPrinterSink(uri.host, uri.port) else null
+    "file" -> FilePrinterSink(Paths.get(uri))
+    else -> null
+  }
+}
@@ -4,6 +4,7 @@ import java.lang.StringBuilder
 import java.sql.Connection
 import pos.ambrosia.logger
 import pos.ambrosia.models.Role
+import pos.ambrosia.utils.PermissionCache
 import pos.ambrosia.utils.SecurePinProcessor
 import io.ktor.server.application.ApplicationEnvironment
 
@@ -117,6 +118,7 @@ class RolesService(private val env: ApplicationEnvironment, private val connecti
     statement.setString(role.password?.let { 4 } ?: 3, role.id)
 
     val rowsUpdated = statement.executeUpdate()
+    PermissionCache.invalidateRole(id)
     if (rowsUpdated > 0) {
       logger.info("Role updated successfully: ${role.id}")
     } else {
@@ -145,6 +147,7 @@ class RolesService(private val env: ApplicationEnvironment, private val connecti
     val statement = connection.prepareStatement(DELETE_ROLE)
     statement.setString(1, id)
     val rowsDeleted = statement.executeUpdate()
+    PermissionCache.invalidateRole(id)
 
     if (rowsDeleted > 0) {
       logger.info("Role soft-deleted successfully: $id")
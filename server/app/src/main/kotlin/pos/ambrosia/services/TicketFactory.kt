@@ -3,14 +3,18 @@ package pos.ambrosia.services
 import com.github.anastaciocintra.escpos.EscPos
 import com.github.anastaciocintra.escpos.EscPosConst
 import com.github.anastaciocintra.escpos.Style
+import java.util.concurrent.ConcurrentHashMap
+import java.util.concurrent.atomic.AtomicLong
 import pos.ambrosia.models.*
 import pos.ambrosia.util.formatTicketLine
 
 class TicketFactory(private val template: TicketTemplate) {
+  // Los estilos no dependen del ticket, se convierten una sola vez por plantilla
+  private val styles = template.elements.map { convertToEscPosStyle(it.style) }
 
   fun build(escpos: EscPos, data: TicketData, config: Config?) {
-    template.elements.forEach { element ->
-      val style = convertToEscPosStyle(element.style)
+    template.elements.forEachIndexed { index, element ->
+      val style = styles[index]
       val content = resolveValue(element.value, data, config)
 
       when (element.type) {
@@ -78,3 +82,28 @@ class TicketFactory(private val template: TicketTemplate) {
     return escposStyle
   }
 }
+
+/**
+ * Plantillas ya compiladas en [TicketFactory], por nombre. Así una impresión no consulta la base
+ * de datos ni vuelve a convertir los estilos. Se invalida al actualizar o borrar una plantilla; una
+ * carga que coincide con una invalidación no se guarda.
+ */
+object TicketFactoryCache {
+  private val factories = ConcurrentHashMap<String, TicketFactory>()
+  private val generation = AtomicLong()
+
+  /** Fábrica de la plantilla [name]; null si la plantilla no existe */
+  suspend fun get(name: String, load: suspend (String) -> TicketTemplate?): TicketFactory? {
+    factories[name]?.let { return it }
+    val loadedAt = generation.get()
+    val factory = load(name)?.let { TicketFactory(it) } ?: return null
+    factories[name] = factory
+    if (generation.get() != loadedAt) factories.remove(name, factory)
+    return factory
+  }
+
+  fun invalidateAll() {
+    generation.incrementAndGet()
+    factories.clear()
+  }
+}
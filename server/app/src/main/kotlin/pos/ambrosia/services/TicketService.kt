@@ -10,6 +10,8 @@ class TicketService(private val connection: Connection) {
             "INSERT INTO tickets (id, order_id, user_id, ticket_date, status, total_amount, notes) VALUES (?, ?, ?, ?, ?, ?, ?)"
     private const val GET_TICKETS =
             "SELECT id, order_id, user_id, ticket_date, status, total_amount, notes FROM tickets"
+    private const val GET_TICKETS_PAGE =
+            "SELECT id, order_id, user_id, ticket_date, status, total_amount, notes FROM tickets WHERE id > ? ORDER BY id LIMIT ?"
     private const val GET_TICKET_BY_ID =
             "SELECT id, order_id, user_id, ticket_date, status, total_amount, notes FROM tickets WHERE id = ?"
     private const val UPDATE_TICKET =
@@ -106,6 +108,29 @@ class TicketService(private val connection: Connection) {
     return tickets
   }
 
+  /** Página de tickets ordenados por id, a partir del id `cursor` (excluido) */
+  suspend fun getTicketsPage(limit: Int, cursor: String?): List<Ticket> {
+    val statement = connection.prepareStatement(GET_TICKETS_PAGE)
+    statement.setString(1, cursor ?: "")
+    statement.setInt(2, limit)
+    val resultSet = statement.executeQuery()
+    val tickets = mutableListOf<Ticket>()
+    while (resultSet.next()) {
+      tickets.add(
+        Ticket(
+          id = resultSet.getString("id"),
+          order_id = resultSet.getString("order_id"),
+          user_id = resultSet.getString("user_id"),
+          ticket_date = resultSet.getString("ticket_date"),
+          status = resultSet.getInt("status"),
+          total_amount = resultSet.getDouble("total_amount"),
+          notes = resultSet.getString("notes")
+        )
+      )
+    }
+    return tickets
+  }
+
   suspend fun getTicketById(id: String): Ticket? {
     val statement = connection.prepareStatement(GET_TICKET_BY_ID)
     statement.setString(1, id)
@@ -174,6 +174,7 @@ open class TicketTemplateService(private val connection: Connection) {
                 }
             }
             connection.commit()
+            TicketFactoryCache.invalidateAll()
             logger.info("Template updated successfully: $id")
             return true
         } catch (e: Exception) {
@@ -197,6 +198,7 @@ open class TicketTemplateService(private val connection: Connection) {
             stmt.setBytes(1, templateId.toBytes())
             val rowsDeleted = stmt.executeUpdate()
             return if (rowsDeleted > 0) {
+                TicketFactoryCache.invalidateAll()
                 logger.info("Template deleted successfully: $id")
                 true
             } else {
@@ -5,6 +5,7 @@ import pos.ambrosia.logger
 import pos.ambrosia.models.AuthResponse
 import pos.ambrosia.models.UpdateUserRequest
 import pos.ambrosia.models.User
+import pos.ambrosia.utils.PermissionCache
 import pos.ambrosia.utils.SecurePinProcessor
 import java.sql.Connection
 
@@ -208,6 +209,7 @@ class UsersService(
     statement.setString(fields.size + 1, id)
 
     val rowsUpdated = statement.executeUpdate()
+    PermissionCache.invalidateUser(id)
     return rowsUpdated > 0
   }
 
@@ -215,6 +217,7 @@ class UsersService(
     val statement = connection.prepareStatement(DELETE_USER)
     statement.setString(1, id)
     val rowsDeleted = statement.executeUpdate()
+    PermissionCache.invalidateUser(id)
     return rowsDeleted > 0
   }
 }
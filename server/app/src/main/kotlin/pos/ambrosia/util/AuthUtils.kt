@@ -69,7 +69,7 @@ suspend fun ApplicationCall.requireWallet() {
  */
 val AdminAccess =
 createRouteScopedPlugin(name = "AdminAccess") {
-  on(AuthenticationChecked) { call -> call.requireAdmin() }
+  on(AuthenticationChecked) { call -> timed("perm") { call.requireAdmin() } }
 }
 
 /**
@@ -88,6 +88,13 @@ data class UserInfo(val userId: String, val role: String, val isAdmin: Boolean)
 suspend fun ApplicationCall.requirePermission(name: String) {
   val principal = principal<JWTPrincipal>() ?: throw PermissionDeniedException()
   val userId = principal.getClaim("userId", String::class) ?: throw PermissionDeniedException()
+  val connection: Connection = DatabaseConnection.getConnection()
+  if (PermissionCache.enabled) {
+    if (name !in PermissionCache.permissionsFor(connection, userId)) {
+      throw PermissionDeniedException()
+    }
+    return
+  }
   val sql =
   """
   SELECT 1
@@ -97,7 +104,6 @@ suspend fun ApplicationCall.requirePermission(name: String) {
   JOIN permissions p ON p.id = rp.permission_id
   WHERE u.id = ? AND p.name = ? AND p.enabled = 1 AND u.is_deleted = 0
   """
-  val connection: Connection = DatabaseConnection.getConnection()
   connection.prepareStatement(sql).use { st ->
     st.setString(1, userId)
     st.setString(2, name)
@@ -127,5 +133,5 @@ createRouteScopedPlugin(
   createConfiguration = ::PermissionPluginConfig
 ) {
   val permissionKey = pluginConfig.key
-  on(AuthenticationChecked) { call -> call.requirePermission(permissionKey) }
+  on(AuthenticationChecked) { call -> timed("perm") { call.requirePermission(permissionKey) } }
 }
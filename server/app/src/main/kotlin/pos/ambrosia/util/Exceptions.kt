@@ -32,3 +32,6 @@ class WalletOnlyException(message: String = "Wallet access required") : Security
 class PermissionDeniedException(message: String = "Permission required") : SecurityException(message)
 
 class PrintTicketException(message: String = "Error processing print job") : RuntimeException(message)
+
+class InvalidPageRequestException(message: String = "Invalid pagination parameters") :
+        IllegalArgumentException(message)
@@ -0,0 +1,33 @@
+package pos.ambrosia.utils
+
+import io.ktor.server.application.*
+import io.ktor.server.response.*
+
+/** Cabecera con el cursor de la siguiente página, ausente en la última */
+const val NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+const val MAX_PAGE_LIMIT = 1000
+
+/** Página pedida con `?limit=N&cursor=ID`: filas con id mayor que el cursor, ordenadas por id */
+data class PageRequest(val limit: Int, val cursor: String?)
+
+/**
+ * Lee `limit` y `cursor` de la query. Devuelve null si la petición no está paginada (sin
+ * `limit`), para mantener la respuesta completa de siempre.
+ */
+fun ApplicationCall.pageRequest(): PageRequest? {
+  val limitParam = request.queryParameters["limit"] ?: return null
+  val limit = limitParam.toIntOrNull()
+  if (limit == null || limit < 1) {
+    throw InvalidPageRequestException("Invalid limit: $limitParam")
+  }
+  val cursor = request.queryParameters["cursor"]?.takeIf { it.isNotEmpty() }
+  return PageRequest(minOf(limit, MAX_PAGE_LIMIT), cursor)
+}
+
+/** Añade la cabecera de siguiente página si la página vino llena */
+fun ApplicationCall.setNextCursor(page: PageRequest, size: Int, lastId: String?) {
+  if (size >= page.limit && lastId != null) {
+    response.header(NEXT_CURSOR_HEADER, lastId)
+  }
+}
@@ -0,0 +1,78 @@
+package pos.ambrosia.utils
+
+import java.sql.Connection
+import java.util.concurrent.ConcurrentHashMap
+import java.util.concurrent.atomic.AtomicLong
+
+/**
+ * Caché opcional (`--permission-cache`) de los permisos efectivos de cada usuario. Evita el JOIN
+ * de `users`, `roles`, `role_permissions` y `permissions` en cada petición autorizada.
+ *
+ * Se invalida al cambiar los permisos de un rol, al actualizar o borrar un rol o un usuario y tras
+ * la configuración inicial. Una carga que coincide con una invalidación no se guarda, así una
+ * revocación surte efecto en la siguiente petición.
+ */
+object PermissionCache {
+  private const val SELECT_USER_PERMISSIONS =
+    """
+    SELECT u.role_id, p.name
+    FROM users u
+    JOIN roles r ON u.role_id = r.id
+    LEFT JOIN role_permissions rp ON rp.role_id = r.id
+    LEFT JOIN permissions p ON p.id = rp.permission_id AND p.enabled = 1
+    WHERE u.id = ? AND u.is_deleted = 0
+    """
+
+  private data class Entry(val roleId: String?, val permissions: Set<String>)
+
+  @Volatile
+  var enabled: Boolean = false
+    private set
+
+  private val entries = ConcurrentHashMap<String, Entry>()
+  private val generation = AtomicLong()
+
+  fun enable() {
+    enabled = true
+  }
+
+  /** Permisos habilitados del usuario; vacío si no existe o está borrado */
+  fun permissionsFor(connection: Connection, userId: String): Set<String> {
+    entries[userId]?.let { return it.permissions }
+    val loadedAt = generation.get()
+    val entry = load(connection, userId)
+    entries[userId] = entry
+    // Si hubo una invalidación durante la carga, el resultado puede estar obsoleto
+    if (generation.get() != loadedAt) entries.remove(userId, entry)
+    return entry.permissions
+  }
+
+  private fun load(connection: Connection, userId: String): Entry {
+    var roleId: String? = null
+    val permissions = mutableSetOf<String>()
+    connection.prepareStatement(SELECT_USER_PERMISSIONS).use { st ->
+      st.setString(1, userId)
+      val rs = st.executeQuery()
+      while (rs.next()) {
+        roleId = rs.getString("role_id")
+        rs.getString("name")?.let { permissions.add(it) }
+      }
+    }
+    return Entry(roleId, permissions)
+  }
+
+  fun invalidateUser(userId: String) {
+    generation.incrementAndGet()
+    entries.remove(userId)
+  }
+
+  fun invalidateRole(roleId: String) {
+    generation.incrementAndGet()
+    entries.values.removeIf { it.roleId == roleId }
+  }
+
+  fun invalidateAll() {
+    generation.incrementAndGet()
+    entries.clear()
+  }
+}
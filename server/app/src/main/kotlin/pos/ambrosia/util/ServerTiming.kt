@@ -0,0 +1,204 @@
+package pos.ambrosia.utils
+
+import io.ktor.server.application.*
+import io.ktor.server.application.hooks.*
+import io.ktor.server.request.*
+import io.ktor.server.response.*
+import io.ktor.server.routing.*
+import io.ktor.util.*
+import java.lang.reflect.InvocationTargetException
+import java.lang.reflect.Proxy
+import java.sql.Connection
+import java.sql.ResultSet
+import java.sql.Statement
+import java.util.concurrent.ConcurrentHashMap
+import java.util.concurrent.atomic.AtomicLongArray
+import kotlinx.coroutines.asContextElement
+import kotlinx.coroutines.withContext
+
+/**
+ * Tiempos por fase de una petición (auth, perm, db, phoenix, serialize). Las fases pueden
+ * solaparse: las consultas de los chequeos de permisos cuentan también como `db`.
+ */
+class ServerTimings {
+  val startNanos: Long = System.nanoTime()
+  private val durations = LinkedHashMap<String, Long>()
+  private val started = HashMap<String, Long>()
+
+  @Synchronized
+  fun add(phase: String, nanos: Long) {
+    durations[phase] = (durations[phase] ?: 0L) + nanos
+  }
+
+  @Synchronized
+  fun begin(phase: String) {
+    started.putIfAbsent(phase, System.nanoTime())
+  }
+
+  @Synchronized
+  fun end(phase: String) {
+    val start = started.remove(phase) ?: return
+    add(phase, System.nanoTime() - start)
+  }
+
+  /** Cierra las fases abiertas (p. ej. auth cuando el token es inválido) */
+  @Synchronized
+  fun snapshot(): Map<String, Long> {
+    started.keys.toList().forEach { end(it) }
+    return LinkedHashMap(durations)
+  }
+}
+
+/** Tiempos de la petición en curso; se propaga entre hilos con las corrutinas */
+val currentServerTimings = ThreadLocal<ServerTimings?>()
+
+val ServerTimingsKey = AttributeKey<ServerTimings>("ServerTimings")
+
+val ApplicationCall.serverTimings: ServerTimings?
+  get() = attributes.getOrNull(ServerTimingsKey)
+
+/** Mide [block] como la fase [phase] de la petición en curso; sin coste si está desactivado */
+inline fun <T> timed(phase: String, block: () -> T): T {
+  val timings = currentServerTimings.get() ?: return block()
+  val start = System.nanoTime()
+  try {
+    return block()
+  } finally {
+    timings.add(phase, System.nanoTime() - start)
+  }
+}
+
+/** Formatea los tiempos como cabecera `Server-Timing` (milisegundos) */
+fun formatServerTiming(phases: Map<String, Long>, totalNanos: Long): String =
+  (phases + ("total" to totalNanos)).entries.joinToString(", ") { (phase, nanos) ->
+    "$phase;dur=${"%.3f".format(java.util.Locale.ROOT, nanos / 1_000_000.0)}"
+  }
+
+/** Envuelve una conexión JDBC para medir como `db` las sentencias y la lectura de resultados */
+fun timedConnection(connection: Connection): Connection =
+  timedProxy(connection, Connection::class.java)
+
+private fun <T : Any> timedProxy(target: T, type: Class<T>): T {
+  val proxy =
+    Proxy.newProxyInstance(type.classLoader, arrayOf(type)) { _, method, args ->
+      val invoke = {
+        try {
+          method.invoke(target, *(args ?: emptyArray()))
+        } catch (e: InvocationTargetException) {
+          throw e.targetException
+        }
+      }
+      val measured = method.name.startsWith("execute") || method.name == "next"
+      val result = if (measured) timed("db", invoke) else invoke()
+      when (result) {
+        is ResultSet -> timedProxy(result, ResultSet::class.java)
+        is java.sql.PreparedStatement ->
+          timedProxy(result, java.sql.PreparedStatement::class.java)
+        is Statement -> timedProxy(result, Statement::class.java)
+        else -> result
+      }
+    }
+  return type.cast(proxy)
+}
+
+/** Histogramas de latencia por ruta, en formato de texto de Prometheus */
+class RouteMetrics {
+  private class Series {
+    val buckets = AtomicLongArray(BUCKETS.size + 1)
+    val sums = ConcurrentHashMap<String, Long>()
+
+    fun record(totalNanos: Long, phases: Map<String, Long>) {
+      val seconds = totalNanos / 1e9
+      val index = BUCKETS.indexOfFirst { seconds <= it }.takeIf { it >= 0 } ?: BUCKETS.size
+      buckets.incrementAndGet(index)
+      sums.merge("total", totalNanos, Long::plus)
+      phases.forEach { (phase, nanos) -> sums.merge(phase, nanos, Long::plus) }
+    }
+  }
+
+  private val series = ConcurrentHashMap<String, Series>()
+
+  fun record(route: String, totalNanos: Long, phases: Map<String, Long>) {
+    series.computeIfAbsent(route) { Series() }.record(totalNanos, phases)
+  }
+
+  fun render(): String = buildString {
+    val sorted = series.toSortedMap()
+    appendLine("# TYPE $DURATION histogram")
+    sorted.forEach { (route, s) ->
+      val label = "route=\"${escape(route)}\""
+      var cumulative = 0L
+      BUCKETS.forEachIndexed { i, le ->
+        cumulative += s.buckets[i]
+        appendLine("${DURATION}_bucket{$label,le=\"$le\"} $cumulative")
+      }
+      cumulative += s.buckets[BUCKETS.size]
+      appendLine("${DURATION}_bucket{$label,le=\"+Inf\"} $cumulative")
+      appendLine("${DURATION}_sum{$label} ${(s.sums["total"] ?: 0L) / 1e9}")
+      appendLine("${DURATION}_count{$label} $cumulative")
+    }
+    appendLine("# TYPE $PHASE counter")
+    sorted.forEach { (route, s) ->
+      val label = "route=\"${escape(route)}\""
+      s.sums.toSortedMap().filterKeys { it != "total" }.forEach { (phase, nanos) ->
+        appendLine("$PHASE{$label,phase=\"$phase\"} ${nanos / 1e9}")
+      }
+    }
+  }
+
+  private fun escape(value: String) = value.replace("\\", "\\\\").replace("\"", "\\\"")
+
+  companion object {
+    const val DURATION = "ambrosia_http_request_duration_seconds"
+    const val PHASE = "ambrosia_http_phase_seconds_sum"
+    val BUCKETS =
+      doubleArrayOf(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+  }
+}
+
+val RouteMetricsKey = AttributeKey<RouteMetrics>("RouteMetrics")
+
+private val RouteLabelKey = AttributeKey<String>("RouteLabel")
+
+/** Ruta sin los selectores que no forman parte del path, p. ej. `(authenticate auth-jwt)` */
+private fun routeLabel(call: RoutingCall): String {
+  val path = call.route.parent.toString().replace(Regex("/\\([^)]*\\)"), "").ifEmpty { "/" }
+  return "${call.request.httpMethod.value} $path"
+}
+
+/**
+ * Plugin opcional (`--server-timing`) que añade la cabecera `Server-Timing` con la duración de
+ * cada fase y alimenta los histogramas por ruta servidos en `/metrics`.
+ */
+val ServerTiming =
+  createApplicationPlugin(name = "ServerTiming") {
+    val metrics = RouteMetrics()
+    application.attributes.put(RouteMetricsKey, metrics)
+
+    application.intercept(ApplicationCallPipeline.Setup) {
+      val timings = ServerTimings()
+      call.attributes.put(ServerTimingsKey, timings)
+      withContext(currentServerTimings.asContextElement(timings)) { proceed() }
+    }
+
+    application.monitor.subscribe(RoutingRoot.RoutingCallStarted) { call ->
+      call.attributes.put(RouteLabelKey, routeLabel(call))
+    }
+
+    // La serialización (ContentNegotiation) ocurre entre Before y After
+    application.sendPipeline.intercept(ApplicationSendPipeline.Before) {
+      call.serverTimings?.begin("serialize")
+    }
+    application.sendPipeline.intercept(ApplicationSendPipeline.After) {
+      val timings = call.serverTimings ?: return@intercept
+      timings.end("serialize")
+      val total = System.nanoTime() - timings.startNanos
+      call.response.header("Server-Timing", formatServerTiming(timings.snapshot(), total))
+    }
+
+    on(ResponseSent) { call ->
+      val timings = call.serverTimings ?: return@on
+      val route = call.attributes.getOrNull(RouteLabelKey) ?: "unmatched"
+      metrics.record(route, System.nanoTime() - timings.startNanos, timings.snapshot())
+    }
+  }
@@ -0,0 +1,4 @@
+PRAGMA foreign_keys = ON;
+
+-- The order total is recomputed from its dishes on every dish change
+CREATE INDEX IF NOT EXISTS idx_orders_dishes_order_id ON orders_dishes (order_id);
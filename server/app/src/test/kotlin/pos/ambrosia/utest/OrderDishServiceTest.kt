@@ -111,6 +111,8 @@ class OrderDishServiceTest {
             val service = OrderDishService(mockConnection) // Arrange
             val result = service.addOrderDish(orderDish) // Act
             assertNull(result) // Assert
+            verify(mockConnection).rollback() // Assert
+            verify(mockConnection, never()).prepareStatement(contains("INSERT INTO")) // Assert
         }
     }
 
@@ -251,4 +253,113 @@ class OrderDishServiceTest {
             assertFalse(result) // Assert
         }
     }
-}
\ No newline at end of file
+
+    @Test
+    fun `addOrderDishesAndTotal recomputes the order total in one transaction`() {
+        runBlocking {
+            val dishes = listOf(
+                OrderDish(order_id = "order123", dish_id = "dish1", price_at_order = 50.00, status = "pending", should_prepare = true),
+                OrderDish(order_id = "order123", dish_id = "dish2", price_at_order = 12.50, status = "pending", should_prepare = true)
+            ) // Arrange
+            whenever(mockConnection.prepareStatement(any())).thenReturn(mockStatement) // Arrange
+            whenever(mockStatement.executeQuery()).thenReturn(mockResultSet) // Arrange
+            whenever(mockResultSet.next()).thenReturn(true) // Arrange
+            whenever(mockResultSet.getDouble("total")).thenReturn(62.50) // Arrange
+            val service = OrderDishService(mockConnection) // Arrange
+            val result = service.addOrderDishesAndTotal("order123", dishes) // Act
+            assertEquals(62.50, result) // Assert
+            verify(mockStatement, times(2)).addBatch() // Assert
+            verify(mockConnection).prepareStatement(contains("SUM(price_at_order)")) // Assert
+            verify(mockConnection).commit() // Assert
+        }
+    }
+
+    @Test
+    fun `addOrderDishesAndTotal returns null if a dish does not exist`() {
+        runBlocking {
+            val dishes = listOf(OrderDish(order_id = "order123", dish_id = "missing", price_at_order = 50.00, status = "pending", should_prepare = true)) // Arrange
+            whenever(mockConnection.prepareStatement(any())).thenReturn(mockStatement) // Arrange
+            whenever(mockStatement.executeQuery()).thenReturn(mockResultSet) // Arrange
+            whenever(mockResultSet.next()).thenReturn(true).thenReturn(false) // Arrange: la orden existe, el plato no
+            val service = OrderDishService(mockConnection) // Arrange
+            val result = service.addOrderDishesAndTotal("order123", dishes) // Act
+            assertNull(result) // Assert
+            verify(mockStatement, never()).addBatch() // Assert
+            verify(mockConnection).rollback() // Assert
+        }
+    }
+
+    @Test
+    fun `updateOrderDishAndTotal returns the total recomputed from the dishes`() {
+        runBlocking {
+            val orderDish = OrderDish(id = "od1", order_id = "order123", dish_id = "dish1", price_at_order = 55.00, status = "COOKING", should_prepare = false) // Arrange
+            whenever(mockConnection.prepareStatement(any())).thenReturn(mockStatement) // Arrange
+            whenever(mockStatement.executeUpdate()).thenReturn(1) // Arrange
+            whenever(mockStatement.executeQuery()).thenReturn(mockResultSet) // Arrange
+            whenever(mockResultSet.next()).thenReturn(true) // Arrange
+            whenever(mockResultSet.getDouble("total")).thenReturn(105.00) // Arrange
+            val service = OrderDishService(mockConnection) // Arrange
+            val result = service.updateOrderDishAndTotal(orderDish) // Act
+            assertEquals(105.00, result) // Assert
+            verify(mockStatement).setDouble(1, 55.00) // Assert
+            verify(mockConnection).prepareStatement(contains("SUM(price_at_order)")) // Assert
+            verify(mockConnection).commit() // Assert
+        }
+    }
+
+    @Test
+    fun `updateOrderDishAndTotal rolls back when the dish is not in the order`() {
+        runBlocking {
+            val orderDish = OrderDish(id = "od1", order_id = "other-order", dish_id = "dish1", price_at_order = 55.00, status = "COOKING", should_prepare = false) // Arrange
+            whenever(mockConnection.prepareStatement(any())).thenReturn(mockStatement) // Arrange
+            whenever(mockStatement.executeUpdate()).thenReturn(0) // Arrange
+            val service = OrderDishService(mockConnection) // Arrange
+            val result = service.updateOrderDishAndTotal(orderDish) // Act
+            assertNull(result) // Assert
+            verify(mockStatement, never()).executeQuery() // Assert
+            verify(mockConnection).rollback() // Assert
+            verify(mockConnection, never()).commit() // Assert
+        }
+    }
+
+    @Test
+    fun `deleteOrderDishAndTotal returns the total of the remaining dishes`() {
+        runBlocking {
+            whenever(mockConnection.prepareStatement(any())).thenReturn(mockStatement) // Arrange
+            whenever(mockStatement.executeUpdate()).thenReturn(1) // Arrange
+            whenever(mockStatement.executeQuery()).thenReturn(mockResultSet) // Arrange
+            whenever(mockResultSet.next()).thenReturn(true) // Arrange
+            whenever(mockResultSet.getDouble("total")).thenReturn(50.00) // Arrange
+            val service = OrderDishService(mockConnection) // Arrange
+            val result = service.deleteOrderDishAndTotal("order123", "od1") // Act
+            assertEquals(50.00, result) // Assert
+            verify(mockConnection).commit() // Assert
+        }
+    }
+
+    @Test
+    fun `deleteOrderDishAndTotal rolls back when the dish is not in the order`() {
+        runBlocking {
+            whenever(mockConnection.prepareStatement(any())).thenReturn(mockStatement) // Arrange
+            whenever(mockStatement.executeUpdate()).thenReturn(0) // Arrange
+            val service = OrderDishService(mockConnection) // Arrange
+            val result = service.deleteOrderDishAndTotal("other-order", "od1") // Act
+            assertNull(result) // Assert
+            verify(mockConnection).rollback() // Assert
+            verify(mockConnection, never()).commit() // Assert
+        }
+    }
+
+    @Test
+    fun `deleteOrderDishesAndTotal returns null when the order does not exist`() {
+        runBlocking {
+            whenever(mockConnection.prepareStatement(any())).thenReturn(mockStatement) // Arrange
+            whenever(mockStatement.executeQuery()).thenReturn(mockResultSet) // Arrange
+            whenever(mockResultSet.next()).thenReturn(false) // Arrange
+            val service = OrderDishService(mockConnection) // Arrange
+            val result = service.deleteOrderDishesAndTotal("not-found") // Act
+            assertNull(result) // Assert
+            verify(mockConnection).rollback() // Assert
+        }
+    }
+}
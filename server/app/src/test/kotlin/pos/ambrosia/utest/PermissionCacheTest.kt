@@ -0,0 +1,84 @@
+package pos.ambrosia.utest
+
+import org.mockito.kotlin.*
+import pos.ambrosia.utils.PermissionCache
+import java.sql.Connection
+import java.sql.PreparedStatement
+import java.sql.ResultSet
+import kotlin.test.*
+
+class PermissionCacheTest {
+    private val conn: Connection = mock()
+
+    @BeforeTest
+    fun setUp() {
+        PermissionCache.invalidateAll()
+    }
+
+    private fun stubPermissions(roleId: String, vararg names: String?) {
+        val st: PreparedStatement = mock()
+        val rs: ResultSet = mock()
+        whenever(conn.prepareStatement(any())).thenReturn(st)
+        whenever(st.executeQuery()).thenReturn(rs)
+        var stub = whenever(rs.next())
+        names.forEach { _ -> stub = stub.thenReturn(true) }
+        stub.thenReturn(false)
+        whenever(rs.getString("role_id")).thenReturn(roleId)
+        if (names.isNotEmpty()) {
+            whenever(rs.getString("name")).thenReturn(names[0], *names.drop(1).toTypedArray())
+        }
+    }
+
+    @Test
+    fun `permissionsFor loads once and then serves from cache`() {
+        // Arrange
+        stubPermissions("role-1", "dish_read", "dish_create")
+        // Act
+        val first = PermissionCache.permissionsFor(conn, "user-1")
+        val second = PermissionCache.permissionsFor(conn, "user-1")
+        // Assert
+        assertEquals(setOf("dish_read", "dish_create"), first)
+        assertEquals(first, second)
+        verify(conn, times(1)).prepareStatement(any())
+    }
+
+    @Test
+    fun `permissionsFor returns empty when the role has no enabled permissions`() {
+        // Arrange
+        stubPermissions("role-1", null)
+        // Act
+        val permissions = PermissionCache.permissionsFor(conn, "user-1")
+        // Assert
+        assertTrue(permissions.isEmpty())
+    }
+
+    @Test
+    fun `invalidateRole reloads users of that role only`() {
+        // Arrange
+        stubPermissions("role-1", "dish_read")
+        PermissionCache.permissionsFor(conn, "user-1")
+        stubPermissions("role-2", "dish_read")
+        PermissionCache.permissionsFor(conn, "user-2")
+        // Act
+        PermissionCache.invalidateRole("role-1")
+        stubPermissions("role-1")
+        val revoked = PermissionCache.permissionsFor(conn, "user-1")
+        val untouched = PermissionCache.permissionsFor(conn, "user-2")
+        // Assert
+        assertTrue(revoked.isEmpty())
+        assertEquals(setOf("dish_read"), untouched)
+    }
+
+    @Test
+    fun `invalidateUser reloads that user`() {
+        // Arrange
+        stubPermissions("role-1", "dish_read")
+        PermissionCache.permissionsFor(conn, "user-1")
+        // Act
+        PermissionCache.invalidateUser("user-1")
+        stubPermissions("role-2", "orders_read")
+        val permissions = PermissionCache.permissionsFor(conn, "user-1")
+        // Assert
+        assertEquals(setOf("orders_read"), permissions)
+    }
+}
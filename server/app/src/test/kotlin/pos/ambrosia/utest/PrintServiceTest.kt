@@ -4,11 +4,21 @@ import kotlinx.coroutines.runBlocking
 import org.junit.Test
 import org.mockito.kotlin.*
 import pos.ambrosia.models.*
+import pos.ambrosia.services.FilePrinterSink
 import pos.ambrosia.services.PrintService
+import pos.ambrosia.services.TcpPrinterSink
+import pos.ambrosia.services.TicketFactoryCache
 import pos.ambrosia.services.TicketTemplateService
+import pos.ambrosia.services.virtualPrinterSink
 import java.io.IOException
+import java.net.ServerSocket
+import java.nio.file.Files
+import kotlin.test.assertContentEquals
+import kotlin.test.assertEquals
 import kotlin.test.assertFailsWith
+import kotlin.test.assertIs
 import kotlin.test.assertNotNull
+import kotlin.test.assertNull
 import kotlin.test.assertTrue
 
 class PrintServiceTest {
@@ -56,4 +66,135 @@ class PrintServiceTest {
 
         whenever(runBlocking { ticketTemplateService.getTemplateByName("NonExistent") }).thenReturn(null)
     }
-}
\ No newline at end of file
+
+    private val template = TicketTemplate(
+        id = "template-1",
+        name = "Kitchen",
+        elements = listOf(
+            TicketElement("e1", "template-1", 0, ElementType.HEADER, "Ticket {{ticket.id}}"),
+            TicketElement("e2", "template-1", 1, ElementType.TABLE_ROW, "")
+        )
+    )
+
+    private val ticketData = TicketData(
+        ticketId = "T-42",
+        tableName = "Table 1",
+        roomName = "Main Room",
+        date = "2023-10-27",
+        items = listOf(TicketDataItem(2, "Paella", 12.5)),
+        total = 25.0
+    )
+
+    @Test
+    fun `render should emit the ticket text followed by a cut`() {
+        // Act
+        val bytes = printService.render(template, ticketData, null)
+        // Assert
+        val text = String(bytes, Charsets.ISO_8859_1)
+        assertTrue(text.contains("Ticket T-42"))
+        assertTrue(text.contains("2x Paella"))
+        val cut = text.lastIndexOf("\u001dV")
+        assertTrue(cut > text.indexOf("2x Paella"))
+    }
+
+    @Test
+    fun `printTicket should write the rendered ticket to a virtual file printer`() {
+        // Arrange
+        val file = Files.createTempFile("printer", ".bin")
+        val virtualPrintService = PrintService(ticketTemplateService, virtualPrinters = true)
+        whenever(runBlocking { ticketTemplateService.getTemplateByName("Kitchen") }).thenReturn(template)
+        virtualPrintService.setPrinter(PrinterType.KITCHEN, file.toUri().toString())
+        // Act
+        runBlocking { virtualPrintService.printTicket(ticketData, "Kitchen", PrinterType.KITCHEN, null) }
+        // Assert
+        assertContentEquals(virtualPrintService.render(template, ticketData, null), Files.readAllBytes(file))
+        Files.delete(file)
+    }
+
+    @Test
+    fun `virtual printers are ignored unless enabled`() {
+        // Arrange
+        whenever(runBlocking { ticketTemplateService.getTemplateByName("Kitchen") }).thenReturn(template)
+        printService.setPrinter(PrinterType.BAR, "tcp://127.0.0.1:9100")
+        // Act & Assert
+        runBlocking {
+            assertFailsWith<IOException> {
+                printService.printTicket(ticketData, "Kitchen", PrinterType.BAR, null)
+            }
+        }
+    }
+
+    @Test
+    fun `virtualPrinterSink should parse tcp and file printers only`() {
+        // Act & Assert
+        val tcp = virtualPrinterSink("tcp://127.0.0.1:9100")
+        assertIs<TcpPrinterSink>(tcp)
+        assertEquals("tcp://127.0.0.1:9100", tcp.name)
+        assertIs<FilePrinterSink>(virtualPrinterSink("file:/tmp/printer.bin"))
+        assertNull(virtualPrinterSink("tcp://127.0.0.1"))
+        assertNull(virtualPrinterSink("EPSON TM-T20"))
+    }
+
+    @Test
+    fun `submit should queue jobs and print them in order`() {
+        // Arrange
+        val file = Files.createTempFile("printer", ".bin")
+        val virtualPrintService = PrintService(ticketTemplateService, virtualPrinters = true)
+        whenever(runBlocking { ticketTemplateService.getTemplateByName("Queue") }).thenReturn(template)
+        virtualPrintService.setPrinter(PrinterType.KITCHEN, file.toUri().toString())
+        val tickets = (1..5).map { ticketData.copy(ticketId = "T-$it") }
+        // Act
+        val queued = runBlocking {
+            tickets.map { virtualPrintService.submit(it, "Queue", PrinterType.KITCHEN, null) }
+        }
+        val last = runBlocking {
+            virtualPrintService.printTicket(ticketData, "Queue", PrinterType.KITCHEN, null)
+        }
+        // Assert
+        assertTrue(queued.all { it.status == PrintJobStatus.QUEUED })
+        assertEquals(PrintJobStatus.DONE, last.status)
+        queued.forEach { assertEquals(PrintJobStatus.DONE, virtualPrintService.getJob(it.id)?.status) }
+        val expected = (tickets + ticketData).map { virtualPrintService.render(template, it, null) }
+        assertContentEquals(expected.reduce { acc, bytes -> acc + bytes }, Files.readAllBytes(file))
+        Files.delete(file)
+    }
+
+    @Test
+    fun `printTicket should record a failed job when the printer is unreachable`() {
+        // Arrange
+        val port = ServerSocket(0).use { it.localPort }
+        val virtualPrintService = PrintService(ticketTemplateService, virtualPrinters = true)
+        whenever(runBlocking { ticketTemplateService.getTemplateByName("Offline") }).thenReturn(template)
+        virtualPrintService.setPrinter(PrinterType.BAR, "tcp://127.0.0.1:$port")
+        // Act
+        val job = runBlocking { virtualPrintService.submit(ticketData, "Offline", PrinterType.BAR, null) }
+        runBlocking {
+            assertFailsWith<IOException> {
+                virtualPrintService.printTicket(ticketData, "Offline", PrinterType.BAR, null)
+            }
+        }
+        // Assert
+        val failed = virtualPrintService.getJob(job.id)
+        assertEquals(PrintJobStatus.FAILED, failed?.status)
+        assertNotNull(failed?.error)
+        assertNull(virtualPrintService.getJob("missing"))
+    }
+
+    @Test
+    fun `TicketFactoryCache should load a template once until invalidated`() {
+        // Arrange
+        var loads = 0
+        val load: suspend (String) -> TicketTemplate? = { loads++; template }
+        TicketFactoryCache.invalidateAll()
+        // Act
+        runBlocking {
+            TicketFactoryCache.get("Cached", load)
+            TicketFactoryCache.get("Cached", load)
+            TicketFactoryCache.invalidateAll()
+            TicketFactoryCache.get("Cached", load)
+        }
+        // Assert
+        assertEquals(2, loads)
+        assertNull(runBlocking { TicketFactoryCache.get("Missing") { null } })
+    }
+}
@@ -0,0 +1,346 @@
+"""Authentication throughput and token-refresh storm benchmark.
+
+Every ``POST /auth/login`` verifies the PIN with PBKDF2 (``SecurePinProcessor``)
+and every ``POST /auth/refresh`` verifies the JWT, looks the token up in
+``users`` and signs a new access token. This module simulates a shift change:
+N terminals, each logged in as its own staff user, log in within a short
+window (a login storm) and then refresh their access tokens in synchronized
+waves. It reports logins/s, refresh latency and, when the server's PID is
+known, the server CPU time per request. The share of login CPU spent on PIN
+hashing is estimated as the extra CPU a login costs over a refresh (both sign
+JWTs and hit SQLite; only logins hash the PIN).
+
+``pbkdf2_seconds`` times the same PBKDF2 parameters locally, to project
+login latency for other iteration counts.
+
+Example:
+    report = await run_auth_benchmark(server_url, clients=50, server_pid=pid)
+    print(report.format_summary())
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+from ambrosia.auth_utils import get_tokens_from_response, login_user
+from ambrosia.http_client import AmbrosiaHttpClient, SharedConnectionPool
+from ambrosia.load import LoadRecorder, LoadReport
+from ambrosia.resource_monitor import sample_process_tree
+from ambrosia.resources import AmbrosiaApi
+
+logger = logging.getLogger(__name__)
+
+# SecurePinProcessor parameters
+PIN_HASH_ITERATIONS = 10_000
+PIN_HASH_KEY_BYTES = 32
+
+
+def server_cpu_seconds(pid: int) -> float:
+    """Return the user + system CPU seconds used so far by a process tree."""
+    usage = sample_process_tree(pid, connections=False)
+    return usage["cpu_seconds"] if usage else 0.0
+
+
+def pbkdf2_seconds(iterations: int = PIN_HASH_ITERATIONS, samples: int = 20) -> float:
+    """Median local time of one PBKDF2-HMAC-SHA256 PIN hash with ``iterations``."""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hashlib.pbkdf2_hmac(
+            "sha256",
+            b"0000",
+            b"app-master-key" + uuid.uuid4().bytes,
+            iterations,
+            PIN_HASH_KEY_BYTES,
+        )
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+@dataclass
+class AuthPhase:
+    """One login storm or refresh wave.
+
+    Attributes:
+        name: Phase label, e.g. "login storm" or "refresh wave 2"
+        report: Latency report, routes "POST /auth/login" or "POST /auth/refresh"
+        cpu_seconds: Server CPU time used during the phase, None without a PID
+    """
+
+    name: str
+    report: LoadReport
+    cpu_seconds: float | None = None
+
+    @property
+    def succeeded(self) -> int:
+        """Requests answered with 200."""
+        return self.report.total.status_codes.get(200, 0)
+
+    @property
+    def per_second(self) -> float:
+        """Successful requests per second over the phase."""
+        duration = self.report.duration
+        return self.succeeded / duration if duration > 0 else 0.0
+
+    @property
+    def cpu_per_request(self) -> float | None:
+        """Server CPU seconds per successful request."""
+        if self.cpu_seconds is None or not self.succeeded:
+            return None
+        return self.cpu_seconds / self.succeeded
+
+
+@dataclass
+class AuthBenchmarkReport:
+    """Result of a login storm followed by refresh waves.
+
+    Attributes:
+        clients: Number of simulated terminals
+        login_storm: The login storm phase
+        refresh_waves: The synchronized refresh waves, in order
+        local_pin_hash_seconds: Local time of one PBKDF2 PIN hash
+    """
+
+    clients: int
+    login_storm: AuthPhase
+    refresh_waves: list[AuthPhase]
+    local_pin_hash_seconds: float
+
+    @property
+    def refresh_p99(self) -> float:
+        """Worst p99 refresh latency across the waves, in seconds."""
+        return max((w.report.total.p99 for w in self.refresh_waves), default=0.0)
+
+    @property
+    def pin_hash_cpu_share(self) -> float | None:
+        """Estimated share of login CPU spent on PIN hashing (0 to 1)."""
+        login_cpu = self.login_storm.cpu_per_request
+        refresh_cpu = [w.cpu_per_request for w in self.refresh_waves]
+        if not login_cpu or not refresh_cpu or None in refresh_cpu:
+            return None
+        refresh_mean = sum(refresh_cpu) / len(refresh_cpu)  # type: ignore[arg-type]
+        return min(1.0, max(0.0, (login_cpu - refresh_mean) / login_cpu))
+
+    def format_summary(self) -> str:
+        """Render every phase and the derived figures."""
+        header = (
+            f"{'phase':<18} {'ok':>5} {'err':>5} {'req/s':>8} {'p50 ms':>8} "
+            f"{'p99 ms':>8} {'cpu ms/req':>10}"
+        )
+        lines = [header, "-" * len(header)]
+        for phase in [self.login_storm, *self.refresh_waves]:
+            stats = phase.report.total
+            cpu = phase.cpu_per_request
+            lines.append(
+                f"{phase.name:<18} {phase.succeeded:>5} {stats.errors:>5} "
+                f"{phase.per_second:>8.1f} {stats.p50 * 1000:>8.1f} "
+                f"{stats.p99 * 1000:>8.1f} "
+                f"{'-' if cpu is None else f'{cpu * 1000:.2f}':>10}"
+            )
+        share = self.pin_hash_cpu_share
+        lines.append(
+            f"clients: {self.clients}, logins/s: {self.login_storm.per_second:.1f}, "
+            f"refresh p99: {self.refresh_p99 * 1000:.1f} ms, PIN hashing: "
+            f"{'n/a' if share is None else f'{share:.0%} of login CPU'} "
+            f"(local PBKDF2 {self.local_pin_hash_seconds * 1000:.1f} ms)"
+        )
+        return "\n".join(lines)
+
+
+async def create_staff_users(
+    base_url: str,
+    count: int,
+    pin: str = "1234",
+    admin_credentials: dict[str, str] | None = None,
+) -> tuple[list[dict[str, str]], list[str]]:
+    """Create ``count`` staff users with the admin's role.
+
+    Each terminal needs its own user: logging in again as the same user
+    replaces the stored refresh token and invalidates the other sessions.
+
+    Args:
+        base_url: Base URL of the server
+        count: Number of users
+        pin: PIN of every user
+        admin_credentials: Credentials allowed to create users. Defaults to
+            the test user
+
+    Returns:
+        The users' credentials and their ids
+    """
+    prefix = f"auth-bench-{uuid.uuid4().hex[:8]}"
+    async with AmbrosiaApi.connect(base_url, admin_credentials) as api:
+        role_id = api.user["role_id"]
+        credentials = [{"name": f"{prefix}-{i}", "pin": pin} for i in range(count)]
+        ids = await api.users.create_many(
+            {"name": c["name"], "pin": pin, "role_id": role_id} for c in credentials
+        )
+    return credentials, ids
+
+
+async def delete_staff_users(
+    base_url: str, user_ids: list[str], admin_credentials: dict[str, str] | None = None
+) -> None:
+    """Delete users created by ``create_staff_users``."""
+    async with AmbrosiaApi.connect(base_url, admin_credentials) as api:
+        await api.users.delete_many(user_ids)
+
+
+async def _timed_phase(
+    name: str,
+    route: str,
+    requests: list,
+    server_pid: int | None,
+) -> AuthPhase:
+    """Run request coroutines concurrently, recording latency under ``route``."""
+    recorder = LoadRecorder()
+
+    async def timed(request) -> None:
+        start = time.perf_counter()
+        try:
+            response = await request
+        except Exception as e:
+            recorder.record(route, time.perf_counter() - start, error=True)
+            logger.debug(f"{route} failed: {e}")
+            return
+        recorder.record(
+            route,
+            time.perf_counter() - start,
+            status_code=response.status_code,
+            error=response.status_code != 200,
+        )
+
+    cpu_before = server_cpu_seconds(server_pid) if server_pid else None
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(request) for request in requests))
+    duration = time.perf_counter() - start
+    cpu_seconds = (
+        server_cpu_seconds(server_pid) - cpu_before if cpu_before is not None else None
+    )
+    return AuthPhase(name, recorder.build_report(duration), cpu_seconds)
+
+
+async def login_storm(
+    clients: list[AmbrosiaHttpClient],
+    credentials: list[dict[str, str]],
+    spread: float = 0.0,
+    server_pid: int | None = None,
+    seed: int | None = None,
+) -> AuthPhase:
+    """Log every client in as its user, all within ``spread`` seconds.
+
+    Args:
+        clients: Open clients, one per terminal; they keep the session cookies
+        credentials: One set of credentials per client
+        spread: Window the logins are spread over (0 for all at once)
+        server_pid: Server PID for CPU accounting
+        seed: Random seed for the start offsets
+
+    Returns:
+        The login storm phase
+    """
+    rng = random.Random(seed)
+
+    async def login(client: AmbrosiaHttpClient, creds: dict[str, str]):
+        await asyncio.sleep(rng.uniform(0, spread))
+        response = await login_user(client, creds, expected_status=None)
+        if response.status_code == 200:
+            get_tokens_from_response(response)
+        return response
+
+    return await _timed_phase(
+        "login storm",
+        "POST /auth/login",
+        [login(c, creds) for c, creds in zip(clients, credentials, strict=True)],
+        server_pid,
+    )
+
+
+async def refresh_wave(
+    clients: list[AmbrosiaHttpClient],
+    name: str = "refresh wave",
+    jitter: float = 0.0,
+    server_pid: int | None = None,
+    seed: int | None = None,
+) -> AuthPhase:
+    """Have every logged-in client call ``POST /auth/refresh`` at the same time.
+
+    Args:
+        clients: Clients logged in by ``login_storm``
+        name: Phase label
+        jitter: Maximum random delay before each refresh (0 for lockstep)
+        server_pid: Server PID for CPU accounting
+        seed: Random seed for the delays
+
+    Returns:
+        The refresh wave phase
+    """
+    rng = random.Random(seed)
+
+    async def refresh(client: AmbrosiaHttpClient):
+        await asyncio.sleep(rng.uniform(0, jitter))
+        return await client.post("/auth/refresh")
+
+    return await _timed_phase(
+        name, "POST /auth/refresh", [refresh(c) for c in clients], server_pid
+    )
+
+
+async def run_auth_benchmark(
+    base_url: str,
+    clients: int = 50,
+    spread: float = 0.0,
+    waves: int = 3,
+    wave_interval: float = 1.0,
+    jitter: float = 0.0,
+    server_pid: int | None = None,
+    seed: int | None = None,
+) -> AuthBenchmarkReport:
+    """Run a login storm followed by synchronized refresh waves.
+
+    Args:
+        base_url: Base URL of the server
+        clients: Number of terminals, each with its own staff user
+        spread: Window in seconds the logins are spread over
+        waves: Number of refresh waves
+        wave_interval: Pause between waves in seconds
+        jitter: Maximum random delay of each refresh within a wave
+        server_pid: Server PID, enables CPU accounting and the PIN hash share
+        seed: Random seed
+
+    Returns:
+        AuthBenchmarkReport with every phase
+    """
+    credentials, user_ids = await create_staff_users(base_url, clients)
+    pool = SharedConnectionPool(
+        max_connections=clients, max_keepalive_connections=clients
+    )
+    terminals = [AmbrosiaHttpClient(base_url, pool=pool) for _ in range(clients)]
+    try:
+        for terminal in terminals:
+            await terminal.__aenter__()
+        storm = await login_storm(terminals, credentials, spread, server_pid, seed)
+        refresh_phases = []
+        for i in range(waves):
+            if i:
+                await asyncio.sleep(wave_interval)
+            refresh_phases.append(
+                await refresh_wave(
+                    terminals, f"refresh wave {i + 1}", jitter, server_pid, seed
+                )
+            )
+    finally:
+        for terminal in terminals:
+            await terminal.__aexit__(None, None, None)
+        await pool.aclose()
+        await delete_staff_users(base_url, user_ids)
+
+    report = AuthBenchmarkReport(
+        clients, storm, refresh_phases, await asyncio.to_thread(pbkdf2_seconds)
+    )
+    logger.info(f"Auth benchmark:\n{report.format_summary()}")
+    return report
@@ -4,11 +4,21 @@ This module provides utility functions for testing authentication endpoints,
 token management, and cookie handling.
 """
 
+import asyncio
+import base64
+import json
+import logging
+import time
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+
 import httpx
 
 from ambrosia.api_utils import assert_status_code
 from ambrosia.http_client import AmbrosiaHttpClient
 
+logger = logging.getLogger(__name__)
+
 # Default test user credentials
 DEFAULT_TEST_USER = {"name": "cooluser1", "pin": "0000"}
 
@@ -41,9 +51,8 @@ def set_cookie_in_jar(client: AmbrosiaHttpClient, name: str, value: str) -> None
         value: Cookie value
     """
     assert client._client is not None, "HTTP client should be initialized"
-    # Delete existing cookie first to avoid duplicates
-    if name in client._client.cookies:
-        del client._client.cookies[name]
+    # Delete existing cookies first (for any domain) to avoid duplicates
+    client._client.cookies.delete(name)
     client._client.cookies.set(name, value)
 
 
@@ -107,3 +116,177 @@ async def login_user(
     if expected_status is not None:
         assert_status_code(response, expected_status)
     return response
+
+
+def get_token_expiry(token: str) -> float | None:
+    """Read the ``exp`` claim of a JWT without verifying its signature.
+
+    Args:
+        token: Encoded JWT
+
+    Returns:
+        Expiry as a Unix timestamp, or None if the token has no readable expiry
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+@dataclass
+class AuthSession:
+    """Cached authentication cookies for one set of credentials.
+
+    Attributes:
+        access_token: Current accessToken cookie value
+        refresh_token: refreshToken cookie value
+        access_expires_at: Unix timestamp at which the access token expires
+    """
+
+    access_token: str
+    refresh_token: str
+    access_expires_at: float | None
+
+    def access_valid(self, margin: float) -> bool:
+        """Whether the access token stays valid for at least ``margin`` seconds."""
+        if self.access_expires_at is None:
+            return False
+        return time.time() + margin < self.access_expires_at
+
+
+class AuthSessionCache:
+    """Cache of authenticated cookie sessions keyed by credentials.
+
+    Logging in runs PIN hashing on the server, so tests and load tools that
+    only need *an* authenticated client reuse a cached session instead:
+    a still-valid access token is copied into the client's cookie jar, an
+    expired one is renewed with ``/auth/refresh``, and only when that fails
+    (e.g. the refresh token was revoked by a logout or replaced by another
+    login of the same user) a full ``/auth/login`` is performed.
+
+    Access tokens of the test server expire after a few seconds, so
+    long-running tools ``attach`` the cache to their clients instead of
+    authenticating before every request.
+    """
+
+    def __init__(self, refresh_margin: float = 1.0):
+        """Initialize the cache.
+
+        Args:
+            refresh_margin: Renew access tokens expiring within this many seconds
+        """
+        self.refresh_margin = refresh_margin
+        self._sessions: dict[tuple[str, str], AuthSession] = {}
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+        self.logins = 0
+        self.refreshes = 0
+
+    @staticmethod
+    def _key(credentials: dict) -> tuple[str, str]:
+        return credentials["name"], credentials["pin"]
+
+    async def authenticate(
+        self,
+        client: AmbrosiaHttpClient,
+        credentials: dict = None,
+        rejected: str | None = None,
+    ) -> AuthSession:
+        """Make ``client`` authenticated as ``credentials``, reusing cached tokens.
+
+        Args:
+            client: The HTTP client whose cookie jar receives the tokens
+            credentials: Login credentials dict with 'name' and 'pin'. Defaults
+                to the test user.
+            rejected: Access token the server answered 401 to; renewed even if
+                it has not expired yet
+
+        Returns:
+            The AuthSession now installed in the client
+        """
+        if credentials is None:
+            credentials = DEFAULT_TEST_USER
+        key = self._key(credentials)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+
+        # Serialize renewals per user so concurrent clients share one login
+        async with lock:
+            session = self._sessions.get(key)
+            if session is not None and (
+                session.access_token == rejected
+                or not session.access_valid(self.refresh_margin)
+            ):
+                session = await self._refresh(client, session)
+            if session is None:
+                session = await self._login(client, credentials)
+            self._sessions[key] = session
+
+        set_cookie_in_jar(client, "accessToken", session.access_token)
+        set_cookie_in_jar(client, "refreshToken", session.refresh_token)
+        return session
+
+    async def attach(
+        self, client: AmbrosiaHttpClient, credentials: dict = None
+    ) -> AuthSession:
+        """Authenticate ``client`` and keep it authenticated on every request.
+
+        Before each request an expiring access token is renewed, and a request
+        answered 401 is sent again once with a renewed session.
+
+        Args:
+            client: The HTTP client to keep authenticated
+            credentials: Login credentials dict with 'name' and 'pin'. Defaults
+                to the test user.
+
+        Returns:
+            The AuthSession now installed in the client
+        """
+        credentials = credentials or DEFAULT_TEST_USER
+        client.session_auth = _CachedSessionAuth(self, credentials)
+        return await self.authenticate(client, credentials)
+
+    def invalidate(self, credentials: dict = None) -> None:
+        """Drop the cached session for ``credentials`` (e.g. after a logout)."""
+        self._sessions.pop(self._key(credentials or DEFAULT_TEST_USER), None)
+
+    async def _login(
+        self, client: AmbrosiaHttpClient, credentials: dict
+    ) -> AuthSession:
+        response = await login_user(client, credentials)
+        access_token, refresh_token = get_tokens_from_response(response)
+        self.logins += 1
+        logger.debug(f"Cached new session for {credentials['name']}")
+        return AuthSession(access_token, refresh_token, get_token_expiry(access_token))
+
+    async def _refresh(
+        self, client: AmbrosiaHttpClient, session: AuthSession
+    ) -> AuthSession | None:
+        set_cookie_in_jar(client, "refreshToken", session.refresh_token)
+        response = await client.post("/auth/refresh")
+        access_token = response.cookies.get("accessToken")
+        if response.status_code != 200 or not access_token:
+            logger.debug(f"Cached session refresh failed: {response.status_code}")
+            return None
+        self.refreshes += 1
+        return AuthSession(
+            access_token, session.refresh_token, get_token_expiry(access_token)
+        )
+
+
+@dataclass
+class _CachedSessionAuth:
+    """``SessionAuth`` hook installed by ``AuthSessionCache.attach``."""
+
+    cache: AuthSessionCache
+    credentials: dict
+
+    async def prepare(self, client: AmbrosiaHttpClient) -> None:
+        await self.cache.authenticate(client, self.credentials)
+
+    async def renew(self, client: AmbrosiaHttpClient, response: httpx.Response) -> bool:
+        sent = SimpleCookie(response.request.headers.get("cookie", ""))
+        rejected = sent["accessToken"].value if "accessToken" in sent else None
+        session = await self.cache.authenticate(client, self.credentials, rejected)
+        return session.access_token != rejected
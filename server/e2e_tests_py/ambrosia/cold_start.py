@@ -0,0 +1,316 @@
+"""Cold-start benchmark of the packaged server.
+
+POS terminals reboot often, so the time from launching the server to serving
+staff matters. This module starts the server jar repeatedly on the same home
+directory (database, keystore and phoenix.conf already in place, as on a
+terminal) and timestamps every startup milestone relative to the process
+spawn:
+
+- ``jvm_ready``: ``Ambrosia.run()`` printed its banner (JVM up, CLI parsed)
+- ``port_bound``: the HTTP port accepts connections
+- ``app_started``: Ktor logged "Application started" (every route installed)
+- ``first_ok``: first 200 on ``/``
+- ``first_authenticated``: a login followed by an authenticated request
+  answered 200
+
+Runs can be repeated per set of JVM flags (e.g. with and without an AppCDS
+archive, see ``create_appcds_archive``), and the medians can be appended to a
+JSON history keyed by git commit and compared with the previous commit.
+
+Example:
+    report = run_cold_start_benchmark(runs=5, appcds=True)
+    print(report.format_table())
+"""
+
+import asyncio
+import json
+import logging
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import httpx
+
+from ambrosia.auth_utils import DEFAULT_TEST_USER
+from ambrosia.latency_baseline import get_git_commit
+from ambrosia.seeding import ensure_initial_setup
+from ambrosia.test_server import AmbrosiaTestServer
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("jvm_ready", "port_bound", "app_started", "first_ok", "first_authenticated")
+
+# Authenticated request used for the last milestone
+AUTHENTICATED_PATH = "/users/me"
+
+
+@dataclass
+class ColdStartRun:
+    """Startup milestones of one server launch, in seconds since the spawn.
+
+    Attributes:
+        variant: Name of the JVM flag set
+        run: Run index within the variant
+        phases: Seconds since the spawn per milestone in ``PHASES``; a
+            milestone whose log line did not appear is missing
+    """
+
+    variant: str
+    run: int
+    phases: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class ColdStartReport:
+    """Result of a cold-start benchmark.
+
+    Attributes:
+        runs: Every measured launch
+        variants: JVM flags per variant name
+    """
+
+    runs: list[ColdStartRun]
+    variants: dict[str, list[str]]
+
+    def medians(self, variant: str) -> dict[str, float]:
+        """Median seconds since the spawn per milestone for one variant."""
+        medians = {}
+        for phase in PHASES:
+            values = [
+                run.phases[phase]
+                for run in self.runs
+                if run.variant == variant and phase in run.phases
+            ]
+            if values:
+                medians[phase] = statistics.median(values)
+        return medians
+
+    def format_table(self) -> str:
+        """Render median milestones per variant (seconds since the spawn)."""
+        header = f"{'variant':<16} {'runs':>4} " + " ".join(
+            f"{phase:>19}" for phase in PHASES
+        )
+        lines = [header, "-" * len(header)]
+        for variant in self.variants:
+            medians = self.medians(variant)
+            count = sum(run.variant == variant for run in self.runs)
+            cells = " ".join(
+                f"{medians[phase]:>19.3f}" if phase in medians else f"{'n/a':>19}"
+                for phase in PHASES
+            )
+            lines.append(f"{variant:<16} {count:>4} {cells}")
+        return "\n".join(lines)
+
+
+@dataclass
+class ColdStartRegression:
+    """A milestone that got slower than in the previous recorded commit.
+
+    Attributes:
+        variant: JVM flag set
+        phase: Milestone name
+        previous: Previous median in seconds
+        current: Current median in seconds
+        previous_commit: Commit the previous median was recorded at
+    """
+
+    variant: str
+    phase: str
+    previous: float
+    current: float
+    previous_commit: str
+
+    @property
+    def ratio(self) -> float:
+        """Current over previous median."""
+        return self.current / self.previous if self.previous else float("inf")
+
+
+def _first_authenticated_request(server_url: str) -> None:
+    """Log in and issue one authenticated request, raising unless both succeed.
+
+    Uses a synchronous client so no event loop start-up is counted.
+    """
+    with httpx.Client(base_url=server_url, timeout=30.0) as client:
+        login = client.post("/auth/login", json=DEFAULT_TEST_USER)
+        login.raise_for_status()
+        client.get(AUTHENTICATED_PATH).raise_for_status()
+
+
+def measure_cold_start(
+    server: AmbrosiaTestServer, variant: str, run: int
+) -> ColdStartRun:
+    """Start the server once, record its milestones and stop it again.
+
+    Args:
+        server: Stopped server whose home directory is already initialized
+        variant: Name stored in the result
+        run: Run index stored in the result
+
+    Returns:
+        The launch's milestones
+    """
+    server.start_server()
+    try:
+        _first_authenticated_request(server.server_url)
+        authenticated_at = time.time()
+        spawned_at = server.spawned_at
+        timings = server.startup_timings
+        assert spawned_at is not None, "start_server() records the spawn time"
+        phases = {
+            name: at - spawned_at for name, at in server.output_milestones.items()
+        }
+        if timings.jvm_start is not None:
+            phases["port_bound"] = timings.jvm_start
+            if timings.first_health_check is not None:
+                phases["first_ok"] = timings.jvm_start + timings.first_health_check
+        phases["first_authenticated"] = authenticated_at - spawned_at
+    finally:
+        server.stop_server()
+    result = ColdStartRun(variant, run, {p: phases[p] for p in PHASES if p in phases})
+    logger.info(f"Cold start {variant} #{run}: {result.phases}")
+    return result
+
+
+def create_appcds_archive(server: AmbrosiaTestServer, archive_path: Path) -> Path:
+    """Record an AppCDS archive of the classes loaded through a first request.
+
+    The server runs once with ``-XX:ArchiveClassesAtExit`` (JDK 13+), serves a
+    login and an authenticated request, and writes the archive when it exits.
+
+    Args:
+        server: Stopped server whose home directory is already initialized
+        archive_path: Where to write the archive
+
+    Returns:
+        The archive path
+    """
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    flags = server.jvm_args
+    server.jvm_args = [*flags, f"-XX:ArchiveClassesAtExit={archive_path}"]
+    try:
+        server.start_server()
+        try:
+            _first_authenticated_request(server.server_url)
+        finally:
+            server.stop_server()
+    finally:
+        server.jvm_args = flags
+    if not archive_path.exists():
+        raise RuntimeError(f"The JVM did not write an AppCDS archive to {archive_path}")
+    return archive_path
+
+
+def run_cold_start_benchmark(
+    runs: int = 5,
+    variants: dict[str, list[str]] | None = None,
+    warmup: int = 1,
+    appcds: bool = False,
+) -> ColdStartReport:
+    """Launch the packaged server repeatedly and measure its startup milestones.
+
+    The first launch creates the database, keystore and test business and is
+    not measured. Must be called outside a running event loop.
+
+    Args:
+        runs: Measured launches per variant
+        variants: JVM flags per variant name. Defaults to the plain JVM
+        warmup: Unmeasured launches per variant (page cache, CDS mapping)
+        appcds: Also measure with default CDS disabled ("no-cds") and with an
+            AppCDS archive recorded from this server ("appcds")
+
+    Returns:
+        ColdStartReport with every launch
+    """
+    variants = dict(variants or {"default": []})
+    server = AmbrosiaTestServer(launch_mode="jar", isolated=True)
+    assert server.home_dir is not None, "Isolated servers have a home directory"
+    results = []
+    try:
+        server.start_server()
+        asyncio.run(ensure_initial_setup(server.server_url))
+        server.stop_server()
+
+        if appcds:
+            archive = create_appcds_archive(server, server.home_dir / "ambrosia.jsa")
+            variants.setdefault("no-cds", ["-Xshare:off"])
+            variants.setdefault("appcds", [f"-XX:SharedArchiveFile={archive}"])
+
+        for variant, flags in variants.items():
+            server.jvm_args = list(flags)
+            for i in range(warmup + runs):
+                result = measure_cold_start(server, variant, i - warmup)
+                if i >= warmup:
+                    results.append(result)
+    finally:
+        if server.server_process is not None:
+            server.stop_server()
+        server.cleanup_home_dir()
+
+    report = ColdStartReport(results, variants)
+    logger.info(f"Cold-start benchmark:\n{report.format_table()}")
+    return report
+
+
+def record_cold_start(
+    history_path: Path,
+    report: ColdStartReport,
+    commit: str | None = None,
+    tolerance: float = 0.10,
+) -> list[ColdStartRegression]:
+    """Append the report's medians to a JSON history and compare with the past.
+
+    Each variant is compared with its most recent entry recorded at another
+    commit; milestones more than ``tolerance`` slower are returned.
+
+    Args:
+        history_path: JSON history file, created if missing
+        report: Benchmark result to record
+        commit: Commit to record under. Defaults to the current git commit
+        tolerance: Allowed slowdown as a fraction of the previous median
+
+    Returns:
+        The milestones that regressed
+    """
+    commit = commit or get_git_commit(Path(__file__).parent)
+    history = json.loads(history_path.read_text()) if history_path.exists() else []
+    regressions = []
+    for variant, flags in report.variants.items():
+        medians = report.medians(variant)
+        previous = next(
+            (
+                entry
+                for entry in reversed(history)
+                if entry["variant"] == variant and entry["commit"] != commit
+            ),
+            None,
+        )
+        if previous is not None:
+            for phase, current in medians.items():
+                before = previous["medians"].get(phase)
+                if before and current > before * (1 + tolerance):
+                    regressions.append(
+                        ColdStartRegression(
+                            variant, phase, before, current, previous["commit"]
+                        )
+                    )
+        history.append(
+            {
+                "commit": commit,
+                "recorded_at": time.time(),
+                "variant": variant,
+                "jvm_args": flags,
+                "medians": medians,
+                "runs": [asdict(run) for run in report.runs if run.variant == variant],
+            }
+        )
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    history_path.write_text(json.dumps(history, indent=2))
+    for regression in regressions:
+        logger.warning(
+            f"Cold start {regression.variant} {regression.phase}: "
+            f"{regression.previous:.3f}s -> {regression.current:.3f}s "
+            f"(previous commit {regression.previous_commit[:12]})"
+        )
+    return regressions
@@ -0,0 +1,560 @@
+"""SQLite concurrency stress suite for the server's shared JDBC connection.
+
+Every service shares the single ``Connection`` handed out by
+``DatabaseConnection.getConnection()``, without WAL mode or a busy timeout,
+and multi-statement operations (create an order with dishes, recompute a
+total) are not wrapped in transactions. This module fires a mixed workload of
+concurrent writes and reads at increasing concurrency levels and, after each
+level, checks the database through the API:
+
+- writes answered with ``SQLITE_BUSY``/"database is locked", other 5xx, or an
+  unexpected 4xx (several routes turn database errors into 400s)
+- lost dishes: acknowledged ``POST /orders/{id}/dishes`` rows that are missing
+- lost total updates: an order whose stored total differs from the sum of its
+  dishes once the run is quiet (a stale read-modify-write won the race)
+- interleaved-transaction corruption: orders left behind by failed
+  ``POST /orders/with-dishes`` calls, created orders with the wrong dishes,
+  and acknowledged ticket payments that are not linked
+
+A request that timed out on the client but completed on the server also shows
+up as an orphan order or phantom dish, so check ``ErrorBreakdown.transport``
+before blaming the server.
+
+Example:
+    report = await run_stress(server_url, concurrency_levels=(1, 8, 32, 64))
+    print(report.format_table())
+"""
+
+import asyncio
+import logging
+import random
+import re
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+
+from ambrosia.auth_utils import AuthSessionCache, login_user
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.load import LoadRecorder, LoadReport, run_load, timed_request
+from ambrosia.scenarios import RestaurantData, prepare_restaurant
+from ambrosia.test_server import AmbrosiaTestServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEVELS = (1, 4, 16, 64)
+
+# Relative weights of the operations in the mixed workload
+DEFAULT_MIX = {
+    "create_order": 3,
+    "add_dishes": 3,
+    "calculate_total": 2,
+    "pay": 1,
+    "read": 3,
+}
+
+BUSY_PATTERN = re.compile(r"SQLITE_BUSY|database is locked", re.IGNORECASE)
+
+
+@dataclass
+class _OrderLedger:
+    """What the server acknowledged for one order."""
+
+    dish_prices: list[float] = field(default_factory=list)
+    dish_ids: list[str] = field(default_factory=list)
+    links: list[tuple[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class ErrorBreakdown:
+    """Failed requests of a level, by cause.
+
+    Attributes:
+        busy: Responses mentioning SQLITE_BUSY or a locked database
+        server_errors: Other 5xx responses
+        rejected: Unexpected 4xx responses
+        transport: Requests that raised (timeouts, connection resets)
+        busy_log_lines: Server output lines mentioning SQLITE_BUSY, when the
+            server's output is available
+    """
+
+    busy: int = 0
+    server_errors: int = 0
+    rejected: int = 0
+    transport: int = 0
+    busy_log_lines: int | None = None
+
+    @property
+    def total(self) -> int:
+        """All failed requests."""
+        return self.busy + self.server_errors + self.rejected + self.transport
+
+
+@dataclass
+class IntegrityReport:
+    """Consistency of the data written during a level.
+
+    Attributes:
+        orders_checked: Orders acknowledged during the level
+        missing_orders: Acknowledged orders that cannot be read back
+        orphan_orders: Orders left behind by requests that failed
+        lost_dishes: Acknowledged dishes missing from their order
+        phantom_dishes: Dishes present on an order but never acknowledged
+        stale_totals: Orders whose total differs from the sum of their dishes
+        missing_links: Acknowledged ticket payments that are not linked
+        examples: A few human-readable examples of the problems found
+    """
+
+    orders_checked: int = 0
+    missing_orders: int = 0
+    orphan_orders: int = 0
+    lost_dishes: int = 0
+    phantom_dishes: int = 0
+    stale_totals: int = 0
+    missing_links: int = 0
+    examples: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """Whether no inconsistency was found."""
+        return not (
+            self.missing_orders
+            or self.orphan_orders
+            or self.lost_dishes
+            or self.phantom_dishes
+            or self.stale_totals
+            or self.missing_links
+        )
+
+    def add_example(self, message: str, limit: int = 10) -> None:
+        if len(self.examples) < limit:
+            self.examples.append(message)
+
+
+@dataclass
+class StressLevel:
+    """Result of one concurrency level.
+
+    Attributes:
+        concurrency: Number of concurrent virtual users
+        report: Per-operation load report
+        errors: Failed requests by cause
+        integrity: Consistency checks run after the level
+    """
+
+    concurrency: int
+    report: LoadReport
+    errors: ErrorBreakdown
+    integrity: IntegrityReport
+
+    @property
+    def throughput(self) -> float:
+        """Completed requests per second across all operations."""
+        return self.report.total.throughput
+
+
+@dataclass
+class StressReport:
+    """Result of a stress run across concurrency levels."""
+
+    levels: list[StressLevel]
+
+    @property
+    def ok(self) -> bool:
+        """Whether every level ran without errors and passed the integrity checks."""
+        return all(
+            level.errors.total == 0 and level.integrity.ok for level in self.levels
+        )
+
+    def format_table(self) -> str:
+        """Render throughput, errors and integrity per level."""
+        header = (
+            f"{'users':>5} {'req/s':>8} {'p99 ms':>8} {'busy':>5} {'5xx':>5} "
+            f"{'4xx':>5} {'net':>5} {'lost':>5} {'stale':>5} {'orph':>5} {'links':>5}"
+        )
+        lines = [header, "-" * len(header)]
+        for level in self.levels:
+            errors, integrity = level.errors, level.integrity
+            lines.append(
+                f"{level.concurrency:>5} {level.throughput:>8.1f} "
+                f"{level.report.total.p99 * 1000:>8.1f} {errors.busy:>5} "
+                f"{errors.server_errors:>5} {errors.rejected:>5} "
+                f"{errors.transport:>5} {integrity.lost_dishes:>5} "
+                f"{integrity.stale_totals:>5} {integrity.orphan_orders:>5} "
+                f"{integrity.missing_links:>5}"
+            )
+        for level in self.levels:
+            for example in level.integrity.examples:
+                lines.append(f"[{level.concurrency} users] {example}")
+        return "\n".join(lines)
+
+
+class _StressWorkload:
+    """Mixed write/read workload of one level, recording what was acknowledged."""
+
+    def __init__(
+        self,
+        restaurant: RestaurantData,
+        user_id: str,
+        waiter: str,
+        hot_order_ids: list[str],
+        mix: dict[str, float],
+        rng: random.Random,
+        auth: AuthSessionCache,
+    ):
+        self.restaurant = restaurant
+        self.user_id = user_id
+        self.waiter = waiter
+        self.mix = mix
+        self.rng = rng
+        self.auth = auth
+        self.errors = ErrorBreakdown()
+        self.orders: dict[str, _OrderLedger] = {
+            oid: _OrderLedger() for oid in hot_order_ids
+        }
+        self.hot_order_ids = hot_order_ids
+        self.created_order_ids: list[str] = []
+
+    async def setup(self, client: AmbrosiaHttpClient) -> None:
+        await self.auth.attach(client, self.restaurant.credentials)
+
+    async def action(self, client: AmbrosiaHttpClient, recorder: LoadRecorder) -> None:
+        operation = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        await getattr(self, f"_{operation}")(client, recorder)
+
+    async def _request(
+        self,
+        client: AmbrosiaHttpClient,
+        recorder: LoadRecorder,
+        method: str,
+        url: str,
+        route: str,
+        expected: tuple[int, ...],
+        **kwargs,
+    ) -> httpx.Response | None:
+        response = await timed_request(
+            client,
+            recorder,
+            method,
+            url,
+            route=route,
+            expected_status=expected,
+            **kwargs,
+        )
+        if response is None:
+            self.errors.transport += 1
+        elif response.status_code not in expected:
+            if BUSY_PATTERN.search(response.text):
+                self.errors.busy += 1
+            elif response.status_code >= 500:
+                self.errors.server_errors += 1
+            else:
+                self.errors.rejected += 1
+            logger.debug(f"{route}: {response.status_code} {response.text[:200]}")
+            return None
+        return response
+
+    def _pick_dishes(self, count: int) -> list[dict]:
+        return [self.rng.choice(self.restaurant.dishes) for _ in range(count)]
+
+    async def _create_order(
+        self, client: AmbrosiaHttpClient, recorder: LoadRecorder
+    ) -> None:
+        dishes = self._pick_dishes(self.rng.randint(1, 3))
+        response = await self._request(
+            client,
+            recorder,
+            "POST",
+            "/orders/with-dishes",
+            "POST /orders/with-dishes",
+            (201,),
+            json={
+                "order": {
+                    "user_id": self.user_id,
+                    "waiter": self.waiter,
+                    "status": "open",
+                    "total": 0.0,
+                    "created_at": "",
+                },
+                "dishes": [
+                    {
+                        "order_id": "",
+                        "dish_id": dish["id"],
+                        "price_at_order": dish["price"],
+                        "status": "pending",
+                        "should_prepare": True,
+                    }
+                    for dish in dishes
+                ],
+            },
+        )
+        if response is not None:
+            order_id = response.json()["id"]
+            self.orders[order_id] = _OrderLedger(
+                dish_prices=[dish["price"] for dish in dishes],
+                dish_ids=[dish["id"] for dish in dishes],
+            )
+            self.created_order_ids.append(order_id)
+
+    async def _add_dishes(
+        self, client: AmbrosiaHttpClient, recorder: LoadRecorder
+    ) -> None:
+        # Hot orders concentrate concurrent read-modify-writes on few rows
+        order_id = self.rng.choice(self.hot_order_ids)
+        dishes = self._pick_dishes(self.rng.randint(1, 2))
+        response = await self._request(
+            client,
+            recorder,
+            "POST",
+            f"/orders/{order_id}/dishes",
+            "POST /orders/{id}/dishes",
+            (201,),
+            json=[
+                {"dish_id": dish["id"], "price_at_order": dish["price"], "notes": None}
+                for dish in dishes
+            ],
+        )
+        if response is not None:
+            ledger = self.orders[order_id]
+            ledger.dish_prices += [dish["price"] for dish in dishes]
+            ledger.dish_ids += [dish["id"] for dish in dishes]
+
+    async def _calculate_total(
+        self, client: AmbrosiaHttpClient, recorder: LoadRecorder
+    ) -> None:
+        order_id = self.rng.choice(self.hot_order_ids)
+        await self._request(
+            client,
+            recorder,
+            "PUT",
+            f"/orders/{order_id}/calculate-total",
+            "PUT /orders/{id}/calculate-total",
+            (200,),
+        )
+
+    async def _pay(self, client: AmbrosiaHttpClient, recorder: LoadRecorder) -> None:
+        if not self.created_order_ids:
+            return
+        order_id = self.rng.choice(self.created_order_ids)
+        amount = round(sum(self.orders[order_id].dish_prices), 2)
+        ticket = await self._request(
+            client,
+            recorder,
+            "POST",
+            "/tickets",
+            "POST /tickets",
+            (201,),
+            json={
+                "order_id": order_id,
+                "user_id": self.user_id,
+                "ticket_date": "",
+                "status": 1,
+                "total_amount": amount,
+                "notes": "",
+            },
+        )
+        payment = await self._request(
+            client,
+            recorder,
+            "POST",
+            "/payments",
+            "POST /payments",
+            (201,),
+            json={
+                "method_id": self.restaurant.payment_method_id,
+                "currency_id": self.restaurant.currency_id,
+                "transaction_id": uuid.uuid4().hex,
+                "amount": amount,
+            },
+        )
+        if ticket is None or payment is None:
+            return
+        ticket_id = ticket.json()["id"]
+        payment_id = payment.json()["id"]
+        link = await self._request(
+            client,
+            recorder,
+            "POST",
+            "/payments/ticket-payments",
+            "POST /payments/ticket-payments",
+            (201,),
+            json={"payment_id": payment_id, "ticket_id": ticket_id},
+        )
+        if link is not None:
+            self.orders[order_id].links.append((ticket_id, payment_id))
+
+    async def _read(self, client: AmbrosiaHttpClient, recorder: LoadRecorder) -> None:
+        order_id = self.rng.choice([*self.hot_order_ids, *self.created_order_ids])
+        url, route = self.rng.choice(
+            [
+                (f"/orders/{order_id}", "GET /orders/{id}"),
+                (f"/orders/{order_id}/dishes", "GET /orders/{id}/dishes"),
+                ("/orders?limit=100", "GET /orders?limit"),
+            ]
+        )
+        await self._request(client, recorder, "GET", url, route, (200, 204))
+
+
+async def _create_hot_orders(
+    client: AmbrosiaHttpClient, user_id: str, waiter: str, count: int
+) -> list[str]:
+    ids = []
+    for _ in range(count):
+        response = await client.post(
+            "/orders",
+            json={
+                "user_id": user_id,
+                "waiter": waiter,
+                "status": "open",
+                "total": 0.0,
+                "created_at": "",
+            },
+        )
+        response.raise_for_status()
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def check_integrity(
+    client: AmbrosiaHttpClient, workload: _StressWorkload, concurrency: int = 8
+) -> IntegrityReport:
+    """Compare the acknowledged writes of a level with what the server stores."""
+    report = IntegrityReport(orders_checked=len(workload.orders))
+    semaphore = asyncio.Semaphore(concurrency)
+    await workload.auth.attach(client, workload.restaurant.credentials)
+
+    async def check_order(order_id: str, ledger: _OrderLedger) -> None:
+        async with semaphore:
+            order = await client.get(f"/orders/{order_id}")
+            dishes = await client.get(f"/orders/{order_id}/dishes")
+            links = [
+                await client.get(f"/payments/ticket-payments/by-ticket/{ticket_id}")
+                for ticket_id, _ in ledger.links
+            ]
+        if order.status_code != 200:
+            report.missing_orders += 1
+            report.add_example(f"order {order_id} missing ({order.status_code})")
+            return
+
+        stored = dishes.json() if dishes.status_code == 200 else []
+        stored_ids = Counter(dish["dish_id"] for dish in stored)
+        acknowledged = Counter(ledger.dish_ids)
+        lost = sum((acknowledged - stored_ids).values())
+        phantom = sum((stored_ids - acknowledged).values())
+        report.lost_dishes += lost
+        report.phantom_dishes += phantom
+        if lost or phantom:
+            report.add_example(
+                f"order {order_id}: {lost} lost and {phantom} phantom dishes"
+            )
+
+        total = order.json()["total"]
+        expected_total = sum(dish["price_at_order"] for dish in stored)
+        if abs(total - expected_total) > 0.005:
+            report.stale_totals += 1
+            report.add_example(
+                f"order {order_id}: stored total {total:.2f}, "
+                f"dishes sum to {expected_total:.2f}"
+            )
+
+        for (ticket_id, payment_id), response in zip(ledger.links, links, strict=True):
+            linked = response.json() if response.status_code == 200 else []
+            if not any(link.get("payment_id") == payment_id for link in linked):
+                report.missing_links += 1
+                report.add_example(f"payment {payment_id} not linked to {ticket_id}")
+
+    await asyncio.gather(
+        *(check_order(oid, led) for oid, led in workload.orders.items())
+    )
+
+    # Orders of this level that no successful request accounts for
+    async for page in client.paginate("/orders", page_size=1000):
+        for order in page:
+            if (
+                order["waiter"] == workload.waiter
+                and order["id"] not in workload.orders
+            ):
+                report.orphan_orders += 1
+                report.add_example(f"orphan order {order['id']} from a failed request")
+    return report
+
+
+async def run_stress(
+    base_url: str,
+    concurrency_levels: tuple[int, ...] = DEFAULT_LEVELS,
+    duration: float = 10.0,
+    hot_orders: int = 4,
+    mix: dict[str, float] | None = None,
+    seed: int | None = None,
+    server: AmbrosiaTestServer | None = None,
+    restaurant: RestaurantData | None = None,
+    auth: AuthSessionCache | None = None,
+) -> StressReport:
+    """Run the mixed workload at each concurrency level and check integrity.
+
+    Args:
+        base_url: Base URL of the server
+        concurrency_levels: Concurrent virtual users per level, run in order
+        duration: Seconds of load per level
+        hot_orders: Orders per level that all users add dishes to and total
+        mix: Relative operation weights (keys of ``DEFAULT_MIX``)
+        seed: Random seed for the operation sequence
+        server: Test server whose output is scanned for SQLITE_BUSY lines
+        restaurant: Menu and payment settings. Defaults to a new menu
+        auth: Session cache the virtual users authenticate with, e.g. the
+            ``auth_sessions`` fixture. Defaults to a new one
+
+    Returns:
+        StressReport with throughput, errors and integrity per level
+    """
+    restaurant = restaurant or await prepare_restaurant(base_url)
+    auth = auth or AuthSessionCache()
+    rng = random.Random(seed)
+    run_id = uuid.uuid4().hex[:8]
+    levels = []
+
+    async with AmbrosiaHttpClient(base_url) as client:
+        login = await login_user(client, restaurant.credentials)
+        user_id = login.json()["user"]["user_id"]
+        await auth.attach(client, restaurant.credentials)
+
+        for concurrency in concurrency_levels:
+            waiter = f"stress-{run_id}-{concurrency}"
+            hot_order_ids = await _create_hot_orders(
+                client, user_id, waiter, hot_orders
+            )
+            workload = _StressWorkload(
+                restaurant,
+                user_id,
+                waiter,
+                hot_order_ids,
+                mix or DEFAULT_MIX,
+                rng,
+                auth,
+            )
+            report = await run_load(
+                base_url,
+                workload.action,
+                virtual_users=concurrency,
+                duration=duration,
+                setup=workload.setup,
+            )
+
+            # Fresh client: its cookie jar only ever holds the cached session
+            async with AmbrosiaHttpClient(base_url) as checker:
+                integrity = await check_integrity(checker, workload)
+            if server is not None:
+                workload.errors.busy_log_lines = sum(
+                    1 for line in server.recent_output() if BUSY_PATTERN.search(line)
+                )
+            level = StressLevel(concurrency, report, workload.errors, integrity)
+            levels.append(level)
+            logger.info(
+                f"{concurrency} users: {level.throughput:.1f} req/s, "
+                f"{workload.errors.total} errors, integrity ok: {integrity.ok}"
+            )
+
+    result = StressReport(levels)
+    logger.info(f"SQLite stress:\n{result.format_table()}")
+    return result
@@ -0,0 +1,508 @@
+"""In-process phoenixd stand-in for wallet and webhook tests.
+
+The server talks to phoenixd over HTTP (``PhoenixService``) and receives
+payment notifications through signed webhooks. ``FakePhoenixd`` speaks the
+same endpoints with an in-memory wallet, so every ``/wallet/*`` route can be
+exercised and benchmarked offline. Latency, jitter and error rates can be
+injected per route to measure how a slow upstream node affects checkout
+latency and Ktor worker saturation.
+
+Example:
+    with FakePhoenixd(port=9740, server_url=server_url) as phoenixd:
+        with phoenixd.faults(latency=0.2, jitter=0.05, error_rate=0.1):
+            ...  # drive /wallet/* routes
+        await phoenixd.settle_invoice(payment_hash)  # signed webhook
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.test_server import AmbrosiaTestServer
+from ambrosia.webhook_utils import build_payment_received_payload, post_webhook
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PhoenixFaults:
+    """Faults injected into every matching phoenixd response.
+
+    Attributes:
+        latency: Base delay added before responding, in seconds
+        jitter: Extra uniformly distributed delay in ``[0, jitter]`` seconds
+        error_rate: Probability (0.0-1.0) of answering with ``error_status``
+        error_status: HTTP status used for injected errors
+        routes: Route names (e.g. ``"createinvoice"``) the faults apply to.
+            None applies them to every route
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    routes: frozenset[str] | None = None
+
+    def applies_to(self, route: str) -> bool:
+        """Whether the faults apply to the given route name."""
+        return self.routes is None or route in self.routes
+
+
+class FakePhoenixd:
+    """Threaded HTTP server emulating the phoenixd API used by ``PhoenixService``.
+
+    Requests must carry HTTP basic auth with an empty user and the configured
+    password; unauthenticated requests get the ``401`` challenge Ktor's basic
+    auth provider expects before it sends credentials.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        password: str = AmbrosiaTestServer.PHOENIXD_PASSWORD,
+        server_url: str | None = None,
+        webhook_secret: str = AmbrosiaTestServer.PHOENIXD_WEBHOOK_SECRET,
+        balance_sat: int = 1_000_000,
+        seed: int | None = None,
+    ):
+        """Initialize the fake node.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind. 0 picks a free port
+            password: phoenixd ``http-password`` expected in basic auth
+            server_url: Base URL of the Ambrosia server receiving webhooks
+            webhook_secret: Secret used to sign webhooks
+            balance_sat: Initial wallet balance in satoshis
+            seed: Seed for the latency and error injection random generator
+        """
+        self.host = host
+        self.port = port
+        self.password = password
+        self.server_url = server_url
+        self.webhook_secret = webhook_secret
+        self.balance_sat = balance_sat
+        self.node_id = "02" + hashlib.sha256(b"fake-phoenixd").hexdigest()
+        self.requests: Counter[str] = Counter()
+        self.injected_errors: Counter[str] = Counter()
+        self.incoming: dict[str, dict] = {}
+        self.outgoing: dict[str, dict] = {}
+        self._faults = PhoenixFaults()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to the server's ``--phoenixd-url``."""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> None:
+        """Start serving in a background thread."""
+        if self._httpd is not None:
+            logger.warning("Fake phoenixd is already running")
+            return
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fake-phoenixd", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Fake phoenixd listening on {self.url}")
+
+    def stop(self) -> None:
+        """Stop the server and wait for the serving thread."""
+        if self._httpd is None:
+            return
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._httpd = None
+        self._thread = None
+        logger.info("Fake phoenixd stopped")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def set_faults(self, **kwargs) -> None:
+        """Replace the injected faults (see ``PhoenixFaults`` for the fields)."""
+        routes = kwargs.get("routes")
+        if routes is not None:
+            kwargs["routes"] = frozenset(routes)
+        self._faults = PhoenixFaults(**kwargs)
+
+    @contextmanager
+    def faults(self, **kwargs) -> Iterator[PhoenixFaults]:
+        """Inject faults for the duration of a ``with`` block."""
+        previous = self._faults
+        self.set_faults(**kwargs)
+        try:
+            yield self._faults
+        finally:
+            self._faults = previous
+
+    def reset(self) -> None:
+        """Clear faults, counters and recorded payments."""
+        with self._lock:
+            self._faults = PhoenixFaults()
+            self.requests.clear()
+            self.injected_errors.clear()
+            self.incoming.clear()
+            self.outgoing.clear()
+
+    def create_invoice(
+        self,
+        description: str,
+        amount_sat: int | None = None,
+        external_id: str | None = None,
+        expiry_seconds: int | None = None,
+    ) -> dict:
+        """Create an unpaid incoming payment and return the phoenixd response."""
+        payment_hash = secrets.token_hex(32)
+        serialized = f"lnbcrt{amount_sat or 0}n1p{secrets.token_hex(40)}"
+        now = _now_ms()
+        with self._lock:
+            self.incoming[payment_hash] = {
+                "type": "incoming_payment",
+                "subType": "lightning",
+                "paymentHash": payment_hash,
+                "externalId": external_id,
+                "description": description,
+                "invoice": serialized,
+                "isPaid": False,
+                "isExpired": False,
+                "requestedSat": amount_sat,
+                "receivedSat": 0,
+                "fees": 0,
+                "expiresAt": now + (expiry_seconds or 3600) * 1000,
+                "createdAt": now,
+            }
+        return {
+            "amountSat": amount_sat,
+            "paymentHash": payment_hash,
+            "serialized": serialized,
+        }
+
+    def mark_paid(self, payment_hash: str, amount_sat: int | None = None) -> dict:
+        """Mark an incoming payment as received (creating it if unknown).
+
+        Args:
+            payment_hash: Hash of the invoice being paid
+            amount_sat: Amount received. Defaults to the requested amount
+
+        Returns:
+            The updated incoming payment
+        """
+        with self._lock:
+            payment = self.incoming.get(payment_hash)
+            if payment is None:
+                payment = self.incoming[payment_hash] = {
+                    "type": "incoming_payment",
+                    "subType": "lightning",
+                    "paymentHash": payment_hash,
+                    "isPaid": False,
+                    "receivedSat": 0,
+                    "fees": 0,
+                    "createdAt": _now_ms(),
+                }
+            received = amount_sat or payment.get("requestedSat") or 0
+            payment.update(
+                isPaid=True,
+                receivedSat=received,
+                preimage=secrets.token_hex(32),
+                completedAt=_now_ms(),
+            )
+            self.balance_sat += received
+            return dict(payment)
+
+    async def settle_invoice(
+        self, payment_hash: str, amount_sat: int | None = None
+    ) -> httpx.Response:
+        """Mark an invoice paid and send the signed webhook phoenixd would send.
+
+        Args:
+            payment_hash: Hash of the invoice being paid
+            amount_sat: Amount received. Defaults to the requested amount
+
+        Returns:
+            The server's response to ``POST /webhook/phoenixd``
+        """
+        if self.server_url is None:
+            raise RuntimeError("FakePhoenixd needs a server_url to send webhooks")
+        payment = self.mark_paid(payment_hash, amount_sat)
+        payload = build_payment_received_payload(
+            amount_sat=payment["receivedSat"],
+            payment_hash=payment_hash,
+            external_id=payment.get("externalId"),
+        )
+        async with AmbrosiaHttpClient(self.server_url) as client:
+            return await post_webhook(client, payload, self.webhook_secret)
+
+    def send_payment(self, amount_sat: int, payment_hash: str | None = None) -> dict:
+        """Record an outgoing payment and return the phoenixd payment response."""
+        payment_id = secrets.token_hex(16)
+        payment_hash = payment_hash or secrets.token_hex(32)
+        preimage = secrets.token_hex(32)
+        fee = max(1, amount_sat // 250)
+        now = _now_ms()
+        with self._lock:
+            self.balance_sat -= amount_sat + fee
+            self.outgoing[payment_id] = {
+                "type": "outgoing_payment",
+                "subType": "lightning",
+                "paymentId": payment_id,
+                "paymentHash": payment_hash,
+                "preimage": preimage,
+                "isPaid": True,
+                "sent": amount_sat + fee,
+                "fees": fee * 1000,
+                "completedAt": now,
+                "createdAt": now,
+            }
+        return {
+            "recipientAmountSat": amount_sat,
+            "routingFeeSat": fee,
+            "paymentId": payment_id,
+            "paymentHash": payment_hash,
+            "paymentPreimage": preimage,
+        }
+
+    def _draw_fault(self, route: str) -> tuple[float, int | None]:
+        """Pick the delay and the injected error status (if any) for one request."""
+        faults = self._faults
+        if not faults.applies_to(route):
+            return 0.0, None
+        with self._lock:
+            delay = faults.latency + self._rng.uniform(0.0, faults.jitter)
+            fail = self._rng.random() < faults.error_rate
+        return delay, faults.error_status if fail else None
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _list_payments(payments: list[dict], query: dict[str, str]) -> list[dict]:
+    """Apply phoenixd's from/to/limit/offset/all filters to a payment list."""
+    start = int(query.get("from", 0))
+    end = int(query["to"]) if "to" in query else None
+    limit = int(query.get("limit", 20))
+    offset = int(query.get("offset", 0))
+    include_unpaid = query.get("all") == "true"
+    external_id = query.get("externalId")
+
+    selected = [
+        p
+        for p in sorted(payments, key=lambda p: p["createdAt"], reverse=True)
+        if p["createdAt"] >= start
+        and (end is None or p["createdAt"] <= end)
+        and (include_unpaid or p["isPaid"])
+        and (external_id is None or p.get("externalId") == external_id)
+    ]
+    return selected[offset : offset + limit]
+
+
+# (method, pattern, route name) for every endpoint PhoenixService calls
+_ROUTES = [
+    ("GET", re.compile(r"^/getinfo$"), "getinfo"),
+    ("GET", re.compile(r"^/getbalance$"), "getbalance"),
+    ("POST", re.compile(r"^/createinvoice$"), "createinvoice"),
+    ("POST", re.compile(r"^/createoffer$"), "createoffer"),
+    ("POST", re.compile(r"^/payinvoice$"), "payinvoice"),
+    ("POST", re.compile(r"^/payoffer$"), "payoffer"),
+    ("POST", re.compile(r"^/payonchain$"), "payonchain"),
+    ("POST", re.compile(r"^/bumpfee$"), "bumpfee"),
+    ("GET", re.compile(r"^/payments/incoming$"), "payments/incoming"),
+    ("GET", re.compile(r"^/payments/incoming/(?P<id>[^/]+)$"), "payments/incoming/id"),
+    ("GET", re.compile(r"^/payments/outgoing$"), "payments/outgoing"),
+    ("GET", re.compile(r"^/payments/outgoing/(?P<id>[^/]+)$"), "payments/outgoing/id"),
+    (
+        "GET",
+        re.compile(r"^/payments/outgoingbyhash/(?P<id>[^/]+)$"),
+        "payments/outgoingbyhash/id",
+    ),
+]
+
+
+def _match_route(method: str, path: str) -> tuple[str | None, re.Match | None]:
+    """Find the route name and path match for a request."""
+    for route_method, pattern, route in _ROUTES:
+        match = pattern.match(path)
+        if match and route_method == method:
+            return route, match
+    return None, None
+
+
+def _make_handler(node: FakePhoenixd) -> type[BaseHTTPRequestHandler]:
+    """Build a request handler class bound to a fake node."""
+    expected_auth = "Basic " + base64.b64encode(f":{node.password}".encode()).decode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # noqa: A002 - stdlib signature
+            logger.debug(f"fake phoenixd: {format % args}")
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def _dispatch(self, method: str) -> None:
+            parts = urlsplit(self.path)
+            query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode() if length else ""
+            form = {k: v[-1] for k, v in parse_qs(body).items()}
+
+            if self.headers.get("Authorization") != expected_auth:
+                self._reply(
+                    401,
+                    "Unauthorized",
+                    headers={"WWW-Authenticate": 'Basic realm="phoenixd"'},
+                )
+                return
+
+            route, match = _match_route(method, parts.path)
+            if route is None:
+                self._reply(404, "Not found")
+                return
+
+            with node._lock:
+                node.requests[route] += 1
+            delay, error_status = node._draw_fault(route)
+            if delay > 0:
+                time.sleep(delay)
+            if error_status is not None:
+                with node._lock:
+                    node.injected_errors[route] += 1
+                self._reply(error_status, "Injected phoenixd error")
+                return
+
+            try:
+                status, payload = self._handle(route, match.groupdict(), query, form)
+            except (KeyError, ValueError) as e:
+                status, payload = 400, f"Invalid request: {e}"
+            self._reply(status, payload)
+
+        def _handle(
+            self, route: str, params: dict, query: dict, form: dict
+        ) -> tuple[int, object]:
+            if route == "getinfo":
+                return 200, {
+                    "nodeId": node.node_id,
+                    "channels": [
+                        {
+                            "state": "Normal",
+                            "channelId": hashlib.sha256(b"channel").hexdigest(),
+                            "balanceSat": node.balance_sat,
+                            "inboundLiquiditySat": 2_000_000,
+                            "capacitySat": node.balance_sat + 2_000_000,
+                            "fundingTxId": hashlib.sha256(b"funding").hexdigest(),
+                        }
+                    ],
+                    "chain": "regtest",
+                    "blockHeight": 800_000,
+                    "version": "fake-0.1",
+                }
+            if route == "getbalance":
+                return 200, {"balanceSat": node.balance_sat, "feeCreditSat": 0}
+            if route == "createinvoice":
+                amount = form.get("amountSat")
+                expiry = form.get("expirySeconds")
+                return 200, node.create_invoice(
+                    form["description"],
+                    amount_sat=int(amount) if amount else None,
+                    external_id=form.get("externalId"),
+                    expiry_seconds=int(expiry) if expiry else None,
+                )
+            if route == "createoffer":
+                return 200, f"lno1{secrets.token_hex(48)}"
+            if route in ("payinvoice", "payoffer", "payonchain"):
+                return 200, node.send_payment(int(form.get("amountSat") or 1000))
+            if route == "bumpfee":
+                return 200, secrets.token_hex(32)
+            if route == "payments/incoming":
+                with node._lock:
+                    payments = list(node.incoming.values())
+                return 200, _list_payments(payments, query)
+            if route == "payments/outgoing":
+                with node._lock:
+                    payments = list(node.outgoing.values())
+                return 200, _list_payments(payments, query)
+            if route == "payments/incoming/id":
+                payment = node.incoming.get(params["id"])
+            elif route == "payments/outgoing/id":
+                payment = node.outgoing.get(params["id"])
+            else:
+                with node._lock:
+                    payments = list(node.outgoing.values())
+                payment = next(
+                    (p for p in payments if p["paymentHash"] == params["id"]), None
+                )
+            if payment is None:
+                return 404, "Payment not found"
+            return 200, payment
+
+        def _reply(
+            self, status: int, payload: object, headers: dict | None = None
+        ) -> None:
+            if isinstance(payload, str):
+                body = payload.encode()
+                content_type = "text/plain; charset=utf-8"
+            else:
+                body = json.dumps(payload).encode()
+                content_type = "application/json"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+@pytest.fixture(scope="session")
+def fake_phoenixd(test_server: AmbrosiaTestServer) -> FakePhoenixd:
+    """Session-scoped fake phoenixd listening where the test server expects it.
+
+    Faults and recorded payments are shared across tests; use
+    ``fake_phoenixd.faults(...)`` to inject latency or errors temporarily.
+    """
+    node = FakePhoenixd(
+        host=test_server.host,
+        port=test_server.phoenixd_port,
+        password=test_server.PHOENIXD_PASSWORD,
+        server_url=test_server.server_url,
+        webhook_secret=test_server.PHOENIXD_WEBHOOK_SECRET,
+    )
+    node.start()
+    yield node
+    node.stop()
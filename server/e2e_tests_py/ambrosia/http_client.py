@@ -2,14 +2,383 @@
 
 This module provides HTTP client functionality that replicates the behavior
 of the Ktor HttpClient used in the Kotlin tests.
+
+Clients can optionally share a ``SharedConnectionPool`` so that many short-lived
+clients (one per test or per virtual user) reuse the same keep-alive
+connections while still keeping their own cookie jar.
+
+Request observers (``add_request_observer``) are notified of the latency of
+every response received by any client, e.g. to build latency baselines.
+
+Large list endpoints can be consumed page by page (``paginate`` for the
+``limit``/``cursor`` routes, ``paginate_offset`` for the ``limit``/``offset``
+wallet routes) or, for unpaginated routes, streamed and parsed item by item
+(``stream_json_array``), so client memory stays flat whatever the history size.
+
+Files are uploaded with ``upload``, which streams them from disk as a
+``multipart/form-data`` body (``MultipartFileStream``) without reading whole
+files into memory.
+
+When the server runs with ``--server-timing``, the per-phase durations of its
+``Server-Timing`` header (auth, perm, db, phoenix, serialize, total) are parsed
+and attached to every response; read them with ``server_timing(response)``.
+
+A client can keep itself authenticated through a ``SessionAuth`` hook (see
+``AuthSessionCache.attach``): it renews the access token before a request once
+it is about to expire and retries a request once after a ``401``.
 """
 
+import asyncio
+import codecs
+import json
 import logging
+import mimetypes
+import re
+import secrets
+import time
+from collections.abc import AsyncIterator, Callable, Sequence
+from pathlib import Path
+from typing import Any, Protocol
 
 import httpx
 
 logger = logging.getLogger(__name__)
 
+# Called with (method, url, status_code, seconds) for every response
+RequestObserver = Callable[[str, httpx.URL, int, float], None]
+
+_request_observers: list[RequestObserver] = []
+_START_EXTENSION = "ambrosia_start"
+
+# Response header carrying the cursor of the next page of a paginated list
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+SERVER_TIMING_HEADER = "Server-Timing"
+_SERVER_TIMING_EXTENSION = "ambrosia_server_timing"
+
+
+class SessionAuth(Protocol):
+    """Keeps an ``AmbrosiaHttpClient`` authenticated.
+
+    Not called for ``/auth/`` routes, which the hook itself uses to log in.
+    """
+
+    async def prepare(self, client: "AmbrosiaHttpClient") -> None:
+        """Install valid session cookies in ``client`` before a request."""
+
+    async def renew(
+        self, client: "AmbrosiaHttpClient", response: httpx.Response
+    ) -> bool:
+        """Renew the session after ``response`` was a 401.
+
+        Returns:
+            True if the request should be sent again
+        """
+
+
+def add_request_observer(observer: RequestObserver) -> None:
+    """Register a callback notified of every response's latency."""
+    _request_observers.append(observer)
+
+
+def remove_request_observer(observer: RequestObserver) -> None:
+    """Unregister a callback added with ``add_request_observer``."""
+    if observer in _request_observers:
+        _request_observers.remove(observer)
+
+
+async def _mark_request_start(request: httpx.Request) -> None:
+    request.extensions[_START_EXTENSION] = time.perf_counter()
+
+
+async def _notify_request_observers(response: httpx.Response) -> None:
+    # Latency until the response headers arrived, before the body is read
+    start = response.request.extensions.get(_START_EXTENSION)
+    if start is None or not _request_observers:
+        return
+    seconds = time.perf_counter() - start
+    request = response.request
+    for observer in list(_request_observers):
+        observer(request.method, request.url, response.status_code, seconds)
+
+
+def parse_server_timing(values: str | list[str]) -> dict[str, float]:
+    """Parse ``Server-Timing`` header values into phase durations in seconds.
+
+    Metrics without a ``dur`` parameter are ignored; repeated metrics are summed.
+
+    Args:
+        values: One header value or every value of a repeated header
+
+    Returns:
+        Mapping of metric name to duration in seconds, e.g. {"db": 0.0031}
+    """
+    if isinstance(values, str):
+        values = [values]
+    phases: dict[str, float] = {}
+    for value in values:
+        for metric in value.split(","):
+            name, *params = (part.strip() for part in metric.split(";"))
+            for param in params:
+                key, _, raw = param.partition("=")
+                if key.strip().lower() != "dur":
+                    continue
+                try:
+                    duration = float(raw.strip().strip('"')) / 1000
+                except ValueError:
+                    break
+                phases[name] = phases.get(name, 0.0) + duration
+                break
+    return phases
+
+
+def server_timing(response: httpx.Response) -> dict[str, float]:
+    """Return the server's per-phase durations (seconds) attached to a response.
+
+    Empty unless the server runs with ``--server-timing``.
+    """
+    phases = response.extensions.get(_SERVER_TIMING_EXTENSION)
+    if phases is None:
+        phases = parse_server_timing(response.headers.get_list(SERVER_TIMING_HEADER))
+    return phases
+
+
+async def _attach_server_timing(response: httpx.Response) -> None:
+    values = response.headers.get_list(SERVER_TIMING_HEADER)
+    if values:
+        response.extensions[_SERVER_TIMING_EXTENSION] = parse_server_timing(values)
+
+
+_WHITESPACE = re.compile(r"\s*")
+
+
+class JsonArrayStreamParser:
+    """Incremental parser for a JSON array received in chunks.
+
+    Only the unparsed tail of the body is buffered: complete items are
+    returned as soon as their closing byte arrives.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+        # Whether the next token is a separator (after an item) or an item
+        # (after a comma); right after "[" either an item or "]" may follow
+        self._expect_separator = False
+        self._after_comma = False
+
+    def feed(self, chunk: bytes, final: bool = False) -> list[Any]:
+        """Parse a chunk of the body.
+
+        Args:
+            chunk: Next bytes of the body
+            final: Whether this is the last chunk
+
+        Returns:
+            The items completed by this chunk
+
+        Raises:
+            ValueError: If the body is not a JSON array, is malformed (e.g. a
+                missing or extra comma) or is truncated
+        """
+        buffer = self._buffer + self._text.decode(chunk, final)
+        items = []
+        pos = 0
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if self._finished:
+                raise ValueError("Unexpected data after the JSON array")
+            if not self._started:
+                if char != "[":
+                    raise ValueError("Response body is not a JSON array")
+                self._started = True
+                pos += 1
+            elif char == "]":
+                if self._after_comma:
+                    raise ValueError("Trailing ',' in JSON array")
+                self._finished = True
+                pos += 1
+            elif char == ",":
+                if not self._expect_separator:
+                    raise ValueError("Unexpected ',' in JSON array")
+                self._expect_separator = False
+                self._after_comma = True
+                pos += 1
+            elif self._expect_separator:
+                raise ValueError("Missing ',' between JSON array items")
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                # A number at the end of the buffer may continue in the next chunk
+                if end == len(buffer) and not final:
+                    break
+                items.append(item)
+                self._expect_separator = True
+                self._after_comma = False
+                pos = end
+        self._buffer = buffer[pos:]
+        if final and self._started and not self._finished:
+            raise ValueError("Truncated JSON array")
+        return items
+
+
+class MultipartFileStream:
+    """A ``multipart/form-data`` request body streamed from files on disk.
+
+    Files are read ``chunk_size`` bytes at a time while the body is sent, so
+    memory stays flat whatever their size. Reads run in a worker thread so
+    they do not block the event loop. The exact Content-Length is known
+    up front, so the request is not sent with chunked transfer encoding.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str | Path],
+        field: str = "file",
+        chunk_size: int = 64 * 1024,
+        rate: float | None = None,
+    ):
+        """Initialize the body.
+
+        Args:
+            paths: Files to send, one part each
+            field: Form field name of every part
+            chunk_size: Bytes read from disk per chunk
+            rate: Optional upload rate limit in bytes per second
+        """
+        self.paths = [Path(path) for path in paths]
+        self.field = field
+        self.chunk_size = chunk_size
+        self.rate = rate
+        self.boundary = secrets.token_hex(16)
+        self._headers = [self._part_header(path) for path in self.paths]
+        self._closing = f"--{self.boundary}--\r\n".encode()
+
+    def _part_header(self, path: Path) -> bytes:
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        filename = path.name.replace('"', "%22")
+        return (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{self.field}"; '
+            f'filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+
+    @property
+    def content_type(self) -> str:
+        """Value of the request's Content-Type header."""
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def content_length(self) -> int:
+        """Exact size of the encoded body in bytes."""
+        files = sum(path.stat().st_size for path in self.paths)
+        # Every part ends with CRLF before the next boundary
+        return (
+            sum(map(len, self._headers))
+            + files
+            + 2 * len(self.paths)
+            + len(self._closing)
+        )
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Headers to send with the body."""
+        return {
+            "Content-Type": self.content_type,
+            "Content-Length": str(self.content_length),
+        }
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        start = time.perf_counter()
+        sent = 0
+        for path, header in zip(self.paths, self._headers, strict=True):
+            yield header
+            with await asyncio.to_thread(path.open, "rb") as f:
+                while chunk := await asyncio.to_thread(f.read, self.chunk_size):
+                    yield chunk
+                    sent += len(chunk)
+                    if self.rate:
+                        ahead = sent / self.rate - (time.perf_counter() - start)
+                        if ahead > 0:
+                            await asyncio.sleep(ahead)
+            yield b"\r\n"
+        yield self._closing
+
+
+class _NonClosingTransport(httpx.AsyncBaseTransport):
+    """Transport view that lets clients borrow a pool without closing it."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        # The owning SharedConnectionPool closes the real transport
+        pass
+
+
+class SharedConnectionPool:
+    """A long-lived connection pool shared by many AmbrosiaHttpClient instances.
+
+    Every client created with ``pool=`` keeps its own cookie jar (so separate
+    logins stay separate) but sends requests over the pool's keep-alive
+    connections, avoiding a new TCP handshake per test or virtual user.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+    ):
+        """Initialize the connection pool.
+
+        Args:
+            max_connections: Maximum number of concurrent connections
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Enable HTTP/2 (requires the ``h2`` package, e.g.
+                ``pip install httpx[http2]``). httpx only negotiates HTTP/2
+                over TLS and does not support h2c, so this has no effect
+                against the suite's plain ``http://`` servers
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self._transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=http2)
+
+    @property
+    def transport(self) -> httpx.AsyncBaseTransport:
+        """Transport to hand to clients; closing it does not close the pool."""
+        return _NonClosingTransport(self._transport)
+
+    async def aclose(self) -> None:
+        """Close every pooled connection."""
+        await self._transport.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
 
 class AmbrosiaHttpClient:
     """HTTP client for testing API endpoints.
@@ -18,15 +387,23 @@ class AmbrosiaHttpClient:
     that matches the behavior of the Ktor HttpClient used in Kotlin tests.
     """
 
-    def __init__(self, base_url: str = "http://127.0.0.1:9154", timeout: float = 30.0):
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:9154",
+        timeout: float = 30.0,
+        pool: SharedConnectionPool | None = None,
+    ):
         """Initialize the HTTP client.
 
         Args:
             base_url: Base URL of the server
             timeout: Request timeout in seconds
+            pool: Optional shared connection pool to send requests through
         """
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self.pool = pool
+        self.session_auth: SessionAuth | None = None
         self._client: httpx.AsyncClient | None = None
 
     async def __aenter__(self):
@@ -36,6 +413,11 @@ class AmbrosiaHttpClient:
             timeout=self.timeout,
             follow_redirects=True,
             cookies=httpx.Cookies(),  # Explicit cookie jar
+            transport=self.pool.transport if self.pool else None,
+            event_hooks={
+                "request": [_mark_request_start],
+                "response": [_notify_request_observers, _attach_server_timing],
+            },
         )
         return self
 
@@ -55,13 +437,7 @@ class AmbrosiaHttpClient:
         Returns:
             httpx.Response object
         """
-        full_url = self._build_url(url)
-
-        logger.debug(f"GET {full_url}")
-        response = await self._client.get(full_url, **kwargs)
-        logger.debug(f"Response: {response.status_code}")
-
-        return response
+        return await self.request("GET", url, **kwargs)
 
     async def post(self, url: str, **kwargs) -> httpx.Response:
         """Make a POST request.
@@ -70,17 +446,193 @@ class AmbrosiaHttpClient:
             url: URL to request (can be relative to base_url)
             **kwargs: Additional arguments for httpx
 
+        Returns:
+            httpx.Response object
+        """
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> httpx.Response:
+        """Make a PUT request.
+
+        Args:
+            url: URL to request (can be relative to base_url)
+            **kwargs: Additional arguments for httpx
+
+        Returns:
+            httpx.Response object
+        """
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        """Make a DELETE request.
+
+        Args:
+            url: URL to request (can be relative to base_url)
+            **kwargs: Additional arguments for httpx
+
+        Returns:
+            httpx.Response object
+        """
+        return await self.request("DELETE", url, **kwargs)
+
+    async def upload(
+        self,
+        url: str,
+        paths: Sequence[str | Path],
+        field: str = "file",
+        chunk_size: int = 64 * 1024,
+        rate: float | None = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """Upload files as ``multipart/form-data``, streaming them from disk.
+
+        Args:
+            url: URL to request (can be relative to base_url)
+            paths: Files to upload, one part each
+            field: Form field name of every part
+            chunk_size: Bytes read from disk per chunk
+            rate: Optional upload rate limit in bytes per second
+            **kwargs: Additional arguments for httpx
+
+        Returns:
+            httpx.Response object
+        """
+        body = MultipartFileStream(paths, field, chunk_size, rate)
+        headers = {**body.headers, **kwargs.pop("headers", {})}
+        return await self.request("POST", url, content=body, headers=headers, **kwargs)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Make a request with an arbitrary HTTP method.
+
+        With a ``session_auth`` hook the session is renewed before the request
+        when needed, and the request is sent once more after a 401.
+
+        Args:
+            method: HTTP method (e.g. "GET", "PUT")
+            url: URL to request (can be relative to base_url)
+            **kwargs: Additional arguments for httpx
+
         Returns:
             httpx.Response object
         """
         full_url = self._build_url(url)
+        auth = None if "/auth/" in full_url else self.session_auth
+        if auth is not None:
+            await auth.prepare(self)
 
-        logger.debug(f"POST {full_url}")
-        response = await self._client.post(full_url, **kwargs)
+        logger.debug(f"{method.upper()} {full_url}")
+        response = await self._client.request(method, full_url, **kwargs)
         logger.debug(f"Response: {response.status_code}")
 
+        if (
+            auth is not None
+            and response.status_code == 401
+            and await auth.renew(self, response)
+        ):
+            logger.debug(f"Retrying {method.upper()} {full_url} with a new session")
+            response = await self._client.request(method, full_url, **kwargs)
+            logger.debug(f"Response: {response.status_code}")
+
         return response
 
+    async def paginate(
+        self, url: str, page_size: int = 500, params: dict | None = None
+    ) -> AsyncIterator[list[Any]]:
+        """Iterate over the pages of a ``limit``/``cursor`` paginated list.
+
+        Follows the ``X-Next-Cursor`` header until the last page. A 204 (no
+        items) ends the iteration.
+
+        Args:
+            url: List endpoint, e.g. "/orders"
+            page_size: Items per page (the server caps it at 1000)
+            params: Extra query parameters
+
+        Yields:
+            Each page's items
+
+        Raises:
+            httpx.HTTPStatusError: If a page request fails
+        """
+        cursor = None
+        while True:
+            query = {**(params or {}), "limit": page_size}
+            if cursor is not None:
+                query["cursor"] = cursor
+            response = await self.get(url, params=query)
+            if response.status_code == 204:
+                return
+            response.raise_for_status()
+            yield response.json()
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                return
+
+    async def paginate_offset(
+        self, url: str, page_size: int = 100, params: dict | None = None
+    ) -> AsyncIterator[list[Any]]:
+        """Iterate over the pages of a ``limit``/``offset`` list (wallet payments).
+
+        Args:
+            url: List endpoint, e.g. "/wallet/payments/incoming"
+            page_size: Items per page
+            params: Extra query parameters (e.g. ``{"all": "true"}``)
+
+        Yields:
+            Each non-empty page's items
+
+        Raises:
+            httpx.HTTPStatusError: If a page request fails
+        """
+        offset = 0
+        while True:
+            query = {**(params or {}), "limit": page_size, "offset": offset}
+            response = await self.get(url, params=query)
+            if response.status_code == 204:
+                return
+            response.raise_for_status()
+            page = response.json()
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            offset += len(page)
+
+    async def stream_json_array(self, url: str, **kwargs) -> AsyncIterator[Any]:
+        """Stream a JSON array response and yield its items as they are parsed.
+
+        Unlike ``get``, the body is never held in memory as a whole. A 204 (no
+        items) yields nothing.
+
+        Args:
+            url: URL to request (can be relative to base_url)
+            **kwargs: Additional arguments for httpx
+
+        Yields:
+            Each item of the array
+
+        Raises:
+            httpx.HTTPStatusError: If the request fails
+            ValueError: If the body is not a JSON array
+        """
+        full_url = self._build_url(url)
+        if self.session_auth is not None:
+            await self.session_auth.prepare(self)
+
+        logger.debug(f"GET {full_url} (streaming)")
+        async with self._client.stream("GET", full_url, **kwargs) as response:
+            if response.status_code == 204:
+                return
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            parser = JsonArrayStreamParser()
+            async for chunk in response.aiter_bytes():
+                for item in parser.feed(chunk):
+                    yield item
+            for item in parser.feed(b"", final=True):
+                yield item
+
     def _build_url(self, url: str) -> str:
         """Build full URL from relative URL."""
         if url.startswith("http"):
@@ -0,0 +1,507 @@
+"""Pytest plugin gating per-route latency against a persisted baseline.
+
+Every response the shared test server sends to an ``AmbrosiaHttpClient`` while
+a test runs is recorded per route template (``GET /orders/{id}``). Tests marked
+``no_latency_baseline`` (benchmarks and load tests, whose traffic is not
+representative) are not observed, and responses of other servers, such as the
+isolated ones benchmarks start, are kept apart by server URL and left out of
+the baseline. At session end the samples
+are compared with a rolling baseline built from the most recent runs of other
+git commits, using a one-sided Mann-Whitney U test plus Cliff's delta as the
+effect size, so only slowdowns that are both significant and large enough are
+flagged. The run is then appended to the history file (SQLite, or JSON for a
+``.json`` path) keyed by the current git commit, and a per-route timing report
+is printed.
+
+Options:
+    --latency-history=PATH   History file; without it only the report is shown
+    --latency-baseline=MODE  off, warn (default) or fail on regressions
+    --latency-window=N       Number of previous runs forming the baseline
+    --latency-alpha=P        Significance level of the Mann-Whitney test
+    --latency-effect-size=D  Minimum Cliff's delta counted as a regression
+    --latency-min-samples=N  Routes with fewer samples are not compared
+"""
+
+import json
+import logging
+import math
+import random
+import re
+import sqlite3
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+import pytest
+
+from ambrosia.http_client import add_request_observer, remove_request_observer
+
+logger = logging.getLogger(__name__)
+
+BASELINE_MODES = ("off", "warn", "fail")
+
+# Samples kept per route and run, so load tests don't bloat the history
+MAX_SAMPLES_PER_ROUTE = 2000
+
+# Marker of tests whose requests are left out of the latency baseline
+NO_BASELINE_MARKER = "no_latency_baseline"
+
+# Base URL of the shared test server, set by the manage_server_lifecycle fixture
+baseline_server_key = pytest.StashKey[str]()
+
+_ID_SEGMENT = re.compile(
+    r"^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+    r"|[0-9a-f]{16,})$",
+    re.IGNORECASE,
+)
+_DATE_SEGMENT = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def route_template(method: str, path: str) -> str:
+    """Collapse ids and dates in a path into a route label.
+
+    Example:
+        ``route_template("GET", "/orders/42/dishes")`` -> ``"GET /orders/{id}/dishes"``
+    """
+    segments = []
+    for segment in path.split("/"):
+        if _DATE_SEGMENT.match(segment):
+            segments.append("{date}")
+        elif _ID_SEGMENT.match(segment):
+            segments.append("{id}")
+        else:
+            segments.append(segment)
+    return f"{method.upper()} {'/'.join(segments) or '/'}"
+
+
+def server_origin(url: httpx.URL | str) -> str:
+    """Scheme, host and port of a URL, e.g. ``"http://127.0.0.1:9154"``."""
+    url = httpx.URL(url)
+    return f"{url.scheme}://{url.netloc.decode('ascii')}"
+
+
+class LatencySamples:
+    """Per-route latency samples with a bounded reservoir per route."""
+
+    def __init__(self, max_per_route: int = MAX_SAMPLES_PER_ROUTE, seed: int = 0):
+        self.max_per_route = max_per_route
+        self.samples: dict[str, list[float]] = {}
+        self.seen: dict[str, int] = {}
+        self._rng = random.Random(seed)
+
+    def record(self, route: str, seconds: float) -> None:
+        """Record one sample, replacing a random one once the route is full."""
+        samples = self.samples.setdefault(route, [])
+        seen = self.seen.get(route, 0) + 1
+        self.seen[route] = seen
+        if len(samples) < self.max_per_route:
+            samples.append(seconds)
+        else:
+            index = self._rng.randrange(seen)
+            if index < self.max_per_route:
+                samples[index] = seconds
+
+    def observe(self, method: str, url: httpx.URL, status_code: int, seconds: float):
+        """``RequestObserver`` callback recording successful responses."""
+        if status_code < 500:
+            self.record(route_template(method, url.path), seconds)
+
+    def merge(self, other: dict[str, list[float]]) -> None:
+        """Merge serialized samples, e.g. from a pytest-xdist worker."""
+        for route, values in other.items():
+            for value in values:
+                self.record(route, value)
+
+
+def mann_whitney_u(current: list[float], baseline: list[float]) -> tuple[float, float]:
+    """One-sided Mann-Whitney U test that ``current`` tends to be slower.
+
+    Uses the normal approximation with tie and continuity corrections, which
+    is accurate for the sample sizes a test session produces (n >= ~20).
+
+    Args:
+        current: Latency samples of this run
+        baseline: Latency samples of the baseline runs
+
+    Returns:
+        Tuple of (p-value, Cliff's delta). Delta ranges from -1 (always faster)
+        to 1 (always slower)
+    """
+    n1, n2 = len(current), len(baseline)
+    combined = sorted(
+        [(value, 0) for value in current] + [(value, 1) for value in baseline]
+    )
+    rank_sum = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        average_rank = (i + j) / 2 + 1
+        rank_sum += average_rank * sum(
+            1 for k in range(i, j + 1) if combined[k][1] == 0
+        )
+        ties = j - i + 1
+        tie_term += ties**3 - ties
+        i = j + 1
+
+    u = rank_sum - n1 * (n1 + 1) / 2
+    delta = 2 * u / (n1 * n2) - 1
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0, delta
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    p_value = 0.5 * math.erfc(z / math.sqrt(2))
+    return p_value, delta
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@dataclass
+class RouteComparison:
+    """Latency of one route in this run compared with the baseline.
+
+    Attributes:
+        route: Route label, e.g. "GET /orders/{id}"
+        count: Samples in this run
+        p50, p95: Latencies of this run in seconds
+        baseline_count: Samples in the baseline (0 when there is none)
+        baseline_p50: Baseline median in seconds
+        p_value: One-sided Mann-Whitney p-value (None when not compared)
+        effect_size: Cliff's delta (None when not compared)
+        regressed: Whether the slowdown is significant and large enough
+    """
+
+    route: str
+    count: int
+    p50: float
+    p95: float
+    baseline_count: int = 0
+    baseline_p50: float | None = None
+    p_value: float | None = None
+    effect_size: float | None = None
+    regressed: bool = False
+
+
+def compare_to_baseline(
+    current: dict[str, list[float]],
+    baseline: dict[str, list[float]],
+    alpha: float = 0.01,
+    min_effect_size: float = 0.33,
+    min_samples: int = 20,
+) -> list[RouteComparison]:
+    """Compare each route's samples with its baseline samples.
+
+    Args:
+        current: Samples of this run per route
+        baseline: Samples of the baseline runs per route
+        alpha: Significance level
+        min_effect_size: Minimum Cliff's delta counted as a regression
+        min_samples: Minimum samples on both sides to run the test
+
+    Returns:
+        Comparisons sorted by route
+    """
+    comparisons = []
+    for route in sorted(current):
+        values = current[route]
+        comparison = RouteComparison(
+            route, len(values), _percentile(values, 50), _percentile(values, 95)
+        )
+        reference = baseline.get(route, [])
+        if reference:
+            comparison.baseline_count = len(reference)
+            comparison.baseline_p50 = _percentile(reference, 50)
+        if len(values) >= min_samples and len(reference) >= min_samples:
+            p_value, delta = mann_whitney_u(values, reference)
+            comparison.p_value = p_value
+            comparison.effect_size = delta
+            comparison.regressed = p_value < alpha and delta >= min_effect_size
+        comparisons.append(comparison)
+    return comparisons
+
+
+def format_comparisons(comparisons: list[RouteComparison]) -> str:
+    """Render comparisons as a fixed-width table (latencies in ms)."""
+    header = (
+        f"{'route':<40} {'n':>6} {'p50':>8} {'p95':>8} {'base p50':>9} "
+        f"{'Δp50':>8} {'p-value':>8} {'delta':>6}"
+    )
+    lines = [header, "-" * len(header)]
+    for c in comparisons:
+        base = "-" if c.baseline_p50 is None else f"{c.baseline_p50 * 1000:.1f}"
+        change = (
+            "-" if not c.baseline_p50 else f"{(c.p50 / c.baseline_p50 - 1) * 100:+.0f}%"
+        )
+        p_value = "-" if c.p_value is None else f"{c.p_value:.3f}"
+        delta = "-" if c.effect_size is None else f"{c.effect_size:+.2f}"
+        flag = "  SLOWER" if c.regressed else ""
+        lines.append(
+            f"{c.route:<40} {c.count:>6} {c.p50 * 1000:>8.1f} {c.p95 * 1000:>8.1f} "
+            f"{base:>9} {change:>8} {p_value:>8} {delta:>6}{flag}"
+        )
+    return "\n".join(lines)
+
+
+class SqliteLatencyHistory:
+    """Latency history stored in a SQLite database."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "id INTEGER PRIMARY KEY, git_commit TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                "run_id INTEGER NOT NULL REFERENCES runs(id), "
+                "route TEXT NOT NULL, seconds REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS samples_run ON samples(run_id, route)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def baseline(self, window: int, exclude_commit: str) -> dict[str, list[float]]:
+        """Samples of the last ``window`` runs made at other commits."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT route, seconds FROM samples WHERE run_id IN ("
+                "SELECT id FROM runs WHERE git_commit != ? "
+                "ORDER BY id DESC LIMIT ?)",
+                (exclude_commit, window),
+            ).fetchall()
+        baseline: dict[str, list[float]] = {}
+        for route, seconds in rows:
+            baseline.setdefault(route, []).append(seconds)
+        return baseline
+
+    def append_run(self, git_commit: str, samples: dict[str, list[float]]) -> None:
+        """Store the samples of a run."""
+        with self._connect() as db:
+            run_id = db.execute(
+                "INSERT INTO runs (git_commit, created_at) VALUES (?, ?)",
+                (git_commit, time.time()),
+            ).lastrowid
+            db.executemany(
+                "INSERT INTO samples (run_id, route, seconds) VALUES (?, ?, ?)",
+                [
+                    (run_id, route, seconds)
+                    for route, values in samples.items()
+                    for seconds in values
+                ],
+            )
+
+
+class JsonLatencyHistory:
+    """Latency history stored as a JSON list of runs."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _load(self) -> list[dict]:
+        if not self.path.exists():
+            return []
+        return json.loads(self.path.read_text())
+
+    def baseline(self, window: int, exclude_commit: str) -> dict[str, list[float]]:
+        """Samples of the last ``window`` runs made at other commits."""
+        runs = [run for run in self._load() if run["git_commit"] != exclude_commit]
+        baseline: dict[str, list[float]] = {}
+        for run in runs[-window:]:
+            for route, values in run["samples"].items():
+                baseline.setdefault(route, []).extend(values)
+        return baseline
+
+    def append_run(self, git_commit: str, samples: dict[str, list[float]]) -> None:
+        """Store the samples of a run."""
+        runs = self._load()
+        runs.append(
+            {"git_commit": git_commit, "created_at": time.time(), "samples": samples}
+        )
+        self.path.write_text(json.dumps(runs))
+
+
+def open_history(path: Path | str) -> SqliteLatencyHistory | JsonLatencyHistory:
+    """Open a history file, JSON for ``.json`` paths and SQLite otherwise."""
+    path = Path(path)
+    if path.suffix == ".json":
+        return JsonLatencyHistory(path)
+    return SqliteLatencyHistory(path)
+
+
+def get_git_commit(cwd: Path) -> str:
+    """Return the current git commit hash, or "unknown" outside a repository."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return "unknown"
+    return result.stdout.strip() if result.returncode == 0 else "unknown"
+
+
+class LatencyBaselinePlugin:
+    """Collects latency samples for the session and gates them at the end."""
+
+    def __init__(self, config: pytest.Config):
+        self.config = config
+        # Samples of this process per server origin, merged into ``samples``
+        # (with those of xdist workers) for the shared test server only
+        self.servers: dict[str, LatencySamples] = {}
+        self.samples = LatencySamples()
+        self.comparisons: list[RouteComparison] = []
+        self.regressions: list[RouteComparison] = []
+
+    def observe(self, method: str, url: httpx.URL, status_code: int, seconds: float):
+        """``RequestObserver`` callback recording samples per server origin."""
+        origin = server_origin(url)
+        if origin not in self.servers:
+            self.servers[origin] = LatencySamples()
+        self.servers[origin].observe(method, url, status_code, seconds)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_protocol(self, item: pytest.Item, nextitem):
+        """Observe the requests of each test that has not opted out."""
+        if item.get_closest_marker(NO_BASELINE_MARKER) is not None:
+            return (yield)
+        add_request_observer(self.observe)
+        try:
+            return (yield)
+        finally:
+            remove_request_observer(self.observe)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error) -> None:
+        """Merge samples sent back by a pytest-xdist worker."""
+        worker_samples = getattr(node, "workeroutput", {}).get("latency_samples")
+        if worker_samples:
+            self.samples.merge(json.loads(worker_samples))
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        server_url = self.config.stash.get(baseline_server_key, None)
+        if server_url is not None:
+            own = self.servers.get(server_origin(server_url))
+            if own is not None:
+                self.samples.merge(own.samples)
+        workeroutput = getattr(self.config, "workeroutput", None)
+        if workeroutput is not None:
+            # xdist worker: hand the samples to the controller
+            workeroutput["latency_samples"] = json.dumps(self.samples.samples)
+            return
+
+        config = self.config
+        mode = config.getoption("--latency-baseline")
+        history_path = config.getoption("--latency-history")
+        baseline: dict[str, list[float]] = {}
+        history = None
+        commit = get_git_commit(config.rootpath)
+        if history_path:
+            history = open_history(config.rootpath / history_path)
+            baseline = history.baseline(config.getoption("--latency-window"), commit)
+
+        self.comparisons = compare_to_baseline(
+            self.samples.samples,
+            baseline,
+            alpha=config.getoption("--latency-alpha"),
+            min_effect_size=config.getoption("--latency-effect-size"),
+            min_samples=config.getoption("--latency-min-samples"),
+        )
+        if mode != "off":
+            self.regressions = [c for c in self.comparisons if c.regressed]
+        if self.regressions and mode == "fail":
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+        if history is not None and self.samples.samples:
+            history.append_run(commit, self.samples.samples)
+            logger.info(f"Recorded latency samples for {commit[:12]} in {history_path}")
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if not self.comparisons:
+            return
+        terminalreporter.write_sep("-", "route latency")
+        terminalreporter.write_line(format_comparisons(self.comparisons))
+        for regression in self.regressions:
+            terminalreporter.write_line(
+                f"Latency regression: {regression.route} p50 "
+                f"{regression.baseline_p50 * 1000:.1f}ms -> "
+                f"{regression.p50 * 1000:.1f}ms "
+                f"(p={regression.p_value:.4f}, delta={regression.effect_size:+.2f})",
+                red=True,
+            )
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the latency baseline command-line options."""
+    group = parser.getgroup("latency baseline")
+    group.addoption(
+        "--latency-history",
+        action="store",
+        default=None,
+        help="Latency history file (SQLite, or JSON for *.json), relative to "
+        "the rootdir. Without it latencies are reported but not persisted",
+    )
+    group.addoption(
+        "--latency-baseline",
+        action="store",
+        default="warn",
+        choices=BASELINE_MODES,
+        help="What to do on a significant slowdown: off, warn (default) or fail",
+    )
+    group.addoption(
+        "--latency-window",
+        action="store",
+        type=int,
+        default=5,
+        help="Number of previous runs forming the rolling baseline (default: 5)",
+    )
+    group.addoption(
+        "--latency-alpha",
+        action="store",
+        type=float,
+        default=0.01,
+        help="Significance level of the Mann-Whitney U test (default: 0.01)",
+    )
+    group.addoption(
+        "--latency-effect-size",
+        action="store",
+        type=float,
+        default=0.33,
+        help="Minimum Cliff's delta counted as a regression (default: 0.33)",
+    )
+    group.addoption(
+        "--latency-min-samples",
+        action="store",
+        type=int,
+        default=20,
+        help="Routes with fewer samples are not compared (default: 20)",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Register the marker and the plugin instance for this session."""
+    config.addinivalue_line(
+        "markers",
+        f"{NO_BASELINE_MARKER}: keep the test's requests out of the latency "
+        "baseline (benchmarks and load tests)",
+    )
+    config.pluginmanager.register(LatencyBaselinePlugin(config), "latency-baseline")
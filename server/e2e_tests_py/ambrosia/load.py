@@ -0,0 +1,545 @@
+"""Async load generation for the Ambrosia POS server.
+
+This module drives N concurrent virtual users through ``AmbrosiaHttpClient``,
+either in a closed loop (each user issues its next request as soon as the
+previous one finishes) or at a fixed open-loop arrival rate. Every request is
+recorded per route in an HDR-style histogram, and the run produces a report
+with p50/p95/p99/max latency and throughput per route. When the server sends
+``Server-Timing`` headers, the report also breaks the latency of every route
+down by server phase (``LoadReport.format_phases``).
+
+Example:
+    async def browse(client, recorder):
+        await timed_request(client, recorder, "GET", "/base-currency")
+
+    report = await LoadGenerator(server_url, browse, virtual_users=20).run()
+    print(report.format_table())
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable, Container
+from dataclasses import dataclass, field
+
+import httpx
+
+from ambrosia.http_client import (
+    AmbrosiaHttpClient,
+    SharedConnectionPool,
+    server_timing,
+)
+
+logger = logging.getLogger(__name__)
+
+# Latencies are stored as integer microseconds
+_US_PER_SECOND = 1_000_000
+
+
+class LatencyHistogram:
+    """HDR-style log-linear latency histogram.
+
+    Values are bucketed so that each bucket covers at most a relative error
+    determined by ``significant_digits`` (2 digits -> under 1% error), while
+    memory stays bounded regardless of how many samples are recorded.
+    Values are recorded in seconds and stored as integer microseconds.
+    """
+
+    def __init__(self, significant_digits: int = 2):
+        """Initialize the histogram.
+
+        Args:
+            significant_digits: Number of significant decimal digits to preserve
+        """
+        if not 1 <= significant_digits <= 5:
+            raise ValueError("significant_digits must be between 1 and 5")
+        self.significant_digits = significant_digits
+        # Number of linear sub-buckets per power of two, as a power of two
+        self._sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_digits))
+        self._counts: Counter[tuple[int, int]] = Counter()
+        self.count = 0
+        self.total_us = 0
+        self.min_us: int | None = None
+        self.max_us = 0
+
+    def _bucket(self, value_us: int) -> tuple[int, int]:
+        """Return the (magnitude, sub-bucket) key for a value."""
+        magnitude = max(0, value_us.bit_length() - self._sub_bucket_bits)
+        return magnitude, value_us >> magnitude
+
+    @staticmethod
+    def _bucket_upper(key: tuple[int, int]) -> int:
+        """Highest value (in microseconds) that falls into a bucket."""
+        magnitude, sub_bucket = key
+        return ((sub_bucket + 1) << magnitude) - 1
+
+    def record(self, seconds: float) -> None:
+        """Record a single latency sample.
+
+        Args:
+            seconds: Latency in seconds
+        """
+        value_us = max(0, round(seconds * _US_PER_SECOND))
+        self._counts[self._bucket(value_us)] += 1
+        self.count += 1
+        self.total_us += value_us
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = max(self.max_us, value_us)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add all samples of another histogram with the same precision."""
+        if other.significant_digits != self.significant_digits:
+            raise ValueError("Cannot merge histograms with different precision")
+        self._counts.update(other._counts)
+        self.count += other.count
+        self.total_us += other.total_us
+        if other.min_us is not None:
+            self.min_us = (
+                other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+            )
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, percent: float) -> float:
+        """Return the latency (seconds) at or below which ``percent`` of samples fall.
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds (0.0 for an empty histogram)
+        """
+        if self.count == 0:
+            return 0.0
+        target = max(1, math.ceil(self.count * percent / 100))
+        cumulative = 0
+        for key in sorted(self._counts):
+            cumulative += self._counts[key]
+            if cumulative >= target:
+                return min(self._bucket_upper(key), self.max_us) / _US_PER_SECOND
+        return self.max_us / _US_PER_SECOND
+
+    @property
+    def mean(self) -> float:
+        """Mean latency in seconds."""
+        return self.total_us / self.count / _US_PER_SECOND if self.count else 0.0
+
+    @property
+    def max(self) -> float:
+        """Maximum recorded latency in seconds."""
+        return self.max_us / _US_PER_SECOND
+
+
+@dataclass
+class RouteStats:
+    """Aggregated results for a single route.
+
+    Attributes:
+        route: Route label, e.g. "GET /orders/{id}"
+        count: Number of completed requests
+        errors: Requests that failed (exception or 5xx status)
+        throughput: Completed requests per second over the run
+        p50, p95, p99, max, mean: Latencies in seconds
+        status_codes: Number of responses per HTTP status code
+        server_timing: Mean server-side duration per phase in seconds, over the
+            responses that carried a ``Server-Timing`` header
+    """
+
+    route: str
+    count: int
+    errors: int
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    mean: float
+    status_codes: dict[int, int] = field(default_factory=dict)
+    server_timing: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class LoadReport:
+    """Result of a load run.
+
+    Attributes:
+        duration: Wall-clock duration of the measured phase in seconds
+        routes: Per-route statistics, keyed by route label
+        total: Statistics across all routes
+    """
+
+    duration: float
+    routes: dict[str, RouteStats]
+    total: RouteStats
+
+    def format_table(self) -> str:
+        """Render the report as a fixed-width text table (latencies in ms)."""
+        header = (
+            f"{'route':<40} {'count':>7} {'err':>5} {'rps':>8} "
+            f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+        )
+        lines = [header, "-" * len(header)]
+        for stats in [*sorted(self.routes.values(), key=lambda s: s.route), self.total]:
+            lines.append(
+                f"{stats.route:<40} {stats.count:>7} {stats.errors:>5} "
+                f"{stats.throughput:>8.1f} {stats.p50 * 1000:>8.1f} "
+                f"{stats.p95 * 1000:>8.1f} {stats.p99 * 1000:>8.1f} "
+                f"{stats.max * 1000:>8.1f}"
+            )
+        return "\n".join(lines)
+
+    def format_phases(self) -> str:
+        """Render the mean server-side phase durations per route (ms).
+
+        "client" is the client-observed mean minus the server's total: network,
+        queueing and anything the server does not time.
+        """
+        phases = sorted(
+            {p for s in self.routes.values() for p in s.server_timing} - {"total"}
+        )
+        header = f"{'route':<40} " + " ".join(f"{p:>9}" for p in phases)
+        header += f" {'total':>9} {'client':>9}"
+        lines = [header, "-" * len(header)]
+        for stats in sorted(self.routes.values(), key=lambda s: s.route):
+            if not stats.server_timing:
+                continue
+            cells = [stats.server_timing.get(p, 0.0) * 1000 for p in phases]
+            total = stats.server_timing.get("total", 0.0)
+            cells += [total * 1000, max(stats.mean - total, 0.0) * 1000]
+            lines.append(f"{stats.route:<40} " + " ".join(f"{c:>9.2f}" for c in cells))
+        return "\n".join(lines)
+
+
+class LoadRecorder:
+    """Collects latency samples and outcomes per route during a load run."""
+
+    def __init__(self, significant_digits: int = 2):
+        self.significant_digits = significant_digits
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.errors: Counter[str] = Counter()
+        self.status_codes: dict[str, Counter[int]] = {}
+        self.server_timing: dict[str, Counter[str]] = {}
+        self.server_timed: Counter[str] = Counter()
+
+    def record(
+        self,
+        route: str,
+        seconds: float,
+        status_code: int | None = None,
+        error: bool = False,
+        server_timing: dict[str, float] | None = None,
+    ) -> None:
+        """Record one completed (or failed) request.
+
+        Args:
+            route: Route label the sample belongs to
+            seconds: Observed latency in seconds
+            status_code: HTTP status code, None if the request raised
+            error: Whether the request should count as an error
+            server_timing: Server-side phase durations of the response
+        """
+        if server_timing:
+            self.server_timing.setdefault(route, Counter()).update(server_timing)
+            self.server_timed[route] += 1
+        histogram = self.histograms.get(route)
+        if histogram is None:
+            histogram = LatencyHistogram(self.significant_digits)
+            self.histograms[route] = histogram
+        histogram.record(seconds)
+        if status_code is not None:
+            self.status_codes.setdefault(route, Counter())[status_code] += 1
+        if error:
+            self.errors[route] += 1
+
+    def build_report(self, duration: float) -> LoadReport:
+        """Aggregate the recorded samples into a LoadReport.
+
+        Args:
+            duration: Duration of the measured phase in seconds
+        """
+        routes = {
+            route: self._stats(route, histogram, duration)
+            for route, histogram in self.histograms.items()
+        }
+        combined = LatencyHistogram(self.significant_digits)
+        combined_status: Counter[int] = Counter()
+        for route, histogram in self.histograms.items():
+            combined.merge(histogram)
+            combined_status.update(self.status_codes.get(route, {}))
+        total = self._stats("TOTAL", combined, duration)
+        total.errors = sum(self.errors.values())
+        total.status_codes = dict(combined_status)
+        return LoadReport(duration=duration, routes=routes, total=total)
+
+    def _stats(
+        self, route: str, histogram: LatencyHistogram, duration: float
+    ) -> RouteStats:
+        return RouteStats(
+            route=route,
+            count=histogram.count,
+            errors=self.errors.get(route, 0),
+            throughput=histogram.count / duration if duration > 0 else 0.0,
+            p50=histogram.percentile(50),
+            p95=histogram.percentile(95),
+            p99=histogram.percentile(99),
+            max=histogram.max,
+            mean=histogram.mean,
+            status_codes=dict(self.status_codes.get(route, {})),
+            server_timing={
+                phase: total / self.server_timed[route]
+                for phase, total in self.server_timing.get(route, {}).items()
+            },
+        )
+
+
+async def timed_request(
+    client: AmbrosiaHttpClient,
+    recorder: LoadRecorder,
+    method: str,
+    url: str,
+    route: str | None = None,
+    expected_status: Container[int] | None = None,
+    **kwargs,
+) -> httpx.Response | None:
+    """Issue a request and record its latency under a route label.
+
+    Server errors (5xx), or any status outside ``expected_status`` when given,
+    and transport errors count as errors. Transport errors are recorded and
+    swallowed so one failure does not stop a virtual user.
+
+    Args:
+        client: HTTP client of the virtual user
+        recorder: Recorder collecting the samples
+        method: HTTP method
+        url: URL to request (can be relative to the client's base_url)
+        route: Route label, e.g. "GET /orders/{id}". Defaults to "METHOD url"
+        expected_status: Status codes considered successful, None for any non-5xx
+        **kwargs: Additional arguments for httpx
+
+    Returns:
+        The response, or None if the request raised a transport error
+    """
+    route = route or f"{method.upper()} {url}"
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as e:
+        recorder.record(route, time.perf_counter() - start, error=True)
+        logger.debug(f"{route} failed: {e}")
+        return None
+    if expected_status is None:
+        error = response.status_code >= 500
+    else:
+        error = response.status_code not in expected_status
+    recorder.record(
+        route,
+        time.perf_counter() - start,
+        status_code=response.status_code,
+        error=error,
+        server_timing=server_timing(response),
+    )
+    return response
+
+
+# A virtual user iteration: issues one or more timed requests with the client
+UserAction = Callable[[AmbrosiaHttpClient, LoadRecorder], Awaitable[None]]
+# Optional per-user setup (e.g. login), not included in the measurements
+UserSetup = Callable[[AmbrosiaHttpClient], Awaitable[None]]
+
+
+class LoadGenerator:
+    """Drives concurrent virtual users against the server.
+
+    Each virtual user owns its own ``AmbrosiaHttpClient`` (connections and
+    cookie jar), like a separate POS terminal. Passing a ``SharedConnectionPool``
+    keeps separate cookie jars but reuses pooled keep-alive connections.
+
+    In closed-loop mode (``arrival_rate=None``) every user runs ``action``
+    back to back until ``duration`` elapses, so the offered load adapts to
+    the server's speed.
+
+    In open-loop mode iterations are started at a fixed ``arrival_rate`` per
+    second regardless of how fast the server responds, and are handed to the
+    next idle user. Latency is measured from the scheduled start time, so time
+    spent waiting for a free user is included (avoiding coordinated omission).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        action: UserAction,
+        virtual_users: int = 10,
+        duration: float = 10.0,
+        arrival_rate: float | None = None,
+        setup: UserSetup | None = None,
+        timeout: float = 30.0,
+        pool: SharedConnectionPool | None = None,
+    ):
+        """Initialize the load generator.
+
+        Args:
+            base_url: Base URL of the server
+            action: Coroutine run for every iteration of a virtual user
+            virtual_users: Number of concurrent virtual users
+            duration: Length of the measured phase in seconds
+            arrival_rate: Iterations per second for open-loop mode, or None for
+                closed-loop mode
+            setup: Optional coroutine run once per user before measuring
+            timeout: Per-request timeout in seconds
+            pool: Optional shared connection pool for all virtual users
+        """
+        if virtual_users < 1:
+            raise ValueError("virtual_users must be at least 1")
+        if arrival_rate is not None and arrival_rate <= 0:
+            raise ValueError("arrival_rate must be positive")
+        self.base_url = base_url
+        self.action = action
+        self.virtual_users = virtual_users
+        self.duration = duration
+        self.arrival_rate = arrival_rate
+        self.setup = setup
+        self.timeout = timeout
+        self.pool = pool
+        self.recorder = LoadRecorder()
+
+    async def run(self) -> LoadReport:
+        """Run the load test and return its report."""
+        clients = [
+            AmbrosiaHttpClient(self.base_url, timeout=self.timeout, pool=self.pool)
+            for _ in range(self.virtual_users)
+        ]
+        for client in clients:
+            await client.__aenter__()
+        try:
+            if self.setup is not None:
+                await asyncio.gather(*(self.setup(client) for client in clients))
+
+            mode = "closed-loop" if self.arrival_rate is None else "open-loop"
+            logger.info(
+                f"Starting {mode} load: {self.virtual_users} users, "
+                f"{self.duration}s"
+                + (f", {self.arrival_rate}/s" if self.arrival_rate else "")
+            )
+            start = time.perf_counter()
+            if self.arrival_rate is None:
+                await self._run_closed_loop(clients, start + self.duration)
+            else:
+                await self._run_open_loop(clients, start + self.duration)
+            elapsed = time.perf_counter() - start
+        finally:
+            for client in clients:
+                await client.__aexit__(None, None, None)
+
+        report = self.recorder.build_report(elapsed)
+        logger.info(f"Load run finished:\n{report.format_table()}")
+        return report
+
+    async def _run_closed_loop(
+        self, clients: list[AmbrosiaHttpClient], deadline: float
+    ) -> None:
+        async def user_loop(client: AmbrosiaHttpClient) -> None:
+            while time.perf_counter() < deadline:
+                await self.action(client, self.recorder)
+
+        await asyncio.gather(*(user_loop(client) for client in clients))
+
+    async def _run_open_loop(
+        self, clients: list[AmbrosiaHttpClient], deadline: float
+    ) -> None:
+        idle: asyncio.Queue[AmbrosiaHttpClient] = asyncio.Queue()
+        for client in clients:
+            idle.put_nowait(client)
+
+        interval = 1.0 / self.arrival_rate
+        tasks: set[asyncio.Task] = set()
+        next_start = time.perf_counter()
+
+        async def iteration(scheduled: float) -> None:
+            client = await idle.get()
+            try:
+                queue_delay = time.perf_counter() - scheduled
+                recorder = DelayedRecorder(self.recorder, queue_delay)
+                await self.action(client, recorder)
+            finally:
+                idle.put_nowait(client)
+
+        while next_start < deadline:
+            delay = next_start - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(iteration(next_start))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_start += interval
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+class DelayedRecorder:
+    """Recorder view that adds a queueing delay to the first sample.
+
+    Open-loop drivers use it so the time a request waited for a free virtual
+    user (or concurrency slot) after its scheduled start counts against it.
+
+    Args:
+        target: Recorder receiving the samples
+        delay: Seconds added to the next recorded sample only
+    """
+
+    def __init__(self, target: LoadRecorder, delay: float):
+        self._target = target
+        self._delay = delay
+
+    def __getattr__(self, name: str):
+        return getattr(self._target, name)
+
+    def record(
+        self,
+        route: str,
+        seconds: float,
+        status_code: int | None = None,
+        error: bool = False,
+        server_timing: dict[str, float] | None = None,
+    ) -> None:
+        self._target.record(
+            route, seconds + self._delay, status_code, error, server_timing
+        )
+        # Only the first request of an iteration waited for a free user
+        self._delay = 0.0
+
+
+async def run_load(
+    base_url: str,
+    action: UserAction,
+    virtual_users: int = 10,
+    duration: float = 10.0,
+    arrival_rate: float | None = None,
+    setup: UserSetup | None = None,
+    pool: SharedConnectionPool | None = None,
+) -> LoadReport:
+    """Convenience wrapper that builds a LoadGenerator and runs it.
+
+    Args:
+        base_url: Base URL of the server
+        action: Coroutine run for every iteration of a virtual user
+        virtual_users: Number of concurrent virtual users
+        duration: Length of the measured phase in seconds
+        arrival_rate: Iterations per second (open loop), None for closed loop
+        setup: Optional coroutine run once per user before measuring
+        pool: Optional shared connection pool for all virtual users
+
+    Returns:
+        The LoadReport of the run
+    """
+    generator = LoadGenerator(
+        base_url,
+        action,
+        virtual_users=virtual_users,
+        duration=duration,
+        arrival_rate=arrival_rate,
+        setup=setup,
+        pool=pool,
+    )
+    return await generator.run()
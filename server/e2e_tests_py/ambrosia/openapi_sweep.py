@@ -0,0 +1,604 @@
+"""Latency sweep over every operation documented in the server's OpenAPI spec.
+
+``load_operations`` reads ``openapi/documentation.yaml`` and returns every
+GET/POST/PUT/DELETE operation. ``run_sweep`` then calls each of them against a
+(seeded) server and reports latency and response size per operation, so a
+route is measured as soon as it is documented.
+
+Requests are synthesized from the spec: bodies from the request schema
+(``example`` values, then enums, then a default per type) and path parameters
+from ids that exist on the server. The sweep runs in phases so ids exist when
+they are needed:
+
+1. list reads (GET without path parameters), keeping one id per collection
+2. creates, collections in dependency order (a dish needs a category, an
+   order a table), keeping the created ids
+3. the remaining reads and the updates, in spec order
+4. deletes of everything the sweep created, in reverse dependency order
+
+Updates and deletes only touch rows the sweep created, never seeded ones.
+Statuses the spec does not document for an operation (e.g. a route that was
+renamed on the server but not in the spec) are reported, not raised.
+
+Example:
+    operations = load_operations()
+    report = await run_sweep(server_url, operations)
+    print(report.format_table())
+"""
+
+import logging
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import median
+from typing import Any
+
+import yaml
+
+from ambrosia.auth_utils import DEFAULT_TEST_USER, AuthSessionCache
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.load import LoadRecorder, RouteStats, timed_request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPEC_PATH = (
+    Path(__file__).parent.parent.parent
+    / "app/src/main/resources/openapi/documentation.yaml"
+)
+
+METHODS = ("get", "post", "put", "delete")
+
+# Login, refresh and logout replace or revoke the sweep's own session
+DEFAULT_EXCLUDE = ("/auth/",)
+
+# Collection whose ids a body field refers to. "<collection>.<field>" entries
+# take precedence over plain field names
+REFERENCES = {
+    "role": "/roles",
+    "role_id": "/roles",
+    "user_id": "/users",
+    "space_id": "/spaces",
+    "table_id": "/tables",
+    "dish_id": "/dishes",
+    "order_id": "/orders",
+    "/dishes.category_id": "/dish-categories",
+    "/ingredients.category_id": "/ingredient-categories",
+}
+
+# String fields that must be unique per row get a random suffix
+UNIQUE_FIELDS = frozenset({"name", "role"})
+
+_TYPE_DEFAULTS = {
+    "string": "sweep",
+    "integer": 1,
+    "number": 10.0,
+    "boolean": False,
+    "array": [],
+    "object": {},
+}
+
+
+@dataclass
+class Operation:
+    """One documented operation.
+
+    Attributes:
+        method: HTTP method, upper case
+        path: Path template, e.g. "/orders/{id}"
+        parameters: Path and query parameters, with ``$ref`` resolved
+        body_schema: JSON request body schema with ``$ref`` resolved, or None
+        responses: Documented status codes
+    """
+
+    method: str
+    path: str
+    parameters: list[dict[str, Any]] = field(default_factory=list)
+    body_schema: dict[str, Any] | None = None
+    responses: frozenset[int] = frozenset()
+
+    @property
+    def label(self) -> str:
+        """Route label, e.g. "GET /orders/{id}"."""
+        return f"{self.method} {self.path}"
+
+    @property
+    def collection(self) -> str:
+        """First path segment, e.g. "/orders"."""
+        return "/" + self.path.strip("/").split("/")[0]
+
+    @property
+    def path_parameters(self) -> list[dict[str, Any]]:
+        """Parameters that are part of the path."""
+        return [p for p in self.parameters if p.get("in") == "path"]
+
+    @property
+    def success_statuses(self) -> frozenset[int]:
+        """Documented 2xx status codes."""
+        return frozenset(code for code in self.responses if 200 <= code < 300)
+
+
+@dataclass
+class OperationResult:
+    """Measurements of one operation.
+
+    Attributes:
+        operation: The operation
+        stats: Latency statistics, None if it was never called
+        sizes: Response body size in bytes per call
+        skipped: Why the operation was not called, None if it was
+    """
+
+    operation: Operation
+    stats: RouteStats | None = None
+    sizes: list[int] = field(default_factory=list)
+    skipped: str | None = None
+
+    @property
+    def median_size(self) -> int:
+        """Median response body size in bytes."""
+        return int(median(self.sizes)) if self.sizes else 0
+
+    @property
+    def undocumented_statuses(self) -> list[int]:
+        """Received status codes the spec does not list for the operation."""
+        if self.stats is None:
+            return []
+        return sorted(set(self.stats.status_codes) - self.operation.responses)
+
+
+@dataclass
+class SweepReport:
+    """Per-operation results of a sweep, in spec order.
+
+    Attributes:
+        results: One entry per operation
+    """
+
+    results: list[OperationResult]
+
+    @property
+    def measured(self) -> list[OperationResult]:
+        """Operations that were called."""
+        return [result for result in self.results if result.stats is not None]
+
+    @property
+    def skipped(self) -> list[OperationResult]:
+        """Operations that could not be called."""
+        return [result for result in self.results if result.stats is None]
+
+    @property
+    def failing(self) -> list[OperationResult]:
+        """Called operations with transport errors or non-2xx responses."""
+        return [result for result in self.measured if result.stats.errors]
+
+    @property
+    def undocumented(self) -> list[OperationResult]:
+        """Called operations that returned a status the spec does not list."""
+        return [result for result in self.measured if result.undocumented_statuses]
+
+    def format_table(self) -> str:
+        """Render latency (ms), response size and statuses per operation."""
+        header = (
+            f"{'operation':<42} {'n':>4} {'p50':>8} {'p99':>8} {'max':>8} "
+            f"{'bytes':>9}  statuses"
+        )
+        lines = [header, "-" * len(header)]
+        for result in self.results:
+            label = result.operation.label
+            if result.stats is None:
+                lines.append(f"{label:<42} skipped: {result.skipped}")
+                continue
+            stats = result.stats
+            statuses = ",".join(
+                f"{code}" + ("*" if code in result.undocumented_statuses else "")
+                for code in sorted(stats.status_codes)
+            )
+            if stats.count > sum(stats.status_codes.values()):
+                statuses += ",transport error"
+            lines.append(
+                f"{label:<42} {stats.count:>4} {stats.p50 * 1000:>8.1f} "
+                f"{stats.p99 * 1000:>8.1f} {stats.max * 1000:>8.1f} "
+                f"{result.median_size:>9}  {statuses}"
+            )
+        lines.append("* status not documented for the operation")
+        return "\n".join(lines)
+
+
+def _resolve(node: Any, spec: dict[str, Any], seen: tuple[str, ...] = ()) -> Any:
+    """Inline every local ``$ref`` below ``node``."""
+    if isinstance(node, list):
+        return [_resolve(item, spec, seen) for item in node]
+    if not isinstance(node, dict):
+        return node
+    ref = node.get("$ref")
+    if ref is not None:
+        if not ref.startswith("#/") or ref in seen:
+            return {}
+        target: Any = spec
+        for part in ref[2:].split("/"):
+            target = target[part]
+        return _resolve(target, spec, (*seen, ref))
+    return {key: _resolve(value, spec, seen) for key, value in node.items()}
+
+
+def load_operations(
+    spec_path: Path = DEFAULT_SPEC_PATH, exclude: tuple[str, ...] = DEFAULT_EXCLUDE
+) -> list[Operation]:
+    """Read every GET/POST/PUT/DELETE operation from an OpenAPI spec.
+
+    Args:
+        spec_path: OpenAPI 3 document (YAML or JSON)
+        exclude: Path prefixes to leave out
+
+    Returns:
+        Operations in spec order
+    """
+    spec = yaml.safe_load(spec_path.read_text(encoding="utf-8"))
+    operations = []
+    for path, item in spec.get("paths", {}).items():
+        if path.startswith(exclude):
+            continue
+        shared = item.get("parameters", [])
+        for method in METHODS:
+            definition = item.get(method)
+            if definition is None:
+                continue
+            parameters = _resolve([*shared, *definition.get("parameters", [])], spec)
+            content = definition.get("requestBody", {}).get("content", {})
+            body = content.get("application/json", {}).get("schema")
+            operations.append(
+                Operation(
+                    method=method.upper(),
+                    path=path,
+                    parameters=parameters,
+                    body_schema=_resolve(body, spec) if body is not None else None,
+                    responses=frozenset(
+                        int(code)
+                        for code in definition.get("responses", {})
+                        if code.isdigit()
+                    ),
+                )
+            )
+    return operations
+
+
+def _reference(collection: str, name: str) -> str | None:
+    """Collection a field refers to; a collection's own fields are never references."""
+    reference = REFERENCES.get(f"{collection}.{name}", REFERENCES.get(name))
+    return None if reference == collection else reference
+
+
+def synthesize_value(
+    schema: dict[str, Any],
+    name: str = "",
+    collection: str = "",
+    ids: dict[str, list[str]] | None = None,
+) -> Any:
+    """Build a value matching a JSON schema.
+
+    Ids of referenced collections (see ``REFERENCES``) come from ``ids``;
+    otherwise the schema's example, first enum value or a default per type
+    is used. Objects get their required properties only.
+
+    Args:
+        schema: JSON schema with ``$ref`` resolved
+        name: Property name the value is for
+        collection: Collection the enclosing request belongs to
+        ids: Known ids per collection
+
+    Returns:
+        A JSON-serializable value
+    """
+    reference = _reference(collection, name)
+    if reference is not None and ids and ids.get(reference):
+        return ids[reference][0]
+    kind = schema.get("type", "object" if "properties" in schema else "string")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {
+            key: synthesize_value(properties.get(key, {}), key, collection, ids)
+            for key in schema.get("required", [])
+        }
+    if kind == "array":
+        item = synthesize_value(schema.get("items", {}), name, collection, ids)
+        return [item] if schema.get("minItems", 1) else []
+    if schema.get("example") is not None:
+        value = schema["example"]
+    elif schema.get("enum"):
+        value = schema["enum"][0]
+    elif schema.get("format") == "uuid":
+        value = str(uuid.uuid4())
+    elif schema.get("format") == "email":
+        value = f"sweep-{uuid.uuid4().hex[:8]}@example.com"
+    else:
+        value = _TYPE_DEFAULTS.get(kind, "sweep")
+    if kind == "string" and name in UNIQUE_FIELDS and "enum" not in schema:
+        value = f"{value} {uuid.uuid4().hex[:8]}"
+    return value
+
+
+def _parameter_collection(operation: Operation, name: str) -> str | None:
+    """Collection a path parameter takes ids from, None if it is not an id.
+
+    "/orders/{id}/complete" takes an order id; "/tables/by-space/{id}" a space id.
+    """
+    parameter = next(p for p in operation.path_parameters if p["name"] == name)
+    if name != "id" and parameter.get("schema", {}).get("format") != "uuid":
+        return None
+    segments = operation.path.strip("/").split("/")
+    previous = segments[segments.index(f"{{{name}}}") - 1]
+    if previous.startswith("by-"):
+        return f"/{previous.removeprefix('by-')}s"
+    return operation.collection
+
+
+def _is_item_path(operation: Operation) -> bool:
+    """True for "/{collection}/{id}" style paths."""
+    segments = operation.path.strip("/").split("/")
+    return (
+        len(segments) == 2
+        and len(operation.path_parameters) == 1
+        and (segments[1] == f"{{{operation.path_parameters[0]['name']}}}")
+    )
+
+
+def _dependencies(operation: Operation) -> set[str]:
+    """Collections a create operation's body refers to."""
+    schema = operation.body_schema or {}
+    found: set[str] = set()
+
+    def walk(node: dict[str, Any], name: str = "") -> None:
+        reference = _reference(operation.collection, name)
+        if reference is not None:
+            found.add(reference)
+        for key, value in node.get("properties", {}).items():
+            if key in node.get("required", []):
+                walk(value, key)
+        if "items" in node:
+            walk(node["items"], name)
+
+    walk(schema)
+    return found
+
+
+def creation_order(operations: list[Operation]) -> list[Operation]:
+    """Order create (POST) operations so referenced collections come first.
+
+    Args:
+        operations: Operations to pick the creates from
+
+    Returns:
+        POST operations without path parameters, dependencies first; cycles
+        and references to undocumented collections are ignored
+    """
+    creates = [
+        op for op in operations if op.method == "POST" and not op.path_parameters
+    ]
+    collections = {op.collection for op in creates}
+    ordered: list[Operation] = []
+    visiting: set[str] = set()
+    done: set[str] = set()
+
+    def visit(collection: str) -> None:
+        if collection in done or collection in visiting:
+            return
+        visiting.add(collection)
+        members = [op for op in creates if op.collection == collection]
+        for op in members:
+            for dependency in sorted(_dependencies(op) & collections):
+                visit(dependency)
+        visiting.discard(collection)
+        done.add(collection)
+        ordered.extend(members)
+
+    for op in creates:
+        visit(op.collection)
+    return ordered
+
+
+def _first_id(response_json: Any) -> str | None:
+    items = response_json if isinstance(response_json, list) else [response_json]
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get("id"), str):
+            return item["id"]
+    return None
+
+
+class _Sweep:
+    """State of one sweep: session, recorder and the ids found so far."""
+
+    def __init__(
+        self,
+        client: AmbrosiaHttpClient,
+        repeat: int,
+    ):
+        self.client = client
+        self.repeat = repeat
+        self.recorder = LoadRecorder()
+        self.sizes: dict[str, list[int]] = {}
+        self.skipped: dict[str, str] = {}
+        # Rows the sweep created (updated and deleted) and rows found on the
+        # server (only read), per collection
+        self.created: dict[str, list[str]] = {}
+        self.found: dict[str, list[str]] = {}
+
+    def ids(self) -> dict[str, list[str]]:
+        """Known ids per collection, created ones first."""
+        known = {key: list(value) for key, value in self.created.items()}
+        for collection, ids in self.found.items():
+            known.setdefault(collection, []).extend(ids)
+        return known
+
+    async def call(
+        self, operation: Operation, url: str, body: Any = None
+    ) -> Any | None:
+        """Call an operation once; return its JSON body if it succeeded."""
+        kwargs = {} if body is None else {"json": body}
+        response = await timed_request(
+            self.client,
+            self.recorder,
+            operation.method,
+            url,
+            operation.label,
+            expected_status=operation.success_statuses or None,
+            **kwargs,
+        )
+        if response is None:
+            return None
+        self.sizes.setdefault(operation.label, []).append(len(response.content))
+        if response.status_code not in operation.success_statuses:
+            logger.debug(f"{operation.label}: {response.status_code} {response.text}")
+            return None
+        try:
+            return response.json() if response.content else None
+        except ValueError:
+            return None
+
+    def url(self, operation: Operation, ids: dict[str, list[str]]) -> str | None:
+        """Fill in path and required query parameters, None if an id is missing."""
+        path = operation.path
+        for parameter in operation.path_parameters:
+            name = parameter["name"]
+            collection = _parameter_collection(operation, name)
+            if collection is None:
+                value = synthesize_value(parameter.get("schema", {}), name)
+                value = parameter.get("example", value)
+            elif ids.get(collection):
+                value = ids[collection][0]
+            else:
+                self.skipped[operation.label] = f"no {collection} id available"
+                return None
+            path = path.replace(f"{{{name}}}", str(value))
+        query = {
+            p["name"]: p.get("example", synthesize_value(p.get("schema", {})))
+            for p in operation.parameters
+            if p.get("in") == "query" and p.get("required")
+        }
+        if query:
+            path += "?" + "&".join(f"{key}={value}" for key, value in query.items())
+        return path
+
+    def body(self, operation: Operation) -> Any:
+        """Synthesize a request body, None if the operation takes none."""
+        if operation.body_schema is None:
+            return None
+        return synthesize_value(
+            operation.body_schema, collection=operation.collection, ids=self.ids()
+        )
+
+    async def list_reads(self, operations: list[Operation]) -> None:
+        for operation in operations:
+            url = self.url(operation, {})
+            found = None
+            for _ in range(self.repeat):
+                found = await self.call(operation, url, self.body(operation)) or found
+            found_id = _first_id(found) if found is not None else None
+            if found_id is not None:
+                self.found.setdefault(operation.collection, []).append(found_id)
+
+    async def creates(self, operations: list[Operation]) -> None:
+        for operation in operations:
+            for _ in range(self.repeat):
+                created = await self.call(
+                    operation, operation.path, self.body(operation)
+                )
+                created_id = _first_id(created) if created is not None else None
+                if created_id is not None:
+                    self.created.setdefault(operation.collection, []).append(created_id)
+
+    async def reads_and_updates(self, operations: list[Operation]) -> None:
+        for operation in operations:
+            # Only rows the sweep created are modified
+            ids = self.created if operation.method == "PUT" else self.ids()
+            url = self.url(operation, ids)
+            if url is None:
+                continue
+            for _ in range(self.repeat):
+                await self.call(operation, url, self.body(operation))
+
+    async def deletes(
+        self, operations: list[Operation], collections: list[str]
+    ) -> None:
+        by_collection = {op.collection: op for op in operations}
+        for collection in reversed(collections):
+            operation = by_collection.get(collection)
+            if operation is None:
+                continue
+            ids = self.created.get(collection, [])
+            if not ids:
+                self.skipped[operation.label] = f"no {collection} row was created"
+                continue
+            name = operation.path_parameters[0]["name"]
+            for row_id in ids:
+                await self.call(
+                    operation, operation.path.replace(f"{{{name}}}", row_id)
+                )
+
+
+async def run_sweep(
+    base_url: str,
+    operations: list[Operation] | None = None,
+    repeat: int = 5,
+    credentials: dict[str, str] | None = None,
+    auth: AuthSessionCache | None = None,
+) -> SweepReport:
+    """Call every operation and measure latency and response size.
+
+    Args:
+        base_url: Base URL of the server (ideally seeded, so reads return data)
+        operations: Operations to call. Defaults to ``load_operations()``
+        repeat: Calls per operation; creates run ``repeat`` times per
+            operation and deletes once per created row
+        credentials: User the sweep runs as; needs every permission.
+            Defaults to the test user
+        auth: Session cache to authenticate with, e.g. the ``auth_sessions``
+            fixture. Defaults to a new one
+
+    Returns:
+        SweepReport with one result per operation, in the given order
+    """
+    operations = load_operations() if operations is None else operations
+    credentials = credentials or DEFAULT_TEST_USER
+
+    list_reads, updates, deletes = [], [], []
+    for operation in operations:
+        # "/{collection}/{id}" deletes remove created rows at the end
+        if operation.method == "DELETE" and _is_item_path(operation):
+            deletes.append(operation)
+        elif operation.method == "GET" and not operation.path_parameters:
+            list_reads.append(operation)
+        elif operation.method != "POST" or operation.path_parameters:
+            updates.append(operation)
+    creates = creation_order(operations)
+    order = list(dict.fromkeys(op.collection for op in creates))
+    order += [op.collection for op in deletes if op.collection not in order]
+
+    async with AmbrosiaHttpClient(base_url) as client:
+        await (auth or AuthSessionCache()).attach(client, credentials)
+        sweep = _Sweep(client, repeat)
+        try:
+            await sweep.list_reads(list_reads)
+            await sweep.creates(creates)
+            await sweep.reads_and_updates(updates)
+        finally:
+            # Rows created before a failure are deleted too
+            await sweep.deletes(deletes, order)
+
+    report = sweep.recorder.build_report(duration=0.0)
+    results = []
+    for operation in operations:
+        stats = report.routes.get(operation.label)
+        skipped = None
+        if stats is None:
+            skipped = sweep.skipped.get(operation.label, "not called")
+        results.append(
+            OperationResult(
+                operation,
+                stats,
+                sweep.sizes.get(operation.label, []),
+                skipped,
+            )
+        )
+    sweep_report = SweepReport(results)
+    logger.info(f"OpenAPI sweep:\n{sweep_report.format_table()}")
+    return sweep_report
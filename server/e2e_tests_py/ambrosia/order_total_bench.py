@@ -0,0 +1,248 @@
+"""Order total benchmark: incremental totals against client-side recalculation.
+
+The ``/orders/{id}/dishes`` mutations (add, update, remove) keep the order's
+``total`` up to date in the same transaction as the dish change and return it
+in the response (``total``, plus ``dishIds`` for added dishes). Before, a
+client had to follow every mutation with ``PUT /orders/{id}/calculate-total``,
+which scans the order's dishes, to show the new total, and had to list the
+order's dishes to learn the ids of the ones it added.
+
+``run_order_total_benchmark`` builds the same order with both flows:
+
+- ``recalculate``: mutation, then ``PUT /orders/{id}/calculate-total``; one
+  ``GET /orders/{id}/dishes`` to learn the added dish ids
+- ``incremental``: the mutation alone, reading ``total`` from its response
+
+Each order gets ``items`` dishes added one at a time (a waiter taking an
+order), then a quarter of them repriced and a quarter removed. The report
+shows round-trips and latency per mutation (until the client knows the new
+total), time per order, totals that differ from the client's running sum and
+orders whose stored total differs from their dishes afterwards.
+
+Example:
+    report = await run_order_total_benchmark(server_url, items=20)
+    print(report.format_table())
+    assert report.consistent
+"""
+
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from ambrosia.auth_utils import DEFAULT_TEST_USER
+from ambrosia.load import LatencyHistogram
+from ambrosia.resources import AmbrosiaApi
+
+logger = logging.getLogger(__name__)
+
+FLOWS = ("recalculate", "incremental")
+
+# Totals are sums of prices with two decimals
+TOTAL_TOLERANCE = 0.005
+
+
+@dataclass
+class OrderFlowStats:
+    """Results of one flow over every order.
+
+    Attributes:
+        flow: "recalculate" or "incremental"
+        orders: Orders built
+        mutations: Dish additions, updates and removals
+        round_trips: Requests sent, mutations included
+        latency: Per-mutation time until the client knows the new total
+        order_seconds: Time to build each order
+        mismatches: Reported totals that differed from the client's running sum
+        stale_orders: Orders whose stored total differed from their dishes
+    """
+
+    flow: str
+    orders: int = 0
+    mutations: int = 0
+    round_trips: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    order_seconds: LatencyHistogram = field(default_factory=LatencyHistogram)
+    mismatches: int = 0
+    stale_orders: int = 0
+
+    @property
+    def round_trips_per_mutation(self) -> float:
+        """Requests per dish mutation."""
+        return self.round_trips / self.mutations if self.mutations else 0.0
+
+
+@dataclass
+class OrderTotalReport:
+    """Both flows of an order total benchmark.
+
+    Attributes:
+        items: Dishes added to each order
+        flows: Results per flow, in ``FLOWS`` order
+    """
+
+    items: int
+    flows: list[OrderFlowStats]
+
+    @property
+    def consistent(self) -> bool:
+        """True if every reported and stored total matched the dishes."""
+        return all(not s.mismatches and not s.stale_orders for s in self.flows)
+
+    def flow(self, name: str) -> OrderFlowStats:
+        """Results of the flow called ``name``."""
+        return next(s for s in self.flows if s.flow == name)
+
+    def format_table(self) -> str:
+        """Render round-trips, mutation latency (ms) and time per order."""
+        header = (
+            f"{'flow':<12} {'orders':>6} {'muts':>5} {'trips':>6} {'trips/mut':>9} "
+            f"{'p50':>7} {'p99':>7} {'order ms':>9} {'wrong':>5} {'stale':>5}"
+        )
+        lines = [header, "-" * len(header)]
+        for s in self.flows:
+            lines.append(
+                f"{s.flow:<12} {s.orders:>6} {s.mutations:>5} {s.round_trips:>6} "
+                f"{s.round_trips_per_mutation:>9.2f} "
+                f"{s.latency.percentile(50) * 1000:>7.2f} "
+                f"{s.latency.percentile(99) * 1000:>7.2f} "
+                f"{s.order_seconds.mean * 1000:>9.1f} "
+                f"{s.mismatches:>5} {s.stale_orders:>5}"
+            )
+        return "\n".join(lines)
+
+
+async def run_order_total_benchmark(
+    base_url: str,
+    items: int = 20,
+    orders: int = 5,
+    credentials: dict[str, str] | None = None,
+) -> OrderTotalReport:
+    """Build orders with both flows and compare round-trips and latency.
+
+    Orders alternate between the flows so both see the same server state. The
+    menu and orders it creates are deleted afterwards.
+
+    Args:
+        base_url: Base URL of the server
+        items: Dishes added to each order
+        orders: Orders built with each flow
+        credentials: Staff user. Defaults to the test user
+
+    Returns:
+        OrderTotalReport with both flows
+    """
+    credentials = credentials or DEFAULT_TEST_USER
+    stats = {flow: OrderFlowStats(flow) for flow in FLOWS}
+    async with AmbrosiaApi.connect(base_url, credentials) as api:
+        categories = api.categories("dish")
+        suffix = uuid.uuid4().hex[:8]
+        category_id = await categories.create({"name": f"order-total-{suffix}"})
+        prices = [round(4.5 + i * 1.25, 2) for i in range(items)]
+        dish_ids = await api.dishes.create_many(
+            {
+                "name": f"Total {suffix} {i:02d}",
+                "price": price,
+                "category_id": category_id,
+            }
+            for i, price in enumerate(prices)
+        )
+        menu = list(zip(dish_ids, prices, strict=True))
+        order_ids: list[str] = []
+        try:
+            for _ in range(orders):
+                for flow in FLOWS:
+                    order_id = await api.orders.create(
+                        {
+                            "user_id": api.user.get("user_id", ""),
+                            "waiter": "order-total-bench",
+                            "status": "open",
+                            "total": 0.0,
+                            "created_at": "",
+                        }
+                    )
+                    order_ids.append(order_id)
+                    await _build_order(api, stats[flow], order_id, menu)
+        finally:
+            await api.orders.delete_many(order_ids)
+            await api.dishes.delete_many(dish_ids)
+            await categories.delete(category_id)
+
+    report = OrderTotalReport(items, [stats[flow] for flow in FLOWS])
+    logger.info(f"Order total benchmark:\n{report.format_table()}")
+    return report
+
+
+async def _build_order(
+    api: AmbrosiaApi,
+    stats: OrderFlowStats,
+    order_id: str,
+    menu: list[tuple[str, float]],
+) -> None:
+    """Add every dish of ``menu``, reprice a quarter and remove a quarter."""
+    recalculate = stats.flow == "recalculate"
+    base = f"/orders/{order_id}/dishes"
+    expected = 0.0
+
+    async def mutate(method: str, path: str, status: int, **kwargs) -> Any:
+        start = time.perf_counter()
+        response = await api.pipeline.send(method, path, (status,), **kwargs)
+        body = response.json()
+        if recalculate:
+            response = await api.pipeline.send(
+                "PUT", f"/orders/{order_id}/calculate-total", (200,)
+            )
+            stats.round_trips += 1
+        stats.latency.record(time.perf_counter() - start)
+        stats.round_trips += 1
+        stats.mutations += 1
+        if abs(response.json()["total"] - expected) > TOTAL_TOLERANCE:
+            stats.mismatches += 1
+        return body
+
+    start = time.perf_counter()
+    added: list[tuple[str, str, float]] = []
+    for dish_id, price in menu:
+        expected += price
+        body = await mutate(
+            "POST",
+            base,
+            201,
+            json=[{"dish_id": dish_id, "price_at_order": price, "notes": None}],
+        )
+        if not recalculate:
+            added.append((body["dishIds"][0], dish_id, price))
+    if recalculate:
+        # The dish ids were only available by listing the order's dishes
+        response = await api.pipeline.send("GET", base, (200,))
+        stats.round_trips += 1
+        added = [(d["id"], d["dish_id"], d["price_at_order"]) for d in response.json()]
+
+    quarter = len(added) // 4
+    for order_dish_id, dish_id, price in added[:quarter]:
+        expected += 1.0
+        await mutate(
+            "PUT",
+            f"{base}/{order_dish_id}",
+            200,
+            json={
+                "order_id": order_id,
+                "dish_id": dish_id,
+                "price_at_order": price + 1.0,
+                "status": "pending",
+                "should_prepare": True,
+            },
+        )
+    for order_dish_id, _, price in added[len(added) - quarter :]:
+        expected -= price
+        await mutate("DELETE", f"{base}/{order_dish_id}", 200)
+    stats.order_seconds.record(time.perf_counter() - start)
+    stats.orders += 1
+
+    # Not part of the flow: the stored total must match the remaining dishes
+    order = (await api.pipeline.send("GET", f"/orders/{order_id}", (200,))).json()
+    response = await api.pipeline.send("GET", base, (200, 204))
+    dishes = response.json() if response.status_code == 200 else []
+    if abs(order["total"] - sum(d["price_at_order"] for d in dishes)) > TOTAL_TOLERANCE:
+        stats.stale_orders += 1
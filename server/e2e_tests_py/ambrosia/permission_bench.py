@@ -0,0 +1,327 @@
+"""Permission-check overhead benchmark for the cached authorization mode.
+
+Every route wrapped in ``authorizePermission`` checks the caller's permission
+before the handler runs. Without a cache that is a JOIN across ``users``,
+``roles``, ``role_permissions`` and ``permissions`` on the shared SQLite
+connection for every request. With ``--permission-cache`` the server keeps each
+user's permission set in memory and drops it when role permissions, roles or
+users change.
+
+``run_permission_benchmark`` starts an isolated server per mode, puts the same
+concurrent load on authorized routes and compares throughput and latency.
+``check_revocation`` checks that permission changes take effect on the very
+next request: revoking and restoring a role's permissions, moving the user to
+another role and deleting the user.
+
+Example:
+    report = run_permission_benchmark(virtual_users=20, duration=10)
+    print(report.format_table())
+    assert report.revocations_immediate
+"""
+
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+
+from ambrosia.auth_utils import DEFAULT_TEST_USER, AuthSessionCache, login_user
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.load import LoadRecorder, LoadReport, run_load, timed_request
+from ambrosia.resources import AmbrosiaApi
+from ambrosia.seeding import ensure_initial_setup
+from ambrosia.test_server import AmbrosiaTestServer
+
+logger = logging.getLogger(__name__)
+
+# Cheap authorized reads, so the permission check is a large share of each request
+DEFAULT_ROUTES = ("/dishes", "/spaces", "/tables")
+
+# Application arguments per mode
+MODES = {"uncached": [], "cached": ["--permission-cache"]}
+
+
+@dataclass
+class ModeResult:
+    """Load on authorized routes against one server mode.
+
+    Attributes:
+        mode: Key of ``MODES``
+        report: Latency report of the run
+    """
+
+    mode: str
+    report: LoadReport
+
+    @property
+    def throughput(self) -> float:
+        """Successful requests per second."""
+        total = self.report.total
+        duration = self.report.duration
+        return (total.count - total.errors) / duration if duration > 0 else 0.0
+
+
+@dataclass
+class RevocationStep:
+    """One permission change and the first request made after it.
+
+    Attributes:
+        name: What changed
+        expect_denied: Whether the request must be rejected with 403
+        status_code: Status of the first request after the change
+    """
+
+    name: str
+    expect_denied: bool
+    status_code: int
+
+    @property
+    def ok(self) -> bool:
+        """True if the change was already in effect."""
+        return (self.status_code == 403) == self.expect_denied
+
+
+@dataclass
+class RevocationResult:
+    """Outcome of ``check_revocation``.
+
+    Attributes:
+        mode: Server mode the check ran against
+        steps: Every change, in order
+    """
+
+    mode: str
+    steps: list[RevocationStep] = field(default_factory=list)
+
+    @property
+    def immediate(self) -> bool:
+        """True if every change took effect on the next request."""
+        return all(step.ok for step in self.steps)
+
+
+@dataclass
+class PermissionBenchmarkReport:
+    """Load results and revocation checks per mode.
+
+    Attributes:
+        modes: Load result per mode, in run order
+        revocations: Revocation check per mode, in run order
+    """
+
+    modes: list[ModeResult]
+    revocations: list[RevocationResult]
+
+    def result(self, mode: str) -> ModeResult:
+        """Load result of one mode."""
+        return next(result for result in self.modes if result.mode == mode)
+
+    @property
+    def speedup(self) -> float | None:
+        """Cached over uncached throughput, None unless both ran."""
+        modes = {result.mode for result in self.modes}
+        if not {"cached", "uncached"} <= modes:
+            return None
+        uncached = self.result("uncached").throughput
+        return self.result("cached").throughput / uncached if uncached else None
+
+    @property
+    def revocations_immediate(self) -> bool:
+        """True if revocations took effect immediately in every mode."""
+        return all(result.immediate for result in self.revocations)
+
+    def format_table(self) -> str:
+        """Render throughput, latency and revocation results per mode."""
+        revocations = {result.mode: result for result in self.revocations}
+        header = (
+            f"{'mode':<10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} "
+            f"{'revocation':>10}"
+        )
+        lines = [header, "-" * len(header)]
+        for result in self.modes:
+            total = result.report.total
+            revocation = revocations.get(result.mode)
+            immediate = (
+                "-" if revocation is None else "ok" if revocation.immediate else "STALE"
+            )
+            lines.append(
+                f"{result.mode:<10} {result.throughput:>8.1f} {total.p50 * 1000:>8.2f} "
+                f"{total.p99 * 1000:>8.2f} {total.errors:>6} {immediate:>10}"
+            )
+        if self.speedup is not None:
+            lines.append(f"cached / uncached throughput: {self.speedup:.2f}x")
+        return "\n".join(lines)
+
+
+async def measure_authorized_load(
+    base_url: str,
+    routes: tuple[str, ...] = DEFAULT_ROUTES,
+    virtual_users: int = 20,
+    duration: float = 10.0,
+    credentials: dict[str, str] | None = None,
+) -> LoadReport:
+    """Put closed-loop load on authorized routes, one request per iteration.
+
+    Args:
+        base_url: Base URL of the server
+        routes: Authorized GET routes, requested round-robin
+        virtual_users: Concurrent virtual users
+        duration: Seconds of load
+        credentials: User the load runs as. Defaults to the test user
+
+    Returns:
+        LoadReport with one route per entry of ``routes``
+    """
+    credentials = credentials or DEFAULT_TEST_USER
+    auth = AuthSessionCache()
+    counter = 0
+
+    async def setup(client: AmbrosiaHttpClient) -> None:
+        await auth.attach(client, credentials)
+
+    async def action(client: AmbrosiaHttpClient, recorder: LoadRecorder) -> None:
+        nonlocal counter
+        route = routes[counter % len(routes)]
+        counter += 1
+        await timed_request(
+            client, recorder, "GET", route, f"GET {route}", expected_status=(200, 204)
+        )
+
+    return await run_load(
+        base_url, action, virtual_users=virtual_users, duration=duration, setup=setup
+    )
+
+
+async def check_revocation(
+    base_url: str,
+    mode: str = "uncached",
+    permission: str = "dish_read",
+    route: str = "/dishes",
+    admin_credentials: dict[str, str] | None = None,
+) -> RevocationResult:
+    """Check that permission changes apply to the very next request.
+
+    A staff user is created in a role holding only ``permission`` and reads
+    ``route`` (twice, so a cache is warm). After each change made by the
+    admin, the staff user's next request must reflect it: revoking the role's
+    permissions, restoring them, moving the user to a role without
+    permissions and deleting the user.
+
+    Args:
+        base_url: Base URL of the server
+        mode: Label stored in the result
+        permission: Permission ``route`` requires
+        route: Authorized GET route
+        admin_credentials: Credentials allowed to manage roles and users.
+            Defaults to the test user
+
+    Returns:
+        RevocationResult with every step
+    """
+    result = RevocationResult(mode)
+    prefix = f"perm-bench-{uuid.uuid4().hex[:8]}"
+    staff = {"name": prefix, "pin": "4321"}
+
+    async with (
+        AmbrosiaApi.connect(base_url, admin_credentials) as admin,
+        AmbrosiaHttpClient(base_url) as client,
+    ):
+        role_id, empty_role_id = await admin.roles.create_many(
+            [{"role": prefix, "password": "0000"}, {"role": f"{prefix}-empty"}]
+        )
+        permissions_path = f"/roles/{role_id}/permissions"
+        user_id: str | None = None
+        try:
+            await admin.pipeline.send(
+                "PUT", permissions_path, (200,), json={"permissions": [permission]}
+            )
+            user_id = await admin.users.create({**staff, "role_id": role_id})
+            await login_user(client, staff)
+
+            async def step(name: str, expect_denied: bool) -> None:
+                response = await client.get(route)
+                result.steps.append(
+                    RevocationStep(name, expect_denied, response.status_code)
+                )
+
+            await step("granted", expect_denied=False)
+            await step("granted (cached)", expect_denied=False)
+
+            await admin.pipeline.send(
+                "PUT", permissions_path, (200,), json={"permissions": []}
+            )
+            await step("role permissions revoked", expect_denied=True)
+
+            await admin.pipeline.send(
+                "PUT", permissions_path, (200,), json={"permissions": [permission]}
+            )
+            await step("role permissions restored", expect_denied=False)
+
+            await admin.pipeline.send(
+                "PUT", f"/users/{user_id}", (200,), json={"role_id": empty_role_id}
+            )
+            await step("user moved to a role without permissions", expect_denied=True)
+
+            await admin.pipeline.send(
+                "PUT", f"/users/{user_id}", (200,), json={"role_id": role_id}
+            )
+            await step("user moved back", expect_denied=False)
+
+            await admin.users.delete(user_id)
+            user_id = None
+            await step("user deleted", expect_denied=True)
+        finally:
+            if user_id is not None:
+                await admin.users.delete(user_id)
+            await admin.roles.delete_many([role_id, empty_role_id])
+
+    for revocation_step in result.steps:
+        if not revocation_step.ok:
+            logger.warning(
+                f"{mode}: '{revocation_step.name}' not in effect on the next request "
+                f"(status {revocation_step.status_code})"
+            )
+    return result
+
+
+def run_permission_benchmark(
+    virtual_users: int = 20,
+    duration: float = 10.0,
+    routes: tuple[str, ...] = DEFAULT_ROUTES,
+    modes: tuple[str, ...] = ("uncached", "cached"),
+) -> PermissionBenchmarkReport:
+    """Compare authorized-route load with and without the permission cache.
+
+    Each mode runs on its own isolated server (jar launch mode), so both start
+    from the same empty database. Must be called outside a running event loop.
+
+    Args:
+        virtual_users: Concurrent virtual users
+        duration: Seconds of load per mode
+        routes: Authorized GET routes
+        modes: Keys of ``MODES`` to run, in order
+
+    Returns:
+        PermissionBenchmarkReport with load and revocation results per mode
+    """
+    results, revocations = [], []
+    for mode in modes:
+        server = AmbrosiaTestServer(
+            launch_mode="jar", isolated=True, server_args=MODES[mode]
+        )
+        try:
+            server.start_server()
+            asyncio.run(ensure_initial_setup(server.server_url))
+            report = asyncio.run(
+                measure_authorized_load(
+                    server.server_url, routes, virtual_users, duration
+                )
+            )
+            results.append(ModeResult(mode, report))
+            revocations.append(asyncio.run(check_revocation(server.server_url, mode)))
+        finally:
+            if server.server_process is not None:
+                server.stop_server()
+            server.cleanup_home_dir()
+
+    report = PermissionBenchmarkReport(results, revocations)
+    logger.info(f"Permission benchmark:\n{report.format_table()}")
+    return report
@@ -0,0 +1,637 @@
+"""Print pipeline benchmark against virtual ESC/POS printers.
+
+``POST /printers/print`` queues a job for the printer configured for the
+job's ``PrinterType``; that printer's worker renders the ticket template with
+``TicketFactory`` through ``EscPos`` and sends the bytes. With
+``--virtual-printers`` (the ``print_server_url`` fixture starts a server with
+it) a printer can be ``tcp://host:port``: the server then connects and writes
+raw ESC/POS like it would to a network printer on port 9100.
+
+``VirtualPrinter`` is such a printer: an asyncio TCP server recording every
+job with the time its last byte arrived. ``run_print_benchmark`` points the
+kitchen, bar and customer printers at virtual printers, fires concurrent print
+jobs with ``?wait=true`` (answered once the ticket is printed) and reports per
+printer:
+
+- HTTP latency of ``POST /printers/print?wait=true``
+- server-side render time and time spent sending to the printer
+  (``renderMillis`` and ``sendMillis`` of the finished job)
+- end-to-end time from submitting the job to the printer's last byte
+- bytes emitted per ticket
+
+Every received job is decoded with ``parse_escpos`` and checked: only known
+ESC/POS commands, the ticket's id and items in the text and a final cut.
+
+Example:
+    report = await run_print_benchmark(server_url, jobs_per_printer=50)
+    print(report.format_table())
+    assert report.all_valid
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from ambrosia.auth_utils import DEFAULT_TEST_USER, AuthSessionCache
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.load import LatencyHistogram
+from ambrosia.resources import AmbrosiaApi
+
+logger = logging.getLogger(__name__)
+
+PRINTER_TYPES = ("KITCHEN", "BAR", "CUSTOMER")
+
+ESC, GS, LF = 0x1B, 0x1D, 0x0A
+
+# Argument bytes of the fixed-length ESC and GS commands used for tickets
+_ESC_ARGS = {
+    ord("@"): 0,  # initialize
+    ord(" "): 1,  # character spacing
+    ord("!"): 1,  # print mode
+    ord("E"): 1,  # bold
+    ord("G"): 1,  # double strike
+    ord("-"): 1,  # underline
+    ord("M"): 1,  # font
+    ord("a"): 1,  # justification
+    ord("d"): 1,  # feed n lines
+    ord("J"): 1,  # feed n dots
+    ord("2"): 0,  # default line spacing
+    ord("3"): 1,  # line spacing
+    ord("t"): 1,  # code table
+    ord("R"): 1,  # international character set
+    ord("{"): 1,  # upside down
+    ord("V"): 1,  # rotate 90 degrees
+    ord("p"): 3,  # cash drawer pulse
+}
+_GS_ARGS = {
+    ord("!"): 1,  # character size
+    ord("B"): 1,  # reverse colors
+    ord("b"): 1,  # smoothing
+    ord("h"): 1,  # barcode height
+    ord("w"): 1,  # barcode width
+    ord("H"): 1,  # HRI position
+    ord("f"): 1,  # HRI font
+    ord("L"): 2,  # left margin
+    ord("W"): 2,  # print area width
+}
+_CUT = ord("V")
+
+# Header, table rows and total, like a kitchen or customer ticket
+DEFAULT_TEMPLATE_ELEMENTS = [
+    {"type": "HEADER", "value": "Ticket {{ticket.id}}", "style": {"bold": True}},
+    {"type": "TEXT", "value": "{{ticket.roomName}} / {{ticket.tableName}}"},
+    {"type": "TEXT", "value": "{{ticket.date}}"},
+    {"type": "SEPARATOR", "value": "-"},
+    {"type": "TABLE_HEADER", "value": "Items"},
+    {"type": "TABLE_ROW", "value": ""},
+    {"type": "SEPARATOR", "value": "-"},
+    {
+        "type": "FOOTER",
+        "value": "Total {{ticket.total}}",
+        "style": {"bold": True, "justification": "RIGHT"},
+    },
+]
+
+
+@dataclass
+class EscPosDocument:
+    """A decoded ESC/POS job.
+
+    Attributes:
+        lines: Printed text, one entry per line feed
+        commands: Every ESC/GS command, with its arguments
+        unknown: Byte offsets of sequences that are not known commands
+        cut: Whether the job ends with a paper cut
+        size: Bytes in the job
+    """
+
+    lines: list[str] = field(default_factory=list)
+    commands: list[bytes] = field(default_factory=list)
+    unknown: list[int] = field(default_factory=list)
+    cut: bool = False
+    size: int = 0
+
+    @property
+    def text(self) -> str:
+        """Printed text with line feeds."""
+        return "\n".join(self.lines)
+
+    @property
+    def valid(self) -> bool:
+        """Known commands only, some text and a final cut."""
+        return self.cut and not self.unknown and any(self.lines)
+
+
+def parse_escpos(data: bytes, encoding: str = "cp437") -> EscPosDocument:
+    """Decode the text and commands of an ESC/POS job.
+
+    Args:
+        data: Bytes the printer received for one job
+        encoding: Code page of the text
+
+    Returns:
+        EscPosDocument; sequences it does not know are listed in ``unknown``
+    """
+    document = EscPosDocument(size=len(data))
+    line = bytearray()
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        # Only a cut as the very last command counts
+        document.cut = False
+        if byte in (ESC, GS) and i + 1 < len(data):
+            command = data[i + 1]
+            if byte == GS and command == _CUT and i + 2 < len(data):
+                # GS V m (full/partial cut), or GS V m n (feed n and cut)
+                length = 4 if data[i + 2] in (65, 66) else 3
+                document.cut = True
+            else:
+                args = (_ESC_ARGS if byte == ESC else _GS_ARGS).get(command)
+                if args is None:
+                    document.unknown.append(i)
+                    i += 2
+                    continue
+                length = 2 + args
+            if i + length > len(data):
+                document.unknown.append(i)
+                document.cut = False
+                break
+            document.commands.append(data[i : i + length])
+            i += length
+            continue
+        if byte == LF:
+            document.lines.append(line.decode(encoding, errors="replace"))
+            line.clear()
+        elif byte >= 0x20 or byte in (0x09, 0x0D):
+            line.append(byte)
+        else:
+            document.unknown.append(i)
+        i += 1
+    if line:
+        document.lines.append(line.decode(encoding, errors="replace"))
+    return document
+
+
+@dataclass
+class PrintedJob:
+    """One connection to a virtual printer.
+
+    Attributes:
+        printer: Name of the printer
+        data: Bytes received
+        connected_at: ``time.perf_counter()`` when the server connected
+        last_byte_at: ``time.perf_counter()`` when the last byte arrived
+    """
+
+    printer: str
+    data: bytes
+    connected_at: float
+    last_byte_at: float
+
+
+class VirtualPrinter:
+    """Raw TCP ESC/POS printer recording every job (one job per connection).
+
+    A job ends when the server shuts down its side; the printer then closes
+    the connection, which the server waits for. ``read_delay`` postpones
+    reading (and so closing), like a slow or busy printer.
+    """
+
+    def __init__(self, name: str, host: str = "127.0.0.1", read_delay: float = 0.0):
+        """Initialize the printer.
+
+        Args:
+            name: Label stored on the received jobs
+            host: Interface to listen on
+            read_delay: Seconds to wait before reading each job
+        """
+        self.name = name
+        self.host = host
+        self.read_delay = read_delay
+        self.jobs: list[PrintedJob] = []
+        self._server: asyncio.Server | None = None
+        self._received = asyncio.Event()
+
+    @property
+    def url(self) -> str:
+        """Printer name to pass to ``POST /printers/set``."""
+        assert self._server is not None, "Printer is not started"
+        port = self._server.sockets[0].getsockname()[1]
+        return f"tcp://{self.host}:{port}"
+
+    async def start(self) -> None:
+        """Start listening on a free port."""
+        self._server = await asyncio.start_server(self._handle, self.host, 0)
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "VirtualPrinter":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def wait_for_jobs(self, count: int, timeout: float = 10.0) -> bool:
+        """Wait until at least ``count`` jobs were received.
+
+        Returns:
+            True if they arrived within ``timeout`` seconds
+        """
+        deadline = time.perf_counter() + timeout
+        while len(self.jobs) < count:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            self._received.clear()
+            try:
+                await asyncio.wait_for(self._received.wait(), remaining)
+            except TimeoutError:
+                return False
+        return True
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connected_at = last_byte_at = time.perf_counter()
+        if self.read_delay:
+            await asyncio.sleep(self.read_delay)
+        chunks = []
+        try:
+            while chunk := await reader.read(64 * 1024):
+                chunks.append(chunk)
+                last_byte_at = time.perf_counter()
+        except ConnectionError as e:
+            logger.debug(f"{self.name}: connection lost: {e}")
+        finally:
+            writer.close()
+        self.jobs.append(
+            PrintedJob(self.name, b"".join(chunks), connected_at, last_byte_at)
+        )
+        self._received.set()
+
+
+def ticket_data(ticket_id: str, items: int = 8) -> dict[str, Any]:
+    """Build a ``TicketData`` body with ``items`` lines.
+
+    Args:
+        ticket_id: Printed in the header; identifies the job on the printer
+        items: Number of item lines
+    """
+    lines = [
+        {
+            "quantity": 1 + i % 3,
+            "name": f"Dish {i:02d}",
+            "price": 4.5 + i,
+            "comments": ["no onion"] if i % 4 == 0 else [],
+        }
+        for i in range(items)
+    ]
+    return {
+        "ticketId": ticket_id,
+        "tableName": "Table 7",
+        "roomName": "Terrace",
+        "date": "2025-12-31 21:30",
+        "items": lines,
+        "total": sum(line["quantity"] * line["price"] for line in lines),
+    }
+
+
+@dataclass
+class PrintJobResult:
+    """One print job, from submission to the printer's last byte.
+
+    Attributes:
+        printer_type: ``PrinterType`` the job was sent to
+        ticket_id: Ticket id printed in the header
+        item_names: Names of the printed items
+        submitted_at: ``time.perf_counter()`` when the request was sent
+        status_code: Status of ``POST /printers/print``, None on transport error
+        response_seconds: HTTP latency
+        server_timing: Server-side ``render`` and ``print`` durations in seconds
+        printed: The job as received by the printer, None if it never arrived
+        document: Decoded ``printed`` data
+    """
+
+    printer_type: str
+    ticket_id: str
+    item_names: list[str]
+    submitted_at: float
+    status_code: int | None = None
+    response_seconds: float = 0.0
+    server_timing: dict[str, float] = field(default_factory=dict)
+    printed: PrintedJob | None = None
+    document: EscPosDocument | None = None
+
+    @property
+    def end_to_end(self) -> float | None:
+        """Seconds from submitting the job to the printer's last byte."""
+        if self.printed is None:
+            return None
+        return self.printed.last_byte_at - self.submitted_at
+
+    @property
+    def valid(self) -> bool:
+        """Printed once, valid ESC/POS, containing the ticket and its items."""
+        if self.document is None or not self.document.valid:
+            return False
+        text = self.document.text
+        return f"Ticket {self.ticket_id}" in text and all(
+            name in text for name in self.item_names
+        )
+
+
+@dataclass
+class PrinterStats:
+    """Aggregated results of one printer.
+
+    Attributes:
+        printer_type: ``PrinterType``
+        jobs: Jobs submitted
+        accepted: Jobs answered with 200
+        printed: Jobs that reached the printer
+        valid: Printed jobs with valid content
+        response: HTTP latency histogram
+        end_to_end: Submission to last byte histogram
+        render: Mean server render time in seconds
+        send: Mean server time spent writing to the printer in seconds
+        bytes: Mean bytes per printed job
+    """
+
+    printer_type: str
+    jobs: int
+    accepted: int
+    printed: int
+    valid: int
+    response: LatencyHistogram
+    end_to_end: LatencyHistogram
+    render: float
+    send: float
+    bytes: float
+
+
+@dataclass
+class PrintBenchmarkReport:
+    """Every job of a print benchmark.
+
+    Attributes:
+        jobs: Results in submission order
+        duration: Seconds from the first submission to the last printed byte
+        unmatched: Printed jobs that matched no submitted ticket
+    """
+
+    jobs: list[PrintJobResult]
+    duration: float
+    unmatched: int = 0
+
+    @property
+    def all_valid(self) -> bool:
+        """True if every job was accepted and printed once with valid content."""
+        return not self.unmatched and all(
+            job.status_code == 200 and job.valid for job in self.jobs
+        )
+
+    def printer_stats(self) -> list[PrinterStats]:
+        """Statistics per printer type, in ``PRINTER_TYPES`` order."""
+        stats = []
+        for printer_type in PRINTER_TYPES:
+            jobs = [job for job in self.jobs if job.printer_type == printer_type]
+            if not jobs:
+                continue
+            response, end_to_end = LatencyHistogram(), LatencyHistogram()
+            printed = [job for job in jobs if job.printed is not None]
+            for job in jobs:
+                if job.status_code is not None:
+                    response.record(job.response_seconds)
+                if job.end_to_end is not None:
+                    end_to_end.record(job.end_to_end)
+            timed = [job.server_timing for job in jobs if job.server_timing]
+            stats.append(
+                PrinterStats(
+                    printer_type=printer_type,
+                    jobs=len(jobs),
+                    accepted=sum(job.status_code == 200 for job in jobs),
+                    printed=len(printed),
+                    valid=sum(job.valid for job in jobs),
+                    response=response,
+                    end_to_end=end_to_end,
+                    render=_mean([t.get("render", 0.0) for t in timed]),
+                    send=_mean([t.get("print", 0.0) for t in timed]),
+                    bytes=_mean([len(job.printed.data) for job in printed]),
+                )
+            )
+        return stats
+
+    def format_table(self) -> str:
+        """Render per-printer latency (ms), render time and bytes."""
+        header = (
+            f"{'printer':<9} {'jobs':>5} {'ok':>5} {'valid':>5} {'http p50':>9} "
+            f"{'http p99':>9} {'render':>7} {'send':>7} {'e2e p50':>8} "
+            f"{'e2e p99':>8} {'bytes':>6}"
+        )
+        lines = [header, "-" * len(header)]
+        for s in self.printer_stats():
+            lines.append(
+                f"{s.printer_type:<9} {s.jobs:>5} {s.accepted:>5} {s.valid:>5} "
+                f"{s.response.percentile(50) * 1000:>9.1f} "
+                f"{s.response.percentile(99) * 1000:>9.1f} "
+                f"{s.render * 1000:>7.2f} {s.send * 1000:>7.2f} "
+                f"{s.end_to_end.percentile(50) * 1000:>8.1f} "
+                f"{s.end_to_end.percentile(99) * 1000:>8.1f} {s.bytes:>6.0f}"
+            )
+        jobs_per_second = len(self.jobs) / self.duration if self.duration else 0.0
+        lines.append(
+            f"{len(self.jobs)} jobs in {self.duration:.2f}s "
+            f"({jobs_per_second:.1f} jobs/s), {self.unmatched} unmatched"
+        )
+        return "\n".join(lines)
+
+
+def _mean(values: list[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+async def create_print_template(
+    api: AmbrosiaApi, elements: list[dict[str, Any]] | None = None
+) -> tuple[str, str]:
+    """Create a ticket template with a unique name.
+
+    Args:
+        api: Authenticated API
+        elements: Template elements. Defaults to ``DEFAULT_TEMPLATE_ELEMENTS``
+
+    Returns:
+        Template id and name
+    """
+    name = f"print-bench-{uuid.uuid4().hex[:8]}"
+    response = await api.pipeline.send(
+        "POST",
+        "/templates",
+        (201,),
+        json={"name": name, "elements": elements or DEFAULT_TEMPLATE_ELEMENTS},
+    )
+    return response.json()["id"], name
+
+
+async def set_printers(api: AmbrosiaApi, printers: dict[str, str]) -> None:
+    """Point printer types at printers, e.g. ``{"KITCHEN": printer.url}``.
+
+    Args:
+        api: Authenticated API
+        printers: Printer name per ``PrinterType``
+    """
+    for printer_type, name in printers.items():
+        await api.pipeline.send(
+            "POST",
+            "/printers/set",
+            (200,),
+            json={"printerType": printer_type, "printerName": name},
+        )
+
+
+def match_printed_jobs(
+    jobs: list[PrintJobResult], printers: list[VirtualPrinter]
+) -> int:
+    """Attach each printed job to the submitted job whose ticket it shows.
+
+    Args:
+        jobs: Submitted jobs; ``printed`` and ``document`` are filled in
+        printers: Printers the jobs were sent to
+
+    Returns:
+        Number of printed jobs that matched no submitted job (or a job twice)
+    """
+    by_ticket = {job.ticket_id: job for job in jobs}
+    unmatched = 0
+    for printer in printers:
+        for printed in printer.jobs:
+            document = parse_escpos(printed.data)
+            header = next((line for line in document.lines if "Ticket " in line), "")
+            job = by_ticket.get(header.split("Ticket ", 1)[-1].strip())
+            if job is None or job.printed is not None:
+                unmatched += 1
+                continue
+            job.printed, job.document = printed, document
+    return unmatched
+
+
+async def run_print_benchmark(
+    base_url: str,
+    jobs_per_printer: int = 20,
+    concurrency: int = 8,
+    items: int = 8,
+    credentials: dict[str, str] | None = None,
+    timeout: float = 30.0,
+) -> PrintBenchmarkReport:
+    """Fire concurrent print jobs at kitchen, bar and customer virtual printers.
+
+    The server must run with ``--virtual-printers``. Printer types are left
+    pointing at the (stopped) virtual printers afterwards.
+
+    Args:
+        base_url: Base URL of the server
+        jobs_per_printer: Jobs sent to each printer type
+        concurrency: Print requests in flight at once
+        items: Item lines per ticket
+        credentials: User sending the jobs. Defaults to the test user
+        timeout: Seconds to wait for every job to reach its printer
+
+    Returns:
+        PrintBenchmarkReport with every job
+    """
+    credentials = credentials or DEFAULT_TEST_USER
+    printers = {t: VirtualPrinter(t.lower()) for t in PRINTER_TYPES}
+    for printer in printers.values():
+        await printer.start()
+    try:
+        async with AmbrosiaApi.connect(base_url, credentials) as api:
+            template_id, template_name = await create_print_template(api)
+            await set_printers(api, {t: p.url for t, p in printers.items()})
+            try:
+                jobs = [
+                    PrintJobResult(
+                        printer_type=PRINTER_TYPES[i % len(PRINTER_TYPES)],
+                        ticket_id=f"{i:05d}-{uuid.uuid4().hex[:6]}",
+                        item_names=[f"Dish {n:02d}" for n in range(items)],
+                        submitted_at=0.0,
+                    )
+                    for i in range(jobs_per_printer * len(PRINTER_TYPES))
+                ]
+                start = time.perf_counter()
+                await _submit(
+                    base_url, jobs, template_name, items, concurrency, credentials
+                )
+                for printer_type, printer in printers.items():
+                    expected = sum(
+                        job.printer_type == printer_type and job.status_code == 200
+                        for job in jobs
+                    )
+                    if not await printer.wait_for_jobs(expected, timeout):
+                        logger.warning(
+                            f"{printer_type}: {len(printer.jobs)} of {expected} "
+                            f"jobs printed within {timeout}s"
+                        )
+            finally:
+                await api.pipeline.send("DELETE", f"/templates/{template_id}")
+    finally:
+        for printer in printers.values():
+            await printer.stop()
+
+    unmatched = match_printed_jobs(jobs, list(printers.values()))
+    last_byte = max(
+        (job.printed.last_byte_at for job in jobs if job.printed), default=start
+    )
+    report = PrintBenchmarkReport(jobs, last_byte - start, unmatched)
+    logger.info(f"Print benchmark:\n{report.format_table()}")
+    return report
+
+
+async def _submit(
+    base_url: str,
+    jobs: list[PrintJobResult],
+    template_name: str,
+    items: int,
+    concurrency: int,
+    credentials: dict[str, str],
+) -> None:
+    """Print every job with ``?wait=true``, ``concurrency`` at a time."""
+    auth = AuthSessionCache()
+    pending = list(reversed(jobs))
+
+    async with AmbrosiaHttpClient(base_url) as client:
+        await auth.attach(client, credentials)
+
+        async def worker() -> None:
+            while pending:
+                job = pending.pop()
+                body = {
+                    "templateName": template_name,
+                    "ticketData": ticket_data(job.ticket_id, items),
+                    "printerType": job.printer_type,
+                }
+                job.submitted_at = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/printers/print", params={"wait": "true"}, json=body
+                    )
+                except Exception as e:
+                    logger.debug(f"Print job {job.ticket_id} failed: {e}")
+                    continue
+                job.response_seconds = time.perf_counter() - job.submitted_at
+                job.status_code = response.status_code
+                if response.status_code == 200:
+                    printed = response.json()
+                    job.server_timing = {
+                        "render": (printed.get("renderMillis") or 0.0) / 1000,
+                        "print": (printed.get("sendMillis") or 0.0) / 1000,
+                    }
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
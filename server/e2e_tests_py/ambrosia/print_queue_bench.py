@@ -0,0 +1,383 @@
+"""Print queue benchmark: bursts of tickets to a slow and two fast printers.
+
+Each printer type has its own job queue on the server with a single worker.
+``POST /printers/print`` validates the printer and template, queues the job
+and answers ``202`` with it; ``GET /printers/jobs/{id}`` reports its status
+(``QUEUED``, ``PRINTING``, ``DONE`` or ``FAILED``) and, once finished, its
+render and send times. ``?wait=true`` keeps the old behavior of answering
+once the ticket is printed.
+
+``run_print_queue_benchmark`` points the kitchen printer at a slow
+``VirtualPrinter`` (``read_delay`` per ticket, like a busy thermal printer)
+and bar and customer at fast ones. It submits a burst per printer, each burst
+in order and all printers in parallel, then polls every job until it is
+finished and checks:
+
+- the API answers without waiting for the printer: with the queue, each
+  response carries a ``QUEUED`` or ``PRINTING`` job and arrives before the
+  printer has received the ticket
+- each printer prints its tickets in submission order
+- the slow printer does not hold back the fast ones
+- every job ends ``DONE`` with a valid ESC/POS ticket
+
+Running it with ``wait=True`` gives the blocking baseline for comparison.
+
+Example:
+    queued = await run_print_queue_benchmark(server_url)
+    blocking = await run_print_queue_benchmark(server_url, wait=True)
+    print(queued.format_table())
+    assert queued.all_done and queued.in_order
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from ambrosia.auth_utils import DEFAULT_TEST_USER, AuthSessionCache
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.load import LatencyHistogram
+from ambrosia.print_bench import (
+    PRINTER_TYPES,
+    EscPosDocument,
+    VirtualPrinter,
+    create_print_template,
+    parse_escpos,
+    set_printers,
+    ticket_data,
+)
+from ambrosia.resources import AmbrosiaApi
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("DONE", "FAILED")
+
+# Kitchen printers are the ones that fall behind during a rush
+SLOW_PRINTER = "KITCHEN"
+
+
+@dataclass
+class QueuedJobResult:
+    """One ticket of a burst.
+
+    Attributes:
+        printer_type: ``PrinterType`` the job was sent to
+        sequence: Position in its printer's burst
+        ticket_id: Ticket id printed in the header
+        submitted_at: ``time.perf_counter()`` when the request was sent
+        status_code: Status of ``POST /printers/print``, None on transport error
+        response_seconds: HTTP latency
+        job: Last ``PrintJob`` reported by the server
+        accepted_status: Job status in the ``POST /printers/print`` response
+        printed_before_response: Tickets the printer had received when the
+            response arrived, None on transport error
+        document: The ticket as decoded from the printer, None if not printed
+        printed_at: ``time.perf_counter()`` of the printer's last byte
+    """
+
+    printer_type: str
+    sequence: int
+    ticket_id: str
+    submitted_at: float = 0.0
+    status_code: int | None = None
+    response_seconds: float = 0.0
+    job: dict[str, Any] = field(default_factory=dict)
+    accepted_status: str | None = None
+    printed_before_response: int | None = None
+    document: EscPosDocument | None = None
+    printed_at: float | None = None
+
+    @property
+    def status(self) -> str | None:
+        """Server-side job status."""
+        return self.job.get("status")
+
+    @property
+    def queue_wait(self) -> float | None:
+        """Seconds the job waited in its printer's queue."""
+        if self.job.get("startedAt") is None:
+            return None
+        return (self.job["startedAt"] - self.job["createdAt"]) / 1000
+
+
+@dataclass
+class QueuePrinterStats:
+    """Results of one printer's burst.
+
+    Attributes:
+        printer_type: ``PrinterType``
+        jobs: Jobs submitted
+        done: Jobs that finished ``DONE``
+        in_order: Whether tickets were printed in submission order
+        response: HTTP latency histogram of the submissions
+        queue_wait: Histogram of time spent queued on the server
+        submit_seconds: Seconds to submit the whole burst
+        print_seconds: Seconds from the first submission to the last byte
+    """
+
+    printer_type: str
+    jobs: int
+    done: int
+    in_order: bool
+    response: LatencyHistogram
+    queue_wait: LatencyHistogram
+    submit_seconds: float
+    print_seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """Printed tickets per second."""
+        return self.done / self.print_seconds if self.print_seconds else 0.0
+
+
+@dataclass
+class PrintQueueReport:
+    """Every job of a print queue benchmark.
+
+    Attributes:
+        wait: Whether jobs were sent with ``?wait=true``
+        read_delay: Per-ticket delay of the slow printer in seconds
+        jobs: Results in submission order per printer
+        printed_order: Ticket sequences per printer, in the order printed
+        unmatched: Printed tickets that matched no submitted job
+    """
+
+    wait: bool
+    read_delay: float
+    jobs: list[QueuedJobResult]
+    printed_order: dict[str, list[int]]
+    unmatched: int = 0
+
+    @property
+    def all_done(self) -> bool:
+        """True if every job was accepted, finished ``DONE`` and printed."""
+        accepted = 200 if self.wait else 202
+        return not self.unmatched and all(
+            job.status_code == accepted
+            and job.status == "DONE"
+            and job.document is not None
+            and job.document.valid
+            for job in self.jobs
+        )
+
+    @property
+    def in_order(self) -> bool:
+        """True if every printer printed its tickets in submission order."""
+        return all(s.in_order for s in self.printer_stats())
+
+    def printer_stats(self) -> list[QueuePrinterStats]:
+        """Statistics per printer type, in ``PRINTER_TYPES`` order."""
+        stats = []
+        for printer_type in PRINTER_TYPES:
+            jobs = [job for job in self.jobs if job.printer_type == printer_type]
+            if not jobs:
+                continue
+            response, queue_wait = LatencyHistogram(), LatencyHistogram()
+            for job in jobs:
+                if job.status_code is not None:
+                    response.record(job.response_seconds)
+                if job.queue_wait is not None:
+                    queue_wait.record(job.queue_wait)
+            first = min(job.submitted_at for job in jobs)
+            last_response = max(job.submitted_at + job.response_seconds for job in jobs)
+            printed = [job.printed_at for job in jobs if job.printed_at]
+            last_byte = max(printed, default=first)
+            order = self.printed_order.get(printer_type, [])
+            stats.append(
+                QueuePrinterStats(
+                    printer_type=printer_type,
+                    jobs=len(jobs),
+                    done=sum(job.status == "DONE" for job in jobs),
+                    in_order=order == sorted(order) and len(order) == len(jobs),
+                    response=response,
+                    queue_wait=queue_wait,
+                    submit_seconds=last_response - first,
+                    print_seconds=last_byte - first,
+                )
+            )
+        return stats
+
+    def format_table(self) -> str:
+        """Render per-printer response latency (ms), queue wait and throughput."""
+        header = (
+            f"{'printer':<9} {'jobs':>5} {'done':>5} {'order':>6} {'http p50':>9} "
+            f"{'http p99':>9} {'queue p99':>10} {'submit s':>9} {'jobs/s':>7}"
+        )
+        mode = "wait=true" if self.wait else "queued"
+        lines = [
+            f"{mode}, slow printer {self.read_delay * 1000:.0f} ms/ticket",
+            header,
+            "-" * len(header),
+        ]
+        for s in self.printer_stats():
+            lines.append(
+                f"{s.printer_type:<9} {s.jobs:>5} {s.done:>5} "
+                f"{'ok' if s.in_order else 'WRONG':>6} "
+                f"{s.response.percentile(50) * 1000:>9.1f} "
+                f"{s.response.percentile(99) * 1000:>9.1f} "
+                f"{s.queue_wait.percentile(99) * 1000:>10.1f} "
+                f"{s.submit_seconds:>9.2f} {s.throughput:>7.1f}"
+            )
+        lines.append(f"{self.unmatched} unmatched")
+        return "\n".join(lines)
+
+
+async def run_print_queue_benchmark(
+    base_url: str,
+    jobs_per_printer: int = 20,
+    read_delay: float = 0.05,
+    items: int = 8,
+    wait: bool = False,
+    credentials: dict[str, str] | None = None,
+    timeout: float = 30.0,
+) -> PrintQueueReport:
+    """Submit a burst of tickets per printer and follow every job to the end.
+
+    The server must run with ``--virtual-printers``. Printer types are left
+    pointing at the (stopped) virtual printers afterwards.
+
+    Args:
+        base_url: Base URL of the server
+        jobs_per_printer: Tickets in each printer's burst
+        read_delay: Seconds the slow (kitchen) printer takes per ticket
+        items: Item lines per ticket
+        wait: Send jobs with ``?wait=true`` (blocking baseline)
+        credentials: User sending the jobs. Defaults to the test user
+        timeout: Seconds to wait for every job to finish
+
+    Returns:
+        PrintQueueReport with every job
+    """
+    credentials = credentials or DEFAULT_TEST_USER
+    printers = {
+        t: VirtualPrinter(t.lower(), read_delay=read_delay if t == SLOW_PRINTER else 0)
+        for t in PRINTER_TYPES
+    }
+    jobs = [
+        QueuedJobResult(t, sequence, f"{t[0]}{sequence:04d}-{uuid.uuid4().hex[:6]}")
+        for t in PRINTER_TYPES
+        for sequence in range(jobs_per_printer)
+    ]
+    for printer in printers.values():
+        await printer.start()
+    try:
+        async with AmbrosiaApi.connect(base_url, credentials) as api:
+            template_id, template_name = await create_print_template(api)
+            await set_printers(api, {t: p.url for t, p in printers.items()})
+            try:
+                async with AmbrosiaHttpClient(base_url) as client:
+                    await AuthSessionCache().attach(client, credentials)
+                    await asyncio.gather(
+                        *(
+                            _submit_burst(
+                                client,
+                                [job for job in jobs if job.printer_type == t],
+                                printers[t],
+                                template_name,
+                                items,
+                                wait,
+                            )
+                            for t in PRINTER_TYPES
+                        )
+                    )
+                    await _follow_jobs(client, jobs, timeout)
+                for printer_type, printer in printers.items():
+                    expected = sum(
+                        job.printer_type == printer_type and job.status == "DONE"
+                        for job in jobs
+                    )
+                    if not await printer.wait_for_jobs(expected, timeout):
+                        logger.warning(
+                            f"{printer_type}: {len(printer.jobs)} of {expected} "
+                            f"jobs printed within {timeout}s"
+                        )
+            finally:
+                await api.pipeline.send("DELETE", f"/templates/{template_id}")
+    finally:
+        for printer in printers.values():
+            await printer.stop()
+
+    printed_order, unmatched = _match_printed(jobs, printers)
+    report = PrintQueueReport(wait, read_delay, jobs, printed_order, unmatched)
+    logger.info(f"Print queue benchmark:\n{report.format_table()}")
+    return report
+
+
+async def _submit_burst(
+    client: AmbrosiaHttpClient,
+    jobs: list[QueuedJobResult],
+    printer: VirtualPrinter,
+    template_name: str,
+    items: int,
+    wait: bool,
+) -> None:
+    """Submit one printer's jobs one after another, in sequence order."""
+    params = {"wait": "true"} if wait else None
+    for job in jobs:
+        body = {
+            "templateName": template_name,
+            "ticketData": ticket_data(job.ticket_id, items),
+            "printerType": job.printer_type,
+        }
+        job.submitted_at = time.perf_counter()
+        try:
+            response = await client.post("/printers/print", params=params, json=body)
+        except Exception as e:
+            logger.debug(f"Print job {job.ticket_id} failed: {e}")
+            continue
+        job.response_seconds = time.perf_counter() - job.submitted_at
+        job.printed_before_response = len(printer.jobs)
+        job.status_code = response.status_code
+        if response.status_code in (200, 202):
+            job.job = response.json()
+            job.accepted_status = job.status
+
+
+async def _follow_jobs(
+    client: AmbrosiaHttpClient,
+    jobs: list[QueuedJobResult],
+    timeout: float,
+    interval: float = 0.05,
+) -> None:
+    """Poll ``GET /printers/jobs/{id}`` until every accepted job is finished."""
+    deadline = time.perf_counter() + timeout
+    pending = [job for job in jobs if job.job.get("id")]
+    while pending:
+        for job in pending:
+            response = await client.get(f"/printers/jobs/{job.job['id']}")
+            if response.status_code == 200:
+                job.job = response.json()
+        pending = [job for job in pending if job.status not in FINISHED_STATUSES]
+        if not pending:
+            return
+        if time.perf_counter() > deadline:
+            logger.warning(f"{len(pending)} print jobs unfinished after {timeout}s")
+            return
+        await asyncio.sleep(interval)
+
+
+def _match_printed(
+    jobs: list[QueuedJobResult], printers: dict[str, VirtualPrinter]
+) -> tuple[dict[str, list[int]], int]:
+    """Attach printed tickets to their jobs and list sequences in print order."""
+    by_ticket = {job.ticket_id: job for job in jobs}
+    printed_order: dict[str, list[int]] = {}
+    unmatched = 0
+    for printer_type, printer in printers.items():
+        order = printed_order.setdefault(printer_type, [])
+        for printed in printer.jobs:
+            document = parse_escpos(printed.data)
+            header = next((line for line in document.lines if "Ticket " in line), "")
+            job = by_ticket.get(header.split("Ticket ", 1)[-1].strip())
+            if (
+                job is None
+                or job.printer_type != printer_type
+                or job.document is not None
+            ):
+                unmatched += 1
+                continue
+            job.document, job.printed_at = document, printed.last_byte_at
+            order.append(job.sequence)
+    return printed_order, unmatched
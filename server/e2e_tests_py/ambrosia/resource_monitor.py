@@ -0,0 +1,405 @@
+"""Background resource sampler for the server process tree.
+
+``ResourceMonitor`` samples CPU, RSS, thread count, open file descriptors and
+inet sockets of a process and its children at a fixed interval on a background
+thread. Labelled windows (``begin``/``end``) annotate the timeline with test
+or load-phase boundaries and take a sample at each boundary, so memory growth
+or descriptor leaks can be attributed to the endpoints a test exercised. The
+timeline is saved as CSV or JSON.
+
+As a pytest plugin (``--resource-profile=PATH``) the session server is
+monitored and every test is a labelled window; the tests that grew RSS, file
+descriptors, threads or sockets the most are listed in the summary.
+
+Options:
+    --resource-profile=PATH     Timeline file (CSV, or JSON for a ``.json`` path)
+    --resource-interval=SECONDS Sampling interval (default: 0.5)
+
+Example:
+    with ResourceMonitor(server.server_process.pid, interval=0.2) as monitor:
+        monitor.begin("uploads")
+        ...
+        monitor.end("uploads")
+    monitor.save("uploads.csv")
+"""
+
+import csv
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+import psutil
+import pytest
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResourceSample:
+    """Resource usage of a process tree at one point in time.
+
+    Attributes:
+        elapsed: Seconds since the monitor started
+        cpu_seconds: User + system CPU time used so far
+        cpu_percent: CPU use since the previous sample (100 = one core)
+        rss: Resident set size in bytes
+        threads: Number of threads
+        fds: Open file descriptors (None where unsupported)
+        sockets: Open inet sockets (None if not permitted)
+        established: Established TCP connections (None if not permitted)
+        processes: Number of processes in the tree
+        label: Window the sample belongs to, "" outside any window
+    """
+
+    elapsed: float
+    cpu_seconds: float
+    cpu_percent: float
+    rss: int
+    threads: int
+    fds: int | None
+    sockets: int | None
+    established: int | None
+    processes: int
+    label: str = ""
+
+
+@dataclass
+class ResourceEvent:
+    """A timeline annotation.
+
+    Attributes:
+        elapsed: Seconds since the monitor started
+        kind: "begin", "end" or "mark"
+        label: Window label, e.g. a pytest node id
+    """
+
+    elapsed: float
+    kind: str
+    label: str
+
+
+@dataclass
+class WindowGrowth:
+    """Resource change between the begin and end of a labelled window.
+
+    Attributes:
+        label: Window label
+        duration: Seconds between begin and end
+        rss: RSS change in bytes
+        fds: File descriptor change (None where unsupported)
+        threads: Thread count change
+        sockets: Inet socket change (None if not permitted)
+        cpu_seconds: CPU time used inside the window
+    """
+
+    label: str
+    duration: float
+    rss: int
+    fds: int | None
+    threads: int
+    sockets: int | None
+    cpu_seconds: float
+
+
+def _delta(after: int | None, before: int | None) -> int | None:
+    return None if after is None or before is None else after - before
+
+
+def sample_process_tree(pid: int, connections: bool = True) -> dict | None:
+    """Return the summed resource usage of a process and its children.
+
+    Args:
+        pid: Root process id
+        connections: Count file descriptors and sockets; they are the costly
+            part of a sample, so callers that only need CPU or RSS skip them
+
+    Returns:
+        Mapping with cpu_seconds, rss, threads, fds, sockets, established and
+        processes (fds, sockets and established are None when not counted or
+        not readable), or None if the process no longer exists
+    """
+    try:
+        root = psutil.Process(pid)
+        processes = [root, *root.children(recursive=True)]
+    except psutil.NoSuchProcess:
+        return None
+    usage = {
+        "cpu_seconds": 0.0,
+        "rss": 0,
+        "threads": 0,
+        "fds": 0 if connections else None,
+        "sockets": 0 if connections else None,
+        "established": 0 if connections else None,
+        "processes": 0,
+    }
+    for proc in processes:
+        try:
+            with proc.oneshot():
+                times = proc.cpu_times()
+                usage["cpu_seconds"] += times.user + times.system
+                usage["rss"] += proc.memory_info().rss
+                usage["threads"] += proc.num_threads()
+                usage["processes"] += 1
+                if usage["fds"] is not None:
+                    try:
+                        usage["fds"] += proc.num_fds()
+                    except (AttributeError, psutil.AccessDenied):
+                        usage["fds"] = None
+                if usage["sockets"] is not None:
+                    try:
+                        sockets = proc.net_connections(kind="inet")
+                    except psutil.AccessDenied:
+                        usage["sockets"] = usage["established"] = None
+                    else:
+                        usage["sockets"] += len(sockets)
+                        usage["established"] += sum(
+                            s.status == psutil.CONN_ESTABLISHED for s in sockets
+                        )
+        except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+            pass
+    return usage
+
+
+class ResourceMonitor:
+    """Samples a process tree on a background thread."""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        """Initialize the monitor.
+
+        Args:
+            pid: PID of the root process (e.g. the server or its Gradle wrapper)
+            interval: Seconds between periodic samples
+        """
+        self.pid = pid
+        self.interval = interval
+        self.samples: list[ResourceSample] = []
+        self.events: list[ResourceEvent] = []
+        self._label = ""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._start = time.perf_counter()
+        self._last_cpu: tuple[float, float] | None = None
+
+    def start(self) -> "ResourceMonitor":
+        """Start periodic sampling."""
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ambrosia-resource-monitor", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop sampling, taking a final sample."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.sample()
+
+    def __enter__(self) -> "ResourceMonitor":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def sample(self) -> ResourceSample | None:
+        """Take a sample now, labelled with the current window."""
+        usage = sample_process_tree(self.pid)
+        if usage is None:
+            return None
+        with self._lock:
+            elapsed = self._elapsed()
+            cpu_percent = 0.0
+            if self._last_cpu is not None:
+                last_elapsed, last_cpu = self._last_cpu
+                if elapsed > last_elapsed:
+                    cpu_percent = (
+                        100
+                        * (usage["cpu_seconds"] - last_cpu)
+                        / (elapsed - last_elapsed)
+                    )
+            self._last_cpu = (elapsed, usage["cpu_seconds"])
+            sample = ResourceSample(
+                elapsed=elapsed,
+                cpu_percent=max(cpu_percent, 0.0),
+                label=self._label,
+                **usage,
+            )
+            self.samples.append(sample)
+        return sample
+
+    def mark(self, label: str, kind: str = "mark") -> None:
+        """Annotate the timeline at the current time."""
+        with self._lock:
+            self.events.append(ResourceEvent(self._elapsed(), kind, label))
+
+    def begin(self, label: str) -> None:
+        """Open a labelled window and sample its starting point."""
+        self.mark(label, "begin")
+        with self._lock:
+            self._label = label
+        self.sample()
+
+    def end(self, label: str) -> None:
+        """Sample the end of a labelled window and close it."""
+        self.sample()
+        with self._lock:
+            self._label = ""
+        self.mark(label, "end")
+
+    def window_growth(self) -> list[WindowGrowth]:
+        """Return the resource change of every labelled window, in order."""
+        windows: dict[str, list[ResourceSample]] = {}
+        with self._lock:
+            for sample in self.samples:
+                if sample.label:
+                    windows.setdefault(sample.label, []).append(sample)
+        growth = []
+        for label, samples in windows.items():
+            first, last = samples[0], samples[-1]
+            growth.append(
+                WindowGrowth(
+                    label=label,
+                    duration=last.elapsed - first.elapsed,
+                    rss=last.rss - first.rss,
+                    fds=_delta(last.fds, first.fds),
+                    threads=last.threads - first.threads,
+                    sockets=_delta(last.sockets, first.sockets),
+                    cpu_seconds=last.cpu_seconds - first.cpu_seconds,
+                )
+            )
+        return growth
+
+    def format_growth(self, top: int = 10) -> str:
+        """Render the windows with the largest RSS or descriptor growth."""
+        growth = sorted(
+            self.window_growth(),
+            key=lambda g: (g.fds or 0, g.sockets or 0, g.rss),
+            reverse=True,
+        )[:top]
+        header = (
+            f"{'window':<60} {'RSS MiB':>8} {'fds':>5} {'thr':>5} "
+            f"{'socks':>5} {'cpu s':>7}"
+        )
+        lines = [header, "-" * len(header)]
+        for g in growth:
+            label = g.label if len(g.label) <= 60 else "..." + g.label[-57:]
+            lines.append(
+                f"{label:<60} {g.rss / 2**20:>+8.1f} "
+                f"{'-' if g.fds is None else f'{g.fds:+d}':>5} {g.threads:>+5d} "
+                f"{'-' if g.sockets is None else f'{g.sockets:+d}':>5} "
+                f"{g.cpu_seconds:>7.2f}"
+            )
+        return "\n".join(lines)
+
+    def save(self, path: str | Path) -> Path:
+        """Write the timeline as JSON (``.json`` path) or CSV.
+
+        The CSV holds one row per sample; events are written next to it as
+        ``<name>.events.csv``. The JSON holds samples, events and window growth.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            samples = list(self.samples)
+            events = list(self.events)
+        if path.suffix == ".json":
+            data = {
+                "pid": self.pid,
+                "interval": self.interval,
+                "samples": [asdict(s) for s in samples],
+                "events": [asdict(e) for e in events],
+                "windows": [asdict(g) for g in self.window_growth()],
+            }
+            path.write_text(json.dumps(data, indent=2))
+            return path
+
+        _write_csv(path, ResourceSample, samples)
+        _write_csv(path.with_suffix(".events.csv"), ResourceEvent, events)
+        return path
+
+
+def _write_csv(path: Path, row_type: type, rows: list) -> None:
+    with path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=[f.name for f in fields(row_type)])
+        writer.writeheader()
+        writer.writerows(asdict(row) for row in rows)
+
+
+# Key under which the session's monitor is stored on the pytest config
+resource_monitor_key = pytest.StashKey[ResourceMonitor]()
+
+
+def worker_profile_path(path: Path, worker_id: str | None) -> Path:
+    """Give each pytest-xdist worker its own timeline file."""
+    if worker_id is None:
+        return path
+    return path.with_name(f"{path.stem}.{worker_id}{path.suffix}")
+
+
+class ResourceProfilePlugin:
+    """Labels the session monitor with test boundaries and saves the timeline."""
+
+    def __init__(self, config: pytest.Config):
+        self.config = config
+
+    def _monitor(self) -> ResourceMonitor | None:
+        return self.config.stash.get(resource_monitor_key, None)
+
+    def pytest_runtest_logstart(self, nodeid: str, location) -> None:
+        monitor = self._monitor()
+        if monitor is not None:
+            monitor.begin(nodeid)
+
+    def pytest_runtest_logfinish(self, nodeid: str, location) -> None:
+        monitor = self._monitor()
+        if monitor is not None:
+            monitor.end(nodeid)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        monitor = self._monitor()
+        if monitor is None or not monitor.samples:
+            return
+        terminalreporter.write_sep("-", "server resources per test")
+        terminalreporter.write_line(monitor.format_growth())
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the resource profile command-line options."""
+    group = parser.getgroup("resource profile")
+    group.addoption(
+        "--resource-profile",
+        action="store",
+        default=None,
+        help="Sample the server's CPU, RSS, threads, file descriptors and "
+        "sockets and save the timeline here (CSV, or JSON for *.json), "
+        "relative to the rootdir",
+    )
+    group.addoption(
+        "--resource-interval",
+        action="store",
+        type=float,
+        default=0.5,
+        help="Resource sampling interval in seconds (default: 0.5)",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Register the plugin instance for this session."""
+    config.pluginmanager.register(ResourceProfilePlugin(config), "resource-profile")
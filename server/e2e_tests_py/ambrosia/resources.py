@@ -0,0 +1,433 @@
+"""Typed CRUD helpers with bounded concurrency and retries.
+
+Setting up a menu used to take hundreds of sequential round-trips. Here every
+CRUD route (``/dishes``, ``/categories``, ``/tables``...) is a ``Resource``
+whose calls go through one ``RequestPipeline``, which:
+
+- bounds the requests in flight with a semaphore (the connection pool of
+  ``AmbrosiaApi.connect`` has exactly that many connections),
+- retries 503 responses and connection errors with exponential backoff,
+  honoring ``Retry-After``,
+- logs in again once on 401 (expired access token) and retries.
+
+``create_many``/``update_many``/``delete_many`` turn bulk setup into a
+controlled-concurrency pipeline; results keep the order of the input.
+
+Example:
+    async with AmbrosiaApi.connect(server_url, concurrency=16) as api:
+        [category_id] = await api.categories("dish").create_many([{"name": "Mains"}])
+        dish_ids = await api.dishes.create_many(
+            {"name": f"Dish {i}", "price": 9.5, "category_id": category_id}
+            for i in range(200)
+        )
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Iterable, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, NotRequired, TypedDict
+
+import httpx
+
+from ambrosia.auth_utils import login_user
+from ambrosia.http_client import AmbrosiaHttpClient, SharedConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: the server (or a proxy) is temporarily unavailable
+RETRY_STATUSES = frozenset({503})
+
+# Errors raised before the request reached the server, safe to retry for any verb
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class DishBody(TypedDict):
+    name: str
+    price: float
+    category_id: str
+
+
+class CategoryBody(TypedDict):
+    name: str
+    type: NotRequired[str]
+
+
+class SpaceBody(TypedDict):
+    name: str
+
+
+class TableBody(TypedDict):
+    name: str
+    space_id: str
+    status: NotRequired[str]
+    order_id: NotRequired[str | None]
+
+
+class IngredientBody(TypedDict):
+    name: str
+    category_id: str
+    quantity: float
+    unit: str
+    low_stock_threshold: float
+    cost_per_unit: float
+
+
+class SupplierBody(TypedDict):
+    name: str
+    contact: str
+    phone: str
+    email: str
+    address: str
+
+
+class ProductBody(TypedDict):
+    SKU: str
+    name: str
+    cost_cents: int
+    category_id: str
+    quantity: int
+    price_cents: int
+    description: NotRequired[str]
+    image_url: NotRequired[str]
+
+
+class RoleBody(TypedDict):
+    role: str
+    password: NotRequired[str]
+    isAdmin: NotRequired[bool]
+
+
+class UserBody(TypedDict):
+    name: str
+    pin: str
+    role_id: str
+
+
+class OrderBody(TypedDict):
+    user_id: str
+    waiter: str
+    status: str
+    total: float
+    created_at: str
+    table_id: NotRequired[str | None]
+
+
+class PaymentBody(TypedDict):
+    method_id: str
+    currency_id: str
+    amount: float
+    transaction_id: NotRequired[str]
+
+
+class TicketBody(TypedDict):
+    order_id: str
+    user_id: str
+    ticket_date: str
+    status: int
+    total_amount: float
+    notes: str
+
+
+class ShiftBody(TypedDict):
+    user_id: str
+    shift_date: str
+    start_time: str
+    notes: str
+    end_time: NotRequired[str]
+
+
+class ApiError(RuntimeError):
+    """A request that ended with an unexpected status.
+
+    Attributes:
+        method: HTTP method
+        path: Request path
+        status_code: Final response status
+        body: Start of the response body
+    """
+
+    def __init__(self, method: str, path: str, response: httpx.Response):
+        self.method = method
+        self.path = path
+        self.status_code = response.status_code
+        self.body = response.text[:200]
+        super().__init__(f"{method} {path} failed with {self.status_code}: {self.body}")
+
+
+@dataclass
+class PipelineStats:
+    """Counters of a ``RequestPipeline``.
+
+    Attributes:
+        requests: Requests that got a final response
+        retries: Attempts repeated after a 503 or connection error
+        relogins: Logins performed after a 401
+        failures: Requests that raised ``ApiError`` or gave up on errors
+    """
+
+    requests: int = 0
+    retries: int = 0
+    relogins: int = 0
+    failures: int = 0
+
+
+class RequestPipeline:
+    """Sends requests through one client with bounded concurrency and retries."""
+
+    def __init__(
+        self,
+        client: AmbrosiaHttpClient,
+        concurrency: int = 16,
+        retries: int = 3,
+        backoff: float = 0.1,
+        credentials: dict[str, str] | None = None,
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            client: Open client; its session cookies are shared by every request
+            concurrency: Maximum requests in flight
+            retries: Extra attempts after a 503 or connection error
+            backoff: Delay before the first retry in seconds, doubled each time
+            credentials: Login used again on 401. Defaults to the test user
+        """
+        self.client = client
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.credentials = credentials
+        self.stats = PipelineStats()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._login_lock = asyncio.Lock()
+        self._login_generation = 0
+
+    async def _relogin(self, generation: int) -> None:
+        """Log in again unless another request already did since ``generation``."""
+        async with self._login_lock:
+            if generation == self._login_generation:
+                await login_user(self.client, self.credentials)
+                self._login_generation += 1
+                self.stats.relogins += 1
+
+    def _retry_delay(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response else None
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * 2**attempt
+
+    async def send(
+        self,
+        method: str,
+        path: str,
+        expected_status: Iterable[int] | None = (200, 201, 204),
+        **kwargs,
+    ) -> httpx.Response:
+        """Send one request, waiting for a free slot.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            expected_status: Accepted final statuses; None accepts any
+            **kwargs: Additional arguments for httpx
+
+        Returns:
+            The final response
+
+        Raises:
+            ApiError: If the final status is not expected
+            httpx.TransportError: If every attempt failed to connect, or on
+                another transport error
+        """
+        relogged = False
+        attempt = 0
+        while True:
+            generation = self._login_generation
+            response: httpx.Response | None = None
+            async with self._semaphore:
+                try:
+                    response = await self.client.request(method, path, **kwargs)
+                except RETRY_ERRORS:
+                    if attempt >= self.retries:
+                        self.stats.failures += 1
+                        raise
+            if response is not None and response.status_code == 401 and not relogged:
+                relogged = True
+                await self._relogin(generation)
+                continue
+            if response is None or (
+                response.status_code in RETRY_STATUSES and attempt < self.retries
+            ):
+                delay = self._retry_delay(attempt, response)
+                attempt += 1
+                self.stats.retries += 1
+                logger.debug(f"Retrying {method} {path} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            break
+
+        self.stats.requests += 1
+        if expected_status is not None and response.status_code not in set(
+            expected_status
+        ):
+            self.stats.failures += 1
+            raise ApiError(method, path, response)
+        return response
+
+
+class Resource[Body: Mapping[str, Any]]:
+    """CRUD calls of one collection route, e.g. ``/dishes``."""
+
+    def __init__(
+        self,
+        pipeline: RequestPipeline,
+        path: str,
+        params: dict[str, str] | None = None,
+        defaults: dict[str, Any] | None = None,
+    ):
+        """Initialize the resource.
+
+        Args:
+            pipeline: Pipeline the requests go through
+            path: Collection path, e.g. "/dishes"
+            params: Query parameters sent with every request
+                (``/categories`` needs ``type``)
+            defaults: Fields merged into every create and update body
+        """
+        self.pipeline = pipeline
+        self.path = path.rstrip("/")
+        self.params = params or {}
+        self.defaults = defaults or {}
+
+    def _body(self, body: Body) -> dict[str, Any]:
+        return {**self.defaults, **body}
+
+    async def all(self, **params) -> list[dict[str, Any]]:
+        """Return every item; a 204 (empty collection) gives an empty list."""
+        response = await self.pipeline.send(
+            "GET", self.path, params={**self.params, **params}
+        )
+        return [] if response.status_code == 204 else response.json()
+
+    async def get(self, item_id: str) -> dict[str, Any]:
+        """Return one item."""
+        response = await self.pipeline.send(
+            "GET", f"{self.path}/{item_id}", (200,), params=self.params
+        )
+        return response.json()
+
+    async def create(self, body: Body) -> str:
+        """Create an item and return its id."""
+        response = await self.pipeline.send(
+            "POST", self.path, (201,), json=self._body(body), params=self.params
+        )
+        return response.json()["id"]
+
+    async def update(self, item_id: str, body: Body) -> None:
+        """Replace an item."""
+        await self.pipeline.send(
+            "PUT",
+            f"{self.path}/{item_id}",
+            (200, 204),
+            json=self._body(body),
+            params=self.params,
+        )
+
+    async def delete(self, item_id: str) -> None:
+        """Delete an item."""
+        await self.pipeline.send(
+            "DELETE", f"{self.path}/{item_id}", (200, 204), params=self.params
+        )
+
+    async def create_many(self, bodies: Iterable[Body]) -> list[str]:
+        """Create items concurrently and return their ids in input order."""
+        return list(await asyncio.gather(*(self.create(body) for body in bodies)))
+
+    async def update_many(self, items: Mapping[str, Body]) -> None:
+        """Replace items concurrently, keyed by id."""
+        await asyncio.gather(
+            *(self.update(item_id, body) for item_id, body in items.items())
+        )
+
+    async def delete_many(self, item_ids: Iterable[str]) -> None:
+        """Delete items concurrently."""
+        await asyncio.gather(*(self.delete(item_id) for item_id in item_ids))
+
+
+class AmbrosiaApi:
+    """Typed resources of the POS API sharing one ``RequestPipeline``.
+
+    Attributes:
+        pipeline: Pipeline every resource sends through
+        user: Logged-in user as returned by ``POST /auth/login``
+    """
+
+    def __init__(self, pipeline: RequestPipeline, user: dict[str, Any] | None = None):
+        """Initialize the API.
+
+        Args:
+            pipeline: Pipeline over a logged-in client
+            user: Logged-in user as returned by ``POST /auth/login``
+        """
+        self.pipeline = pipeline
+        self.user = user or {}
+        self.dishes = Resource[DishBody](pipeline, "/dishes")
+        self.spaces = Resource[SpaceBody](pipeline, "/spaces")
+        self.tables = Resource[TableBody](pipeline, "/tables")
+        self.ingredients = Resource[IngredientBody](pipeline, "/ingredients")
+        self.suppliers = Resource[SupplierBody](pipeline, "/suppliers")
+        self.products = Resource[ProductBody](pipeline, "/products")
+        self.roles = Resource[RoleBody](pipeline, "/roles")
+        self.users = Resource[UserBody](pipeline, "/users")
+        self.orders = Resource[OrderBody](pipeline, "/orders")
+        self.payments = Resource[PaymentBody](pipeline, "/payments")
+        self.tickets = Resource[TicketBody](pipeline, "/tickets")
+        self.shifts = Resource[ShiftBody](pipeline, "/shifts")
+
+    def categories(self, category_type: str) -> Resource[CategoryBody]:
+        """Categories of one type ("dish", "ingredient", "product"...)."""
+        return Resource[CategoryBody](
+            self.pipeline,
+            "/categories",
+            params={"type": category_type},
+            defaults={"type": category_type},
+        )
+
+    @classmethod
+    @asynccontextmanager
+    async def connect(
+        cls,
+        base_url: str,
+        credentials: dict[str, str] | None = None,
+        concurrency: int = 16,
+        retries: int = 3,
+        timeout: float = 30.0,
+    ) -> AsyncIterator["AmbrosiaApi"]:
+        """Log in and yield an API limited to ``concurrency`` connections.
+
+        Args:
+            base_url: Base URL of the server
+            credentials: Staff credentials. Defaults to the test user
+            concurrency: Requests in flight and pooled connections
+            retries: Extra attempts after a 503 or connection error
+            timeout: Request timeout in seconds
+        """
+        async with SharedConnectionPool(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        ) as pool:
+            async with AmbrosiaHttpClient(base_url, timeout, pool=pool) as client:
+                login = await login_user(client, credentials)
+                pipeline = RequestPipeline(
+                    client, concurrency, retries, credentials=credentials
+                )
+                start = time.perf_counter()
+                yield cls(pipeline, login.json().get("user"))
+                logger.debug(
+                    f"API session: {pipeline.stats} in "
+                    f"{time.perf_counter() - start:.2f}s"
+                )
@@ -0,0 +1,367 @@
+"""Data-size scaling benchmark for the order and sales reporting endpoints.
+
+``GET /orders``, ``/orders/with-payments``, ``/orders/date-range`` and
+``/orders/total-sales/{date}`` return or aggregate unpaginated result sets.
+This module starts a server on seeded order histories of increasing size
+(``ambrosia.seeding``), measures latency, response size and server RSS per
+endpoint at each size, and fits a power law ``value = a * size ** b`` to every
+metric. The exponent ``b`` tells the growth: ~0 constant, ~1 linear, and above
+``super_linear_threshold`` the endpoint is flagged as super-linear.
+
+Example:
+    report = run_scaling_benchmark(sizes=(1_000, 10_000, 100_000, 1_000_000))
+    print(report.format_table())
+    for fit in report.super_linear():
+        print(f"{fit.route} {fit.metric} grows as size^{fit.exponent:.2f}")
+"""
+
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass, field, replace
+from datetime import timedelta
+
+from ambrosia.auth_utils import login_user
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.load import LatencyHistogram
+from ambrosia.resource_monitor import sample_process_tree
+from ambrosia.seeding import SeedProfile, start_seeded_server
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+METRICS = ("p50", "bytes", "rss")
+
+# Catalog and history span stay fixed; only the number of orders grows
+BASE_PROFILE = SeedProfile("scale", orders=DEFAULT_SIZES[0], days=365)
+
+
+def scaling_profile(size: int, base: SeedProfile = BASE_PROFILE) -> SeedProfile:
+    """Return the seed profile with ``size`` orders."""
+    return replace(base, name=f"{base.name}-{size}", orders=size)
+
+
+def scaling_endpoints(profile: SeedProfile) -> dict[str, str]:
+    """Map route labels to the request paths measured for a profile.
+
+    The date range covers the last 30 days of the history and the sales total
+    its last day.
+    """
+    range_start = profile.end_date - timedelta(days=29)
+    return {
+        "GET /orders": "/orders",
+        "GET /orders/with-payments": "/orders/with-payments",
+        "GET /orders/date-range": (
+            f"/orders/date-range?start_date={range_start}"
+            f"&end_date={profile.end_date}T23:59:59"
+        ),
+        "GET /orders/total-sales/{date}": f"/orders/total-sales/{profile.end_date}",
+    }
+
+
+def process_tree_rss(pid: int) -> int:
+    """Return the resident set size in bytes of a process and its children."""
+    usage = sample_process_tree(pid, connections=False)
+    return usage["rss"] if usage else 0
+
+
+@dataclass
+class ScalingPoint:
+    """Measurements of one endpoint at one data size.
+
+    Attributes:
+        route: Route label, e.g. "GET /orders"
+        size: Number of orders in the database
+        p50, p95: Request latencies in seconds
+        bytes: Response body size
+        rss: Peak server RSS in bytes observed after the endpoint's requests
+        status_codes: Number of responses per HTTP status code
+    """
+
+    route: str
+    size: int
+    p50: float
+    p95: float
+    bytes: int
+    rss: int
+    status_codes: dict[int, int] = field(default_factory=dict)
+
+
+@dataclass
+class GrowthFit:
+    """Power-law fit ``value = coefficient * size ** exponent`` of one metric.
+
+    Attributes:
+        route: Route label
+        metric: One of ``METRICS``
+        exponent: Growth exponent over all sizes
+        tail_exponent: Growth exponent between the two largest sizes, where
+            fixed per-request overhead no longer hides the trend
+        coefficient: Scale factor of the fit
+        r_squared: Goodness of the fit in log-log space
+        shape: "constant", "sub-linear", "linear" or "super-linear"
+    """
+
+    route: str
+    metric: str
+    exponent: float
+    tail_exponent: float
+    coefficient: float
+    r_squared: float
+    shape: str
+
+
+def classify_exponent(exponent: float, super_linear_threshold: float = 1.15) -> str:
+    """Name the growth shape of a power-law exponent."""
+    if exponent < 0.25:
+        return "constant"
+    if exponent < 0.85:
+        return "sub-linear"
+    if exponent <= super_linear_threshold:
+        return "linear"
+    return "super-linear"
+
+
+def fit_growth(
+    sizes: list[int],
+    values: list[float],
+    route: str = "",
+    metric: str = "",
+    super_linear_threshold: float = 1.15,
+) -> GrowthFit:
+    """Fit ``value = a * size ** b`` by least squares in log-log space.
+
+    The shape is classified from the larger of the overall and tail exponents,
+    so growth that only shows at large sizes is still flagged.
+
+    Args:
+        sizes: Data sizes (at least two distinct values)
+        values: Measured values, one per size
+        route: Route label stored in the fit
+        metric: Metric name stored in the fit
+        super_linear_threshold: Exponent above which growth is super-linear
+
+    Returns:
+        GrowthFit for the measurements
+    """
+    if len(set(sizes)) < 2:
+        raise ValueError("At least two distinct sizes are needed to fit growth")
+    # Zero values (e.g. empty 204 bodies) are clamped so the log is defined
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(value, 1e-9)) for value in values]
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys, strict=True))
+    exponent = sxy / sxx
+    intercept = mean_y - exponent * mean_x
+
+    ss_tot = sum((y - mean_y) ** 2 for y in ys)
+    ss_res = sum(
+        (y - (intercept + exponent * x)) ** 2 for x, y in zip(xs, ys, strict=True)
+    )
+    r_squared = 1.0 - ss_res / ss_tot if ss_tot > 0 else 1.0
+
+    points = sorted(zip(xs, ys, strict=True))
+    (x1, y1), (x2, y2) = points[-2], points[-1]
+    tail_exponent = (y2 - y1) / (x2 - x1) if x2 != x1 else exponent
+
+    return GrowthFit(
+        route=route,
+        metric=metric,
+        exponent=exponent,
+        tail_exponent=tail_exponent,
+        coefficient=math.exp(intercept),
+        r_squared=r_squared,
+        shape=classify_exponent(max(exponent, tail_exponent), super_linear_threshold),
+    )
+
+
+@dataclass
+class ScalingReport:
+    """Result of a scaling benchmark.
+
+    Attributes:
+        points: Measurements per route and size
+        fits: Growth fits per route, keyed by metric
+    """
+
+    points: list[ScalingPoint]
+    fits: dict[str, dict[str, GrowthFit]]
+
+    def super_linear(self) -> list[GrowthFit]:
+        """Return the fits flagged as super-linear."""
+        return [
+            fit
+            for metrics in self.fits.values()
+            for fit in metrics.values()
+            if fit.shape == "super-linear"
+        ]
+
+    def format_table(self) -> str:
+        """Render measurements and fits as fixed-width text tables."""
+        header = (
+            f"{'route':<32} {'orders':>9} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'KiB':>10} {'RSS MiB':>9}"
+        )
+        lines = [header, "-" * len(header)]
+        for point in sorted(self.points, key=lambda p: (p.route, p.size)):
+            lines.append(
+                f"{point.route:<32} {point.size:>9} {point.p50 * 1000:>9.1f} "
+                f"{point.p95 * 1000:>9.1f} {point.bytes / 1024:>10.1f} "
+                f"{point.rss / 2**20:>9.1f}"
+            )
+
+        header = f"{'route':<32} {'metric':>6} {'exp':>6} {'tail':>6} {'r2':>5}  shape"
+        lines += ["", header, "-" * len(header)]
+        for route in sorted(self.fits):
+            for metric, fit in self.fits[route].items():
+                lines.append(
+                    f"{route:<32} {metric:>6} {fit.exponent:>6.2f} "
+                    f"{fit.tail_exponent:>6.2f} {fit.r_squared:>5.2f}  {fit.shape}"
+                )
+        return "\n".join(lines)
+
+
+def build_scaling_report(
+    points: list[ScalingPoint], super_linear_threshold: float = 1.15
+) -> ScalingReport:
+    """Fit every metric of every route measured at two or more sizes."""
+    fits: dict[str, dict[str, GrowthFit]] = {}
+    for route in sorted({point.route for point in points}):
+        route_points = sorted(
+            (p for p in points if p.route == route), key=lambda p: p.size
+        )
+        sizes = [p.size for p in route_points]
+        if len(set(sizes)) < 2:
+            continue
+        fits[route] = {
+            metric: fit_growth(
+                sizes,
+                [getattr(p, metric) for p in route_points],
+                route,
+                metric,
+                super_linear_threshold,
+            )
+            for metric in METRICS
+        }
+    return ScalingReport(points, fits)
+
+
+async def measure_endpoints(
+    base_url: str,
+    server_pid: int,
+    profile: SeedProfile,
+    repeats: int = 5,
+    warmup: int = 2,
+    timeout: float = 300.0,
+) -> list[ScalingPoint]:
+    """Measure every scaling endpoint against a server seeded with ``profile``.
+
+    Each request is preceded by a fresh login (not timed), since the test
+    server's access tokens may expire during slow requests.
+
+    Args:
+        base_url: Base URL of the seeded server
+        server_pid: PID of the server process, for RSS sampling
+        profile: Profile the server was seeded with
+        repeats: Timed requests per endpoint
+        warmup: Untimed requests per endpoint (JIT and page cache warm-up)
+        timeout: Request timeout in seconds
+
+    Returns:
+        One ScalingPoint per endpoint
+    """
+    points = []
+    async with AmbrosiaHttpClient(base_url, timeout=timeout) as client:
+        for route, path in scaling_endpoints(profile).items():
+            histogram = LatencyHistogram()
+            status_codes: dict[int, int] = {}
+            body_size = 0
+            peak_rss = 0
+            for i in range(warmup + repeats):
+                await login_user(client)
+                start = time.perf_counter()
+                response = await client.get(path)
+                elapsed = time.perf_counter() - start
+                peak_rss = max(peak_rss, process_tree_rss(server_pid))
+                if i < warmup:
+                    continue
+                histogram.record(elapsed)
+                status_codes[response.status_code] = (
+                    status_codes.get(response.status_code, 0) + 1
+                )
+                body_size = len(response.content)
+
+            points.append(
+                ScalingPoint(
+                    route=route,
+                    size=profile.orders,
+                    p50=histogram.percentile(50),
+                    p95=histogram.percentile(95),
+                    bytes=body_size,
+                    rss=peak_rss,
+                    status_codes=status_codes,
+                )
+            )
+            logger.info(
+                f"{route} at {profile.orders} orders: "
+                f"p50={points[-1].p50 * 1000:.1f}ms, {body_size} bytes"
+            )
+    return points
+
+
+def run_scaling_benchmark(
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    repeats: int = 5,
+    warmup: int = 2,
+    method: str = "sqlite",
+    super_linear_threshold: float = 1.15,
+    base_profile: SeedProfile = BASE_PROFILE,
+) -> ScalingReport:
+    """Measure the reporting endpoints across order-history sizes.
+
+    A fresh isolated server is started per size on a seeded (and cached)
+    database, so each size gets a cold JVM and RSS is comparable. Must be
+    called outside a running event loop.
+
+    Args:
+        sizes: Numbers of orders to measure at
+        repeats: Timed requests per endpoint and size
+        warmup: Untimed requests per endpoint and size
+        method: Seeding method, "sqlite" or "api"
+        super_linear_threshold: Exponent above which growth is flagged
+        base_profile: Profile whose catalog and history span are used
+
+    Returns:
+        ScalingReport with measurements and growth fits
+    """
+    points = []
+    for size in sizes:
+        profile = scaling_profile(size, base_profile)
+        server = start_seeded_server(profile, method)
+        try:
+            assert server.server_process is not None, "Seeded server is running"
+            points += asyncio.run(
+                measure_endpoints(
+                    server.server_url,
+                    server.server_process.pid,
+                    profile,
+                    repeats,
+                    warmup,
+                )
+            )
+        finally:
+            server.stop_server()
+            server.cleanup_home_dir()
+
+    report = build_scaling_report(points, super_linear_threshold)
+    logger.info(f"Scaling benchmark:\n{report.format_table()}")
+    for fit in report.super_linear():
+        logger.warning(
+            f"{fit.route} {fit.metric} grows super-linearly "
+            f"(exponent {fit.exponent:.2f}, tail {fit.tail_exponent:.2f})"
+        )
+    return report
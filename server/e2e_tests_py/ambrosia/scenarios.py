@@ -0,0 +1,549 @@
+"""Weighted, scripted workload scenarios for the load engine.
+
+A ``Scenario`` is an ordered list of ``Step`` objects (one HTTP call each, with
+optional think time), and a ``Workload`` mixes several scenarios by weight.
+Every step is recorded under its own ``"<scenario>/<step>"`` route label, so
+the load report breaks latency down per step and shows which part of a shift
+degrades first.
+
+Path templates and request bodies can reference values extracted by earlier
+steps (e.g. ``/orders/{order_id}/dishes``) through the per-iteration
+``ScenarioContext``.
+
+Example:
+    restaurant = await prepare_restaurant(server_url)
+    workload = friday_night_workload(restaurant)
+    report = await workload.run(server_url, virtual_users=30, duration=60)
+    print(report.format_table())
+"""
+
+import asyncio
+import logging
+import random
+import uuid
+from collections.abc import Callable, Container
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any
+
+import httpx
+
+from ambrosia.api_utils import assert_status_code
+from ambrosia.auth_utils import DEFAULT_TEST_USER, login_user
+from ambrosia.http_client import AmbrosiaHttpClient, SharedConnectionPool
+from ambrosia.load import LoadGenerator, LoadRecorder, LoadReport, timed_request
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = range(200, 300)
+
+
+@dataclass
+class ScenarioContext:
+    """Mutable state of one scenario iteration.
+
+    Attributes:
+        vars: Values available to path templates and body builders
+        rng: Random generator of the virtual user running the iteration
+    """
+
+    vars: dict[str, Any]
+    rng: random.Random
+
+    def __getitem__(self, key: str) -> Any:
+        return self.vars[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.vars[key] = value
+
+
+# Values that may be given either literally or computed from the context
+Dynamic = Any | Callable[[ScenarioContext], Any]
+# Extractor storing values from a response into the context
+Extractor = Callable[[ScenarioContext, httpx.Response], None]
+
+
+@dataclass
+class Step:
+    """A single HTTP call in a scenario.
+
+    Attributes:
+        name: Step name, used in the route label "<scenario>/<name>"
+        method: HTTP method
+        path: Path template formatted with the context vars, or a callable
+        json: Request body, or a callable building it from the context
+        params: Query parameters, or a callable building them from the context
+        expect: Status codes considered successful
+        extract: Optional callable storing response values in the context
+        think_time: Pause after the step in seconds, or a (min, max) range
+    """
+
+    name: str
+    method: str
+    path: Dynamic
+    json: Dynamic = None
+    params: Dynamic = None
+    expect: Container[int] = SUCCESS
+    extract: Extractor | None = None
+    think_time: float | tuple[float, float] = 0.0
+
+
+def step(
+    name: str,
+    method: str,
+    path: Dynamic,
+    *,
+    json: Dynamic = None,
+    params: Dynamic = None,
+    expect: Container[int] = SUCCESS,
+    extract: Extractor | None = None,
+    think: float | tuple[float, float] = 0.0,
+) -> Step:
+    """Shorthand for building a Step, see ``Step`` for the arguments."""
+    return Step(name, method, path, json, params, expect, extract, think)
+
+
+def _resolve(value: Dynamic, ctx: ScenarioContext) -> Any:
+    return value(ctx) if callable(value) else value
+
+
+@dataclass
+class Scenario:
+    """An ordered sequence of steps representing one user journey.
+
+    Attributes:
+        name: Scenario name, used as the route label prefix
+        steps: Steps executed in order for every iteration
+        weight: Relative frequency of this scenario within a workload
+    """
+
+    name: str
+    steps: list[Step]
+    weight: float = 1.0
+
+    async def run_iteration(
+        self,
+        client: AmbrosiaHttpClient,
+        recorder: LoadRecorder,
+        ctx: ScenarioContext,
+    ) -> bool:
+        """Run all steps once, stopping at the first unexpected status.
+
+        An expired access token (401) triggers one ``/auth/refresh`` and a
+        retry of the step, the same way the POS terminals behave.
+
+        Returns:
+            True if every step succeeded
+        """
+        for current in self.steps:
+            route = f"{self.name}/{current.name}"
+            response = await self._send(client, recorder, ctx, current, route)
+            if (
+                response is not None
+                and response.status_code == 401
+                and current.path != "/auth/login"
+            ):
+                await timed_request(
+                    client, recorder, "POST", "/auth/refresh", f"{self.name}/refresh"
+                )
+                response = await self._send(client, recorder, ctx, current, route)
+
+            if response is None or response.status_code not in current.expect:
+                logger.debug(
+                    f"{route} aborted iteration: "
+                    f"{response.status_code if response is not None else 'error'}"
+                )
+                return False
+            if current.extract is not None:
+                current.extract(ctx, response)
+
+            pause = current.think_time
+            if isinstance(pause, tuple):
+                pause = ctx.rng.uniform(*pause)
+            if pause > 0:
+                await asyncio.sleep(pause)
+        return True
+
+    @staticmethod
+    async def _send(
+        client: AmbrosiaHttpClient,
+        recorder: LoadRecorder,
+        ctx: ScenarioContext,
+        current: Step,
+        route: str,
+    ) -> httpx.Response | None:
+        path = _resolve(current.path, ctx)
+        if not callable(current.path):
+            path = path.format(**ctx.vars)
+        kwargs = {}
+        if current.json is not None:
+            kwargs["json"] = _resolve(current.json, ctx)
+        if current.params is not None:
+            kwargs["params"] = _resolve(current.params, ctx)
+        return await timed_request(
+            client,
+            recorder,
+            current.method,
+            path,
+            route,
+            expected_status=current.expect,
+            **kwargs,
+        )
+
+
+class Workload:
+    """A weighted mix of scenarios executed by the load engine.
+
+    Every iteration of a virtual user picks one scenario at random according
+    to the weights, with a per-user random generator derived from ``seed`` so
+    runs are reproducible.
+    """
+
+    def __init__(
+        self,
+        scenarios: list[Scenario],
+        variables: dict[str, Any] | None = None,
+        seed: int = 0,
+    ):
+        """Initialize the workload.
+
+        Args:
+            scenarios: Scenarios to mix, each with its own weight
+            variables: Shared values available to every scenario's context
+            seed: Seed for scenario selection and think times
+        """
+        if not scenarios:
+            raise ValueError("A workload needs at least one scenario")
+        self.scenarios = scenarios
+        self.variables = variables or {}
+        self.seed = seed
+        self.completed: dict[str, int] = dict.fromkeys((s.name for s in scenarios), 0)
+        self.aborted: dict[str, int] = dict.fromkeys((s.name for s in scenarios), 0)
+        self._rngs: dict[int, random.Random] = {}
+
+    def _rng_for(self, client: AmbrosiaHttpClient) -> random.Random:
+        key = id(client)
+        rng = self._rngs.get(key)
+        if rng is None:
+            rng = random.Random(self.seed * 100_003 + len(self._rngs))
+            self._rngs[key] = rng
+        return rng
+
+    async def action(self, client: AmbrosiaHttpClient, recorder: LoadRecorder) -> None:
+        """Run one weighted scenario iteration; usable as a LoadGenerator action."""
+        rng = self._rng_for(client)
+        scenario = rng.choices(
+            self.scenarios, weights=[s.weight for s in self.scenarios]
+        )[0]
+        ctx = ScenarioContext(vars=dict(self.variables), rng=rng)
+        if await scenario.run_iteration(client, recorder, ctx):
+            self.completed[scenario.name] += 1
+        else:
+            self.aborted[scenario.name] += 1
+
+    async def run(
+        self,
+        base_url: str,
+        virtual_users: int = 10,
+        duration: float = 60.0,
+        arrival_rate: float | None = None,
+        pool: SharedConnectionPool | None = None,
+    ) -> LoadReport:
+        """Run the workload with the load engine.
+
+        Args:
+            base_url: Base URL of the server
+            virtual_users: Number of concurrent virtual users
+            duration: Length of the measured phase in seconds
+            arrival_rate: Scenario iterations per second (open loop), or None
+                for closed-loop mode
+            pool: Optional shared connection pool for all virtual users
+
+        Returns:
+            LoadReport with one route per scenario step
+        """
+        generator = LoadGenerator(
+            base_url,
+            self.action,
+            virtual_users=virtual_users,
+            duration=duration,
+            arrival_rate=arrival_rate,
+            pool=pool,
+        )
+        report = await generator.run()
+        logger.info(f"Scenario iterations completed: {self.completed}")
+        logger.info(f"Scenario iterations aborted: {self.aborted}")
+        return report
+
+
+# ---------------------------------------------------------------------------
+# Restaurant service scenarios
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class RestaurantData:
+    """Catalog data the restaurant scenarios need on the server.
+
+    Attributes:
+        dishes: Dishes as dicts with "id" and "price"
+        payment_method_id: Payment method used to settle tickets
+        currency_id: Currency used for payments
+        credentials: Login credentials of the staff user
+    """
+
+    dishes: list[dict[str, Any]]
+    payment_method_id: str
+    currency_id: str
+    credentials: dict[str, str] = field(default_factory=lambda: DEFAULT_TEST_USER)
+
+
+async def prepare_restaurant(
+    base_url: str,
+    dish_count: int = 20,
+    credentials: dict[str, str] | None = None,
+) -> RestaurantData:
+    """Create a dish category and menu and look up payment settings.
+
+    Args:
+        base_url: Base URL of the server
+        dish_count: Number of dishes to create
+        credentials: Staff credentials. Defaults to the test user
+
+    Returns:
+        RestaurantData to build the restaurant scenarios with
+    """
+    credentials = credentials or DEFAULT_TEST_USER
+    async with AmbrosiaHttpClient(base_url) as client:
+        await login_user(client, credentials)
+
+        category_response = await client.post(
+            "/categories",
+            json={"name": f"Load test {uuid.uuid4().hex[:8]}", "type": "dish"},
+        )
+        assert_status_code(category_response, 201, "Failed to create category")
+        category_id = category_response.json()["id"]
+
+        dishes = []
+        for i in range(dish_count):
+            price = round(5 + (i % 10) * 1.5, 2)
+            response = await client.post(
+                "/dishes",
+                json={
+                    "name": f"Dish {i} {category_id[:8]}",
+                    "price": price,
+                    "category_id": category_id,
+                },
+            )
+            assert_status_code(response, 201, "Failed to create dish")
+            dishes.append({"id": response.json()["id"], "price": price})
+
+        methods_response = await client.get("/payments/methods")
+        assert_status_code(methods_response, 200, "No payment methods available")
+        payment_method_id = methods_response.json()[0]["id"]
+
+        currency_response = await client.get("/base-currency")
+        assert_status_code(currency_response, 200, "Failed to get base currency")
+        currency_id = currency_response.json().get("currency_id")
+        assert currency_id, "Base currency must be configured"
+
+    return RestaurantData(dishes, payment_method_id, currency_id, credentials)
+
+
+def _pick_dishes(ctx: ScenarioContext, count: int) -> list[dict[str, Any]]:
+    return [ctx.rng.choice(ctx["dishes"]) for _ in range(count)]
+
+
+def waiter_service_scenario(
+    weight: float = 8.0,
+    dishes_per_round: int = 2,
+    extra_rounds: int = 2,
+    think: tuple[float, float] = (0.5, 2.0),
+) -> Scenario:
+    """A waiter taking a table from login to a settled ticket.
+
+    Steps: login, open order with dishes, add more dishes (``extra_rounds``
+    times), calculate the total, create the ticket, create the payment and
+    link the payment to the ticket.
+
+    Args:
+        weight: Relative frequency within a workload
+        dishes_per_round: Dishes ordered in each round
+        extra_rounds: Additional rounds of dishes after opening the order
+        think: Think time range between steps in seconds
+    """
+
+    def store_user(ctx: ScenarioContext, response: httpx.Response) -> None:
+        ctx["user_id"] = response.json()["user"]["user_id"]
+
+    def open_order_body(ctx: ScenarioContext) -> dict[str, Any]:
+        return {
+            "order": {
+                "user_id": ctx["user_id"],
+                "table_id": None,
+                "waiter": ctx["credentials"]["name"],
+                "status": "open",
+                "total": 0.0,
+                "created_at": "",
+            },
+            "dishes": [
+                {
+                    "order_id": "",
+                    "dish_id": dish["id"],
+                    "price_at_order": dish["price"],
+                    "status": "pending",
+                    "should_prepare": True,
+                }
+                for dish in _pick_dishes(ctx, dishes_per_round)
+            ],
+        }
+
+    def add_dishes_body(ctx: ScenarioContext) -> list[dict[str, Any]]:
+        return [
+            {"dish_id": dish["id"], "price_at_order": dish["price"]}
+            for dish in _pick_dishes(ctx, dishes_per_round)
+        ]
+
+    def store(key: str, *path: str) -> Extractor:
+        def extract(ctx: ScenarioContext, response: httpx.Response) -> None:
+            value = response.json()
+            for part in path:
+                value = value[part]
+            ctx[key] = value
+
+        return extract
+
+    steps = [
+        step(
+            "login",
+            "POST",
+            "/auth/login",
+            json=lambda ctx: ctx["credentials"],
+            extract=store_user,
+            think=think,
+        ),
+        step(
+            "open_order",
+            "POST",
+            "/orders/with-dishes",
+            json=open_order_body,
+            extract=store("order_id", "id"),
+            think=think,
+        ),
+        *(
+            step(
+                f"add_dishes_{i + 1}",
+                "POST",
+                "/orders/{order_id}/dishes",
+                json=add_dishes_body,
+                think=think,
+            )
+            for i in range(extra_rounds)
+        ),
+        step(
+            "calculate_total",
+            "PUT",
+            "/orders/{order_id}/calculate-total",
+            extract=store("total", "total"),
+            think=think,
+        ),
+        step(
+            "create_ticket",
+            "POST",
+            "/tickets",
+            json=lambda ctx: {
+                "order_id": ctx["order_id"],
+                "user_id": ctx["user_id"],
+                "ticket_date": datetime.now().isoformat(timespec="seconds"),
+                "status": 1,
+                "total_amount": ctx["total"],
+                "notes": "",
+            },
+            extract=store("ticket_id", "id"),
+        ),
+        step(
+            "create_payment",
+            "POST",
+            "/payments",
+            json=lambda ctx: {
+                "method_id": ctx["payment_method_id"],
+                "currency_id": ctx["currency_id"],
+                "transaction_id": None,
+                "amount": ctx["total"],
+            },
+            extract=store("payment_id", "id"),
+        ),
+        step(
+            "link_payment",
+            "POST",
+            "/payments/ticket-payments",
+            json=lambda ctx: {
+                "payment_id": ctx["payment_id"],
+                "ticket_id": ctx["ticket_id"],
+            },
+        ),
+    ]
+    return Scenario("waiter", steps, weight)
+
+
+def manager_polling_scenario(
+    weight: float = 2.0, think: tuple[float, float] = (1.0, 3.0)
+) -> Scenario:
+    """A manager dashboard polling open orders and today's sales.
+
+    Args:
+        weight: Relative frequency within a workload
+        think: Think time range between polls in seconds
+    """
+    # 204 means "no orders yet", which is a valid dashboard state
+    ok = (200, 204)
+    steps = [
+        step(
+            "login",
+            "POST",
+            "/auth/login",
+            json=lambda ctx: ctx["credentials"],
+            think=think,
+        ),
+        step("open_orders", "GET", "/orders/status/open", expect=ok, think=think),
+        step("paid_orders", "GET", "/orders/status/paid", expect=ok, think=think),
+        step(
+            "total_sales",
+            "GET",
+            lambda ctx: f"/orders/total-sales/{date.today().isoformat()}",
+            expect=ok,
+            think=think,
+        ),
+    ]
+    return Scenario("manager", steps, weight)
+
+
+def friday_night_workload(
+    restaurant: RestaurantData,
+    waiter_weight: float = 8.0,
+    manager_weight: float = 2.0,
+    think: tuple[float, float] = (0.5, 2.0),
+    seed: int = 0,
+) -> Workload:
+    """A busy service: mostly waiters taking orders, with managers polling.
+
+    Args:
+        restaurant: Catalog data created by ``prepare_restaurant``
+        waiter_weight: Relative frequency of waiter journeys
+        manager_weight: Relative frequency of manager polling
+        think: Think time range between steps in seconds
+        seed: Seed for reproducible runs
+    """
+    return Workload(
+        [
+            waiter_service_scenario(weight=waiter_weight, think=think),
+            manager_polling_scenario(weight=manager_weight, think=think),
+        ],
+        variables={
+            "dishes": restaurant.dishes,
+            "payment_method_id": restaurant.payment_method_id,
+            "currency_id": restaurant.currency_id,
+            "credentials": restaurant.credentials,
+        },
+        seed=seed,
+    )
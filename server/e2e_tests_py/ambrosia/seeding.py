@@ -0,0 +1,675 @@
+"""Bulk data seeding for large-catalog, large-history test databases.
+
+A ``SeedProfile`` describes the volumes to generate: dishes, tables and a
+history of orders spread over a number of days, with their order dishes,
+tickets and payments. ``SeedDataGenerator`` turns a profile into rows
+deterministically (same profile and seed, same rows), and two writers load
+them:
+
+- ``seed_sqlite`` bulk-inserts straight into a stopped server's
+  ``ambrosia.db``. This is fast enough for millions of rows and backdates
+  payments too
+- ``seed_via_api`` replays the same data through concurrent API calls,
+  exercising the real write path (payment dates are set by the server)
+
+Seeded databases are cached per profile and schema (a hash of the Flyway
+migrations) under ``~/.cache/ambrosia-e2e/seed``, so later runs copy the file
+into a fresh server home directory instead of seeding again.
+
+Example:
+    server = start_seeded_server(PROFILES["restaurant"])
+    ...  # benchmark server.server_url
+    server.stop_server()
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import time
+import uuid
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from ambrosia.auth_utils import DEFAULT_TEST_USER, login_user
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.resources import RequestPipeline
+from ambrosia.server_dist import file_lock
+from ambrosia.test_server import AmbrosiaTestServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEED_CACHE_DIR = Path.home() / ".cache" / "ambrosia-e2e" / "seed"
+MIGRATIONS_PATH = "app/src/main/resources/db/migration"
+DATA_DIR_NAME = ".Ambrosia-POS"
+DATABASE_NAME = "ambrosia.db"
+
+# Business created by ensure_initial_setup, same as the initialize_database fixture
+INITIAL_SETUP_DATA = {
+    "businessType": "restaurant",
+    "userName": DEFAULT_TEST_USER["name"],
+    "userPassword": "password123",
+    "userPin": DEFAULT_TEST_USER["pin"],
+    "businessName": "Test Restaurant",
+    "businessAddress": "123 Test St",
+    "businessPhone": "1234567890",
+    "businessEmail": "test@example.com",
+    "businessCurrency": "USD",
+}
+
+
+@dataclass(frozen=True)
+class SeedProfile:
+    """Volumes of a seeded database.
+
+    Attributes:
+        name: Profile name, used in the cache file name
+        orders: Total number of orders in the history
+        days: Number of days the orders are spread over, ending at ``end_date``
+        dishes: Number of dishes in the menu
+        categories: Number of dish categories
+        spaces: Number of dining spaces
+        tables: Number of tables, spread over the spaces
+        dishes_per_order: Inclusive range of dishes per order
+        paid_ratio: Share of orders that are paid (with ticket and payment);
+            the rest are closed without payment
+        end_date: Last day of the history (fixed for reproducibility)
+        seed: Random seed
+    """
+
+    name: str
+    orders: int
+    days: int = 730
+    dishes: int = 500
+    categories: int = 20
+    spaces: int = 5
+    tables: int = 50
+    dishes_per_order: tuple[int, int] = (1, 6)
+    paid_ratio: float = 0.9
+    end_date: date = date(2025, 12, 31)
+    seed: int = 42
+
+    @property
+    def start_date(self) -> date:
+        """First day of the order history."""
+        return self.end_date - timedelta(days=self.days - 1)
+
+    def fingerprint(self) -> str:
+        """Short hash of every field, identifying the generated data."""
+        encoded = json.dumps(asdict(self), sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()[:12]
+
+    def orders_on_day(self, day_index: int) -> int:
+        """Number of orders on the given day (0 is ``start_date``)."""
+        base, extra = divmod(self.orders, self.days)
+        return base + (1 if day_index < extra else 0)
+
+
+PROFILES = {
+    "smoke": SeedProfile("smoke", orders=1_000, days=30, dishes=20, tables=5),
+    # Two years of a busy restaurant
+    "restaurant": SeedProfile("restaurant", orders=100_000),
+    "large": SeedProfile("large", orders=1_000_000),
+}
+
+
+@dataclass
+class SeedContext:
+    """Existing rows the generated data refers to.
+
+    Attributes:
+        user_id: Staff user owning the orders and tickets
+        waiter: Waiter name stored on the orders
+        payment_method_ids: Payment methods to spread payments over
+        currency_id: Currency of the payments
+    """
+
+    user_id: str
+    waiter: str
+    payment_method_ids: list[str]
+    currency_id: str
+
+
+@dataclass
+class SeedBatch:
+    """Rows of one table group, as tuples in column order."""
+
+    orders: list[tuple] = field(default_factory=list)
+    order_dishes: list[tuple] = field(default_factory=list)
+    tickets: list[tuple] = field(default_factory=list)
+    payments: list[tuple] = field(default_factory=list)
+    ticket_payments: list[tuple] = field(default_factory=list)
+
+
+@dataclass
+class SeedSummary:
+    """Counts of seeded rows.
+
+    Attributes:
+        profile: Profile that was seeded
+        counts: Rows written per table
+        seconds: Time spent seeding (0.0 when served from the cache)
+        cached: Whether the database came from the cache
+    """
+
+    profile: SeedProfile
+    counts: dict[str, int]
+    seconds: float = 0.0
+    cached: bool = False
+
+
+class SeedDataGenerator:
+    """Deterministic rows for a profile.
+
+    Every day of the history draws from its own random generator seeded with
+    the profile seed and the day, so days can be generated independently (and
+    in any order) and still match.
+    """
+
+    def __init__(self, profile: SeedProfile, context: SeedContext):
+        self.profile = profile
+        self.context = context
+        self.categories: list[tuple] = []
+        self.dishes: list[tuple] = []
+        self.spaces: list[tuple] = []
+        self.tables: list[tuple] = []
+        self._build_catalog()
+
+    @staticmethod
+    def _uuid(rng: random.Random) -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def _build_catalog(self) -> None:
+        profile = self.profile
+        rng = random.Random(f"{profile.seed}:catalog")
+        for i in range(profile.categories):
+            name = f"{profile.name} category {i + 1}"
+            self.categories.append((self._uuid(rng), name, "dish", 0))
+        for i in range(profile.dishes):
+            category_id = self.categories[i % profile.categories][0]
+            price = round(rng.uniform(3.0, 45.0), 2)
+            self.dishes.append(
+                (self._uuid(rng), f"Dish {i + 1}", price, category_id, 0)
+            )
+        for i in range(profile.spaces):
+            self.spaces.append((self._uuid(rng), f"{profile.name} space {i + 1}", 0))
+        for i in range(profile.tables):
+            space_id = self.spaces[i % profile.spaces][0]
+            self.tables.append(
+                (self._uuid(rng), f"Table {i + 1}", "available", space_id, None, 0)
+            )
+
+    def day(self, day_index: int) -> SeedBatch:
+        """Generate the orders (and their dishes, tickets and payments) of a day."""
+        profile = self.profile
+        context = self.context
+        rng = random.Random(f"{profile.seed}:day:{day_index}")
+        day = profile.start_date + timedelta(days=day_index)
+        batch = SeedBatch()
+
+        for _ in range(profile.orders_on_day(day_index)):
+            order_id = self._uuid(rng)
+            # Service hours from noon to 11 pm
+            opened_at = datetime.combine(day, datetime.min.time()) + timedelta(
+                seconds=rng.randrange(12 * 3600, 23 * 3600)
+            )
+            table_id = rng.choice(self.tables)[0] if self.tables else None
+            total = 0.0
+            for _ in range(rng.randint(*profile.dishes_per_order)):
+                dish = rng.choice(self.dishes)
+                total += dish[2]
+                batch.order_dishes.append(
+                    (self._uuid(rng), order_id, dish[0], dish[2], None, "done", 1)
+                )
+            total = round(total, 2)
+            paid = rng.random() < profile.paid_ratio
+            batch.orders.append(
+                (
+                    order_id,
+                    context.user_id,
+                    table_id,
+                    context.waiter,
+                    "paid" if paid else "closed",
+                    total,
+                    opened_at.isoformat(),
+                    0,
+                )
+            )
+            if not paid:
+                continue
+
+            closed_at = (
+                opened_at + timedelta(minutes=rng.randint(20, 120))
+            ).isoformat()
+            ticket_id = self._uuid(rng)
+            payment_id = self._uuid(rng)
+            batch.tickets.append(
+                (ticket_id, order_id, context.user_id, closed_at, 1, total, "")
+            )
+            batch.payments.append(
+                (
+                    payment_id,
+                    rng.choice(context.payment_method_ids),
+                    context.currency_id,
+                    self._uuid(rng),
+                    total,
+                    closed_at.replace("T", " "),
+                )
+            )
+            batch.ticket_payments.append((payment_id, ticket_id))
+        return batch
+
+    def days(self) -> Iterator[SeedBatch]:
+        """Generate every day of the history in order."""
+        for day_index in range(self.profile.days):
+            yield self.day(day_index)
+
+
+_INSERTS = {
+    "categories": "INSERT INTO categories (id, name, type, is_deleted) "
+    "VALUES (?, ?, ?, ?)",
+    "dishes": "INSERT INTO dishes (id, name, price, category_id, is_deleted) "
+    "VALUES (?, ?, ?, ?, ?)",
+    "spaces": "INSERT INTO spaces (id, name, is_deleted) VALUES (?, ?, ?)",
+    "tables": "INSERT INTO tables (id, name, status, space_id, order_id, is_deleted) "
+    "VALUES (?, ?, ?, ?, ?, ?)",
+    "orders": "INSERT INTO orders "
+    "(id, user_id, table_id, waiter, status, total, created_at, is_deleted) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+    "order_dishes": "INSERT INTO orders_dishes "
+    "(id, order_id, dish_id, price_at_order, notes, status, should_prepare) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+    "tickets": "INSERT INTO tickets "
+    "(id, order_id, user_id, ticket_date, status, total_amount, notes) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+    "payments": "INSERT INTO payments "
+    "(id, method_id, currency_id, transaction_id, amount, date) "
+    "VALUES (?, ?, ?, ?, ?, ?)",
+    "ticket_payments": "INSERT INTO ticket_payments (payment_id, ticket_id) "
+    "VALUES (?, ?)",
+}
+
+
+def read_seed_context(
+    db: sqlite3.Connection, user_name: str = DEFAULT_TEST_USER["name"]
+) -> SeedContext:
+    """Look up the user, payment methods and base currency in a database."""
+    user = db.execute(
+        "SELECT id, name FROM users WHERE name = ? AND is_deleted = 0", (user_name,)
+    ).fetchone()
+    if user is None:
+        raise RuntimeError(f"User {user_name!r} not found, run the initial setup first")
+    methods = [row[0] for row in db.execute("SELECT id FROM payment_methods")]
+    currency = db.execute(
+        "SELECT currency_id FROM base_currency WHERE id = 1"
+    ).fetchone()
+    if not methods or currency is None:
+        raise RuntimeError("Payment methods and a base currency are required")
+    return SeedContext(user[0], user[1], methods, currency[0])
+
+
+def seed_sqlite(
+    db_path: Path, profile: SeedProfile, commit_every: int = 30
+) -> SeedSummary:
+    """Bulk-insert a profile into a migrated, initialized ``ambrosia.db``.
+
+    The server must not be running: rows are written in large transactions
+    with synchronous writes disabled.
+
+    Args:
+        db_path: Path to the database file
+        profile: Volumes to seed
+        commit_every: Days of history per transaction
+
+    Returns:
+        SeedSummary with the number of rows per table
+    """
+    start = time.perf_counter()
+    counts = dict.fromkeys(_INSERTS, 0)
+    db = sqlite3.connect(db_path)
+    try:
+        db.execute("PRAGMA synchronous = OFF")
+        db.execute("PRAGMA journal_mode = MEMORY")
+        generator = SeedDataGenerator(profile, read_seed_context(db))
+
+        def insert(table: str, rows: list[tuple]) -> None:
+            db.executemany(_INSERTS[table], rows)
+            counts[table] += len(rows)
+
+        insert("categories", generator.categories)
+        insert("dishes", generator.dishes)
+        insert("spaces", generator.spaces)
+        insert("tables", generator.tables)
+        for day_index, batch in enumerate(generator.days(), 1):
+            insert("orders", batch.orders)
+            insert("order_dishes", batch.order_dishes)
+            insert("tickets", batch.tickets)
+            insert("payments", batch.payments)
+            insert("ticket_payments", batch.ticket_payments)
+            if day_index % commit_every == 0:
+                db.commit()
+        db.commit()
+    finally:
+        db.close()
+
+    seconds = time.perf_counter() - start
+    logger.info(f"Seeded {profile.name} into {db_path} in {seconds:.1f}s: {counts}")
+    return SeedSummary(profile, counts, seconds)
+
+
+class _ApiWriter:
+    """Posts seed rows through a ``RequestPipeline`` (bounded, retried)."""
+
+    def __init__(self, client: AmbrosiaHttpClient, concurrency: int, credentials):
+        self.pipeline = RequestPipeline(client, concurrency, credentials=credentials)
+
+    async def post(self, path: str, body) -> dict:
+        response = await self.pipeline.send("POST", path, (201,), json=body)
+        return response.json()
+
+
+@dataclass
+class _OrderRows:
+    dishes: list[tuple] = field(default_factory=list)
+    ticket: tuple | None = None
+    payment: tuple | None = None
+
+
+def _group_by_order(batch: SeedBatch) -> dict[str, _OrderRows]:
+    """Index a day's dishes, tickets and payments by order id."""
+    rows = {order[0]: _OrderRows() for order in batch.orders}
+    for dish in batch.order_dishes:
+        rows[dish[1]].dishes.append(dish)
+    tickets = {ticket[0]: ticket for ticket in batch.tickets}
+    payments = {payment[0]: payment for payment in batch.payments}
+    for payment_id, ticket_id in batch.ticket_payments:
+        ticket = tickets[ticket_id]
+        rows[ticket[1]].ticket = ticket
+        rows[ticket[1]].payment = payments[payment_id]
+    return rows
+
+
+async def seed_via_api(
+    base_url: str,
+    profile: SeedProfile,
+    concurrency: int = 16,
+    credentials: dict[str, str] | None = None,
+) -> SeedSummary:
+    """Seed a profile through the API with concurrent requests.
+
+    Orders keep their generated ``created_at``; ticket dates too. Payment
+    dates are always set to "now" by the server.
+
+    Args:
+        base_url: Base URL of an initialized server
+        profile: Volumes to seed
+        concurrency: Maximum requests in flight
+        credentials: Staff credentials. Defaults to the test user
+
+    Returns:
+        SeedSummary with the number of rows per table
+    """
+    credentials = credentials or DEFAULT_TEST_USER
+    start = time.perf_counter()
+    counts = dict.fromkeys(_INSERTS, 0)
+
+    async with AmbrosiaHttpClient(base_url) as client:
+        login_response = await login_user(client, credentials)
+        user_id = login_response.json()["user"]["user_id"]
+        methods = (await client.get("/payments/methods")).json()
+        currency_id = (await client.get("/base-currency")).json()["currency_id"]
+        context = SeedContext(
+            user_id, credentials["name"], [m["id"] for m in methods], currency_id
+        )
+        generator = SeedDataGenerator(profile, context)
+        writer = _ApiWriter(client, concurrency, credentials)
+        ids: dict[str, str] = {}
+
+        async def create(table: str, path: str, row_id: str, body: dict) -> None:
+            ids[row_id] = (await writer.post(path, body))["id"]
+            counts[table] += 1
+
+        await asyncio.gather(
+            *(
+                create(
+                    "categories", "/categories", c[0], {"name": c[1], "type": "dish"}
+                )
+                for c in generator.categories
+            ),
+            *(
+                create("spaces", "/spaces", s[0], {"name": s[1]})
+                for s in generator.spaces
+            ),
+        )
+        await asyncio.gather(
+            *(
+                create(
+                    "dishes",
+                    "/dishes",
+                    d[0],
+                    {"name": d[1], "price": d[2], "category_id": ids[d[3]]},
+                )
+                for d in generator.dishes
+            ),
+            *(
+                create("tables", "/tables", t[0], {"name": t[1], "space_id": ids[t[3]]})
+                for t in generator.tables
+            ),
+        )
+
+        async def create_order(order: tuple, rows: _OrderRows) -> None:
+            _, _, table_id, waiter, status, total, created_at, _ = order
+            created = await writer.post(
+                "/orders/with-dishes",
+                {
+                    "order": {
+                        "user_id": user_id,
+                        "table_id": ids.get(table_id),
+                        "waiter": waiter,
+                        "status": status,
+                        "total": total,
+                        "created_at": created_at,
+                    },
+                    "dishes": [
+                        {
+                            "order_id": "",
+                            "dish_id": ids[row[2]],
+                            "price_at_order": row[3],
+                            "status": row[5],
+                            "should_prepare": bool(row[6]),
+                        }
+                        for row in rows.dishes
+                    ],
+                },
+            )
+            counts["orders"] += 1
+            counts["order_dishes"] += len(rows.dishes)
+            if rows.ticket is None or rows.payment is None:
+                return
+
+            ticket = rows.ticket
+            ticket_id = (
+                await writer.post(
+                    "/tickets",
+                    {
+                        "order_id": created["id"],
+                        "user_id": user_id,
+                        "ticket_date": ticket[3],
+                        "status": ticket[4],
+                        "total_amount": ticket[5],
+                        "notes": ticket[6],
+                    },
+                )
+            )["id"]
+            payment = rows.payment
+            payment_id = (
+                await writer.post(
+                    "/payments",
+                    {
+                        "method_id": payment[1],
+                        "currency_id": payment[2],
+                        "transaction_id": payment[3],
+                        "amount": payment[4],
+                    },
+                )
+            )["id"]
+            await writer.post(
+                "/payments/ticket-payments",
+                {"payment_id": payment_id, "ticket_id": ticket_id},
+            )
+            counts["tickets"] += 1
+            counts["payments"] += 1
+            counts["ticket_payments"] += 1
+
+        for batch in generator.days():
+            rows = _group_by_order(batch)
+            await asyncio.gather(
+                *(create_order(order, rows[order[0]]) for order in batch.orders)
+            )
+
+    seconds = time.perf_counter() - start
+    logger.info(f"Seeded {profile.name} via API in {seconds:.1f}s: {counts}")
+    return SeedSummary(profile, counts, seconds)
+
+
+async def ensure_initial_setup(base_url: str) -> None:
+    """Run ``POST /initial-setup`` with the test business unless already done."""
+    async with AmbrosiaHttpClient(base_url) as client:
+        status = await client.get("/initial-setup")
+        if status.status_code == 200 and status.json().get("initialized", False):
+            return
+        response = await client.post("/initial-setup", json=INITIAL_SETUP_DATA)
+        if response.status_code not in (201, 409):
+            raise RuntimeError(
+                f"Initial setup failed with {response.status_code}: "
+                f"{response.text[:200]}"
+            )
+
+
+def get_seed_cache_dir() -> Path:
+    """Return the seeded database cache directory (overridable via AMBROSIA_SEED_CACHE)."""
+    override = os.environ.get("AMBROSIA_SEED_CACHE")
+    return Path(override) if override else DEFAULT_SEED_CACHE_DIR
+
+
+def compute_schema_hash(gradle_dir: Path) -> str:
+    """Hash the Flyway migrations, so cached databases follow schema changes."""
+    digest = hashlib.sha256()
+    for file in sorted((gradle_dir / MIGRATIONS_PATH).glob("*.sql")):
+        digest.update(file.name.encode())
+        digest.update(file.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def cached_database_path(
+    profile: SeedProfile, schema_hash: str, method: str, cache_dir: Path | None = None
+) -> Path:
+    """Path of the cached database for a profile, schema and seeding method."""
+    cache_dir = cache_dir or get_seed_cache_dir()
+    return (
+        cache_dir / f"{profile.name}-{profile.fingerprint()}-{method}-{schema_hash}.db"
+    )
+
+
+def server_database_path(home_dir: Path) -> Path:
+    """Path of the server database inside a (JVM ``user.home``) home directory."""
+    return home_dir / DATA_DIR_NAME / DATABASE_NAME
+
+
+def install_database(db_file: Path, home_dir: Path) -> None:
+    """Copy a database into a server home directory before the server starts."""
+    target = server_database_path(home_dir)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(db_file, target)
+
+
+def start_seeded_server(
+    profile: SeedProfile, method: str = "sqlite", concurrency: int = 16
+) -> AmbrosiaTestServer:
+    """Start an isolated server on a seeded database, seeding and caching it if needed.
+
+    Must be called outside a running event loop (e.g. from a sync fixture).
+
+    Args:
+        profile: Volumes to seed
+        method: "sqlite" for direct bulk inserts or "api" for API calls
+        concurrency: Requests in flight when seeding via the API
+
+    Returns:
+        The running server; the caller stops it and cleans up its home dir.
+        If starting or seeding fails, the server is stopped and its home dir
+        removed before the error propagates
+    """
+    if method not in ("sqlite", "api"):
+        raise ValueError(f"Unknown seeding method {method!r}")
+    server = AmbrosiaTestServer(launch_mode="jar", isolated=True)
+    assert server.home_dir is not None, "Isolated servers have a home directory"
+    try:
+        _seed_and_start(server, profile, method, concurrency)
+    except Exception:
+        server.stop_server()
+        server.cleanup_home_dir()
+        raise
+    return server
+
+
+def _seed_and_start(
+    server: AmbrosiaTestServer, profile: SeedProfile, method: str, concurrency: int
+) -> None:
+    """Install the cached database, or seed and cache it, then start ``server``."""
+    cached = cached_database_path(
+        profile, compute_schema_hash(server.gradle_dir), method
+    )
+
+    if cached.exists():
+        logger.info(f"Using cached {profile.name} database: {cached}")
+        install_database(cached, server.home_dir)
+        server.start_server()
+        return
+
+    server.start_server()
+    asyncio.run(ensure_initial_setup(server.server_url))
+    if method == "api":
+        asyncio.run(seed_via_api(server.server_url, profile, concurrency))
+        server.stop_server()
+    else:
+        server.stop_server()
+        seed_sqlite(server_database_path(server.home_dir), profile)
+
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(cached.parent / ".seed.lock"):
+        if not cached.exists():
+            tmp_path = cached.with_suffix(f".{os.getpid()}.tmp")
+            shutil.copyfile(server_database_path(server.home_dir), tmp_path)
+            os.replace(tmp_path, cached)
+            logger.info(f"Cached {profile.name} database at {cached}")
+
+    server.start_server()
+
+
+@pytest.fixture(scope="session")
+def seeded_server_factory():
+    """Session-scoped factory starting (and later stopping) seeded servers.
+
+    Servers are reused per profile and method within the session.
+    """
+    servers: dict[tuple[SeedProfile, str], AmbrosiaTestServer] = {}
+
+    def factory(profile: SeedProfile, method: str = "sqlite") -> AmbrosiaTestServer:
+        key = (profile, method)
+        if key not in servers:
+            servers[key] = start_seeded_server(profile, method)
+        return servers[key]
+
+    yield factory
+    for server in servers.values():
+        server.stop_server()
+        server.cleanup_home_dir()
@@ -0,0 +1,167 @@
+"""Prebuilt server distribution management for fast test server startup.
+
+This module builds the server's fat jar once with Gradle and caches it keyed
+by a hash of the server sources, so later test sessions can start the server
+with ``java -jar`` instead of paying for a cold ``./gradlew run`` every time.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Files and directories (relative to the Gradle root) that affect the built jar
+HASHED_PATHS = (
+    "app/src/main",
+    "app/build.gradle.kts",
+    "gradle/libs.versions.toml",
+)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "ambrosia-e2e" / "dist"
+CACHED_JAR_NAME = "ambrosia.jar"
+
+
+@dataclass
+class ServerDistribution:
+    """A built server jar ready to be launched with ``java -jar``.
+
+    Attributes:
+        jar_path: Path to the cached fat jar
+        source_hash: Hash of the sources the jar was built from
+        build_seconds: Time spent building (0.0 when served from the cache)
+        cached: Whether the jar was already present in the cache
+    """
+
+    jar_path: Path
+    source_hash: str
+    build_seconds: float
+    cached: bool
+
+
+def compute_source_hash(gradle_dir: Path) -> str:
+    """Compute a stable hash of every file that influences the server jar.
+
+    Args:
+        gradle_dir: Root directory of the Gradle project (``server/``)
+
+    Returns:
+        Hex digest identifying the current server sources
+    """
+    digest = hashlib.sha256()
+    for relative in HASHED_PATHS:
+        path = gradle_dir / relative
+        files = (
+            sorted(p for p in path.rglob("*") if p.is_file())
+            if path.is_dir()
+            else [path]
+        )
+        for file in files:
+            if not file.exists():
+                continue
+            digest.update(file.relative_to(gradle_dir).as_posix().encode())
+            digest.update(b"\0")
+            digest.update(file.read_bytes())
+            digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def get_cache_dir() -> Path:
+    """Return the distribution cache directory (overridable via AMBROSIA_DIST_CACHE)."""
+    override = os.environ.get("AMBROSIA_DIST_CACHE")
+    return Path(override) if override else DEFAULT_CACHE_DIR
+
+
+def ensure_server_jar(
+    gradle_dir: Path, cache_dir: Path | None = None
+) -> ServerDistribution:
+    """Return a cached server jar for the current sources, building it if needed.
+
+    Args:
+        gradle_dir: Root directory of the Gradle project (``server/``)
+        cache_dir: Directory holding cached jars. Defaults to ``get_cache_dir()``
+
+    Returns:
+        ServerDistribution describing the jar to launch
+
+    Raises:
+        RuntimeError: If the Gradle build fails or produces no jar
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    source_hash = compute_source_hash(gradle_dir)
+    jar_path = cache_dir / source_hash / CACHED_JAR_NAME
+
+    if jar_path.exists():
+        logger.info(f"Using cached server jar: {jar_path}")
+        return ServerDistribution(jar_path, source_hash, 0.0, cached=True)
+
+    jar_path.parent.mkdir(parents=True, exist_ok=True)
+    start_time = time.perf_counter()
+    # Parallel workers share the cache: only one of them runs Gradle, the
+    # others wait on the lock and then pick up the freshly cached jar
+    with file_lock(cache_dir / ".build.lock"):
+        if jar_path.exists():
+            logger.info(f"Server jar was built by another worker: {jar_path}")
+            return ServerDistribution(jar_path, source_hash, 0.0, cached=True)
+
+        logger.info(f"No cached server jar for sources {source_hash}, building it")
+        built_jar = _build_jar(gradle_dir)
+
+        # Copy to a temporary name first so readers never see a partial jar
+        tmp_path = jar_path.with_suffix(f".{os.getpid()}.tmp")
+        shutil.copy2(built_jar, tmp_path)
+        os.replace(tmp_path, jar_path)
+    build_seconds = time.perf_counter() - start_time
+
+    logger.info(f"Built server jar in {build_seconds:.1f}s, cached at {jar_path}")
+    return ServerDistribution(jar_path, source_hash, build_seconds, cached=False)
+
+
+@contextmanager
+def file_lock(lock_path: Path) -> Iterator[None]:
+    """Hold an exclusive inter-process lock on a file (no-op without fcntl).
+
+    Used to let one of several parallel workers fill a shared cache entry.
+    """
+    if fcntl is None:
+        yield
+        return
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _build_jar(gradle_dir: Path) -> Path:
+    """Build the fat jar with Gradle and return its path."""
+    cmd = ["./gradlew", ":app:jar", "--no-daemon", "-q"]
+    logger.info(f"Building server jar with command: {' '.join(cmd)}")
+
+    result = subprocess.run(cmd, cwd=gradle_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error(f"Gradle stdout: {result.stdout}")
+        logger.error(f"Gradle stderr: {result.stderr}")
+        raise RuntimeError(f"Server jar build failed with code {result.returncode}")
+
+    jars = sorted(
+        (gradle_dir / "app" / "build" / "libs").glob("ambrosia-*.jar"),
+        key=lambda p: p.stat().st_mtime,
+    )
+    if not jars:
+        raise RuntimeError("Gradle build did not produce an ambrosia-*.jar")
+    return jars[-1]
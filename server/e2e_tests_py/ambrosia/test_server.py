@@ -6,17 +6,71 @@ handling server startup, shutdown, and health checking for API tests.
 
 import logging
 import os
+import re
+import shutil
 import signal
+import socket
 import subprocess
+import tempfile
+import threading
 import time
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
+from typing import IO, TYPE_CHECKING
 
 import httpx
 import psutil
 import pytest
 
+from ambrosia.server_dist import ensure_server_jar
+
+# The latency_baseline and resource_monitor plugins are imported where used:
+# conftest imports this module before registering them with pytest_plugins,
+# and importing them first would keep their asserts from being rewritten
+if TYPE_CHECKING:
+    from ambrosia.resource_monitor import ResourceMonitor
+
 logger = logging.getLogger(__name__)
 
+LAUNCH_MODES = ("gradle", "jar")
+
+
+@dataclass
+class StartupTimings:
+    """Durations of each server startup phase, in seconds.
+
+    Attributes:
+        build: Time spent building the server jar (None when launching via Gradle)
+        jvm_start: Time from process spawn until the HTTP port accepts connections
+        first_health_check: Time from port bound until the first 200 on the root path
+    """
+
+    build: float | None = None
+    jvm_start: float | None = None
+    first_health_check: float | None = None
+
+    @property
+    def total(self) -> float:
+        """Total startup time across all recorded phases."""
+        return sum(
+            t
+            for t in (self.build, self.jvm_start, self.first_health_check)
+            if t is not None
+        )
+
+    def summary(self) -> str:
+        """Return a one-line human readable summary of the timings."""
+
+        def fmt(value: float | None) -> str:
+            return "n/a" if value is None else f"{value:.2f}s"
+
+        return (
+            f"build={fmt(self.build)} jvm_start={fmt(self.jvm_start)} "
+            f"first_health_check={fmt(self.first_health_check)} "
+            f"total={self.total:.2f}s"
+        )
+
 
 class AmbrosiaTestServer:
     """Test server manager that replicates TestServer.kt functionality.
@@ -24,45 +78,135 @@ class AmbrosiaTestServer:
     This class manages the lifecycle of the Ambrosia POS server for testing,
     including starting the server via Gradle, waiting for it to be ready,
     and properly shutting it down after tests complete.
+
+    Two launch modes are supported:
+    - ``gradle``: run the server with ``./gradlew run`` (compiles on every start)
+    - ``jar``: build the fat jar once, cache it keyed by a hash of the server
+      sources and start it directly with ``java -jar``
+
+    An isolated server gets its own free HTTP/HTTPS/phoenixd ports and its own
+    temporary home directory (and therefore its own
+    ``~/.Ambrosia-POS/ambrosia.db``), so several instances can run side by
+    side, e.g. one per pytest-xdist worker. Isolation relies on overriding the
+    JVM ``user.home`` and requires the ``jar`` launch mode.
     """
 
     # Server configuration constants (matching TestServer.kt)
     SERVER_PORT = 9154
     SERVER_HOST = "127.0.0.1"
-    HEALTH_CHECK_URL = f"http://{SERVER_HOST}:{SERVER_PORT}/"
 
     # Timeout settings
     STARTUP_TIMEOUT = 30  # seconds
-    HEALTH_CHECK_INTERVAL = 1  # seconds
-
-    def __init__(self):
+    # Readiness probes back off exponentially between these bounds, but wake
+    # up immediately when the server logs that it is ready
+    PROBE_INITIAL_INTERVAL = 0.05  # seconds
+    PROBE_MAX_INTERVAL = 1.0  # seconds
+
+    # Ktor log lines announcing that the server accepts connections
+    READY_LOG_PATTERN = re.compile(r"Application started|Responding at")
+    # Output lines whose first appearance is timestamped (see output_milestones)
+    OUTPUT_MILESTONES = {
+        # Printed by Ambrosia.run() once the JVM is up and the CLI is parsed
+        "jvm_ready": re.compile(r"Running Ambrosia POS Server"),
+        # Ktor finished installing every route module
+        "app_started": re.compile(r"Application started"),
+    }
+    # Recent server output lines kept for diagnostics
+    OUTPUT_BUFFER_LINES = 500
+
+    # phoenixd connection settings (see ambrosia.fake_phoenixd)
+    PHOENIXD_PORT = 9740
+    PHOENIXD_PASSWORD = "test-password"
+    # Secret the server uses to verify Phoenix webhook signatures
+    PHOENIXD_WEBHOOK_SECRET = "test-webhook-secret"
+
+    # Application arguments shared by every launch mode
+    # Use shorter access token expiration (5 seconds) for faster E2E testing
+    SERVER_ARGS = [
+        f"--phoenixd-password={PHOENIXD_PASSWORD}",
+        f"--phoenixd-webhook-secret={PHOENIXD_WEBHOOK_SECRET}",
+        "--jwt-access-token-expiration",
+        "5",
+    ]
+
+    def __init__(
+        self,
+        launch_mode: str = "gradle",
+        isolated: bool = False,
+        jvm_args: list[str] | None = None,
+        server_args: list[str] | None = None,
+    ):
+        """Initialize the test server manager.
+
+        Args:
+            launch_mode: How to launch the server, either "gradle" or "jar"
+            isolated: Use free ports and a private temporary home directory
+            jvm_args: Extra JVM flags (jar launch mode only), e.g. a CDS archive
+            server_args: Extra application arguments, e.g. ``--permission-cache``
+        """
+        if launch_mode not in LAUNCH_MODES:
+            raise ValueError(
+                f"Unknown launch mode {launch_mode!r}, expected one of {LAUNCH_MODES}"
+            )
+        if isolated and launch_mode != "jar":
+            logger.warning("Isolated servers require the jar launch mode, using it")
+            launch_mode = "jar"
+        if jvm_args and launch_mode != "jar":
+            logger.warning("Extra JVM flags only apply to the jar launch mode")
+
+        self.launch_mode = launch_mode
+        self.isolated = isolated
+        self.jvm_args = list(jvm_args or [])
+        self.server_args = list(server_args or [])
+        self.host = self.SERVER_HOST
+        self.port = find_free_port(self.host) if isolated else self.SERVER_PORT
+        self.https_port = find_free_port(self.host) if isolated else None
+        self.phoenixd_port = (
+            find_free_port(self.host) if isolated else self.PHOENIXD_PORT
+        )
+        self.phoenixd_url = f"http://{self.host}:{self.phoenixd_port}"
+        self.home_dir: Path | None = (
+            Path(tempfile.mkdtemp(prefix="ambrosia-home-")) if isolated else None
+        )
         self.server_process: subprocess.Popen | None = None
-        self.server_url = f"http://{self.SERVER_HOST}:{self.SERVER_PORT}"
+        self.resource_monitor: ResourceMonitor | None = None
+        self.server_url = f"http://{self.host}:{self.port}"
+        self.health_check_url = f"{self.server_url}/"
+        self.startup_timings = StartupTimings()
+        # time.time() of the last spawn and of the first OUTPUT_MILESTONES lines
+        self.spawned_at: float | None = None
+        self.output_milestones: dict[str, float] = {}
         self._gradle_dir = Path(__file__).parent.parent.parent
+        self._output: deque[str] = deque(maxlen=self.OUTPUT_BUFFER_LINES)
+        self._output_readers: list[threading.Thread] = []
+        self._ready_logged = threading.Event()
+
+    @property
+    def gradle_dir(self) -> Path:
+        """Root of the Gradle project the server is built and run from."""
+        return self._gradle_dir
 
     def start_server(self) -> None:
-        """Start the server using Gradle, equivalent to runGradleApp() in TestServer.kt."""
+        """Start the server, equivalent to runGradleApp() in TestServer.kt."""
         if self.server_process is not None:
             logger.warning("Server is already running")
             return
 
-        logger.info(f"Starting server from directory: {self._gradle_dir}")
+        logger.info(
+            f"Starting server from directory: {self._gradle_dir} "
+            f"(launch mode: {self.launch_mode})"
+        )
+        self.startup_timings = StartupTimings()
 
-        # Change to the app directory and run gradlew with Phoenix configuration
-        cmd = [
-            "./gradlew",
-            "run",
-            "--no-daemon",
-            # Note: All application arguments must be in a single quoted string after --args
-            # Use shorter access token expiration (5 seconds) for faster E2E testing
-            "--args=--phoenixd-url=http://localhost:9740 "
-            "--phoenixd-password=test-password "
-            "--phoenixd-webhook-secret=test-webhook-secret "
-            "--jwt-access-token-expiration 5",
-        ]
+        if self.launch_mode == "jar":
+            cmd = self._build_jar_command()
+        else:
+            cmd = self._build_gradle_command()
 
         logger.info(f"Starting server with command: {' '.join(cmd)}")
 
+        self.output_milestones = {}
+        self.spawned_at = time.time()
         try:
             self.server_process = subprocess.Popen(
                 cmd,
@@ -72,21 +216,97 @@ class AmbrosiaTestServer:
                 preexec_fn=os.setsid if os.name != "nt" else None,
             )
             logger.info(f"Server process started with PID: {self.server_process.pid}")
+            self._start_output_readers()
 
             # Wait for server to be ready
             self._wait_for_server()
+            logger.info(f"Server startup timings: {self.startup_timings.summary()}")
 
         except Exception as e:
             logger.error(f"Failed to start server: {e}")
             self._cleanup_server()
             raise
 
+    def _server_args(self) -> list[str]:
+        """Application arguments for this instance, including its ports."""
+        args = [
+            *self.SERVER_ARGS,
+            f"--phoenixd-url={self.phoenixd_url}",
+            f"--http-bind-port={self.port}",
+            *self.server_args,
+        ]
+        if self.https_port is not None:
+            args.append(f"--https-bind-port={self.https_port}")
+        return args
+
+    def _build_gradle_command(self) -> list[str]:
+        """Build the command that runs the server through Gradle."""
+        # Note: All application arguments must be in a single quoted string after --args
+        return [
+            "./gradlew",
+            "run",
+            "--no-daemon",
+            f"--args={' '.join(self._server_args())}",
+        ]
+
+    def _build_jar_command(self) -> list[str]:
+        """Build (or reuse) the cached server jar and return the java command."""
+        distribution = ensure_server_jar(self._gradle_dir)
+        self.startup_timings.build = distribution.build_seconds
+        jvm_args = [
+            # Same logging configuration as the Gradle run task
+            "-Dlogback.configurationFile=Ambrosia-Logs.xml",
+        ]
+        if self.home_dir is not None:
+            # The server derives its data and phoenix config paths from user.home
+            jvm_args.append(f"-Duser.home={self.home_dir}")
+        jvm_args += self.jvm_args
+        return [
+            self._java_executable(),
+            *jvm_args,
+            "-jar",
+            str(distribution.jar_path),
+            *self._server_args(),
+        ]
+
+    @staticmethod
+    def _java_executable() -> str:
+        """Locate the java binary, preferring JAVA_HOME when it is set."""
+        java_home = os.environ.get("JAVA_HOME")
+        if java_home:
+            candidate = Path(java_home) / "bin" / "java"
+            if candidate.exists():
+                return str(candidate)
+        return shutil.which("java") or "java"
+
+    def start_resource_monitor(self, interval: float = 0.5) -> "ResourceMonitor":
+        """Sample the running server's process tree until it is stopped.
+
+        Args:
+            interval: Seconds between samples
+
+        Returns:
+            The started ResourceMonitor
+        """
+        if self.server_process is None:
+            raise RuntimeError("Server is not running")
+        from ambrosia.resource_monitor import ResourceMonitor
+
+        if self.resource_monitor is None:
+            self.resource_monitor = ResourceMonitor(self.server_process.pid, interval)
+            self.resource_monitor.start()
+        return self.resource_monitor
+
     def stop_server(self) -> None:
         """Stop the server process, equivalent to stopServer() in TestServer.kt."""
         if self.server_process is None:
             logger.warning("No server process to stop")
             return
 
+        if self.resource_monitor is not None:
+            self.resource_monitor.stop()
+            self.resource_monitor = None
+
         logger.info(f"Stopping server process (PID: {self.server_process.pid})")
 
         try:
@@ -112,38 +332,106 @@ class AmbrosiaTestServer:
         finally:
             self._cleanup_server()
 
+    def _start_output_readers(self) -> None:
+        """Drain stdout and stderr on background threads.
+
+        Draining keeps a chatty startup from filling the pipe buffers and
+        stalling the server, and lets readiness react to the log as it happens.
+        """
+        self._output.clear()
+        self._ready_logged.clear()
+        self._output_readers = [
+            threading.Thread(
+                target=self._read_output,
+                args=(stream, name),
+                name=f"ambrosia-server-{name}",
+                daemon=True,
+            )
+            for stream, name in (
+                (self.server_process.stdout, "stdout"),
+                (self.server_process.stderr, "stderr"),
+            )
+        ]
+        for reader in self._output_readers:
+            reader.start()
+
+    def _read_output(self, stream: IO[bytes], name: str) -> None:
+        """Copy one output stream into the ring buffer until EOF."""
+        for raw_line in iter(stream.readline, b""):
+            line = raw_line.decode(errors="replace").rstrip()
+            self._output.append(f"[{name}] {line}")
+            logger.debug(f"server {name}: {line}")
+            for milestone, pattern in self.OUTPUT_MILESTONES.items():
+                if milestone not in self.output_milestones and pattern.search(line):
+                    self.output_milestones[milestone] = time.time()
+            if self.READY_LOG_PATTERN.search(line):
+                self._ready_logged.set()
+        stream.close()
+
+    def recent_output(self) -> list[str]:
+        """Return the most recent server output lines, oldest first."""
+        return list(self._output)
+
     def _wait_for_server(self) -> None:
-        """Wait for server to be ready, equivalent to waitForServer() in TestServer.kt."""
+        """Wait for server to be ready, equivalent to waitForServer() in TestServer.kt.
+
+        Probes the port with exponential backoff and confirms readiness with a
+        health check. A "ready" log line from the server skips the remaining
+        backoff so the check happens right away.
+        """
         start_time = time.time()
         timeout = self.STARTUP_TIMEOUT
+        interval = self.PROBE_INITIAL_INTERVAL
+        port_bound_at: float | None = None
 
         logger.info(f"Waiting for server to be ready (timeout: {timeout}s)")
 
-        while time.time() - start_time < timeout:
-            try:
-                # Check if server is responding
-                response = httpx.get(self.HEALTH_CHECK_URL, timeout=5.0)
-                if response.status_code == 200:
-                    logger.info("Server is ready and responding")
-                    return
-
-            except (httpx.ConnectError, httpx.TimeoutException, httpx.HTTPError) as e:
-                logger.debug(f"Server not ready yet: {e}")
-
-            # Check if process is still running
-            if self.server_process and self.server_process.poll() is not None:
-                stdout, stderr = self.server_process.communicate()
-                logger.error(
-                    f"Server process died unexpectedly. stdout: {stdout}, stderr: {stderr}"
-                )
-                raise RuntimeError("Server process died during startup")
-
-            time.sleep(self.HEALTH_CHECK_INTERVAL)
+        # One client for all probes, so its setup cost is not counted as startup
+        with httpx.Client(timeout=5.0) as client:
+            while time.time() - start_time < timeout:
+                if port_bound_at is None and self._is_port_open():
+                    port_bound_at = time.time()
+                    self.startup_timings.jvm_start = port_bound_at - start_time
+
+                if port_bound_at is not None:
+                    try:
+                        response = client.get(self.health_check_url)
+                        if response.status_code == 200:
+                            now = time.time()
+                            self.startup_timings.first_health_check = (
+                                now - port_bound_at
+                            )
+                            logger.info("Server is ready and responding")
+                            return
+                    except httpx.HTTPError as e:
+                        logger.debug(f"Server not ready yet: {e}")
+
+                # Check if process is still running
+                if self.server_process and self.server_process.poll() is not None:
+                    self._join_output_readers()
+                    self._log_server_output()
+                    raise RuntimeError("Server process died during startup")
+
+                remaining = timeout - (time.time() - start_time)
+                wait = max(0.0, min(interval, remaining))
+                if self._ready_logged.is_set():
+                    # The server reported it is up, keep probing at the fastest pace
+                    time.sleep(min(self.PROBE_INITIAL_INTERVAL, wait))
+                elif not self._ready_logged.wait(timeout=wait):
+                    interval = min(interval * 2, self.PROBE_MAX_INTERVAL)
 
         # If we get here, server didn't start in time
         self._log_server_output()
         raise RuntimeError(f"Server did not start within {timeout} seconds")
 
+    def _is_port_open(self) -> bool:
+        """Check whether the server's HTTP port accepts TCP connections."""
+        try:
+            with socket.create_connection((self.host, self.port), timeout=0.5):
+                return True
+        except OSError:
+            return False
+
     def _force_kill_server(self) -> None:
         """Force kill the server process and all its children."""
         if self.server_process is None:
@@ -156,21 +444,31 @@ class AmbrosiaTestServer:
             else:
                 self.server_process.kill()
 
-            # Also kill any remaining processes by name (fallback)
-            self._kill_processes_by_name("java")
+            # Also kill any remaining processes by name (fallback). Isolated
+            # servers only match their own home directory so other workers'
+            # servers are left alone.
+            marker = str(self.home_dir) if self.home_dir else "ambrosia"
+            self._kill_processes_by_name("java", marker)
 
         except Exception as e:
             logger.error(f"Error force killing server: {e}")
 
-    def _kill_processes_by_name(self, process_name: str) -> None:
-        """Kill processes by name as a fallback cleanup method."""
+    def _kill_processes_by_name(
+        self, process_name: str, marker: str = "ambrosia"
+    ) -> None:
+        """Kill processes by name as a fallback cleanup method.
+
+        Args:
+            process_name: Substring of the process name to match (e.g. "java")
+            marker: Substring that must appear in the command line
+        """
         try:
             for proc in psutil.process_iter(["pid", "name", "cmdline"]):
                 try:
                     if proc.info["name"] and process_name in proc.info["name"].lower():
                         # Check if it's likely our server process
                         cmdline = proc.info.get("cmdline", [])
-                        if any("ambrosia" in str(arg).lower() for arg in cmdline):
+                        if any(marker.lower() in str(arg).lower() for arg in cmdline):
                             logger.info(
                                 f"Killing process {proc.info['pid']}: {cmdline}"
                             )
@@ -184,31 +482,73 @@ class AmbrosiaTestServer:
         except Exception as e:
             logger.error(f"Error killing processes by name: {e}")
 
+    def _join_output_readers(self, timeout: float = 5.0) -> None:
+        """Wait for the output readers to reach EOF after the process exited."""
+        for reader in self._output_readers:
+            reader.join(timeout=timeout)
+        self._output_readers = []
+
     def _cleanup_server(self) -> None:
         """Clean up server process references."""
         if self.server_process:
+            self._join_output_readers()
             self.server_process = None
 
+    def cleanup_home_dir(self) -> None:
+        """Remove the temporary home directory of an isolated server."""
+        if self.home_dir is not None and self.server_process is None:
+            shutil.rmtree(self.home_dir, ignore_errors=True)
+            self.home_dir = None
+
     def _log_server_output(self) -> None:
-        """Log server output for debugging."""
-        if self.server_process:
-            try:
-                stdout, stderr = self.server_process.communicate(timeout=1)
-                if stdout:
-                    logger.error(f"Server stdout: {stdout.decode()}")
-                if stderr:
-                    logger.error(f"Server stderr: {stderr.decode()}")
-            except subprocess.TimeoutExpired:
-                logger.error("Could not read server output (timeout)")
-            except Exception as e:
-                logger.error(f"Error reading server output: {e}")
+        """Log the most recent server output for debugging."""
+        lines = self.recent_output()
+        if lines:
+            logger.error(
+                f"Last {len(lines)} lines of server output:\n" + "\n".join(lines)
+            )
+        else:
+            logger.error("Server produced no output")
+
+
+def find_free_port(host: str = AmbrosiaTestServer.SERVER_HOST) -> int:
+    """Ask the OS for a currently unused TCP port on the given host."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def get_xdist_worker_id() -> str | None:
+    """Return the pytest-xdist worker id (e.g. "gw0"), or None outside workers."""
+    return os.environ.get("PYTEST_XDIST_WORKER")
+
+
+# Key under which the session's startup timings are stored on the pytest config
+startup_timings_key = pytest.StashKey[StartupTimings]()
+
+
+def get_launch_mode(config: pytest.Config) -> str:
+    """Resolve the launch mode from --launch-mode or the AMBROSIA_LAUNCH_MODE env var."""
+    option = config.getoption("--launch-mode", default=None)
+    return option or os.environ.get("AMBROSIA_LAUNCH_MODE", "gradle")
 
 
 # Pytest fixtures for easy integration
 @pytest.fixture(scope="session")
-def test_server() -> AmbrosiaTestServer:
-    """Session-scoped fixture that provides a TestServer instance."""
-    return AmbrosiaTestServer()
+def test_server(pytestconfig: pytest.Config) -> AmbrosiaTestServer:
+    """Session-scoped fixture that provides a TestServer instance.
+
+    Under pytest-xdist every worker runs its own session, so each worker gets
+    its own isolated server (free port, private home directory and database).
+    """
+    worker_id = get_xdist_worker_id()
+    if worker_id is not None:
+        logger.info(f"Running under xdist worker {worker_id}, isolating server")
+    server = AmbrosiaTestServer(
+        launch_mode=get_launch_mode(pytestconfig), isolated=worker_id is not None
+    )
+    yield server
+    server.cleanup_home_dir()
 
 
 @pytest.fixture(scope="session")
@@ -218,12 +558,32 @@ def server_url(test_server: AmbrosiaTestServer) -> str:
 
 
 @pytest.fixture(scope="session", autouse=True)
-def manage_server_lifecycle(test_server: AmbrosiaTestServer) -> None:
+def manage_server_lifecycle(
+    test_server: AmbrosiaTestServer, pytestconfig: pytest.Config
+) -> None:
     """Session-scoped fixture that manages server startup and shutdown."""
+    from ambrosia.latency_baseline import baseline_server_key
+    from ambrosia.resource_monitor import resource_monitor_key, worker_profile_path
+
     # Start server
     test_server.start_server()
+    pytestconfig.stash[startup_timings_key] = test_server.startup_timings
+    pytestconfig.stash[baseline_server_key] = test_server.server_url
+    profile_path = pytestconfig.getoption("--resource-profile", default=None)
+    monitor = None
+    if profile_path:
+        monitor = test_server.start_resource_monitor(
+            pytestconfig.getoption("--resource-interval")
+        )
+        pytestconfig.stash[resource_monitor_key] = monitor
 
     yield  # Run all tests
 
     # Stop server after all tests
     test_server.stop_server()
+    if monitor is not None:
+        path = worker_profile_path(
+            pytestconfig.rootpath / profile_path, get_xdist_worker_id()
+        )
+        monitor.save(path)
+        logger.info(f"Saved server resource timeline to {path}")
@@ -0,0 +1,339 @@
+"""Upload pipeline throughput and memory benchmark for ``POST /uploads``.
+
+Product photos are uploaded as ``multipart/form-data`` and written by
+``UploadService`` to ``~/.Ambrosia-POS/uploads/<date>/<uuid>.<ext>``. This
+module uploads many files of varying size concurrently, streaming them from
+disk with ``AmbrosiaHttpClient.upload``, and reports MB/s, latency
+percentiles and the growth of the server's RSS while the uploads ran.
+
+``check_incremental_write`` sends one large file at a throttled rate and
+watches the upload directory: a server that streams the part to disk shows
+the file growing while the request is still in flight, while one that holds
+the whole file in heap only writes it at the end (and grows its RSS by about
+the file size).
+
+Ktor rejects multipart file parts over its form field limit (50 MiB by
+default), so generated files stay well below it.
+
+Example:
+    files = generate_upload_files(tmp_path, count=50, sizes=[64 * 1024, 2 * 2**20])
+    report = await run_upload_benchmark(server_url, files, server_pid=pid)
+    print(report.format_summary())
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from ambrosia.auth_utils import login_user
+from ambrosia.http_client import AmbrosiaHttpClient, SharedConnectionPool
+from ambrosia.load import LatencyHistogram
+from ambrosia.scaling import process_tree_rss
+from ambrosia.seeding import DATA_DIR_NAME
+
+logger = logging.getLogger(__name__)
+
+# Default mix of file sizes: thumbnails, photos and a few large images
+DEFAULT_UPLOAD_SIZES = (32 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024)
+
+
+def server_uploads_path(home_dir: Path | None = None) -> Path:
+    """Directory the server writes uploads to.
+
+    Args:
+        home_dir: JVM ``user.home`` of the server. Defaults to the current
+            user's home directory (non-isolated test server)
+    """
+    return (home_dir or Path.home()) / DATA_DIR_NAME / "uploads"
+
+
+def generate_upload_files(
+    directory: Path,
+    count: int,
+    sizes: list[int] | tuple[int, ...] = DEFAULT_UPLOAD_SIZES,
+    seed: int | None = None,
+) -> list[Path]:
+    """Write ``count`` files of random content and sizes picked from ``sizes``.
+
+    Files are written in 1 MiB chunks so large sizes do not need large buffers.
+
+    Args:
+        directory: Where to write the files
+        count: Number of files
+        sizes: File sizes in bytes to pick from
+        seed: Random seed for the sizes and contents
+
+    Returns:
+        Paths of the generated files
+    """
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        size = rng.choice(sizes)
+        path = directory / f"upload-{i:05d}.bin"
+        with path.open("wb") as f:
+            remaining = size
+            while remaining:
+                chunk = min(remaining, 1024 * 1024)
+                f.write(rng.randbytes(chunk))
+                remaining -= chunk
+        paths.append(path)
+    return paths
+
+
+class _RssSampler:
+    """Tracks the peak RSS of the server process tree on a background task."""
+
+    def __init__(self, pid: int | None, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.before = process_tree_rss(pid) if pid else None
+        self.peak = self.before
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        assert self.pid is not None
+        while True:
+            rss = await asyncio.to_thread(process_tree_rss, self.pid)
+            self.peak = max(self.peak or 0, rss)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.pid:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self.peak = max(self.peak or 0, process_tree_rss(self.pid))
+
+    @property
+    def growth(self) -> int | None:
+        if self.before is None or self.peak is None:
+            return None
+        return self.peak - self.before
+
+
+@dataclass
+class UploadReport:
+    """Result of an upload benchmark.
+
+    Attributes:
+        files: Number of files uploaded (one request each)
+        bytes: Total size of the files in bytes
+        duration: Wall-clock seconds of the whole run
+        concurrency: Concurrent uploads
+        latency: Per-request latency histogram
+        status_codes: Responses per status code ("error" for transport errors)
+        rss_before: Server RSS in bytes before the run, None without a PID
+        rss_peak: Highest server RSS sampled during the run
+    """
+
+    files: int
+    bytes: int
+    duration: float
+    concurrency: int
+    latency: LatencyHistogram
+    status_codes: Counter = field(default_factory=Counter)
+    rss_before: int | None = None
+    rss_peak: int | None = None
+
+    @property
+    def succeeded(self) -> int:
+        """Uploads answered with 201."""
+        return self.status_codes.get(201, 0)
+
+    @property
+    def mb_per_second(self) -> float:
+        """Upload throughput in MB/s (10^6 bytes) over the run."""
+        return self.bytes / 1e6 / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def p50(self) -> float:
+        """Median upload latency in seconds."""
+        return self.latency.percentile(50)
+
+    @property
+    def p99(self) -> float:
+        """99th percentile upload latency in seconds."""
+        return self.latency.percentile(99)
+
+    @property
+    def rss_growth(self) -> int | None:
+        """Peak server RSS growth over the run in bytes."""
+        if self.rss_before is None or self.rss_peak is None:
+            return None
+        return self.rss_peak - self.rss_before
+
+    def format_summary(self) -> str:
+        """Render throughput, latency and memory in one line."""
+        growth = self.rss_growth
+        return (
+            f"{self.succeeded}/{self.files} files, {self.bytes / 2**20:.1f} MiB in "
+            f"{self.duration:.2f}s ({self.mb_per_second:.1f} MB/s, "
+            f"concurrency {self.concurrency}), p50 {self.p50 * 1000:.1f} ms, "
+            f"p99 {self.p99 * 1000:.1f} ms, server RSS growth "
+            f"{'n/a' if growth is None else f'{growth / 2**20:+.1f} MiB'}"
+        )
+
+
+async def run_upload_benchmark(
+    base_url: str,
+    files: list[Path],
+    concurrency: int = 8,
+    credentials: dict[str, str] | None = None,
+    chunk_size: int = 64 * 1024,
+    server_pid: int | None = None,
+) -> UploadReport:
+    """Upload every file in its own request, ``concurrency`` at a time.
+
+    Args:
+        base_url: Base URL of the server
+        files: Files to upload, e.g. from ``generate_upload_files``
+        concurrency: Uploads in flight at once
+        credentials: Login used for the uploads. Defaults to the test user
+        chunk_size: Bytes read from disk per chunk
+        server_pid: Server PID, enables RSS sampling
+
+    Returns:
+        UploadReport of the run
+    """
+    latency = LatencyHistogram()
+    status_codes: Counter = Counter()
+    pending = list(reversed(files))
+    pool = SharedConnectionPool(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    sampler = _RssSampler(server_pid)
+
+    async with AmbrosiaHttpClient(base_url, timeout=120.0, pool=pool) as client:
+        await login_user(client, credentials)
+
+        async def worker() -> None:
+            while pending:
+                path = pending.pop()
+                start = time.perf_counter()
+                try:
+                    response = await client.upload(
+                        "/uploads", [path], chunk_size=chunk_size
+                    )
+                except Exception as e:
+                    status_codes["error"] += 1
+                    logger.debug(f"Upload of {path.name} failed: {e}")
+                    continue
+                latency.record(time.perf_counter() - start)
+                status_codes[response.status_code] += 1
+
+        sampler.start()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - start
+        await sampler.stop()
+    await pool.aclose()
+
+    report = UploadReport(
+        files=len(files),
+        bytes=sum(path.stat().st_size for path in files),
+        duration=duration,
+        concurrency=concurrency,
+        latency=latency,
+        status_codes=status_codes,
+        rss_before=sampler.before,
+        rss_peak=sampler.peak,
+    )
+    logger.info(f"Upload benchmark: {report.format_summary()}")
+    return report
+
+
+@dataclass
+class IncrementalWriteResult:
+    """Whether the server writes an upload to disk while receiving it.
+
+    Attributes:
+        size: Size of the uploaded file in bytes
+        status_code: Status of the upload response
+        partial_sizes: Sizes of the target file observed before the response
+            arrived, in order
+        rss_growth: Peak server RSS growth during the upload, None without a PID
+    """
+
+    size: int
+    status_code: int
+    partial_sizes: list[int]
+    rss_growth: int | None = None
+
+    @property
+    def incremental(self) -> bool:
+        """True if the file was seen partially written more than once."""
+        partial = {s for s in self.partial_sizes if 0 < s < self.size}
+        return len(partial) >= 2
+
+
+def _new_files(upload_dir: Path, known: set[Path]) -> list[Path]:
+    if not upload_dir.exists():
+        return []
+    return [p for p in upload_dir.glob("*/*") if p.is_file() and p not in known]
+
+
+async def check_incremental_write(
+    base_url: str,
+    path: Path,
+    upload_dir: Path,
+    rate: float = 8 * 1024 * 1024,
+    credentials: dict[str, str] | None = None,
+    server_pid: int | None = None,
+    poll_interval: float = 0.05,
+) -> IncrementalWriteResult:
+    """Upload one large file at a throttled rate and watch it land on disk.
+
+    Args:
+        base_url: Base URL of the server
+        path: File to upload; at ``rate`` it should take a few seconds
+        upload_dir: Directory the server writes uploads to
+            (``server_uploads_path``)
+        rate: Upload rate in bytes per second
+        credentials: Login used for the upload. Defaults to the test user
+        server_pid: Server PID, enables RSS sampling
+        poll_interval: Seconds between directory scans
+
+    Returns:
+        IncrementalWriteResult with the sizes observed during the upload
+    """
+    known = set(_new_files(upload_dir, set()))
+    partial_sizes: list[int] = []
+    sampler = _RssSampler(server_pid)
+
+    async with AmbrosiaHttpClient(base_url, timeout=120.0) as client:
+        await login_user(client, credentials)
+
+        sampler.start()
+        upload = asyncio.create_task(client.upload("/uploads", [path], rate=rate))
+        while not upload.done():
+            for new_file in _new_files(upload_dir, known):
+                try:
+                    partial_sizes.append(new_file.stat().st_size)
+                except FileNotFoundError:
+                    pass
+            await asyncio.sleep(poll_interval)
+        response = await upload
+        await sampler.stop()
+
+    result = IncrementalWriteResult(
+        size=path.stat().st_size,
+        status_code=response.status_code,
+        partial_sizes=partial_sizes,
+        rss_growth=sampler.growth,
+    )
+    growth = result.rss_growth
+    logger.info(
+        f"Incremental write check: {result.incremental} "
+        f"({len(set(partial_sizes))} distinct partial sizes, RSS growth "
+        f"{'n/a' if growth is None else f'{growth / 2**20:+.1f} MiB'})"
+    )
+    return result
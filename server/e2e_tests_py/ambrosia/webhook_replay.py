@@ -0,0 +1,269 @@
+"""Signed webhook replay and throughput harness for ``/webhook/phoenixd``.
+
+Every Lightning payment makes the server read the raw body, verify its HMAC,
+decode the payload and broadcast it. This module replays synthetic or
+recorded webhook bursts at a controlled rate, mixing in the invalid-signature,
+missing-signature and malformed-payload paths, and reports accepted requests
+per second and tail latency per path.
+
+Recorded bursts are JSON Lines files, one webhook per line::
+
+    {"offset": 0.00, "payload": {"type": "payment_received", "amountSat": 2100}}
+    {"offset": 0.35, "payload": {...}, "kind": "invalid_signature"}
+
+``offset`` (seconds since the first webhook) and ``kind`` are optional.
+
+Example:
+    events = synthetic_burst(500, invalid_ratio=0.05, malformed_ratio=0.02)
+    result = await replay_webhooks(server_url, events, secret, rate=200)
+    print(result.format_summary())
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from ambrosia.http_client import AmbrosiaHttpClient, SharedConnectionPool
+from ambrosia.load import DelayedRecorder, LoadRecorder, LoadReport, timed_request
+from ambrosia.webhook_utils import (
+    SIGNATURE_HEADER,
+    WEBHOOK_PATH,
+    build_payment_received_payload,
+    encode_payload,
+    sign_webhook_body,
+)
+
+logger = logging.getLogger(__name__)
+
+# Status the server answers for each kind of webhook
+EXPECTED_STATUS = {
+    "valid": 202,
+    "invalid_signature": 401,
+    "missing_signature": 401,
+    "malformed": 400,
+}
+WEBHOOK_KINDS = tuple(EXPECTED_STATUS)
+
+
+@dataclass
+class WebhookEvent:
+    """One webhook to replay.
+
+    Attributes:
+        kind: One of ``WEBHOOK_KINDS``, deciding how the body is signed
+        body: Raw request body
+        offset: Seconds since the start of the burst, None when unrecorded
+    """
+
+    kind: str
+    body: bytes
+    offset: float | None = None
+
+    def headers(self, secret: str) -> dict[str, str]:
+        """Build the request headers for this event's kind."""
+        headers = {"Content-Type": "application/json"}
+        if self.kind == "invalid_signature":
+            headers[SIGNATURE_HEADER] = sign_webhook_body(self.body, secret + "-wrong")
+        elif self.kind != "missing_signature":
+            headers[SIGNATURE_HEADER] = sign_webhook_body(self.body, secret)
+        return headers
+
+
+def synthetic_burst(
+    count: int,
+    invalid_ratio: float = 0.0,
+    missing_ratio: float = 0.0,
+    malformed_ratio: float = 0.0,
+    amount_range: tuple[int, int] = (100, 50_000),
+    seed: int | None = None,
+) -> list[WebhookEvent]:
+    """Generate a burst of ``payment_received`` webhooks.
+
+    Args:
+        count: Number of webhooks
+        invalid_ratio: Share signed with the wrong secret
+        missing_ratio: Share sent without a signature header
+        malformed_ratio: Share with a correctly signed but undecodable body
+        amount_range: Inclusive range of ``amountSat`` values
+        seed: Random seed for a reproducible burst
+
+    Returns:
+        Events without offsets (paced by the replay rate)
+    """
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        draw = rng.random()
+        if draw < invalid_ratio:
+            kind = "invalid_signature"
+        elif draw < invalid_ratio + missing_ratio:
+            kind = "missing_signature"
+        elif draw < invalid_ratio + missing_ratio + malformed_ratio:
+            kind = "malformed"
+        else:
+            kind = "valid"
+
+        payload = build_payment_received_payload(
+            amount_sat=rng.randint(*amount_range),
+            payment_hash=f"{rng.getrandbits(256):064x}",
+            external_id=f"replay-{i}",
+        )
+        body = encode_payload(payload)
+        if kind == "malformed":
+            body = body[: len(body) // 2]  # Truncated JSON
+        events.append(WebhookEvent(kind, body))
+    return events
+
+
+def load_recorded_events(path: Path | str) -> list[WebhookEvent]:
+    """Load a recorded burst from a JSON Lines file (see module docstring)."""
+    events = []
+    for line_number, line in enumerate(Path(path).read_text().splitlines(), 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        kind = record.get("kind", "valid")
+        if kind not in EXPECTED_STATUS:
+            raise ValueError(f"{path}:{line_number}: unknown webhook kind {kind!r}")
+        events.append(
+            WebhookEvent(kind, encode_payload(record["payload"]), record.get("offset"))
+        )
+    return events
+
+
+def save_recorded_events(path: Path | str, events: list[WebhookEvent]) -> None:
+    """Write events to a JSON Lines file readable by ``load_recorded_events``.
+
+    Malformed bodies cannot be stored as payloads and are skipped.
+    """
+    with open(path, "w") as f:
+        for event in events:
+            try:
+                payload = json.loads(event.body)
+            except ValueError:
+                continue
+            record = {"payload": payload, "kind": event.kind}
+            if event.offset is not None:
+                record["offset"] = event.offset
+            f.write(json.dumps(record) + "\n")
+
+
+@dataclass
+class WebhookReplayResult:
+    """Outcome of a webhook replay.
+
+    Attributes:
+        report: Per-kind load report, routes labelled ``webhook/<kind>``
+        sent: Number of webhooks sent
+    """
+
+    report: LoadReport
+    sent: int
+
+    @property
+    def accepted(self) -> int:
+        """Webhooks answered with 202 Accepted."""
+        return self.report.total.status_codes.get(EXPECTED_STATUS["valid"], 0)
+
+    @property
+    def accepted_per_second(self) -> float:
+        """Accepted webhooks per second over the replay."""
+        duration = self.report.duration
+        return self.accepted / duration if duration > 0 else 0.0
+
+    @property
+    def unexpected(self) -> int:
+        """Responses whose status differed from the kind's expected status."""
+        return self.report.total.errors
+
+    def format_summary(self) -> str:
+        """Render the per-kind table followed by the acceptance rate."""
+        return (
+            f"{self.report.format_table()}\n"
+            f"sent: {self.sent}, accepted: {self.accepted} "
+            f"({self.accepted_per_second:.1f}/s), unexpected: {self.unexpected}"
+        )
+
+
+async def replay_webhooks(
+    base_url: str,
+    events: list[WebhookEvent],
+    secret: str,
+    rate: float | None = None,
+    speedup: float = 1.0,
+    concurrency: int = 64,
+    pool: SharedConnectionPool | None = None,
+    timeout: float = 30.0,
+) -> WebhookReplayResult:
+    """Replay webhooks against ``POST /webhook/phoenixd``.
+
+    Pacing, in order of precedence: a fixed ``rate``; the events' recorded
+    offsets divided by ``speedup``; otherwise as fast as ``concurrency``
+    allows. When paced, latency is measured from each webhook's scheduled
+    send time, so queueing behind a slow server counts against it.
+
+    Args:
+        base_url: Base URL of the server
+        events: Webhooks to send, in order
+        secret: The server's ``--phoenixd-webhook-secret``
+        rate: Webhooks per second
+        speedup: Time compression factor for recorded offsets
+        concurrency: Maximum webhooks in flight
+        pool: Shared connection pool. Defaults to a dedicated one sized for
+            ``concurrency``
+        timeout: Request timeout in seconds
+
+    Returns:
+        WebhookReplayResult with per-kind latency and status counts
+    """
+    recorder = LoadRecorder()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def scheduled_offset(index: int, event: WebhookEvent) -> float | None:
+        if rate is not None:
+            return index / rate
+        if event.offset is not None:
+            return event.offset / speedup
+        return None
+
+    async with contextlib.AsyncExitStack() as stack:
+        if pool is None:
+            pool = await stack.enter_async_context(
+                SharedConnectionPool(
+                    max_connections=concurrency, max_keepalive_connections=concurrency
+                )
+            )
+        client = await stack.enter_async_context(
+            AmbrosiaHttpClient(base_url, timeout=timeout, pool=pool)
+        )
+        start = time.perf_counter()
+
+        async def send(index: int, event: WebhookEvent) -> None:
+            offset = scheduled_offset(index, event)
+            if offset is not None:
+                await asyncio.sleep(max(0.0, start + offset - time.perf_counter()))
+            scheduled = time.perf_counter() if offset is None else start + offset
+            async with semaphore:
+                queued = time.perf_counter() - scheduled
+                await timed_request(
+                    client,
+                    DelayedRecorder(recorder, queued),
+                    "POST",
+                    WEBHOOK_PATH,
+                    route=f"webhook/{event.kind}",
+                    expected_status=(EXPECTED_STATUS[event.kind],),
+                    content=event.body,
+                    headers=event.headers(secret),
+                )
+
+        await asyncio.gather(*(send(i, e) for i, e in enumerate(events)))
+        duration = time.perf_counter() - start
+
+    result = WebhookReplayResult(recorder.build_report(duration), len(events))
+    logger.info(f"Webhook replay:\n{result.format_summary()}")
+    return result
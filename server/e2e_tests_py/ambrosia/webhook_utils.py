@@ -0,0 +1,97 @@
+"""Phoenix webhook utilities for API testing.
+
+This module builds and signs ``PhoenixWebhookPayload`` bodies the same way
+phoenixd does, so tests can drive ``POST /webhook/phoenixd`` directly.
+"""
+
+import hashlib
+import hmac
+import json
+import time
+import uuid
+
+import httpx
+
+from ambrosia.http_client import AmbrosiaHttpClient
+
+SIGNATURE_HEADER = "X-Phoenix-Signature"
+WEBHOOK_PATH = "/webhook/phoenixd"
+
+
+def sign_webhook_body(body: bytes | str, secret: str) -> str:
+    """Compute the hex HMAC-SHA256 signature phoenixd sends for a body.
+
+    Mirrors ``calculatePhoenixSignature`` in the server's ``Webhook.kt``.
+
+    Args:
+        body: Raw request body
+        secret: The server's ``--phoenixd-webhook-secret``
+
+    Returns:
+        Lowercase hex signature
+    """
+    if isinstance(body, str):
+        body = body.encode()
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def build_payment_received_payload(
+    amount_sat: int = 1000,
+    payment_hash: str | None = None,
+    external_id: str | None = None,
+    payer_note: str | None = None,
+) -> dict:
+    """Build a ``payment_received`` webhook payload.
+
+    Args:
+        amount_sat: Amount received in satoshis
+        payment_hash: Payment hash. Defaults to a random one
+        external_id: Optional external id of the invoice
+        payer_note: Optional note from the payer
+
+    Returns:
+        Payload dict matching ``PhoenixWebhookPayload``
+    """
+    payload = {
+        "type": "payment_received",
+        "timestamp": int(time.time() * 1000),
+        "amountSat": amount_sat,
+        "paymentHash": payment_hash or uuid.uuid4().hex + uuid.uuid4().hex,
+    }
+    if external_id is not None:
+        payload["externalId"] = external_id
+    if payer_note is not None:
+        payload["payerNote"] = payer_note
+    return payload
+
+
+def encode_payload(payload: dict) -> bytes:
+    """Serialize a payload to the compact JSON body that gets signed."""
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+async def post_webhook(
+    client: AmbrosiaHttpClient,
+    payload: dict | bytes,
+    secret: str | None,
+    signature: str | None = None,
+) -> httpx.Response:
+    """Send a signed webhook to ``POST /webhook/phoenixd``.
+
+    Args:
+        client: The HTTP client to use
+        payload: Payload dict, or an already encoded raw body
+        secret: Secret used for signing. None sends no signature header
+        signature: Explicit signature overriding the computed one (e.g. to
+            exercise the invalid-signature path)
+
+    Returns:
+        The webhook response
+    """
+    body = payload if isinstance(payload, bytes) else encode_payload(payload)
+    headers = {"Content-Type": "application/json"}
+    if signature is None and secret is not None:
+        signature = sign_webhook_body(body, secret)
+    if signature is not None:
+        headers[SIGNATURE_HEADER] = signature
+    return await client.post(WEBHOOK_PATH, content=body, headers=headers)
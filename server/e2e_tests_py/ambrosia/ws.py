@@ -0,0 +1,338 @@
+"""WebSocket client and fan-out benchmark for ``/ws/payments``.
+
+The server pushes every Phoenix webhook to all connected ``/ws/payments``
+sessions, one suspending ``send`` after another. This module opens many
+authenticated sessions (optionally with deliberately slow readers), fires
+signed ``POST /webhook/phoenixd`` payloads and measures, per subscriber, the
+latency from sending the webhook to receiving the broadcast. Comparing fast
+and slow subscribers quantifies head-of-line blocking in the broadcast loop.
+
+Example:
+    report = await run_fanout_benchmark(
+        server_url, webhook_secret, subscribers=200, slow_subscribers=20
+    )
+    print(report.format_summary())
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from websockets.asyncio.client import ClientConnection, connect
+
+from ambrosia.auth_utils import AuthSessionCache
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.load import LatencyHistogram
+from ambrosia.webhook_utils import build_payment_received_payload, post_webhook
+
+logger = logging.getLogger(__name__)
+
+PAYMENTS_WS_PATH = "/ws/payments"
+
+
+def to_ws_url(base_url: str, path: str = PAYMENTS_WS_PATH) -> str:
+    """Convert an http(s) base URL to the ws(s) URL of a WebSocket path."""
+    base = base_url.rstrip("/")
+    if base.startswith("https://"):
+        base = "wss://" + base[len("https://") :]
+    elif base.startswith("http://"):
+        base = "ws://" + base[len("http://") :]
+    return f"{base}/{path.lstrip('/')}"
+
+
+class PaymentsWebSocket:
+    """Authenticated client for the ``/ws/payments`` notification stream.
+
+    A ``read_delay`` turns the client into a slow reader: after every message
+    it waits before reading the next one, and with a small ``max_queue`` the
+    unread frames back up into the TCP connection like on a sluggish tablet.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        access_token: str,
+        read_delay: float = 0.0,
+        max_queue: int = 16,
+        open_timeout: float = 10.0,
+    ):
+        """Initialize the WebSocket client.
+
+        Args:
+            base_url: Base HTTP URL of the server
+            access_token: accessToken cookie value used for the handshake
+            read_delay: Seconds to wait after each received message
+            max_queue: Frames buffered by the client before it stops reading
+            open_timeout: Handshake timeout in seconds
+        """
+        self.url = to_ws_url(base_url)
+        self.access_token = access_token
+        self.read_delay = read_delay
+        self.max_queue = max_queue
+        self.open_timeout = open_timeout
+        self._connection: ClientConnection | None = None
+
+    async def connect(self) -> None:
+        """Open the connection and wait for the server's ``connected`` message."""
+        self._connection = await connect(
+            self.url,
+            additional_headers={"Cookie": f"accessToken={self.access_token}"},
+            max_queue=self.max_queue,
+            open_timeout=self.open_timeout,
+        )
+        greeting = json.loads(await self._connection.recv())
+        if greeting.get("type") != "connected":
+            raise RuntimeError(f"Unexpected greeting from {self.url}: {greeting}")
+
+    async def receive(self) -> dict:
+        """Receive the next notification, honouring the configured read delay."""
+        assert self._connection is not None, "WebSocket should be connected"
+        message = json.loads(await self._connection.recv())
+        if self.read_delay > 0:
+            await asyncio.sleep(self.read_delay)
+        return message
+
+    async def close(self) -> None:
+        """Close the connection."""
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+@dataclass
+class SubscriberStats:
+    """Delivery results for one subscriber.
+
+    Attributes:
+        index: Subscriber number
+        slow: Whether the subscriber was a deliberately slow reader
+        latency: Webhook-to-delivery latency histogram
+        received: Number of benchmark notifications received
+    """
+
+    index: int
+    slow: bool
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    received: int = 0
+
+
+@dataclass
+class FanoutReport:
+    """Result of a fan-out benchmark run.
+
+    Attributes:
+        subscribers: Per-subscriber delivery statistics
+        webhooks_sent: Number of webhooks accepted by the server
+        webhook_latency: Latency of the ``POST /webhook/phoenixd`` calls
+        webhook_errors: Webhooks not answered with 202 Accepted
+    """
+
+    subscribers: list[SubscriberStats]
+    webhooks_sent: int
+    webhook_latency: LatencyHistogram
+    webhook_errors: int = 0
+
+    def _group(self, slow: bool) -> LatencyHistogram:
+        combined = LatencyHistogram()
+        for stats in self.subscribers:
+            if stats.slow == slow:
+                combined.merge(stats.latency)
+        return combined
+
+    @property
+    def fast_latency(self) -> LatencyHistogram:
+        """Delivery latency across all normal subscribers."""
+        return self._group(slow=False)
+
+    @property
+    def slow_latency(self) -> LatencyHistogram:
+        """Delivery latency across all slow subscribers."""
+        return self._group(slow=True)
+
+    @property
+    def missing_deliveries(self) -> int:
+        """Notifications that never reached a subscriber."""
+        expected = self.webhooks_sent * len(self.subscribers)
+        return expected - sum(s.received for s in self.subscribers)
+
+    def format_summary(self) -> str:
+        """Render the report as text (latencies in ms)."""
+
+        def row(name: str, histogram: LatencyHistogram) -> str:
+            return (
+                f"{name:<22} {histogram.count:>8} "
+                f"{histogram.percentile(50) * 1000:>9.1f} "
+                f"{histogram.percentile(95) * 1000:>9.1f} "
+                f"{histogram.percentile(99) * 1000:>9.1f} "
+                f"{histogram.max * 1000:>9.1f}"
+            )
+
+        header = f"{'':<22} {'samples':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+        return "\n".join(
+            [
+                header,
+                "-" * len(header),
+                row("webhook POST", self.webhook_latency),
+                row("delivery (fast)", self.fast_latency),
+                row("delivery (slow)", self.slow_latency),
+                f"webhooks sent: {self.webhooks_sent}, "
+                f"webhook errors: {self.webhook_errors}, "
+                f"missing deliveries: {self.missing_deliveries}",
+            ]
+        )
+
+
+TokenProvider = Callable[[], Awaitable[str]]
+
+
+async def open_subscribers(
+    base_url: str,
+    token_provider: TokenProvider,
+    count: int,
+    slow_count: int = 0,
+    slow_read_delay: float = 0.2,
+    connect_concurrency: int = 50,
+) -> list[PaymentsWebSocket]:
+    """Open ``count`` authenticated sessions, the first ``slow_count`` slow.
+
+    Args:
+        base_url: Base HTTP URL of the server
+        token_provider: Coroutine returning a currently valid access token
+        count: Total number of sessions
+        slow_count: Number of slow-reader sessions among them
+        slow_read_delay: Read delay of slow sessions in seconds
+        connect_concurrency: Maximum simultaneous handshakes
+
+    Returns:
+        Connected clients
+    """
+    semaphore = asyncio.Semaphore(connect_concurrency)
+
+    async def open_one(index: int) -> PaymentsWebSocket:
+        async with semaphore:
+            socket = PaymentsWebSocket(
+                base_url,
+                await token_provider(),
+                read_delay=slow_read_delay if index < slow_count else 0.0,
+                max_queue=1 if index < slow_count else 16,
+            )
+            await socket.connect()
+            return socket
+
+    return list(await asyncio.gather(*(open_one(i) for i in range(count))))
+
+
+async def run_fanout_benchmark(
+    base_url: str,
+    webhook_secret: str,
+    subscribers: int = 200,
+    slow_subscribers: int = 20,
+    slow_read_delay: float = 0.2,
+    webhooks: int = 50,
+    webhook_rate: float = 10.0,
+    settle_time: float = 10.0,
+    credentials: dict | None = None,
+    auth: AuthSessionCache | None = None,
+) -> FanoutReport:
+    """Measure webhook-to-delivery latency across many ``/ws/payments`` sessions.
+
+    Args:
+        base_url: Base HTTP URL of the server
+        webhook_secret: The server's ``--phoenixd-webhook-secret``
+        subscribers: Number of WebSocket sessions to open
+        slow_subscribers: How many of them read slowly
+        slow_read_delay: Seconds a slow subscriber waits after each message
+        webhooks: Number of payment webhooks to fire
+        webhook_rate: Webhooks per second
+        settle_time: Maximum seconds to wait for outstanding deliveries
+        credentials: Login credentials. Defaults to the test user
+        auth: Session cache to authenticate with, e.g. the ``auth_sessions``
+            fixture. Defaults to a new one
+
+    Returns:
+        FanoutReport with per-subscriber delivery latency
+    """
+    run_id = uuid.uuid4().hex[:8]
+    sent_at: dict[str, float] = {}
+    stats = [
+        SubscriberStats(index=i, slow=i < slow_subscribers) for i in range(subscribers)
+    ]
+    auth = auth or AuthSessionCache()
+
+    async with AmbrosiaHttpClient(base_url) as client:
+
+        async def token_provider() -> str:
+            return (await auth.authenticate(client, credentials)).access_token
+
+        sockets = await open_subscribers(
+            base_url,
+            token_provider,
+            subscribers,
+            slow_count=slow_subscribers,
+            slow_read_delay=slow_read_delay,
+        )
+        logger.info(
+            f"Opened {len(sockets)} /ws/payments sessions "
+            f"({slow_subscribers} slow readers)"
+        )
+
+        async def consume(socket: PaymentsWebSocket, subscriber: SubscriberStats):
+            while subscriber.received < webhooks:
+                message = await socket.receive()
+                started = sent_at.get(message.get("paymentHash", ""))
+                if started is None:
+                    continue  # Notification from another run or source
+                subscriber.latency.record(time.perf_counter() - started)
+                subscriber.received += 1
+
+        consumers = [
+            asyncio.create_task(consume(socket, subscriber))
+            for socket, subscriber in zip(sockets, stats, strict=True)
+        ]
+
+        webhook_latency = LatencyHistogram()
+        webhook_errors = 0
+        sent = 0
+        interval = 1.0 / webhook_rate
+        try:
+            for i in range(webhooks):
+                payment_hash = f"fanout-{run_id}-{i}"
+                payload = build_payment_received_payload(
+                    amount_sat=1000 + i, payment_hash=payment_hash
+                )
+                start = time.perf_counter()
+                sent_at[payment_hash] = start
+                response = await post_webhook(client, payload, webhook_secret)
+                webhook_latency.record(time.perf_counter() - start)
+                if response.status_code == 202:
+                    sent += 1
+                else:
+                    webhook_errors += 1
+                    sent_at.pop(payment_hash, None)
+                await asyncio.sleep(max(0.0, interval - (time.perf_counter() - start)))
+
+            _, pending = await asyncio.wait(consumers, timeout=settle_time)
+            if pending:
+                logger.warning(f"{len(pending)} subscribers still waiting after settle")
+        finally:
+            for task in consumers:
+                task.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+            await asyncio.gather(
+                *(socket.close() for socket in sockets), return_exceptions=True
+            )
+
+    report = FanoutReport(stats, sent, webhook_latency, webhook_errors)
+    logger.info(f"Fan-out benchmark:\n{report.format_summary()}")
+    return report
@@ -12,16 +12,26 @@ from pathlib import Path
 
 import pytest
 
-from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.auth_utils import AuthSessionCache
+from ambrosia.fake_phoenixd import fake_phoenixd  # noqa: F401
+from ambrosia.http_client import AmbrosiaHttpClient, SharedConnectionPool
+from ambrosia.seeding import ensure_initial_setup, seeded_server_factory  # noqa: F401
 
 # Import fixtures from test_server to make them available to tests
 # These are pytest fixtures that will be used by tests and other fixtures
 from ambrosia.test_server import (  # noqa: F401
+    LAUNCH_MODES,
+    AmbrosiaTestServer,
     manage_server_lifecycle,
     server_url,
+    startup_timings_key,
     test_server,
 )
 
+# Per-route latency report and baseline gating (--latency-history, ...) and
+# server resource timeline (--resource-profile)
+pytest_plugins = ["ambrosia.latency_baseline", "ambrosia.resource_monitor"]
+
 # Add the project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
@@ -43,6 +53,14 @@ def pytest_addoption(parser):
         default=False,
         help="Include slow tests in the test run (default: skip slow tests)",
     )
+    parser.addoption(
+        "--launch-mode",
+        action="store",
+        default=None,
+        choices=LAUNCH_MODES,
+        help="How to launch the server: 'gradle' (./gradlew run) or 'jar' "
+        "(cached prebuilt jar). Defaults to $AMBROSIA_LAUNCH_MODE or 'gradle'",
+    )
 
 
 def pytest_collection_modifyitems(config, items):
@@ -59,11 +77,83 @@ def pytest_collection_modifyitems(config, items):
                 item.add_marker(skip_slow)
 
 
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Report how long each server startup phase took."""
+    timings = config.stash.get(startup_timings_key, None)
+    if timings is not None:
+        terminalreporter.write_sep("-", "server startup")
+        terminalreporter.write_line(timings.summary())
+
+
 # Set up test environment variables
 os.environ.setdefault("TESTING", "true")
 os.environ.setdefault("LOG_LEVEL", "INFO")
 
 
+@pytest.fixture(scope="session")
+async def connection_pool():
+    """Session-scoped connection pool shared by the tests' HTTP clients.
+
+    Clients created with ``pool=connection_pool`` keep their own cookie jar but
+    reuse keep-alive connections instead of opening new ones per test.
+    """
+    async with SharedConnectionPool() as pool:
+        yield pool
+
+
+@pytest.fixture(scope="session")
+def auth_sessions() -> AuthSessionCache:
+    """Session-scoped cache of authenticated cookie sessions keyed by credentials.
+
+    Sessions are not keyed by server, so only use it against the shared test
+    server (``server_url``); helpers that authenticate accept it as ``auth=``.
+    """
+    return AuthSessionCache()
+
+
+@pytest.fixture(scope="session")
+def isolated_server_factory():
+    """Session-scoped factory of isolated servers started with extra arguments.
+
+    For server options that must stay off on the shared test server. Servers
+    are reused per argument list within the session and already have the test
+    business set up.
+    """
+    servers: dict[tuple[str, ...], AmbrosiaTestServer] = {}
+
+    def factory(*server_args: str) -> AmbrosiaTestServer:
+        if server_args not in servers:
+            server = AmbrosiaTestServer(
+                launch_mode="jar", isolated=True, server_args=list(server_args)
+            )
+            try:
+                server.start_server()
+                asyncio.run(ensure_initial_setup(server.server_url))
+            except Exception:
+                server.stop_server()
+                server.cleanup_home_dir()
+                raise
+            servers[server_args] = server
+        return servers[server_args]
+
+    yield factory
+    for server in servers.values():
+        server.stop_server()
+        server.cleanup_home_dir()
+
+
+@pytest.fixture(scope="session")
+def timing_server_url(isolated_server_factory) -> str:
+    """URL of a server running with ``--server-timing``."""
+    return isolated_server_factory("--server-timing").server_url
+
+
+@pytest.fixture(scope="session")
+def print_server_url(isolated_server_factory) -> str:
+    """URL of a server running with ``--virtual-printers``."""
+    return isolated_server_factory("--virtual-printers").server_url
+
+
 @pytest.fixture(scope="session", autouse=True)
 def initialize_database(manage_server_lifecycle, server_url: str):  # noqa: F811
     """Ensure the database is initialized with the default user before any tests run.
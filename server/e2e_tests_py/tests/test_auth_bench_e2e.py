@@ -0,0 +1,38 @@
+"""End-to-end tests for the login storm and refresh wave benchmark."""
+
+import logging
+
+import pytest
+
+from ambrosia.auth_bench import run_auth_benchmark
+from ambrosia.test_server import AmbrosiaTestServer
+
+logger = logging.getLogger(__name__)
+
+
+class TestAuthBenchmark:
+    """Tests for ambrosia.auth_bench against the running server."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_login_storm_and_refresh_waves(
+        self, server_url: str, test_server: AmbrosiaTestServer
+    ):
+        """Test that every terminal logs in and refreshes in each wave."""
+        assert test_server.server_process is not None
+        report = await run_auth_benchmark(
+            server_url,
+            clients=5,
+            waves=2,
+            wave_interval=0.2,
+            server_pid=test_server.server_process.pid,
+            seed=1,
+        )
+        logger.info(f"Auth benchmark:\n{report.format_summary()}")
+
+        assert report.login_storm.succeeded == 5
+        assert report.login_storm.per_second > 0
+        assert [wave.succeeded for wave in report.refresh_waves] == [5, 5]
+        assert report.refresh_p99 > 0
+        assert report.login_storm.cpu_seconds is not None
+        assert report.local_pin_hash_seconds > 0
@@ -16,6 +16,7 @@ import pytest
 
 from ambrosia.api_utils import assert_status_code
 from ambrosia.auth_utils import (
+    AuthSessionCache,
     assert_cookies_absent,
     assert_cookies_present,
     assert_success_message,
@@ -32,9 +33,11 @@ class TestAuthentication:
     """Tests for authentication endpoints and token management."""
 
     @pytest.mark.asyncio
-    async def test_successful_login_sets_both_tokens(self, server_url: str):
+    async def test_successful_login_sets_both_tokens(
+        self, server_url: str, connection_pool
+    ):
         """Test that successful login sets both accessToken and refreshToken cookies."""
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             response = await login_user(client)
 
             # Check response message
@@ -46,9 +49,11 @@ class TestAuthentication:
             logger.info("✓ Login successful, both tokens set")
 
     @pytest.mark.asyncio
-    async def test_failed_login_does_not_set_tokens(self, server_url: str):
+    async def test_failed_login_does_not_set_tokens(
+        self, server_url: str, connection_pool
+    ):
         """Test that failed login does not set authentication cookies."""
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             response = await login_user(
                 client,
                 credentials={"name": "cooluser1", "pin": "wrongpin"},
@@ -64,9 +69,9 @@ class TestAuthentication:
             assert_cookies_absent(response, "accessToken", "refreshToken")
 
     @pytest.mark.asyncio
-    async def test_refresh_without_token_fails(self, server_url: str):
+    async def test_refresh_without_token_fails(self, server_url: str, connection_pool):
         """Test that refresh endpoint fails without refreshToken cookie."""
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             # Try to refresh without any cookies
             response = await client.post("/auth/refresh")
 
@@ -75,9 +80,11 @@ class TestAuthentication:
             )
 
     @pytest.mark.asyncio
-    async def test_refresh_with_invalid_token_fails(self, server_url: str):
+    async def test_refresh_with_invalid_token_fails(
+        self, server_url: str, connection_pool
+    ):
         """Test that refresh endpoint fails with invalid refreshToken."""
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             # First, login to get a valid refresh token
             login_response = await login_user(client)
 
@@ -94,7 +101,9 @@ class TestAuthentication:
             )
 
     @pytest.mark.asyncio
-    async def test_access_token_expiration_and_refresh(self, server_url: str):
+    async def test_access_token_expiration_and_refresh(
+        self, server_url: str, connection_pool
+    ):
         """Test that access token expires and refresh token still works.
 
         This test verifies:
@@ -103,7 +112,7 @@ class TestAuthentication:
         3. Refresh token still works after access token expires
         4. New access token is generated and works
         """
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             # Login to get tokens
             login_response = await login_user(client)
 
@@ -154,7 +163,7 @@ class TestAuthentication:
             logger.info("✓ Access token expiration and refresh verified")
 
     @pytest.mark.asyncio
-    async def test_logout_revokes_tokens(self, server_url: str):
+    async def test_logout_revokes_tokens(self, server_url: str, connection_pool):
         """Test that logout revokes refresh tokens and prevents further refresh.
 
         This test verifies that:
@@ -163,7 +172,7 @@ class TestAuthentication:
         3. After logout, even if we manually restore the cookie, the token won't work
         4. Logout response properly deletes cookies
         """
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             # Login first and verify that the tokens are set and valid
             login_response = await login_user(client)
 
@@ -239,7 +248,9 @@ class TestAuthentication:
             )
 
     @pytest.mark.asyncio
-    async def test_multiple_refreshes_generate_unique_tokens(self, server_url: str):
+    async def test_multiple_refreshes_generate_unique_tokens(
+        self, server_url: str, connection_pool
+    ):
         """Test that multiple token refreshes work and generate unique tokens.
 
         This test verifies:
@@ -248,7 +259,7 @@ class TestAuthentication:
         3. The same refresh token can be reused multiple times
         4. Response body contains correct fields
         """
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             # Login
             login_response = await login_user(client)
 
@@ -300,9 +311,73 @@ class TestAuthentication:
             )
 
     @pytest.mark.asyncio
-    async def test_login_with_missing_fields_fails(self, server_url: str):
+    async def test_cached_session_reuses_login_and_refreshes(
+        self, server_url: str, connection_pool
+    ):
+        """Test that AuthSessionCache logs in once and refreshes expired tokens.
+
+        This test verifies:
+        1. Several clients authenticated through the cache share a single login
+        2. Each client can access protected endpoints with the cached cookies
+        3. Once the access token expires the cache refreshes it instead of
+           logging in again
+        """
+        cache = AuthSessionCache()
+
+        for _ in range(3):
+            async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
+                await cache.authenticate(client)
+                response = await client.get("/users/me")
+                assert_status_code(response, 200, "Cached session should be valid")
+
+        assert cache.logins == 1, f"Expected a single login, got {cache.logins}"
+
+        # Wait for the access token to expire (5 seconds in tests)
+        await asyncio.sleep(6)
+
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
+            await cache.authenticate(client)
+            response = await client.get("/users/me")
+            assert_status_code(response, 200, "Refreshed session should be valid")
+
+        assert cache.logins == 1, "Expired access token should not trigger a login"
+        assert cache.refreshes == 1, f"Expected one refresh, got {cache.refreshes}"
+        logger.info("✓ Cached session reused and refreshed without re-login")
+
+    @pytest.mark.asyncio
+    async def test_attached_session_renews_itself(
+        self, server_url: str, connection_pool
+    ):
+        """Test that a client attached to AuthSessionCache outlives its token.
+
+        This test verifies:
+        1. Requests of an attached client are authenticated
+        2. Once the access token expires the next request refreshes it on its
+           own, without the caller authenticating again
+        """
+        cache = AuthSessionCache()
+
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
+            await cache.attach(client)
+            response = await client.get("/users/me")
+            assert_status_code(response, 200, "Attached session should be valid")
+
+            # Wait for the access token to expire (5 seconds in tests)
+            await asyncio.sleep(6)
+
+            response = await client.get("/users/me")
+            assert_status_code(response, 200, "Attached session should be renewed")
+
+        assert cache.logins == 1, "Expired access token should not trigger a login"
+        assert cache.refreshes == 1, f"Expected one refresh, got {cache.refreshes}"
+        logger.info("✓ Attached session renewed without re-authenticating")
+
+    @pytest.mark.asyncio
+    async def test_login_with_missing_fields_fails(
+        self, server_url: str, connection_pool
+    ):
         """Test that login fails with missing required fields and does not set cookies."""
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             # TODO: Server returns 500 for validation errors instead of proper error codes
             # Should return 400 Bad Request or 422 Unprocessable Entity
 
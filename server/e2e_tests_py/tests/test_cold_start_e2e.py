@@ -0,0 +1,73 @@
+"""End-to-end tests for the cold-start benchmark.
+
+The benchmark launches its own isolated jar server. Set
+``AMBROSIA_COLD_START_RUNS``, ``AMBROSIA_COLD_START_APPCDS=1`` (compare with an
+AppCDS archive) and ``AMBROSIA_COLD_START_HISTORY`` (track medians per commit),
+or use ``make bench-cold-start``.
+"""
+
+import logging
+import os
+from pathlib import Path
+
+import pytest
+
+from ambrosia.cold_start import (
+    PHASES,
+    ColdStartReport,
+    ColdStartRun,
+    record_cold_start,
+    run_cold_start_benchmark,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _report(first_authenticated: float) -> ColdStartReport:
+    phases = dict.fromkeys(PHASES, 1.0)
+    phases["first_authenticated"] = first_authenticated
+    return ColdStartReport([ColdStartRun("default", 0, phases)], {"default": []})
+
+
+class TestColdStartHistory:
+    """Tests for the cold-start history file."""
+
+    def test_regression_against_previous_commit(self, tmp_path: Path):
+        """Test that a slower milestone at a new commit is reported."""
+        history = tmp_path / "cold_start.json"
+
+        assert record_cold_start(history, _report(2.0), commit="a") == []
+        assert record_cold_start(history, _report(2.1), commit="b") == []
+        (regression,) = record_cold_start(history, _report(3.0), commit="c")
+
+        assert regression.phase == "first_authenticated"
+        assert regression.previous_commit == "b"
+        assert regression.ratio == pytest.approx(3.0 / 2.1)
+
+
+class TestColdStartBenchmark:
+    """Tests for ambrosia.cold_start against the packaged server."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.slow
+    def test_milestones_are_ordered(self):
+        """Test that every launch reaches each milestone in order."""
+        runs = int(os.environ.get("AMBROSIA_COLD_START_RUNS", "2"))
+        appcds = os.environ.get("AMBROSIA_COLD_START_APPCDS") == "1"
+        history = os.environ.get("AMBROSIA_COLD_START_HISTORY")
+
+        report = run_cold_start_benchmark(runs=runs, warmup=0, appcds=appcds)
+        logger.info(f"Cold start:\n{report.format_table()}")
+        if history:
+            record_cold_start(Path(history), report)
+
+        assert len(report.runs) == runs * len(report.variants)
+        for run in report.runs:
+            phases = run.phases
+            assert phases["port_bound"] <= phases["first_ok"]
+            assert phases["first_ok"] < phases["first_authenticated"]
+        assert set(report.medians("default")) >= {
+            "port_bound",
+            "first_ok",
+            "first_authenticated",
+        }
@@ -0,0 +1,47 @@
+"""End-to-end tests for the SQLite concurrency stress suite.
+
+A single virtual user must leave the database fully consistent; higher
+levels are reported (throughput, busy errors, lost updates) rather than
+asserted, since they measure the shared-connection design itself.
+"""
+
+import logging
+
+import pytest
+
+from ambrosia.auth_utils import AuthSessionCache
+from ambrosia.db_stress import run_stress
+from ambrosia.test_server import AmbrosiaTestServer
+
+logger = logging.getLogger(__name__)
+
+
+class TestDbStress:
+    """Tests for ambrosia.db_stress against the running server."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_levels_report_throughput_and_integrity(
+        self,
+        server_url: str,
+        test_server: AmbrosiaTestServer,
+        auth_sessions: AuthSessionCache,
+    ):
+        """Test that each level is measured and a serial level is consistent."""
+        report = await run_stress(
+            server_url,
+            concurrency_levels=(1, 8),
+            duration=3.0,
+            hot_orders=2,
+            seed=3,
+            server=test_server,
+            auth=auth_sessions,
+        )
+        logger.info(f"SQLite stress:\n{report.format_table()}")
+
+        assert [level.concurrency for level in report.levels] == [1, 8]
+        assert all(level.throughput > 0 for level in report.levels)
+        serial = report.levels[0]
+        assert serial.errors.total == 0, serial.errors
+        assert serial.integrity.ok, serial.integrity.examples
+        assert serial.integrity.orders_checked >= 2
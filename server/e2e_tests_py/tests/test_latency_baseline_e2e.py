@@ -0,0 +1,77 @@
+"""Tests for the latency baseline plugin's statistics and history storage.
+
+These tests check the Mann-Whitney comparison used for regression gating and
+that both history formats round-trip runs keyed by git commit.
+"""
+
+import random
+from pathlib import Path
+
+import httpx
+import pytest
+
+from ambrosia.latency_baseline import (
+    LatencyBaselinePlugin,
+    compare_to_baseline,
+    mann_whitney_u,
+    open_history,
+    route_template,
+    server_origin,
+)
+
+
+class TestLatencyBaseline:
+    """Tests for ambrosia.latency_baseline."""
+
+    def test_route_template_collapses_ids_and_dates(self):
+        """Test that concrete paths map onto route templates."""
+        assert route_template("get", "/orders/42/dishes") == "GET /orders/{id}/dishes"
+        assert (
+            route_template("GET", "/orders/total-sales/2025-01-31")
+            == "GET /orders/total-sales/{date}"
+        )
+        assert route_template("GET", "/base-currency") == "GET /base-currency"
+
+    def test_mann_whitney_flags_only_real_slowdowns(self):
+        """Test that a shifted distribution is flagged and an equal one is not."""
+        rng = random.Random(1)
+        baseline = [rng.gauss(0.010, 0.002) for _ in range(200)]
+        slower = [rng.gauss(0.013, 0.002) for _ in range(50)]
+        same = [rng.gauss(0.010, 0.002) for _ in range(50)]
+
+        p_slower, delta_slower = mann_whitney_u(slower, baseline)
+        p_same, _ = mann_whitney_u(same, baseline)
+
+        assert p_slower < 0.001 and delta_slower > 0.5
+        assert p_same > 0.01
+
+        comparisons = compare_to_baseline(
+            {"GET /a": slower, "GET /b": same}, {"GET /a": baseline, "GET /b": baseline}
+        )
+        assert [c.regressed for c in comparisons] == [True, False]
+
+    @pytest.mark.parametrize("name", ["history.sqlite", "history.json"])
+    def test_history_baseline_excludes_current_commit(self, tmp_path: Path, name):
+        """Test that the rolling baseline uses the last runs of other commits."""
+        history = open_history(tmp_path / name)
+        history.append_run("aaa", {"GET /x": [0.01, 0.02]})
+        history.append_run("bbb", {"GET /x": [0.03]})
+        history.append_run("ccc", {"GET /x": [0.04], "GET /y": [0.05]})
+
+        assert sorted(history.baseline(5, "ccc")["GET /x"]) == [0.01, 0.02, 0.03]
+        assert history.baseline(1, "zzz") == {"GET /x": [0.04], "GET /y": [0.05]}
+
+    def test_samples_are_kept_per_server(self, pytestconfig: pytest.Config):
+        """Test that responses of other servers stay out of each other's samples."""
+        plugin = LatencyBaselinePlugin(pytestconfig)
+        shared = httpx.URL("http://127.0.0.1:9154/orders/42")
+        isolated = httpx.URL("http://127.0.0.1:41234/orders/42")
+        plugin.observe("GET", shared, 200, 0.01)
+        plugin.observe("GET", isolated, 200, 0.5)
+        plugin.observe("GET", isolated, 200, 0.6)
+
+        assert server_origin("http://127.0.0.1:9154") == server_origin(shared)
+        assert plugin.servers[server_origin(shared)].samples == {
+            "GET /orders/{id}": [0.01]
+        }
+        assert plugin.servers[server_origin(isolated)].seen == {"GET /orders/{id}": 2}
@@ -0,0 +1,70 @@
+"""End-to-end tests for the async load generation engine.
+
+These tests run short load bursts against a server started with
+``--server-timing`` to validate that the engine records per-route latency and
+throughput correctly, and breaks it down by server-side phase.
+"""
+
+import logging
+
+import pytest
+
+from ambrosia.load import LatencyHistogram, LoadGenerator, timed_request
+
+logger = logging.getLogger(__name__)
+
+
+async def browse(client, recorder):
+    """Virtual user iteration hitting two public endpoints."""
+    await timed_request(client, recorder, "GET", "/")
+    await timed_request(client, recorder, "GET", "/base-currency")
+
+
+class TestLoadEngine:
+    """Tests for ambrosia.load against the running server."""
+
+    def test_histogram_percentiles_are_accurate(self):
+        """Test that histogram percentiles stay within the configured precision."""
+        histogram = LatencyHistogram(significant_digits=2)
+        for i in range(1, 1001):
+            histogram.record(i / 1000)  # 1ms .. 1000ms
+
+        assert histogram.count == 1000
+        assert histogram.percentile(50) == pytest.approx(0.5, rel=0.01)
+        assert histogram.percentile(99) == pytest.approx(0.99, rel=0.01)
+        assert histogram.max == pytest.approx(1.0)
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_closed_loop_load_reports_per_route_stats(
+        self, timing_server_url: str
+    ):
+        """Test that a closed-loop run reports latency and throughput per route."""
+        generator = LoadGenerator(
+            timing_server_url, browse, virtual_users=5, duration=2.0
+        )
+        report = await generator.run()
+        logger.info(f"Closed-loop report:\n{report.format_table()}")
+        logger.info(f"Closed-loop phases:\n{report.format_phases()}")
+
+        assert set(report.routes) == {"GET /", "GET /base-currency"}
+        assert report.total.errors == 0, report.total.status_codes
+        for stats in report.routes.values():
+            assert stats.count > 0
+            assert stats.throughput > 0
+            assert stats.p50 <= stats.p95 <= stats.p99 <= stats.max
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_open_loop_load_sustains_arrival_rate(self, timing_server_url: str):
+        """Test that an open-loop run issues iterations at the requested rate."""
+        generator = LoadGenerator(
+            timing_server_url, browse, virtual_users=5, duration=2.0, arrival_rate=20
+        )
+        report = await generator.run()
+        logger.info(f"Open-loop report:\n{report.format_table()}")
+
+        root = report.routes["GET /"]
+        # 20 iterations/s for 2 seconds, allowing for scheduling jitter
+        assert 30 <= root.count <= 45, f"Unexpected iteration count: {root.count}"
+        assert report.total.errors == 0, report.total.status_codes
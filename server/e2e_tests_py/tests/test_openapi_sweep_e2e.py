@@ -0,0 +1,118 @@
+"""End-to-end tests for the OpenAPI-driven latency sweep."""
+
+import logging
+
+import pytest
+import yaml
+
+from ambrosia.auth_utils import AuthSessionCache
+from ambrosia.openapi_sweep import (
+    DEFAULT_SPEC_PATH,
+    METHODS,
+    creation_order,
+    load_operations,
+    run_sweep,
+    synthesize_value,
+)
+from ambrosia.seeding import PROFILES
+
+logger = logging.getLogger(__name__)
+
+
+class TestSpecParsing:
+    """Tests for reading operations and synthesizing requests from the spec."""
+
+    def test_every_documented_operation_is_loaded(self):
+        """Test that each non-auth GET/POST/PUT/DELETE operation is swept."""
+        spec = yaml.safe_load(DEFAULT_SPEC_PATH.read_text(encoding="utf-8"))
+        documented = {
+            f"{method.upper()} {path}"
+            for path, item in spec["paths"].items()
+            for method in METHODS
+            if method in item and not path.startswith("/auth/")
+        }
+
+        operations = load_operations()
+
+        assert {op.label for op in operations} == documented
+        assert all(op.success_statuses for op in operations)
+
+    def test_bodies_have_required_fields_and_known_ids(self):
+        """Test that synthesized bodies fill required fields and use known ids."""
+        operations = {op.label: op for op in load_operations()}
+        ids = {"/spaces": ["space-1"], "/tables": ["table-1"], "/users": ["user-1"]}
+
+        table = synthesize_value(
+            operations["POST /tables"].body_schema, collection="/tables", ids=ids
+        )
+        order = synthesize_value(
+            operations["POST /orders"].body_schema, collection="/orders", ids=ids
+        )
+
+        assert set(table) == {"name", "status", "space_id"}
+        assert table["space_id"] == "space-1"
+        assert table["status"] in ("available", "occupied", "reserved")
+        assert order["table_id"] == "table-1"
+        assert order["user_id"] == "user-1"
+
+    def test_unique_fields_differ_between_bodies(self):
+        """Test that names get a random suffix so repeated creates don't clash."""
+        schema = next(
+            op.body_schema for op in load_operations() if op.label == "POST /roles"
+        )
+
+        first, second = synthesize_value(schema), synthesize_value(schema)
+
+        assert first["role"] != second["role"]
+
+    def test_referenced_collections_are_created_first(self):
+        """Test that creates run in dependency order."""
+        order = [op.collection for op in creation_order(load_operations())]
+
+        assert order.index("/spaces") < order.index("/tables") < order.index("/orders")
+        assert order.index("/dish-categories") < order.index("/dishes")
+        assert order.index("/roles") < order.index("/users")
+
+
+class TestSweep:
+    """Tests for sweeping a running server."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_sweep_measures_every_list_read(
+        self, server_url: str, auth_sessions: AuthSessionCache
+    ):
+        """Test a quick sweep against the shared test server."""
+        report = await run_sweep(server_url, repeat=1, auth=auth_sessions)
+        logger.info(f"OpenAPI sweep:\n{report.format_table()}")
+
+        assert len(report.results) == len(load_operations())
+        for result in report.results:
+            if (
+                result.operation.method == "GET"
+                and not result.operation.path_parameters
+            ):
+                assert result.stats is not None, result.operation.label
+            if result.stats is not None:
+                assert sum(result.stats.status_codes.values()) == result.stats.count
+            else:
+                assert result.skipped
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_sweep_on_seeded_server(self, seeded_server_factory):
+        """Test a full sweep on a seeded server, with sizes from real data."""
+        server = seeded_server_factory(PROFILES["smoke"])
+
+        report = await run_sweep(server.server_url, repeat=5)
+        logger.info(f"OpenAPI sweep (smoke):\n{report.format_table()}")
+        if report.undocumented:
+            logger.warning(
+                "Undocumented statuses: "
+                + ", ".join(r.operation.label for r in report.undocumented)
+            )
+
+        orders = next(r for r in report.results if r.operation.label == "GET /orders")
+        assert orders.stats is not None and orders.stats.count == 5
+        assert orders.median_size > 0
@@ -0,0 +1,151 @@
+"""End-to-end tests for incremental order totals and their benchmark."""
+
+import logging
+
+import pytest
+
+from ambrosia.order_total_bench import FLOWS, run_order_total_benchmark
+from ambrosia.resources import AmbrosiaApi
+
+logger = logging.getLogger(__name__)
+
+
+class TestOrderDishTotals:
+    """Tests for the total returned by the ``/orders/{id}/dishes`` mutations."""
+
+    @pytest.mark.asyncio
+    async def test_mutations_return_the_new_total(self, server_url: str):
+        """Test that add, update and remove keep the stored total in step."""
+        async with AmbrosiaApi.connect(server_url) as api:
+            categories = api.categories("dish")
+            category_id = await categories.create({"name": "Order total test"})
+            dish_id = await api.dishes.create(
+                {"name": "Total test dish", "price": 10.0, "category_id": category_id}
+            )
+            order_id = await api.orders.create(
+                {
+                    "user_id": api.user.get("user_id", ""),
+                    "waiter": "tester",
+                    "status": "open",
+                    "total": 0.0,
+                    "created_at": "",
+                }
+            )
+            base = f"/orders/{order_id}/dishes"
+            try:
+                added = await api.pipeline.send(
+                    "POST",
+                    base,
+                    (201,),
+                    json=[
+                        {"dish_id": dish_id, "price_at_order": 10.0},
+                        {"dish_id": dish_id, "price_at_order": 2.5},
+                    ],
+                )
+                first, second = added.json()["dishIds"]
+                updated = await api.pipeline.send(
+                    "PUT",
+                    f"{base}/{first}",
+                    (200,),
+                    json={
+                        "order_id": order_id,
+                        "dish_id": dish_id,
+                        "price_at_order": 12.0,
+                        "status": "pending",
+                        "should_prepare": True,
+                    },
+                )
+                removed = await api.pipeline.send("DELETE", f"{base}/{second}", (200,))
+                order = await api.orders.get(order_id)
+                cleared = await api.pipeline.send("DELETE", base, (200,))
+            finally:
+                await api.orders.delete(order_id)
+                await api.dishes.delete(dish_id)
+                await categories.delete(category_id)
+
+        assert added.json()["total"] == pytest.approx(12.5)
+        assert updated.json()["total"] == pytest.approx(14.5)
+        assert removed.json()["total"] == pytest.approx(12.0)
+        assert order["total"] == pytest.approx(12.0)
+        assert cleared.json()["total"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_client_total_is_replaced_by_the_dishes(self, server_url: str):
+        """Test that a total set with PUT /orders/{id} does not drift into later ones."""
+        async with AmbrosiaApi.connect(server_url) as api:
+            categories = api.categories("dish")
+            category_id = await categories.create({"name": "Order total drift test"})
+            dish_id = await api.dishes.create(
+                {"name": "Drift test dish", "price": 7.5, "category_id": category_id}
+            )
+            order = {
+                "user_id": api.user.get("user_id", ""),
+                "waiter": "tester",
+                "status": "open",
+                "total": 0.0,
+                "created_at": "",
+            }
+            order_id = await api.orders.create(order)
+            base = f"/orders/{order_id}/dishes"
+            try:
+                await api.orders.update(order_id, {**order, "total": 99.0})
+                added = await api.pipeline.send(
+                    "POST",
+                    base,
+                    (201,),
+                    json=[{"dish_id": dish_id, "price_at_order": 7.5}],
+                )
+                stored = await api.orders.get(order_id)
+                dishes = (await api.pipeline.send("GET", base, (200,))).json()
+            finally:
+                await api.orders.delete(order_id)
+                await api.dishes.delete(dish_id)
+                await categories.delete(category_id)
+
+        expected = sum(d["price_at_order"] for d in dishes)
+        assert expected == pytest.approx(7.5)
+        assert added.json()["total"] == pytest.approx(expected)
+        assert stored["total"] == pytest.approx(expected)
+
+    @pytest.mark.asyncio
+    async def test_dish_of_another_order_is_not_found(self, server_url: str):
+        """Test that a dish can only be changed through its own order."""
+        async with AmbrosiaApi.connect(server_url) as api:
+            response = await api.pipeline.send(
+                "DELETE", "/orders/not-an-order/dishes/not-a-dish", None
+            )
+
+        assert response.status_code == 404
+
+
+class TestOrderTotalBenchmark:
+    """Tests for the incremental versus recalculated totals benchmark."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_incremental_totals_halve_the_round_trips(self, server_url: str):
+        """Test a 20-item order built with both flows."""
+        report = await run_order_total_benchmark(server_url, items=20, orders=1)
+        logger.info(f"Order totals:\n{report.format_table()}")
+
+        assert report.consistent
+        assert [s.flow for s in report.flows] == list(FLOWS)
+        incremental = report.flow("incremental")
+        recalculate = report.flow("recalculate")
+        assert incremental.mutations == recalculate.mutations == 30
+        assert incremental.round_trips == incremental.mutations
+        assert recalculate.round_trips == 2 * recalculate.mutations + 1
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_order_totals_benchmark(self, server_url: str):
+        """Test latency of both flows over several 20-item orders."""
+        report = await run_order_total_benchmark(server_url, items=20, orders=20)
+        logger.info(f"Order totals:\n{report.format_table()}")
+
+        assert report.consistent
+        assert (
+            report.flow("incremental").order_seconds.mean
+            < report.flow("recalculate").order_seconds.mean
+        )
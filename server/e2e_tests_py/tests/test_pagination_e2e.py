@@ -0,0 +1,132 @@
+"""End-to-end tests for paginated and streamed list endpoints.
+
+These tests page through ``/orders``, ``/tickets`` and ``/payments`` with
+``limit``/``cursor``, stream the unpaginated ``/orders`` array item by item,
+and page through wallet incoming payments with ``limit``/``offset``.
+"""
+
+import json
+
+import pytest
+
+from ambrosia.auth_utils import login_user
+from ambrosia.fake_phoenixd import FakePhoenixd
+from ambrosia.http_client import AmbrosiaHttpClient, JsonArrayStreamParser
+
+
+async def _create_orders(client: AmbrosiaHttpClient, count: int) -> list[str]:
+    login = await login_user(client)
+    user_id = login.json()["user"]["user_id"]
+    ids = []
+    for i in range(count):
+        response = await client.post(
+            "/orders",
+            json={
+                "user_id": user_id,
+                "waiter": "Pagination",
+                "status": "open",
+                "total": float(i),
+                "created_at": "",
+            },
+        )
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["id"])
+    return ids
+
+
+class TestJsonArrayStreamParser:
+    """Tests for the incremental JSON array parser."""
+
+    def test_items_split_across_chunks(self):
+        """Test that items split at any byte (including UTF-8) are parsed whole."""
+        items = [{"name": "Café ☕", "tags": [1, 2.5]}, 12345, "a,]", None]
+        body = json.dumps(items, ensure_ascii=False).encode()
+        parser = JsonArrayStreamParser()
+
+        parsed = []
+        for i in range(len(body)):
+            parsed += parser.feed(body[i : i + 1])
+        parsed += parser.feed(b"", final=True)
+
+        assert parsed == items
+
+    @pytest.mark.parametrize(
+        "body", [b"[1 2]", b'[{"a": 1}{"b": 2}]', b"[,1]", b"[1,,2]", b"[1,]"]
+    )
+    def test_malformed_separators_are_rejected(self, body: bytes):
+        """Test that missing, leading, doubled and trailing commas raise."""
+        parser = JsonArrayStreamParser()
+
+        with pytest.raises(ValueError):
+            for i in range(len(body)):
+                parser.feed(body[i : i + 1])
+            parser.feed(b"", final=True)
+
+
+class TestPagination:
+    """Tests for limit/cursor pagination and streamed lists."""
+
+    @pytest.mark.asyncio
+    async def test_orders_pages_cover_every_order_once(self, server_url: str):
+        """Test that cursor pages return every order exactly once, in id order."""
+        async with AmbrosiaHttpClient(server_url) as client:
+            created = await _create_orders(client, 7)
+
+            pages = [page async for page in client.paginate("/orders", page_size=3)]
+            everything = (await client.get("/orders")).json()
+
+        ids = [order["id"] for page in pages for order in page]
+        assert all(len(page) <= 3 for page in pages)
+        assert ids == sorted(ids)
+        assert len(ids) == len(set(ids)) == len(everything)
+        assert set(created) <= set(ids)
+
+    @pytest.mark.asyncio
+    async def test_streamed_orders_match_buffered_orders(self, server_url: str):
+        """Test that streaming /orders yields the same items as a buffered GET."""
+        async with AmbrosiaHttpClient(server_url) as client:
+            await _create_orders(client, 3)
+            streamed = [order async for order in client.stream_json_array("/orders")]
+            buffered = (await client.get("/orders")).json()
+
+        assert streamed == buffered
+
+    @pytest.mark.asyncio
+    async def test_tickets_and_payments_accept_pagination(self, server_url: str):
+        """Test that /tickets and /payments page without errors."""
+        async with AmbrosiaHttpClient(server_url) as client:
+            await login_user(client)
+            for url in ("/tickets", "/payments"):
+                pages = [page async for page in client.paginate(url, page_size=2)]
+                assert all(len(page) <= 2 for page in pages)
+
+    @pytest.mark.asyncio
+    async def test_invalid_limit_is_rejected(self, server_url: str):
+        """Test that a non-positive limit is answered with 400."""
+        async with AmbrosiaHttpClient(server_url) as client:
+            await login_user(client)
+            response = await client.get("/orders", params={"limit": 0})
+
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_wallet_incoming_payments_by_offset(
+        self, server_url: str, fake_phoenixd: FakePhoenixd
+    ):
+        """Test that offset pages cover every incoming payment of the node."""
+        for i in range(5):
+            fake_phoenixd.create_invoice(f"Offset page {i}", amount_sat=100 + i)
+
+        async with AmbrosiaHttpClient(server_url) as client:
+            await login_user(client)
+            auth = await client.post("/wallet/auth", json={"password": "password123"})
+            assert auth.status_code == 200, auth.text
+            pages = [
+                page
+                async for page in client.paginate_offset(
+                    "/wallet/payments/incoming", page_size=2, params={"all": "true"}
+                )
+            ]
+
+        hashes = [payment["paymentHash"] for page in pages for payment in page]
+        assert len(hashes) == len(set(hashes)) == len(fake_phoenixd.incoming)
@@ -0,0 +1,44 @@
+"""End-to-end tests for the permission-check benchmark and cached authorization.
+
+The benchmark launches its own isolated jar servers, one per mode.
+"""
+
+import logging
+
+import pytest
+
+from ambrosia.permission_bench import check_revocation, run_permission_benchmark
+
+logger = logging.getLogger(__name__)
+
+
+class TestRevocation:
+    """Tests for ambrosia.permission_bench.check_revocation."""
+
+    @pytest.mark.asyncio
+    async def test_revocations_take_effect_immediately(self, server_url: str):
+        """Test that permission changes apply to the next request."""
+        result = await check_revocation(server_url)
+        for step in result.steps:
+            logger.info(f"{step.name}: {step.status_code}")
+
+        assert len(result.steps) == 7
+        assert result.immediate, [s for s in result.steps if not s.ok]
+
+
+class TestPermissionBenchmark:
+    """Tests for the cached vs. uncached comparison."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.slow
+    def test_cached_mode_keeps_revocations_immediate(self):
+        """Test both modes under load and their revocation checks."""
+        report = run_permission_benchmark(virtual_users=8, duration=3.0)
+        logger.info(f"Permission benchmark:\n{report.format_table()}")
+
+        assert [result.mode for result in report.modes] == ["uncached", "cached"]
+        for result in report.modes:
+            assert result.report.total.count > 0
+            assert result.report.total.errors == 0
+        assert report.speedup is not None
+        assert report.revocations_immediate
@@ -0,0 +1,104 @@
+"""End-to-end tests for the print pipeline benchmark and virtual printers.
+
+Benchmarks run against a server started with ``--virtual-printers`` (see the
+``print_server_url`` fixture), so printer types can point at ``VirtualPrinter``
+TCP sinks.
+"""
+
+import asyncio
+import logging
+
+import pytest
+
+from ambrosia.print_bench import (
+    PRINTER_TYPES,
+    VirtualPrinter,
+    parse_escpos,
+    run_print_benchmark,
+)
+
+logger = logging.getLogger(__name__)
+
+# Style, text and line feed as EscPos.writeLF writes them, then feed and cut
+STYLE = b"\x1b!\x00\x1bM\x00\x1bE\x01\x1b-\x00\x1d!\x00\x1dB\x00\x1ba\x00\x1b2"
+TICKET = STYLE + b"Ticket 42\n" + STYLE + b"2x Paella      12.5\n" + b"\x1bd\x05\x1dV0"
+
+
+class TestEscPosParser:
+    """Tests for ambrosia.print_bench.parse_escpos."""
+
+    def test_ticket_is_decoded(self):
+        """Test that text lines, commands and the final cut are recognized."""
+        document = parse_escpos(TICKET)
+
+        assert document.lines == ["Ticket 42", "2x Paella      12.5"]
+        assert document.commands[-1] == b"\x1dV0"
+        assert document.cut
+        assert document.valid
+
+    def test_unknown_command_is_invalid(self):
+        """Test that an unknown escape sequence is reported."""
+        document = parse_escpos(b"\x1b\x7fTicket 42\n\x1dV0")
+
+        assert document.unknown == [0]
+        assert not document.valid
+
+    def test_cut_must_be_last(self):
+        """Test that text after the cut makes the job invalid."""
+        document = parse_escpos(TICKET + b"late line\n")
+
+        assert not document.cut
+        assert not document.valid
+
+
+class TestVirtualPrinter:
+    """Tests for ambrosia.print_bench.VirtualPrinter."""
+
+    @pytest.mark.asyncio
+    async def test_job_is_recorded_and_connection_closed(self):
+        """Test that a job ends with the printer closing the connection."""
+        async with VirtualPrinter("kitchen") as printer:
+            host, port = printer.url.removeprefix("tcp://").split(":")
+            reader, writer = await asyncio.open_connection(host, int(port))
+            writer.write(TICKET)
+            writer.write_eof()
+            assert await reader.read() == b""
+            writer.close()
+
+            assert await printer.wait_for_jobs(1, timeout=5)
+
+        assert printer.jobs[0].data == TICKET
+        assert printer.jobs[0].last_byte_at >= printer.jobs[0].connected_at
+
+
+class TestPrintBenchmark:
+    """Tests for concurrent print jobs against the test server."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_every_job_is_printed_and_valid(self, print_server_url: str):
+        """Test that each printer receives exactly its jobs as valid ESC/POS."""
+        report = await run_print_benchmark(
+            print_server_url, jobs_per_printer=5, concurrency=4
+        )
+        logger.info(f"Print benchmark:\n{report.format_table()}")
+
+        assert report.all_valid
+        stats = report.printer_stats()
+        assert [s.printer_type for s in stats] == list(PRINTER_TYPES)
+        for s in stats:
+            assert s.printed == 5
+            assert s.bytes > 0
+            assert s.render > 0
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_rush_of_print_jobs(self, print_server_url: str):
+        """Test a dinner-rush burst of tickets to all three printers."""
+        report = await run_print_benchmark(
+            print_server_url, jobs_per_printer=100, concurrency=16, items=20
+        )
+        logger.info(f"Print benchmark (rush):\n{report.format_table()}")
+
+        assert report.all_valid
@@ -0,0 +1,85 @@
+"""End-to-end tests for the per-printer print job queues.
+
+Bursts run against a server started with ``--virtual-printers`` (see the
+``print_server_url`` fixture); the kitchen printer is a slow ``VirtualPrinter``
+so queued jobs pile up behind it.
+"""
+
+import logging
+
+import pytest
+
+from ambrosia.auth_utils import DEFAULT_TEST_USER, AuthSessionCache
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.print_bench import PRINTER_TYPES
+from ambrosia.print_queue_bench import SLOW_PRINTER, run_print_queue_benchmark
+
+logger = logging.getLogger(__name__)
+
+
+class TestPrintJobs:
+    """Tests for ``GET /printers/jobs/{id}``."""
+
+    @pytest.mark.asyncio
+    async def test_unknown_job_is_not_found(
+        self, server_url: str, auth_sessions: AuthSessionCache
+    ):
+        """Test that an unknown job id answers 404."""
+        async with AmbrosiaHttpClient(server_url) as client:
+            await auth_sessions.authenticate(client, DEFAULT_TEST_USER)
+            response = await client.get("/printers/jobs/not-a-job")
+
+        assert response.status_code == 404
+
+
+class TestPrintQueue:
+    """Tests for bursts of print jobs against the test server."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_jobs_are_queued_and_printed_in_order(self, print_server_url: str):
+        """Test that the API answers before printing and keeps per-printer order."""
+        # Long enough that the whole burst is answered before the slow printer
+        # reads its first ticket
+        read_delay = 0.5
+        report = await run_print_queue_benchmark(
+            print_server_url, jobs_per_printer=5, read_delay=read_delay
+        )
+        logger.info(f"Print queue:\n{report.format_table()}")
+
+        assert report.all_done
+        assert report.in_order
+        stats = {s.printer_type: s for s in report.printer_stats()}
+        assert list(stats) == list(PRINTER_TYPES)
+        slow = stats[SLOW_PRINTER]
+        # Every submission was answered with a pending job while the slow
+        # printer had not received any ticket, so none waited for the printer
+        for job in report.jobs:
+            if job.printer_type == SLOW_PRINTER:
+                assert job.status_code == 202
+                assert job.accepted_status in ("QUEUED", "PRINTING")
+                assert job.printed_before_response == 0
+        assert slow.queue_wait.percentile(99) > 0
+        for printer_type, s in stats.items():
+            if printer_type != SLOW_PRINTER:
+                assert s.print_seconds < slow.print_seconds
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_queue_against_blocking_prints(self, print_server_url: str):
+        """Test a rush burst queued, compared with waiting for each ticket."""
+        queued = await run_print_queue_benchmark(print_server_url, jobs_per_printer=50)
+        blocking = await run_print_queue_benchmark(
+            print_server_url, jobs_per_printer=50, wait=True
+        )
+        logger.info(f"Print queue (queued):\n{queued.format_table()}")
+        logger.info(f"Print queue (wait=true):\n{blocking.format_table()}")
+
+        assert queued.all_done and queued.in_order
+        assert blocking.all_done and blocking.in_order
+        slow_queued, slow_blocking = (
+            next(s for s in r.printer_stats() if s.printer_type == SLOW_PRINTER)
+            for r in (queued, blocking)
+        )
+        assert slow_queued.submit_seconds < slow_blocking.submit_seconds
@@ -0,0 +1,48 @@
+"""End-to-end tests for the server resource sampler."""
+
+import asyncio
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.resource_monitor import ResourceMonitor
+from ambrosia.test_server import AmbrosiaTestServer
+
+
+class TestResourceMonitor:
+    """Tests for ambrosia.resource_monitor against the running server."""
+
+    @pytest.mark.asyncio
+    async def test_timeline_with_labelled_window(
+        self, server_url: str, test_server: AmbrosiaTestServer, tmp_path: Path
+    ):
+        """Test that samples are labelled and saved as CSV and JSON."""
+        assert test_server.server_process is not None
+        with ResourceMonitor(test_server.server_process.pid, interval=0.05) as monitor:
+            monitor.begin("burst")
+            async with AmbrosiaHttpClient(server_url) as client:
+                await asyncio.gather(*(client.get("/") for _ in range(20)))
+            await asyncio.sleep(0.2)
+            monitor.end("burst")
+
+        samples = monitor.samples
+        assert len(samples) >= 3
+        assert all(s.rss > 0 and s.threads > 0 for s in samples)
+        assert any(s.label == "burst" for s in samples)
+        assert [e.kind for e in monitor.events] == ["begin", "end"]
+        (growth,) = monitor.window_growth()
+        assert growth.label == "burst"
+        assert growth.cpu_seconds >= 0
+
+        csv_path = monitor.save(tmp_path / "timeline.csv")
+        with csv_path.open() as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == len(samples)
+        assert (tmp_path / "timeline.events.csv").exists()
+
+        data = json.loads(monitor.save(tmp_path / "timeline.json").read_text())
+        assert data["windows"][0]["label"] == "burst"
+        assert len(data["samples"]) == len(samples)
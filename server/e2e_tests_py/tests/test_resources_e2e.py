@@ -0,0 +1,85 @@
+"""End-to-end tests for the typed CRUD helpers and their request pipeline."""
+
+import asyncio
+import logging
+import time
+import uuid
+
+import pytest
+
+from ambrosia.resources import AmbrosiaApi, ApiError
+
+logger = logging.getLogger(__name__)
+
+
+class TestResources:
+    """Tests for ambrosia.resources against the running server."""
+
+    @pytest.mark.asyncio
+    async def test_bulk_menu_setup(self, server_url: str):
+        """Test creating, updating and deleting a menu with bounded concurrency."""
+        prefix = f"bulk-{uuid.uuid4().hex[:8]}"
+        async with AmbrosiaApi.connect(server_url, concurrency=8) as api:
+            categories = api.categories("dish")
+            category_id = await categories.create({"name": prefix})
+
+            start = time.perf_counter()
+            dish_ids = await api.dishes.create_many(
+                {"name": f"{prefix}-{i}", "price": 5.0 + i, "category_id": category_id}
+                for i in range(50)
+            )
+            logger.info(
+                f"Created {len(dish_ids)} dishes in {time.perf_counter() - start:.2f}s"
+            )
+            assert len(set(dish_ids)) == 50
+
+            # Ids come back in input order
+            first, last = await asyncio.gather(
+                api.dishes.get(dish_ids[0]), api.dishes.get(dish_ids[-1])
+            )
+            assert first["name"] == f"{prefix}-0"
+            assert last["name"] == f"{prefix}-49"
+
+            await api.dishes.update_many(
+                {
+                    dish_id: {
+                        "name": f"{prefix}-renamed",
+                        "price": 1.0,
+                        "category_id": category_id,
+                    }
+                    for dish_id in dish_ids[:10]
+                }
+            )
+            listed = await api.dishes.all()
+            renamed = [d for d in listed if d["name"] == f"{prefix}-renamed"]
+            assert len(renamed) == 10
+
+            await api.dishes.delete_many(dish_ids)
+            await categories.delete(category_id)
+            remaining = {d["id"] for d in await api.dishes.all()}
+            assert remaining.isdisjoint(dish_ids)
+            assert api.pipeline.stats.failures == 0
+
+    @pytest.mark.asyncio
+    async def test_spaces_and_tables(self, server_url: str):
+        """Test that tables created concurrently belong to their space."""
+        prefix = f"bulk-{uuid.uuid4().hex[:8]}"
+        async with AmbrosiaApi.connect(server_url, concurrency=4) as api:
+            space_id = await api.spaces.create({"name": prefix})
+            table_ids = await api.tables.create_many(
+                {"name": f"{prefix}-{i}", "space_id": space_id} for i in range(8)
+            )
+            tables = await asyncio.gather(*(api.tables.get(t) for t in table_ids))
+            assert {t["space_id"] for t in tables} == {space_id}
+
+            await api.tables.delete_many(table_ids)
+            await api.spaces.delete(space_id)
+
+    @pytest.mark.asyncio
+    async def test_unexpected_status_raises_api_error(self, server_url: str):
+        """Test that a missing item raises ApiError with the final status."""
+        async with AmbrosiaApi.connect(server_url) as api:
+            with pytest.raises(ApiError) as error:
+                await api.dishes.get(str(uuid.uuid4()))
+            assert error.value.status_code == 404
+            assert error.value.method == "GET"
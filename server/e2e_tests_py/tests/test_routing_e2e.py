@@ -19,9 +19,9 @@ class TestRoutingE2E:
     """End-to-end routing tests that replicate RoutingE2ETest.kt functionality."""
 
     @pytest.mark.asyncio
-    async def test_root_endpoint(self, server_url: str):
+    async def test_root_endpoint(self, server_url: str, connection_pool):
         """Test the root endpoint, equivalent to testRootEndpoint() in RoutingE2ETest."""
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             response = await client.get("/")
 
             # Assert status code matches Kotlin test
@@ -38,9 +38,9 @@ class TestRoutingE2E:
             )
 
     @pytest.mark.asyncio
-    async def test_base_currency_endpoint(self, server_url: str):
+    async def test_base_currency_endpoint(self, server_url: str, connection_pool):
         """Test the base currency endpoint, equivalent to testBaseCurrencyEndpoint() in RoutingE2ETest."""
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             response = await client.get("/base-currency")
 
             # This might fail due to database dependency, same as Kotlin test
@@ -54,18 +54,18 @@ class TestRoutingE2E:
                 assert_response_contains(response, "currency_id")
 
     @pytest.mark.asyncio
-    async def test_non_existent_endpoint(self, server_url: str):
+    async def test_non_existent_endpoint(self, server_url: str, connection_pool):
         """Test non-existent endpoint, equivalent to testNonExistentEndpoint() in RoutingE2ETest."""
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             response = await client.get("/non-existent")
 
             # Assert 404 status code matches Kotlin test
             assert_status_code(response, 404)
 
     @pytest.mark.asyncio
-    async def test_base_currency_performance(self, server_url: str):
+    async def test_base_currency_performance(self, server_url: str, connection_pool):
         """Test base currency endpoint performance, equivalent to testBaseCurrencyPerformance() in RoutingE2ETest."""
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             start_time = time.time()
             await client.get("/base-currency")
             end_time = time.time()
@@ -75,9 +75,9 @@ class TestRoutingE2E:
             assert request_time < 1000, f"Request took too long: {request_time:.2f}ms"
 
     @pytest.mark.asyncio
-    async def test_cors_headers(self, server_url: str):
+    async def test_cors_headers(self, server_url: str, connection_pool):
         """Test that CORS headers are properly set."""
-        async with AmbrosiaHttpClient(server_url) as client:
+        async with AmbrosiaHttpClient(server_url, pool=connection_pool) as client:
             # Make a request with CORS headers
             headers = {
                 "Origin": "http://localhost:3000",
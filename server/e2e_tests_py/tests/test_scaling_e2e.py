@@ -0,0 +1,68 @@
+"""End-to-end tests for the data-size scaling benchmark.
+
+The benchmark test runs at small sizes by default; set
+``AMBROSIA_SCALING_SIZES`` (e.g. ``1000,10000,100000,1000000``) or use
+``make bench-scaling`` for the full 1k to 1M sweep.
+"""
+
+import logging
+import os
+
+import pytest
+
+from ambrosia.scaling import (
+    DEFAULT_SIZES,
+    fit_growth,
+    run_scaling_benchmark,
+    scaling_endpoints,
+    scaling_profile,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _benchmark_sizes() -> tuple[int, ...]:
+    sizes = os.environ.get("AMBROSIA_SCALING_SIZES")
+    if not sizes:
+        return (1_000, 4_000)
+    return tuple(int(size) for size in sizes.split(","))
+
+
+class TestGrowthFit:
+    """Tests for the power-law growth fit."""
+
+    def test_classifies_growth_shapes(self):
+        """Test that constant, linear and quadratic series are told apart."""
+        sizes = list(DEFAULT_SIZES)
+
+        constant = fit_growth(sizes, [0.004 for _ in sizes])
+        linear = fit_growth(sizes, [2e-6 * size + 0.001 for size in sizes])
+        quadratic = fit_growth(sizes, [1e-10 * size**2 for size in sizes])
+
+        assert constant.shape == "constant"
+        assert linear.shape == "linear"
+        assert linear.tail_exponent == pytest.approx(1.0, abs=0.05)
+        assert quadratic.shape == "super-linear"
+        assert quadratic.exponent == pytest.approx(2.0)
+
+
+class TestScalingBenchmark:
+    """Tests for ambrosia.scaling against seeded servers."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.slow
+    def test_reporting_endpoints_are_measured_at_every_size(self):
+        """Test that every endpoint gets a point per size and a growth fit."""
+        sizes = _benchmark_sizes()
+
+        report = run_scaling_benchmark(sizes=sizes, repeats=3, warmup=1)
+        logger.info(f"Scaling benchmark:\n{report.format_table()}")
+
+        routes = set(scaling_endpoints(scaling_profile(sizes[0])))
+        assert {(p.route, p.size) for p in report.points} == {
+            (route, size) for route in routes for size in sizes
+        }
+        assert set(report.fits) == routes
+        for point in report.points:
+            assert set(point.status_codes) <= {200, 204}, point
+            assert point.rss > 0
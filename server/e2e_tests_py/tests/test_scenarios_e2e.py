@@ -0,0 +1,43 @@
+"""End-to-end tests for the restaurant workload scenarios.
+
+These tests run a short, compressed "Friday night" workload against the live
+server to validate that every scripted step works and is reported separately.
+"""
+
+import logging
+
+import pytest
+
+from ambrosia.scenarios import friday_night_workload, prepare_restaurant
+
+logger = logging.getLogger(__name__)
+
+
+class TestRestaurantScenarios:
+    """Tests for ambrosia.scenarios against the running server."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_friday_night_workload_runs_every_step(self, server_url: str):
+        """Test that waiter and manager journeys complete with per-step stats."""
+        restaurant = await prepare_restaurant(server_url, dish_count=5)
+        # No think time so the short run still completes several journeys
+        workload = friday_night_workload(restaurant, think=(0.0, 0.0), seed=42)
+
+        report = await workload.run(server_url, virtual_users=4, duration=3.0)
+        logger.info(f"Scenario report:\n{report.format_table()}")
+
+        assert report.total.errors == 0, report.total.status_codes
+        assert workload.completed["waiter"] > 0, workload.aborted
+        for step_name in (
+            "login",
+            "open_order",
+            "add_dishes_1",
+            "calculate_total",
+            "create_ticket",
+            "create_payment",
+            "link_payment",
+        ):
+            assert f"waiter/{step_name}" in report.routes, (
+                f"Missing latency breakdown for waiter/{step_name}"
+            )
@@ -0,0 +1,71 @@
+"""End-to-end tests for Server-Timing headers and the /metrics endpoint.
+
+These tests run against a server started with ``--server-timing`` (see the
+``timing_server_url`` fixture), so every response carries the server's
+per-phase durations and ``/metrics`` serves per-route histograms.
+"""
+
+import pytest
+
+from ambrosia.auth_utils import login_user
+from ambrosia.http_client import AmbrosiaHttpClient, parse_server_timing, server_timing
+from ambrosia.load import LoadRecorder, timed_request
+
+
+class TestParseServerTiming:
+    """Tests for the Server-Timing header parser."""
+
+    def test_durations_in_seconds(self):
+        """Test that dur values are converted to seconds and others ignored."""
+        phases = parse_server_timing(
+            ['auth;dur=0.5, db;desc="sqlite";dur=2, cache', "db;dur=1, total;dur=4.25"]
+        )
+        assert phases == pytest.approx({"auth": 0.0005, "db": 0.003, "total": 0.00425})
+
+
+class TestServerTiming:
+    """Tests for server-side phase timings."""
+
+    @pytest.mark.asyncio
+    async def test_authenticated_request_has_phases(self, timing_server_url: str):
+        """Test that a permission-checked list reports auth, perm and db time."""
+        async with AmbrosiaHttpClient(timing_server_url) as client:
+            await login_user(client)
+            response = await client.get("/orders")
+
+        assert response.status_code in (200, 204)
+        phases = server_timing(response)
+        assert {"auth", "perm", "db", "total"} <= phases.keys(), phases
+        assert phases["total"] >= phases["auth"]
+
+    @pytest.mark.asyncio
+    async def test_load_report_breaks_latency_down(self, timing_server_url: str):
+        """Test that timed requests feed the per-phase breakdown."""
+        recorder = LoadRecorder()
+        async with AmbrosiaHttpClient(timing_server_url) as client:
+            await login_user(client)
+            for _ in range(5):
+                await timed_request(client, recorder, "GET", "/orders")
+
+        report = recorder.build_report(1.0)
+        stats = report.routes["GET /orders"]
+        assert stats.server_timing["total"] > 0
+        assert "GET /orders" in report.format_phases()
+
+    @pytest.mark.asyncio
+    async def test_metrics_histograms(self, timing_server_url: str):
+        """Test that /metrics exposes per-route histograms and phase sums."""
+        async with AmbrosiaHttpClient(timing_server_url) as client:
+            await login_user(client)
+            await client.get("/orders")
+            response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        route = 'route="GET /orders"'
+        body = response.text
+        assert f"ambrosia_http_request_duration_seconds_count{{{route}}}" in body
+        assert (
+            f'ambrosia_http_request_duration_seconds_bucket{{{route},le="+Inf"}}'
+            in body
+        )
+        assert f'ambrosia_http_phase_seconds_sum{{{route},phase="db"}}' in body
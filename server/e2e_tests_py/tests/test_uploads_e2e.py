@@ -0,0 +1,109 @@
+"""End-to-end tests for streamed uploads and the upload benchmark."""
+
+import logging
+from pathlib import Path
+
+import pytest
+
+from ambrosia.auth_utils import login_user
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.test_server import AmbrosiaTestServer
+from ambrosia.uploads_bench import (
+    check_incremental_write,
+    generate_upload_files,
+    run_upload_benchmark,
+    server_uploads_path,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TestStreamedUpload:
+    """Tests for AmbrosiaHttpClient.upload against POST /uploads."""
+
+    @pytest.mark.asyncio
+    async def test_upload_multiple_files_round_trip(
+        self, server_url: str, tmp_path: Path
+    ):
+        """Test that every part is stored and served back unchanged."""
+        files = generate_upload_files(
+            tmp_path, count=3, sizes=[1, 100_000, 300_000], seed=3
+        )
+        async with AmbrosiaHttpClient(server_url) as client:
+            await login_user(client)
+            response = await client.upload("/uploads", files, chunk_size=8192)
+            assert response.status_code == 201
+            uploads = response.json()["uploads"]
+            assert len(uploads) == len(files)
+
+            for path, upload in zip(files, uploads, strict=True):
+                assert upload["path"].startswith("/uploads/")
+                assert upload["path"].endswith(".bin")
+                stored = await client.get(upload["path"])
+                assert stored.status_code == 200
+                assert stored.content == path.read_bytes()
+
+    @pytest.mark.asyncio
+    async def test_upload_requires_authentication(
+        self, server_url: str, tmp_path: Path
+    ):
+        """Test that uploads are rejected without a session once configured."""
+        files = generate_upload_files(tmp_path, count=1, sizes=[1024], seed=4)
+        async with AmbrosiaHttpClient(server_url) as client:
+            response = await client.upload("/uploads", files)
+            assert response.status_code == 401
+
+
+class TestUploadBenchmark:
+    """Tests for ambrosia.uploads_bench against the running server."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_concurrent_uploads(
+        self, server_url: str, test_server: AmbrosiaTestServer, tmp_path: Path
+    ):
+        """Test that concurrent uploads of mixed sizes all succeed."""
+        assert test_server.server_process is not None
+        files = generate_upload_files(
+            tmp_path, count=12, sizes=[16 * 1024, 256 * 1024, 1024 * 1024], seed=5
+        )
+        report = await run_upload_benchmark(
+            server_url,
+            files,
+            concurrency=4,
+            server_pid=test_server.server_process.pid,
+        )
+        logger.info(f"Upload benchmark: {report.format_summary()}")
+
+        assert report.succeeded == len(files)
+        assert report.mb_per_second > 0
+        assert report.p99 >= report.p50 > 0
+        assert report.rss_growth is not None
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_incremental_write_check(
+        self, server_url: str, test_server: AmbrosiaTestServer, tmp_path: Path
+    ):
+        """Test that a throttled large upload succeeds and report its disk writes.
+
+        Whether the server streams the part to disk is reported, not asserted.
+        """
+        assert test_server.server_process is not None
+        [path] = generate_upload_files(tmp_path, count=1, sizes=[24 * 2**20], seed=6)
+        result = await check_incremental_write(
+            server_url,
+            path,
+            server_uploads_path(test_server.home_dir),
+            rate=8 * 2**20,
+            server_pid=test_server.server_process.pid,
+        )
+        logger.info(
+            f"Written while receiving: {result.incremental}, "
+            f"partial sizes: {sorted(set(result.partial_sizes))}, "
+            f"RSS growth: {result.rss_growth}"
+        )
+
+        assert result.status_code == 201
+        assert all(size <= result.size for size in result.partial_sizes)
@@ -0,0 +1,69 @@
+"""End-to-end tests for wallet routes backed by the fake phoenixd.
+
+These tests point the server at ``ambrosia.fake_phoenixd`` to exercise the
+``PhoenixService`` calls, injected upstream latency and errors, and the
+signed payment webhook round trip.
+"""
+
+import time
+
+import pytest
+
+from ambrosia.auth_utils import login_user
+from ambrosia.fake_phoenixd import FakePhoenixd
+from ambrosia.http_client import AmbrosiaHttpClient
+
+
+class TestWalletWithFakePhoenixd:
+    """Tests for /wallet/* routes against ambrosia.fake_phoenixd."""
+
+    @pytest.mark.asyncio
+    async def test_create_invoice_reaches_phoenixd(
+        self, server_url: str, fake_phoenixd: FakePhoenixd
+    ):
+        """Test that POST /wallet/createinvoice returns the node's invoice."""
+        async with AmbrosiaHttpClient(server_url) as client:
+            await login_user(client)
+            response = await client.post(
+                "/wallet/createinvoice",
+                json={"description": "Table 4", "amountSat": 2500},
+            )
+
+        assert response.status_code == 200, response.text
+        invoice = response.json()
+        assert invoice["amountSat"] == 2500
+        assert invoice["paymentHash"] in fake_phoenixd.incoming
+
+    @pytest.mark.asyncio
+    async def test_injected_latency_and_errors(
+        self, server_url: str, fake_phoenixd: FakePhoenixd
+    ):
+        """Test that upstream latency and errors surface through the server."""
+        request = {"description": "Slow node", "amountSat": 100}
+        async with AmbrosiaHttpClient(server_url) as client:
+            await login_user(client)
+
+            with fake_phoenixd.faults(latency=0.3, routes=["createinvoice"]):
+                start = time.perf_counter()
+                slow = await client.post("/wallet/createinvoice", json=request)
+                elapsed = time.perf_counter() - start
+            assert slow.status_code == 200
+            assert elapsed >= 0.3
+
+            with fake_phoenixd.faults(error_rate=1.0, routes=["createinvoice"]):
+                failed = await client.post("/wallet/createinvoice", json=request)
+            assert failed.status_code == 503
+            assert fake_phoenixd.injected_errors["createinvoice"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_settled_invoice_sends_signed_webhook(
+        self, server_url: str, fake_phoenixd: FakePhoenixd
+    ):
+        """Test that settling an invoice delivers an accepted signed webhook."""
+        invoice = fake_phoenixd.create_invoice("Webhook test", amount_sat=1500)
+
+        response = await fake_phoenixd.settle_invoice(invoice["paymentHash"])
+
+        assert response.status_code == 202
+        assert fake_phoenixd.incoming[invoice["paymentHash"]]["isPaid"] is True
+        assert fake_phoenixd.incoming[invoice["paymentHash"]]["receivedSat"] == 1500
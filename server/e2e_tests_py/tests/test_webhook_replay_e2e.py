@@ -0,0 +1,65 @@
+"""End-to-end tests for the signed webhook replay harness.
+
+These tests replay short mixed bursts against ``/webhook/phoenixd`` and check
+that every path (valid, invalid signature, missing signature, malformed
+payload) is answered with its expected status.
+"""
+
+import logging
+from pathlib import Path
+
+import pytest
+
+from ambrosia.test_server import AmbrosiaTestServer
+from ambrosia.webhook_replay import (
+    load_recorded_events,
+    replay_webhooks,
+    save_recorded_events,
+    synthetic_burst,
+)
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_SECRET = AmbrosiaTestServer.PHOENIXD_WEBHOOK_SECRET
+
+
+class TestWebhookReplay:
+    """Tests for ambrosia.webhook_replay against the running server."""
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_mixed_burst_gets_expected_statuses(self, server_url: str):
+        """Test that each webhook kind is answered with its expected status."""
+        events = synthetic_burst(
+            100, invalid_ratio=0.1, missing_ratio=0.1, malformed_ratio=0.1, seed=7
+        )
+
+        result = await replay_webhooks(server_url, events, WEBHOOK_SECRET, rate=100)
+        logger.info(f"Webhook replay:\n{result.format_summary()}")
+
+        assert result.sent == 100
+        assert result.unexpected == 0, result.report.total.status_codes
+        valid = sum(1 for e in events if e.kind == "valid")
+        assert result.accepted == valid
+        assert set(result.report.routes) == {f"webhook/{e.kind}" for e in events}
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_recorded_burst_replays_with_offsets(
+        self, server_url: str, tmp_path: Path
+    ):
+        """Test that a recorded burst round-trips and replays at its offsets."""
+        events = synthetic_burst(20, invalid_ratio=0.2, seed=1)
+        for i, event in enumerate(events):
+            event.offset = i * 0.05
+        path = tmp_path / "burst.jsonl"
+        save_recorded_events(path, events)
+
+        recorded = load_recorded_events(path)
+        result = await replay_webhooks(
+            server_url, recorded, WEBHOOK_SECRET, speedup=2.0
+        )
+
+        assert len(recorded) == 20
+        assert result.unexpected == 0, result.report.total.status_codes
+        assert result.report.duration >= 19 * 0.05 / 2.0
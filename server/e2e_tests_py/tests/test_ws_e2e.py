@@ -0,0 +1,69 @@
+"""End-to-end tests for the /ws/payments WebSocket and its fan-out benchmark.
+
+These tests open authenticated WebSocket sessions, fire signed Phoenix
+webhooks and check that every session receives every notification.
+"""
+
+import logging
+
+import pytest
+
+from ambrosia.auth_utils import (
+    AuthSessionCache,
+    get_tokens_from_response,
+    login_user,
+)
+from ambrosia.http_client import AmbrosiaHttpClient
+from ambrosia.test_server import AmbrosiaTestServer
+from ambrosia.webhook_utils import build_payment_received_payload, post_webhook
+from ambrosia.ws import PaymentsWebSocket, run_fanout_benchmark
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_SECRET = AmbrosiaTestServer.PHOENIXD_WEBHOOK_SECRET
+
+
+class TestPaymentsWebSocket:
+    """Tests for ambrosia.ws against the running server."""
+
+    @pytest.mark.asyncio
+    async def test_signed_webhook_is_pushed_to_subscriber(self, server_url: str):
+        """Test that a signed webhook reaches a connected /ws/payments session."""
+        async with AmbrosiaHttpClient(server_url) as client:
+            login_response = await login_user(client)
+            assert login_response.status_code == 200
+            token, _ = get_tokens_from_response(login_response)
+
+            async with PaymentsWebSocket(server_url, token) as socket:
+                payload = build_payment_received_payload(amount_sat=2100)
+                response = await post_webhook(client, payload, WEBHOOK_SECRET)
+                assert response.status_code == 202
+
+                message = await socket.receive()
+                assert message["type"] == "payment_received"
+                assert message["paymentHash"] == payload["paymentHash"]
+                assert message["amountSat"] == 2100
+
+    @pytest.mark.no_latency_baseline
+    @pytest.mark.asyncio
+    async def test_fanout_benchmark_delivers_to_every_subscriber(
+        self, server_url: str, auth_sessions: AuthSessionCache
+    ):
+        """Test that fast and slow subscribers all receive every webhook."""
+        report = await run_fanout_benchmark(
+            server_url,
+            WEBHOOK_SECRET,
+            subscribers=20,
+            slow_subscribers=2,
+            slow_read_delay=0.05,
+            webhooks=10,
+            webhook_rate=20.0,
+            auth=auth_sessions,
+        )
+        logger.info(f"Fan-out report:\n{report.format_summary()}")
+
+        assert report.webhook_errors == 0
+        assert report.webhooks_sent == 10
+        assert report.missing_deliveries == 0
+        assert report.fast_latency.count == 18 * 10
+        assert report.slow_latency.count == 2 * 10